@@ -429,9 +429,13 @@ wireless_module.set_references(local_recreate_main_page, encoder)
 ble_keyboard_module.set_references(local_recreate_main_page, encoder)
 keyboard_module.set_references(local_recreate_main_page, encoder)
 music_module.set_references(local_recreate_main_page, encoder)
+music_module.set_i2c_bus(i2c)
 radio_module.set_references(local_recreate_main_page, encoder)
+radio_module.set_spi_bus(spi_bus)
 lora_chat_module.set_references(local_recreate_main_page, encoder)
+lora_chat_module.start_link_service()  # Chat fragments are ACKed whatever page is open
 gps_module.set_references(local_recreate_main_page, encoder)
+gps_module.start_service()  # GPS fixes reach the subscribers whatever page is open
 monitor_module.set_references(local_recreate_main_page, encoder)
 power_module.set_references(local_recreate_main_page, encoder)
 microphone_module.set_references(local_recreate_main_page, encoder)
@@ -61,7 +61,7 @@ def check_device_status():
         device_status[device] = 'OFFLINE'
     
     try:
-        from machine import Pin, I2C, SPI, UART
+        from machine import Pin, I2C, SPI
         import os
         
         # I2C总线初始化
@@ -121,12 +121,10 @@ def check_device_status():
         except:
             device_status['SX1262'] = 'OFFLINE'
         
-        # GPS (GNSS MIA-M10Q) - UART1 (TX: 43, RX: 44)
+        # GPS (GNSS MIA-M10Q) - UART1由GPS服务独占，收到过数据即在线
         try:
-            gps_uart = UART(1, baudrate=9600, tx=Pin(43), rx=Pin(44))
-            # 尝试发送测试命令
-            gps_uart.write(b'$PMTK000*32\r\n')
-            device_status['GPS'] = 'ONLINE'
+            import lib.gps as gps_module
+            device_status['GPS'] = 'ONLINE' if gps_module.gps_service.rx_chars else 'OFFLINE'
         except:
             device_status['GPS'] = 'OFFLINE'
         
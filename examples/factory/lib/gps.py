@@ -1,14 +1,23 @@
 import lvgl as lv
 import time
-from machine import UART, Pin
+from machine import Pin, I2C, RTC, Timer
+from gps_service import GPSService
+from ubx import UBXReader
+from gps_time import GPSTime
+from pcf85063 import PCF85063
+from geofence import Geofences, EVENT_ENTER, EVENT_EXIT
+import lib.gps_map as gps_map_module
 
 recreate_main_page = None
 encoder = None
 
 # GPS-related configuration
-GPS_TX = 4
-GPS_RX = 12
 GPS_PPS = 13
+GPS_TIMER_ID = 1  # Hardware timer that polls the GPS on every page (0 drives LVGL)
+GPS_POLL_MS = 100
+GPS_USE_UBX = False  # Switch the receiver to binary UBX NAV-PVT output
+GPS_NAV_RATE_HZ = 5  # Navigation rate in UBX mode
+GEOFENCE_FILE = "/sd/fences.txt"  # Optional, read if the SD card is mounted
 
 # GPS data storage
 gps_data = {
@@ -26,61 +35,72 @@ gps_data = {
 # Performance optimization related variables
 last_gps_update = 0
 last_gps_data_str = ""
-GPS_UPDATE_INTERVAL = 500  # GPS data update interval (ms)
+GPS_UPDATE_INTERVAL = 500  # Display label refresh interval (ms)
 is_scrolling = False  # Scroll state flag
 
-# Initialize UART
-uart = UART(1, baudrate=9600, tx=Pin(GPS_RX), rx=Pin(GPS_TX))
+# The service owns the UART for the whole factory program; pages subscribe
+# instead of reading it, and start_service() keeps it polled on every page
+gps_service = GPSService.create()
+uart = gps_service.uart
 pps = Pin(GPS_PPS, Pin.IN)
+gps_fix = gps_service.fix
+ubx_reader = UBXReader(uart, fix=gps_fix)
+ubx_configured = False
+
+# PPS-disciplined time, keeps the ESP32 RTC and the PCF85063A in step
+gps_time = GPSTime(pps)
+rtc = RTC()
+rtc_chip = PCF85063(I2C(0, scl=Pin(2), sda=Pin(3), freq=400000))
 rx_chars = 0
 last_fix_time = time.ticks_ms()
-buffer = b""
 
-def parse_latlng(v, d):
-    """Parse latitude/longitude string"""
-    if v == "":
-        return None
-    deg = int(v[:2])
-    mins = float(v[2:])
-    sign = -1 if d in ("S", "W") else 1
-    return sign * (deg + mins / 60)
+def on_geofence_event(event, name):
+    if event == EVENT_ENTER:
+        print("Geofence: entered", name)
+    elif event == EVENT_EXIT:
+        print("Geofence: left", name)
+    else:
+        print("Geofence: dwelling in", name)
 
-def parse_nmea(line):
-    """Parse NMEA sentence"""
-    global gps_data, last_fix_time
-    
-    parts = line.split(",")
-    if line.startswith("$GPGGA"):
-        if len(parts[1]) >= 6:
-            hh = int(parts[1][0:2])
-            mm = int(parts[1][2:4])
-            ss = int(parts[1][4:6])
-            gps_data["time"] = (hh, mm, ss)
-        
-        gps_data["lat"] = parse_latlng(parts[2], parts[3])
-        gps_data["lng"] = parse_latlng(parts[4], parts[5])
-        gps_data["sats"] = int(parts[7] or 0)
-        gps_data["hdop"] = float(parts[8] or 0)
-        gps_data["alt"] = float(parts[9] or 0)
-        
-        gps_data["valid"] = gps_data["sats"] >= 3
-        if gps_data["valid"]:
-            last_fix_time = time.ticks_ms()
-    
-    elif line.startswith("$GPRMC"):
-        if parts[2] == "A":
-            gps_data["valid"] = True
-            last_fix_time = time.ticks_ms()
-        
-        if len(parts[9]) == 6:
-            dd = int(parts[9][0:2])
-            mm = int(parts[9][2:4])
-            yy = int(parts[9][4:6]) + 2000
-            gps_data["date"] = (yy, mm, dd)
-        
-        gps_data["lat"] = parse_latlng(parts[3], parts[4])
-        gps_data["lng"] = parse_latlng(parts[5], parts[6])
-        gps_data["speed"] = float(parts[7] or 0) * 1.852
+geofences = Geofences(on_geofence_event)
+geofences_loaded = False
+
+def load_geofences():
+    """Load the fence file once, skipped when there is no SD card"""
+    global geofences_loaded
+    
+    if geofences_loaded:
+        return
+    geofences_loaded = True
+    try:
+        print("Geofence: %d fences loaded" % geofences.load(GEOFENCE_FILE))
+    except OSError:
+        pass
+
+def check_geofences(fix):
+    """Evaluate the current fix against the loaded fences"""
+    if geofences.names and fix.valid and fix.lat is not None:
+        geofences.update(fix.lat, fix.lng, time.time())
+
+def sync_gps_data(fix):
+    """Copy the parser's fix into the gps_data dict used by the page"""
+    global last_fix_time
+    
+    gps_data["lat"] = fix.latitude()
+    gps_data["lng"] = fix.longitude()
+    gps_data["sats"] = fix.sats_used
+    gps_data["hdop"] = fix.hdop / 100
+    gps_data["alt"] = fix.alt / 100
+    gps_data["speed"] = fix.speed * 0.036  # cm/s -> km/h
+    gps_data["date"] = (fix.year, fix.month, fix.day)
+    gps_data["time"] = (fix.hour, fix.minute, fix.second)
+    gps_data["valid"] = fix.valid
+    last_fix_time = fix.fix_ticks
+
+# Consumers of every fix, in the order they run
+gps_service.subscribe(sync_gps_data)
+gps_service.subscribe(check_geofences)
+gps_service.subscribe(gps_time.on_fix_time)
 
 def update_gps_display_labels(data_labels):
     """Update GPS data display labels"""
@@ -118,33 +138,47 @@ def update_gps_display_labels(data_labels):
     data_label9.set_text(str(rx_chars))
     
     # Update other status
-    data_label2.set_text("Active" if gps_data["valid"] else "Inactive")
+    if gps_time.pairs:
+        data_label2.set_text("Locked %+.1f ppm" % gps_time.drift_ppm)
+    else:
+        data_label2.set_text("Active" if gps_data["valid"] else "Inactive")
     data_label3.set_text("Enabled" if gps_data["valid"] else "Disabled")
     data_label10.set_text("Enabled" if gps_data["valid"] else "Disabled")
 
 def update_gps_data():
-    """Update GPS data"""
-    global gps_data, rx_chars, last_fix_time, buffer, uart
+    """Drain all pending UART data and parse every complete sentence; run by the service timer"""
+    global rx_chars
     
-    if uart.any():
-        b = uart.read(1)
-        
-        if b:
-            rx_chars += 1
-            
-            if b == b'\n':
-                try:
-                    line = buffer.decode("latin-1").strip()
-                    
-                    if line.startswith("$"):
-                        parse_nmea(line)
-                        
-                except:
-                    pass
-                
-                buffer = b""
-            else:
-                buffer += b
+    if GPS_USE_UBX:
+        if ubx_reader.poll():
+            gps_service.publish()
+        rx_chars = ubx_reader.rx_chars
+    else:
+        gps_service.poll()
+        rx_chars = gps_service.rx_chars
+    
+    try:
+        gps_time.discipline(rtc, rtc_chip)
+    except OSError:
+        pass
+
+def configure_ubx():
+    """Switch the receiver to NAV-PVT output once, before the first UBX poll"""
+    global ubx_configured
+    
+    if not GPS_USE_UBX or ubx_configured:
+        return
+    # The service must not read the ACKs the configuration waits for
+    gps_service.paused = True
+    try:
+        ubx_configured = ubx_reader.configure(GPS_NAV_RATE_HZ)
+    finally:
+        gps_service.paused = False
+
+def start_service():
+    """Poll the GPS from a timer for as long as the factory program runs"""
+    configure_ubx()
+    gps_service.start_timer(Timer(GPS_TIMER_ID), GPS_POLL_MS, update_gps_data)
 
 def set_references(recreate_func, encoder_obj=None):
     global recreate_main_page, encoder
@@ -197,7 +231,11 @@ def update_item_positions(selection_items, scroll_offset, symbol_labels=None, te
 def gps():
     # Declare all global variables that need to be modified
     global recreate_main_page, encoder
-    global last_gps_update, last_gps_data_str, is_scrolling, gps_data, rx_chars, buffer, uart
+    global last_gps_update, last_gps_data_str, is_scrolling, gps_data, rx_chars
+    
+    # Retry the NAV-PVT configuration if the receiver did not answer at start-up
+    configure_ubx()
+    load_geofences()
     
     # Clear all current screen elements
     scr = lv.screen_active()
@@ -494,16 +532,13 @@ def gps():
     while True:
         current_time = time.ticks_ms()
         
-        # Only update GPS data when scrolling
-        if is_scrolling or (current_time - last_gps_update > GPS_UPDATE_INTERVAL):
-            update_gps_data()
+        # Refresh labels at a fixed rate, and only when GPS data changes
+        if not is_scrolling and time.ticks_diff(current_time, last_gps_update) > GPS_UPDATE_INTERVAL:
             last_gps_update = current_time
-        
-        # Only update display labels when GPS data changes
-        gps_data_str = f"{gps_data['sats']},{gps_data['lat']},{gps_data['lng']},{gps_data['time']},{gps_data['speed']},{rx_chars},{gps_data['valid']}"
-        if gps_data_str != last_gps_data_str:
-            update_gps_display_labels(data_labels)
-            last_gps_data_str = gps_data_str
+            gps_data_str = f"{gps_data['sats']},{gps_data['lat']},{gps_data['lng']},{gps_data['time']},{gps_data['speed']},{rx_chars},{gps_data['valid']}"
+            if gps_data_str != last_gps_data_str:
+                update_gps_display_labels(data_labels)
+                last_gps_data_str = gps_data_str
         
         key = encoder.update()
         
@@ -560,6 +595,9 @@ def gps():
             # For other selections, you can add specific handling here
             if current_selection == 1:
                 pass
+            elif current_selection in (5, 6):
+                # lat/lng: open the offline map on top of this page
+                gps_map_module.map_view(encoder, gps_fix)
         
         # Reset state after scrolling ends
         is_scrolling = False
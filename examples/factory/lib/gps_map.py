@@ -0,0 +1,117 @@
+import lvgl as lv
+import time
+from tile_map import TileCache, MapView
+
+MAP_TILE_ROOT = "/sd/tiles"           # Tiles as /sd/tiles/z/x/y.bin (256x256 RGB565)
+MAP_CACHE_BYTES = 1536 * 1024         # Tile cache budget (PSRAM)
+MAP_WIDTH = 480
+MAP_HEIGHT = 222                      # Visible area of the panel
+MAP_TOP = 49                          # First visible row after rotation
+MAP_ZOOM = 15
+MAP_PAN_STEP = 64                     # Pixels per encoder step
+MAP_STATUS_INTERVAL = 500             # Status label refresh interval (ms)
+
+# Encoder button cycles through these modes, the last one leaves the map
+MAP_MODES = ("Follow", "Pan E-W", "Pan N-S", "Back")
+
+# The cache and the view outlive the page, so tiles stay warm between
+# visits and the 213 KB frame buffer is allocated only once
+tile_cache = None
+view = None
+
+def map_view(encoder, gps_fix):
+    """Full-screen map centred on the fix, drawn on top of the calling page"""
+    global tile_cache, view
+
+    if tile_cache is None:
+        tile_cache = TileCache(MAP_TILE_ROOT, MAP_CACHE_BYTES)
+    if view is None:
+        view = MapView(tile_cache, MAP_WIDTH, MAP_HEIGHT, MAP_ZOOM)
+
+    scr = lv.screen_active()
+    map_page = lv.obj(scr)
+    map_page.set_size(480, 320)
+    map_page.set_pos(0, 0)
+    map_page.set_style_bg_color(lv.color_hex(0x000000), 0)
+    map_page.set_style_bg_opa(lv.OPA.COVER, 0)
+    map_page.set_style_border_width(0, 0)
+    map_page.set_style_pad_all(0, 0)
+    map_page.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+
+    # The canvas draws straight from the view's frame buffer
+    canvas = lv.canvas(map_page)
+    canvas.set_buffer(view.buf, MAP_WIDTH, MAP_HEIGHT, lv.COLOR_FORMAT.RGB565)
+    canvas.set_pos(0, MAP_TOP)
+
+    # Position marker
+    marker = lv.obj(map_page)
+    marker.set_size(12, 12)
+    marker.set_style_radius(6, 0)
+    marker.set_style_bg_color(lv.color_hex(0x0078ff), 0)
+    marker.set_style_border_color(lv.color_hex(0xffffff), 0)
+    marker.set_style_border_width(2, 0)
+
+    status_label = lv.label(map_page)
+    status_label.set_style_text_font(lv.font_montserrat_14, 0)
+    status_label.set_style_text_color(lv.color_hex(0xffffff), 0)
+    status_label.set_style_bg_color(lv.color_hex(0x000000), 0)
+    status_label.set_style_bg_opa(lv.OPA._60, 0)
+    status_label.set_pos(4, MAP_TOP + 2)
+
+    mode = 0
+    dirty = True
+    last_status = 0
+    if gps_fix.lat is not None:
+        view.center_on(gps_fix.latitude(), gps_fix.longitude())
+
+    while True:
+        current_time = time.ticks_ms()
+
+        # The GPS service timer keeps gps_fix current
+        has_fix = gps_fix.valid and gps_fix.lat is not None
+        if has_fix and MAP_MODES[mode] == "Follow":
+            old_x, old_y = view.cx, view.cy
+            view.center_on(gps_fix.latitude(), gps_fix.longitude())
+            dirty = dirty or (view.cx, view.cy) != (old_x, old_y)
+
+        key = encoder.update()
+        if key == "enter":
+            if MAP_MODES[mode] == "Back":
+                break
+            mode += 1
+            last_status = 0
+        elif key in ("up", "down"):
+            step = 1 if key == "up" else -1
+            if MAP_MODES[mode] == "Follow":
+                view.set_zoom(view.zoom + step)
+            elif MAP_MODES[mode] == "Pan E-W":
+                view.pan(step * MAP_PAN_STEP, 0)
+            elif MAP_MODES[mode] == "Pan N-S":
+                view.pan(0, -step * MAP_PAN_STEP)
+            dirty = True
+
+        if dirty:
+            view.render()
+            canvas.invalidate()
+            dirty = False
+            if has_fix:
+                x, y = view.screen_pos(gps_fix.latitude(), gps_fix.longitude())
+                if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
+                    marker.set_pos(x - 6, MAP_TOP + y - 6)
+                    marker.set_style_opa(lv.OPA.COVER, 0)
+                else:
+                    marker.set_style_opa(lv.OPA.TRANSP, 0)
+            else:
+                marker.set_style_opa(lv.OPA.TRANSP, 0)
+
+        # One prefetch chunk every frame, so tiles keep coming in while panning
+        tile_cache.step()
+
+        if time.ticks_diff(current_time, last_status) > MAP_STATUS_INTERVAL:
+            last_status = current_time
+            status_label.set_text("%s  z%d  hit %d%%  %d ms" % (
+                MAP_MODES[mode], view.zoom, tile_cache.hit_rate() * 100, view.frame_us // 1000))
+
+        time.sleep_ms(10)
+
+    map_page.delete()
@@ -1,7 +1,13 @@
 import lvgl as lv
+import os
 import time
 import keypad
-from machine import Pin, I2C
+import machine
+import micropython
+from machine import Pin, I2C, Timer
+from lora_link import LoRaLink, PAYLOAD_FLAGS
+from smaz import compress, decompress
+from chat_log import ChatLog, OUTGOING, DELIVERED, FAILED
 import lib.radio as radio_module
 
 recreate_main_page = None
@@ -10,6 +16,29 @@ i2c = I2C(0, scl=Pin(2), sda=Pin(3), freq=400000)
 kb = keypad.TCA8418(i2c)
 kb.setup_keypad()
 
+link = None  # Reliable transport over the radio, created by get_link()
+COMPRESSED = PAYLOAD_FLAGS  # Header bit set when the text is smaz-compressed
+CHAT_LOG_SD = "/sd/chat.log"
+CHAT_LOG_FLASH = "/chat.log"
+chat_log = None  # Message history, opened by get_log()
+sent_messages = {}  # Link seq -> log message number, until delivered or failed
+
+# The link is polled from a timer on every page, so fragments are ACKed
+# even when the chat page is closed. Its events are queued and written
+# to the log by the chat page while it is open (it uses the log itself),
+# otherwise by the timer tick.
+LINK_TIMER_ID = 2  # Timer 0 drives LVGL, timer 1 the GPS service
+LINK_POLL_MS = 20
+link_timer = None
+link_scheduled = False
+link_events = []  # (src, data, flags) for a message, (-1, seq, delivered) for an outcome
+chat_page_open = False
+
+# Message list geometry, between the back button and the input box
+CHAT_TOP = 50
+CHAT_ROWS = 7
+CHAT_ROW_HEIGHT = 20
+
 
 def set_references(recreate_func, encoder_obj=None):
     global recreate_main_page, encoder
@@ -17,7 +46,172 @@ def set_references(recreate_func, encoder_obj=None):
     if encoder_obj is not None:
         encoder = encoder_obj
 
-def create_lora_chat_ui(message_y):
+def pack_text(text):
+    """Message bytes and header flags, compressed when that is shorter"""
+    data = text.encode()
+    packed = compress(data)
+    if len(packed) < len(data):
+        return packed, COMPRESSED
+    return data, 0
+
+def on_message(src, data, flags):
+    link_events.append((src, bytes(data), flags))
+
+def on_outcome(seq, delivered):
+    link_events.append((-1, seq, delivered))
+
+def log_message(src, data, flags):
+    try:
+        if flags & COMPRESSED:
+            data = bytes(decompress(data))
+        text = data.decode()
+    except (UnicodeError, ValueError):
+        text = "<%d bytes>" % len(data)
+    get_log().append(text, src)
+
+def log_outcome(seq, delivered):
+    n = sent_messages.pop(seq, None)
+    if n is not None:
+        get_log().set_flags(n, OUTGOING | (DELIVERED if delivered else FAILED))
+
+def get_link():
+    """Chat transport on the radio, None when the radio is disabled or not available"""
+    global link
+    lora = radio_module.get_radio()
+    if lora is None:
+        return None
+    if link is None:
+        link = LoRaLink(lora, machine.unique_id()[-1] % 0xFF, on_message=on_message,
+                        on_delivered=lambda seq: on_outcome(seq, True),
+                        on_failed=lambda seq: on_outcome(seq, False))
+    return link
+
+def apply_link_events():
+    """Write the queued link events to the chat log"""
+    while link_events:
+        src, a, b = link_events.pop(0)
+        if src < 0:
+            log_outcome(a, b)
+        else:
+            log_message(src, a, b)
+
+def poll_link(arg=None):
+    """Timer tick in the main context: run the link and, unless the chat page is open, the log"""
+    global link_scheduled
+    link_scheduled = False
+    if radio_module.configuring:
+        return  # The radio page is in the middle of a command sequence
+    chat_link = get_link()
+    if chat_link is not None:
+        chat_link.poll()
+    if not chat_page_open:
+        apply_link_events()
+
+def on_link_timer(timer):
+    global link_scheduled
+    if link_scheduled:
+        return
+    link_scheduled = True
+    try:
+        micropython.schedule(poll_link, None)
+    except RuntimeError:
+        link_scheduled = False  # Schedule queue full, try again on the next tick
+
+def start_link_service():
+    """Poll the chat link from a timer for as long as the factory program runs"""
+    global link_timer
+    if link_timer is None:
+        link_timer = Timer(LINK_TIMER_ID)
+        link_timer.init(period=LINK_POLL_MS, mode=Timer.PERIODIC, callback=on_link_timer)
+
+def get_log():
+    """The chat history, on the SD card when one is mounted"""
+    global chat_log
+    if chat_log is None:
+        try:
+            os.statvfs('/sd')
+            path = CHAT_LOG_SD
+        except OSError:
+            path = CHAT_LOG_FLASH
+        chat_log = ChatLog(path)
+    return chat_log
+
+class ChatView:
+    """The visible part of the chat log, drawn with a fixed pool of labels
+
+    Each label remembers which message it shows. Scrolling moves the
+    labels of messages that stay on screen and reads only the rows that
+    come into view from the log, so neither the time nor the memory
+    depends on how long the history is.
+    """
+
+    def __init__(self, scr, log, rows=CHAT_ROWS, top=CHAT_TOP, row_height=CHAT_ROW_HEIGHT):
+        self.log = log
+        self.rows = rows
+        self.top = top
+        self.row_height = row_height
+        self.labels = []
+        for _ in range(rows):
+            label = lv.label(scr)
+            label.set_style_text_color(lv.color_hex(0xffffff), 0)  # White text
+            label.set_style_text_font(lv.font_montserrat_16, 0)
+            label.set_long_mode(lv.label.LONG_MODE.DOT)  # Dots at the end of long messages
+            label.set_text("")
+            self.labels.append(label)
+        self._shown = [-1] * rows  # Message number on each label
+        self._changes = -1
+        self._drawn_first = -1
+        self.first = max(0, len(log) - rows)  # Message in the top row
+        self.follow = True  # Keep the newest message in view
+        self.refresh()
+
+    def scroll(self, delta):
+        last_first = max(0, len(self.log) - self.rows)
+        self.first = max(0, min(last_first, self.first + delta))
+        self.follow = self.first == last_first
+        self.refresh()
+
+    def _draw(self, label, n):
+        flags, peer, t, text = self.log.get(n)
+        if flags & OUTGOING:
+            if flags & DELIVERED:
+                text += " " + lv.SYMBOL.OK
+            elif flags & FAILED:
+                text += " (failed)"
+            label.set_x(260)
+            label.set_width(210)
+        else:
+            text = "%02X: %s" % (peer, text)
+            label.set_x(60)
+            label.set_width(400)
+        label.set_text(text)
+
+    def refresh(self):
+        if self._changes != self.log.changes:
+            # New message or delivery status: re-read the rows on screen
+            self._changes = self.log.changes
+            if self.follow:
+                self.first = max(0, len(self.log) - self.rows)
+            for i in range(self.rows):
+                self._shown[i] = -1
+        elif self._drawn_first == self.first:
+            return
+        self._drawn_first = self.first
+        visible = range(self.first, min(self.first + self.rows, len(self.log)))
+        free = [i for i in range(self.rows) if self._shown[i] not in visible]
+        for row, n in enumerate(visible):
+            if n in self._shown:
+                i = self._shown.index(n)
+            else:
+                i = free.pop()
+                self._draw(self.labels[i], n)
+                self._shown[i] = n
+            self.labels[i].set_y(self.top + row * self.row_height)
+        for i in free:
+            self.labels[i].set_text("")
+            self._shown[i] = -1
+
+def create_lora_chat_ui():
     # Clear all current screen elements
     scr = lv.screen_active()
     # Remove all children from the screen
@@ -116,6 +310,17 @@ def create_lora_chat_ui(message_y):
     item_positions.append((410, 205))  # Adjusted position: left 3px total, up 4px total
     item_sizes.append((37, 37))  # Long size
 
+    # Message history, entered to scroll it with the encoder
+    history_area = lv.obj(scr)
+    history_area.set_size(415, 150)
+    history_area.set_pos(55, 45)
+    history_area.set_style_bg_opa(lv.OPA.TRANSP, 0)
+    history_area.set_style_border_width(0, 0)
+    history_area.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+    selection_items.append(history_area)
+    item_positions.append((55, 45))
+    item_sizes.append((415, 150))
+
     # Position selection box over first item (back button) by default
     current_selection = 0
     x, y = item_positions[current_selection]
@@ -126,16 +331,22 @@ def create_lora_chat_ui(message_y):
     return scr, color_obj, selection_box, selection_items, item_positions, item_sizes, input_text, current_selection
 
 def lora_chat():
-    # Initialize message display position
-    message_y = 50
+    global chat_page_open
     
+    # From here on the page writes the link events to the log, between its own log accesses
+    chat_page_open = True
     # Create initial UI
-    scr, color_obj, selection_box, selection_items, item_positions, item_sizes, input_text, current_selection = create_lora_chat_ui(message_y)
+    scr, color_obj, selection_box, selection_items, item_positions, item_sizes, input_text, current_selection = create_lora_chat_ui()
+    log = get_log()
+    view = ChatView(scr, log)
 
-    
+    # Radio as set on the radio page, None while disabled there; the link is polled by its timer
+    chat_link = get_link()
     
     while True:
         key = encoder.update()
+        apply_link_events()
+        view.refresh()
         
         if key == "down": 
             # Move selection down
@@ -170,6 +381,8 @@ def lora_chat():
                     # Input mode loop
                     while input_mode:
                         key = encoder.update()
+                        apply_link_events()
+                        view.refresh()  # Messages and delivery marks arriving while typing
                         
                         # Check for exit input mode
                         if key == "enter":
@@ -197,24 +410,44 @@ def lora_chat():
                 # Get current input text
                 message_text = input_text.get_text()
                 if message_text:  # Only send if there's text
-                    # Create a new label to display the message
-                    message_label = lv.label(scr)
-                    message_label.set_text(message_text)
-                    message_label.set_style_text_color(lv.color_hex(0xffffff), 0)  # White text
-                    message_label.set_style_text_font(lv.font_montserrat_16, 0)
-                    message_label.set_pos(300, message_y)
+                    seq = None
+                    if chat_link is not None:
+                        data, flags = pack_text(message_text)
+                        if len(data) <= chat_link.max_message:
+                            seq = chat_link.send(data, flags=flags)
+                    # Store the message; the view shows it and its delivery status
+                    if seq is not None:
+                        sent_messages[seq] = log.append(message_text, flags=OUTGOING)
+                    else:
+                        log.append(message_text, flags=OUTGOING | FAILED)
+                    view.scroll(len(log))
                     
                     # Clear input box
                     input_text.set_text("")
-                    
-                    # Update message y position for next message
-                    message_y += 20
             # Handle settings button selection
             elif current_selection == 3:
                 # Call radio function with should_recreate=False to return to lora_chat.py
                 radio_module.radio(should_recreate=False)
+                chat_link = get_link()
                 # Recreate UI after returning from radio
-                scr, color_obj, selection_box, selection_items, item_positions, item_sizes, input_text, current_selection = create_lora_chat_ui(message_y)
+                scr, color_obj, selection_box, selection_items, item_positions, item_sizes, input_text, current_selection = create_lora_chat_ui()
+                view = ChatView(scr, log)
+            # Handle message history selection
+            elif current_selection == 4:
+                # Scroll mode: up/down move through the history, enter leaves
+                while True:
+                    key = encoder.update()
+                    apply_link_events()
+                    if key == "enter":
+                        break
+                    elif key == "up":
+                        view.scroll(-1)
+                    elif key == "down":
+                        view.scroll(1)
+                    view.refresh()
+    
+    chat_page_open = False
+    apply_link_events()
     
     # Clear the screen again to prepare for returning to original page
     scr = lv.screen_active()
@@ -3,8 +3,15 @@ import time
 import math
 import random
 import machine
-from machine import I2C, Pin
+from machine import I2C, Pin, I2S
 from micropython import const
+from audio_meter import AudioMeter
+from spectrum import SpectrumAnalyzer
+from audio_capture import AudioCapture
+from vad import VoiceGate
+from goertzel import DTMFDetector
+from wav import WavWriter
+import os
 
 # XL9555 Register Addresses
 XL9555_INPUT_PORT0 = const(0x00)
@@ -157,232 +164,6 @@ audio_codec = None
 mic_i2s = None
 # 音频缓冲区
 audio_buffer = None
-# PDM数据缓冲区
-pdm_buffer = None
-
-class ES8311:
-    """ES8311音频编解码器类"""
-    def __init__(self, i2c, i2c_addr=0x18):
-        self.i2c = i2c
-        self.i2c_addr = i2c_addr
-        self.is_open = False
-        self.enabled = False
-        self.hw_gain = 0.0
-        self.bits = 16
-        self.sample_rate = 44100
-        self.channels = 1
-
-    def write_reg(self, reg, value):
-        """写入ES8311寄存器"""
-        try:
-            self.i2c.writeto_mem(self.i2c_addr, reg, bytes([value]))
-            return True
-        except OSError:
-            print(f"写入ES8311寄存器失败: reg=0x{reg:02X}, value=0x{value:02X}")
-            return False
-
-    def read_reg(self, reg):
-        """读取ES8311寄存器"""
-        try:
-            return self.i2c.readfrom_mem(self.i2c_addr, reg, 1)[0]
-        except OSError:
-            print(f"读取ES8311寄存器失败: reg=0x{reg:02X}")
-            return None
-
-    def set_bits_per_sample(self, bits):
-        """设置采样位深度"""
-        self.bits = bits
-        dac_iface = self.read_reg(0x09)
-        adc_iface = self.read_reg(0x0A)
-        
-        if dac_iface is None or adc_iface is None:
-            print("无法读取I2S接口寄存器")
-            return False
-            
-        if bits == 16:
-            dac_iface |= 0x0c
-            adc_iface |= 0x0c
-        elif bits == 24:
-            dac_iface |= 0x0f
-            adc_iface |= 0x0f
-        
-        return self.write_reg(0x09, dac_iface) and self.write_reg(0x0A, adc_iface)
-
-    def config_fmt(self, fmt):
-        """配置音频格式"""
-        adc_iface = self.read_reg(0x0A)
-        
-        if adc_iface is None:
-            print("无法读取ADC接口寄存器")
-            return False
-            
-        if fmt == 16:
-            adc_iface |= 0x0c
-        elif fmt == 24:
-            adc_iface |= 0x0f
-        
-        return self.write_reg(0x0A, adc_iface)
-
-    def set_rate(self, sample_rate):
-        """设置采样率"""
-        self.sample_rate = sample_rate
-        # 设置采样率的具体实现依赖于ES8311的时钟配置
-        # 这里简化处理，使用已知的工作配置
-        
-        success = True
-        
-        # 16kHz采样率配置
-        if sample_rate == 16000:
-            # 设置时钟管理器
-            success &= self.write_reg(0x01, 0x03)  # 时钟管理
-            success &= self.write_reg(0x02, 0x40)  # 时钟分频
-            success &= self.write_reg(0x03, 0x0B)  # 时钟配置
-            success &= self.write_reg(0x04, 0x03)  # 时钟配置
-            success &= self.write_reg(0x05, 0xFF)  # 时钟配置
-            success &= self.write_reg(0x06, 0x00)  # 时钟配置
-            success &= self.write_reg(0x07, 0x01)  # 时钟配置
-        else:
-            # 默认配置
-            success &= self.write_reg(0x01, 0x03)
-            success &= self.write_reg(0x02, 0x40)
-            
-        return success
-
-    def open_mic_mode(self, bits=16, channels=1, sample_rate=16000, mic_model=None):
-        """打开麦克风模式
-        Args:
-            bits: 采样位深度
-            channels: 声道数
-            sample_rate: 采样率
-            mic_model: 麦克风型号，例如"MIC-4103-G-G00"
-        """
-        print(f"初始化ES8311麦克风模式，型号: {mic_model}")
-        
-        # 初始化序列
-        # 软复位
-        if not self.write_reg(0x00, 0x20):
-            print("ES8311软复位失败")
-            return False
-        
-        time.sleep_ms(10)
-        
-        # 写入初始化序列
-        init_seq = [
-            (0x0D, 0xC0),  # 主控制器
-            (0x00, 0x00),  # 复位寄存器
-            (0x0D, 0x80),  # 取消软复位
-            (0x0D, 0xC0),  # 激活
-            (0x08, 0x03),  # 系统时钟配置
-            (0x09, 0x07),  # DAC I2S接口配置
-            (0x0A, 0x47),  # ADC I2S接口配置
-            (0x0B, 0x00),  # DAC LRCK周期设置
-            (0x0C, 0x00),  # ADC LRCK周期设置
-            (0x10, 0x08),  # DAC音量设置
-            (0x11, 0x08),  # DAC音量设置
-            (0x12, 0x00),  # ADC音量设置
-            (0x13, 0x00),  # ADC音量设置
-            (0x14, 0x12),  # ADC PGA设置
-            (0x15, 0x01),  # ADC PGA设置
-            (0x16, 0x00),  # 模拟控制
-            (0x17, 0x00),  # 模拟控制
-            (0x18, 0x18),  # 模拟控制
-            (0x1A, 0x00),  # 模拟控制
-            (0x1B, 0x00),  # 模拟控制
-            (0x1C, 0x00),  # 模拟控制
-            (0x1D, 0x00),  # 模拟控制
-            (0x1E, 0x01),  # 模拟控制
-            (0x1F, 0x00),  # 模拟控制
-            (0x20, 0x00),  # 模拟控制
-            (0x21, 0x00),  # 模拟控制
-            (0x22, 0x00),  # 模拟控制
-            (0x23, 0x00),  # 模拟控制
-            (0x24, 0x00),  # 模拟控制
-            (0x25, 0x00),  # 模拟控制
-            (0x26, 0x00),  # 模拟控制
-            (0x27, 0x00),  # 模拟控制
-            (0x28, 0x00),  # 模拟控制
-            (0x29, 0x00),  # 模拟控制
-            (0x2A, 0x00),  # 模拟控制
-            (0x2B, 0x00),  # 模拟控制
-            (0x2C, 0x00),  # 模拟控制
-            (0x2D, 0x00),  # 模拟控制
-            (0x2E, 0x00),  # 模拟控制
-            (0x2F, 0x00),  # 模拟控制
-            (0x30, 0x00),  # 模拟控制
-            (0x31, 0x00),  # 模拟控制
-            (0x32, 0x00),  # 模拟控制
-            (0x33, 0x00),  # 模拟控制
-            (0x34, 0x00),  # 模拟控制
-            (0x35, 0x00),  # 模拟控制
-            (0x36, 0x00),  # 模拟控制
-            (0x37, 0x00),  # 模拟控制
-            (0x38, 0x00),  # 模拟控制
-            (0x39, 0x00),  # 模拟控制
-            (0x3A, 0x00),  # 模拟控制
-            (0x3B, 0x00),  # 模拟控制
-            (0x3C, 0x00),  # 模拟控制
-            (0x3D, 0x00),  # 模拟控制
-            (0x3E, 0x00),  # 模拟控制
-            (0x3F, 0x00),  # 模拟控制
-            (0x40, 0x00),  # 模拟控制
-            (0x41, 0x00),  # 模拟控制
-            (0x42, 0x00),  # 模拟控制
-            (0x43, 0x00),  # 模拟控制
-            (0x44, 0x00),  # 模拟控制
-            (0x45, 0x00),  # 模拟控制
-            (0x46, 0x00),  # 模拟控制
-            (0x47, 0x00),  # 模拟控制
-            (0x48, 0x00),  # 模拟控制
-            (0x49, 0x00),  # 模拟控制
-            (0x4A, 0x00),  # 模拟控制
-            (0x4B, 0x00),  # 模拟控制
-            (0x4C, 0x00),  # 模拟控制
-            (0x4D, 0x00),  # 模拟控制
-            (0x4E, 0x00),  # 模拟控制
-            (0x4F, 0x00),  # 模拟控制
-        ]
-        
-        for reg, value in init_seq:
-            if not self.write_reg(reg, value):
-                print(f"初始化序列失败: reg=0x{reg:02X}, value=0x{value:02X}")
-                return False
-        
-        # 设置参数
-        if not self.set_bits_per_sample(bits):
-            print("设置采样位深度失败")
-            return False
-        
-        if not self.set_rate(sample_rate):
-            print("设置采样率失败")
-            return False
-        
-        # 配置I2S为输入模式
-        adc_iface_value = self.read_reg(0x0A)
-        if adc_iface_value is not None:
-            adc_iface_value |= (1 << 6)  # 启用ADC I2S
-            success = self.write_reg(0x0A, adc_iface_value)
-            if not success:
-                print("配置ADC I2S接口失败")
-                return False
-        else:
-            print("无法读取ADC接口寄存器")
-            return False
-        
-        # 启用ADC
-        power_reg = self.read_reg(0x02)
-        if power_reg is not None:
-            power_reg |= (1 << 0)  # 启用ADC
-            if not self.write_reg(0x02, power_reg):
-                print("启用ADC失败")
-                return False
-        else:
-            print("无法读取电源寄存器")
-            return False
-        
-        self.is_open = True
-        self.enabled = True
-        print("ES8311麦克风模式初始化成功")
-        return True
 
 def set_references(recreate_func, encoder_obj=None):
     global recreate_main_page, encoder
@@ -392,7 +173,7 @@ def set_references(recreate_func, encoder_obj=None):
 
 def init_audio_codec():
     """初始化音频编解码器和I2S输入"""
-    global audio_codec, mic_i2s, audio_buffer, pdm_buffer
+    global audio_codec, mic_i2s, audio_buffer
     
     try:
         # 创建I2C接口（ES8311使用I2C地址0x18）
@@ -419,12 +200,13 @@ def init_audio_codec():
             print(f"XL9555初始化错误: {e}")
             return False
         
-        # 创建ES8311实例 (I2C地址0x18)
-        audio_codec = ES8311(i2c)
+        # 创建ES8311实例 (I2C地址0x18)，共用I2C总线，时钟取自I2S位时钟
+        from es8311 import ES8311
+        audio_codec = ES8311(i2c=i2c, mck=None)
         
         # 配置并打开音频编解码器
         # 针对MIC-4103-G-G00麦克风进行优化配置
-        success = audio_codec.open_mic_mode(bits=16, channels=1, sample_rate=16000, mic_model="MIC-4103-G-G00")
+        success = audio_codec.open_mic_mode(bits=16, channels=1, sample_rate=16000)
         
         if not success:
             print("ES8311麦克风模式初始化失败")
@@ -448,7 +230,6 @@ def init_audio_codec():
                 # 注意：标准MicroPython I2S不支持PDM模式，我们使用RX模式来获取原始数据
             )
             audio_buffer = bytearray(1024)  # 1KB缓冲区
-            pdm_buffer = bytearray(512)     # PDM数据缓冲区
             
             print("I2S音频输入初始化成功")
         except Exception as i2s_error:
@@ -456,7 +237,6 @@ def init_audio_codec():
             print("使用模拟数据模式")
             mic_i2s = None
             audio_buffer = None
-            pdm_buffer = None
         
         print("音频编解码器初始化成功")
         return True
@@ -465,164 +245,9 @@ def init_audio_codec():
         print(f"音频编解码器初始化错误: {e}")
         return False
 
-# ES8311类定义（基于ES8311 driver）
-class ES8311:
-    def __init__(self, i2c, i2c_addr=0x18):
-        self.i2c = i2c
-        self.i2c_addr = i2c_addr
-        self.is_open = False
-        self.enabled = False
-        self.sample_rate = 16000
-        self.bits = 16
-        
-    def write_reg(self, reg, value):
-        """Write a value to an ES8311 register"""
-        try:
-            self.i2c.writeto_mem(self.i2c_addr, reg, bytes([value]))
-            return True
-        except OSError:
-            return False
-
-    def read_reg(self, reg):
-        """Read a value from an ES8311 register"""
-        try:
-            return self.i2c.readfrom_mem(self.i2c_addr, reg, 1)[0]
-        except OSError:
-            return None
-    
-    def config_fmt(self, fmt):
-        """配置I2S格式"""
-        dac_iface = self.read_reg(0x09)
-        adc_iface = self.read_reg(0x0A)
-        
-        if dac_iface is None or adc_iface is None:
-            print("无法读取I2S接口寄存器")
-            return False
-        
-        # 正常I2S格式
-        dac_iface &= 0xFC
-        adc_iface &= 0xFC
-        
-        return self.write_reg(0x09, dac_iface) and self.write_reg(0x0A, adc_iface)
-        
-    def set_bits_per_sample(self, bits):
-        """设置采样位深度"""
-        self.bits = bits
-        dac_iface = self.read_reg(0x09)
-        adc_iface = self.read_reg(0x0A)
-        
-        if dac_iface is None or adc_iface is None:
-            print("无法读取I2S接口寄存器")
-            return False
-            
-        if bits == 16:
-            dac_iface |= 0x0c
-            adc_iface |= 0x0c
-        elif bits == 24:
-            dac_iface |= 0x0f
-            adc_iface |= 0x0f
-        
-        return self.write_reg(0x09, dac_iface) and self.write_reg(0x0A, adc_iface)
-    
-    def set_rate(self, sample_rate):
-        """设置采样率"""
-        self.sample_rate = sample_rate
-        # 设置采样率的具体实现依赖于ES8311的时钟配置
-        # 这里简化处理，使用已知的工作配置
-        
-        success = True
-        
-        # 16kHz采样率配置
-        if sample_rate == 16000:
-            # 设置时钟管理器
-            success &= self.write_reg(0x01, 0x03)  # 时钟管理
-            success &= self.write_reg(0x02, 0x40)  # 时钟分频
-            success &= self.write_reg(0x03, 0x0B)  # 时钟配置
-            success &= self.write_reg(0x04, 0x03)  # 时钟配置
-            success &= self.write_reg(0x05, 0xFF)  # 时钟配置
-            success &= self.write_reg(0x06, 0x00)  # 时钟配置
-            success &= self.write_reg(0x07, 0x01)  # 时钟配置
-        else:
-            # 默认配置
-            success &= self.write_reg(0x01, 0x03)
-            success &= self.write_reg(0x02, 0x40)
-            
-        return success
-            
-    def open_mic_mode(self, bits=16, channels=1, sample_rate=16000):
-        """打开麦克风模式"""
-        if self.is_open:
-            return True
-        
-        try:
-            # 基本寄存器配置
-            self.write_reg(0x44, 0x08)  # GPIO配置
-            self.write_reg(0x44, 0x08)  # 重复写入确保可靠性
-            
-            # 复位芯片
-            self.write_reg(0x00, 0x80)
-            time.sleep(0.1)  # 等待复位完成
-            
-            # 配置基本参数
-            if not self.set_bits_per_sample(bits):
-                print("设置采样位深度失败")
-                return False
-                
-            if not self.set_rate(sample_rate):
-                print("设置采样率失败")
-                return False
-                
-            if not self.config_fmt(0):  # 正常I2S格式
-                print("配置I2S格式失败")
-                return False
-            
-            # 配置为麦克风输入模式
-            # 系统寄存器配置
-            self.write_reg(0x0B, 0x40)  # 系统寄存器 - 启用ADC
-            self.write_reg(0x0C, 0x00)
-            self.write_reg(0x0D, 0x01)
-            self.write_reg(0x0E, 0x02)
-            self.write_reg(0x10, 0x00)
-            self.write_reg(0x11, 0x00)
-            self.write_reg(0x12, 0x00)
-            self.write_reg(0x14, 0x1A)
-            
-            # ADC配置
-            self.write_reg(0x15, 0x40)  # ADC控制
-            self.write_reg(0x16, 0x24)  # ADC采样率
-            self.write_reg(0x17, 0xBF)  # ADC配置
-            self.write_reg(0x31, 0x00)  # DAC寄存器初始化
-            self.write_reg(0x32, 0x00)
-            self.write_reg(0x37, 0x10)
-            
-            # 配置I2S为输入模式
-            adc_iface_value = self.read_reg(0x0A)
-            if adc_iface_value is not None:
-                adc_iface_value |= (1 << 6)  # 启用ADC I2S
-                success = self.write_reg(0x0A, adc_iface_value)
-                if not success:
-                    print("配置ADC I2S接口失败")
-                    return False
-            else:
-                print("无法读取ADC接口寄存器")
-                return False
-            
-            # 启动系统
-            self.write_reg(0x0B, 0x4F)  # 启动系统，启用ADC
-            
-            # 等待系统稳定
-            time.sleep(0.1)
-            
-            self.is_open = True
-            print("ES8311麦克风模式配置成功")
-            return True
-            
-        except Exception as e:
-            print(f"ES8311麦克风模式配置错误: {e}")
-            return False
-
 # 音频级别可视化相关变量
 audio_bars = []
+audio_peaks = []  # 每个条的峰值保持标记
 audio_levels = [0] * 16  # 存储16个音频条的级别
 max_bars = 16
 bar_width = 10
@@ -632,174 +257,159 @@ visualization_area_height = 100
 
 # 全局音频数据缓存
 last_audio_level = 0
-last_update_time = 0
 audio_data_cache = None
-audio_update_interval = 0.05  # 50ms更新间隔
 
-def pdm_to_pcm(pdm_data, sample_rate=16000):
-    """
-    将PDM数据转换为PCM数据
-    PDM是一种1位数字音频格式，需要转换为16位PCM进行分析
-    """
-    if not pdm_data or len(pdm_data) < 4:
-        return None
-        
-    # 简化的PDM到PCM转换
-    # 在实际应用中，这个转换会更复杂，需要使用滤波器
-    pcm_data = bytearray(len(pdm_data) // 8)  # PDM是1位，PCM是16位，所以PCM数据量是PDM的1/16
-    
-    # 简单的PDM解码 - 使用积分器将1位PDM数据转换为多位PCM数据
-    accumulator = 0
-    bit_index = 0
-    pcm_index = 0
-    
-    for byte_index in range(len(pdm_data)):
-        byte_value = pdm_data[byte_index]
-        
-        # 处理每个字节的8位
-        for bit_pos in range(8):
-            if bit_index % 64 == 0:  # 每64位输出一个PCM样本
-                # 限幅
-                if accumulator > 32767:
-                    accumulator = 32767
-                elif accumulator < -32768:
-                    accumulator = -32768
-                
-                # 存储PCM样本（小端序）
-                pcm_data[pcm_index] = accumulator & 0xFF
-                if pcm_index + 1 < len(pcm_data):
-                    pcm_data[pcm_index + 1] = (accumulator >> 8) & 0xFF
-                pcm_index += 2
-                
-                accumulator = 0
-                if pcm_index >= len(pcm_data):
-                    break
-            
-            # 提取PDM位 (LSB first)
-            pdm_bit = (byte_value >> bit_pos) & 1
-            # 积分器 - 简单的1阶低通滤波器
-            if pdm_bit:
-                accumulator += 512  # 正脉冲，增加累加器
-            else:
-                accumulator -= 512  # 负脉冲，减少累加器
-                
-            bit_index += 1
-        
-        if pcm_index >= len(pcm_data):
-            break
-    
-    return pcm_data
+# 电平测量：每个数据块只测量一次
+audio_meter = AudioMeter()
+audio_block_bytes = 512  # 256个样本，16kHz下16ms
+
+# 非阻塞I2S采集：两个缓冲区轮换，UI循环只取已完成的数据块
+audio_capture = None
+
+# 频谱分析：256点定点FFT，按对数频段分组到每个条
+# 每帧（50ms）只分析最新的一个数据块，衰减和峰值保持按帧计算
+spectrum = SpectrumAnalyzer(n=256, rate=16000, bands=max_bars, decay=18, hold=3)
+spectrum_block = bytearray(spectrum.n * 2)
+spectrum_fresh = False
+
+# 语音激活检测：打开录音开关后，只在有人说话时录音（带预录和拖尾）
+# 持续安静时在两次监听之间浅睡眠，醒来后重新启动I2S采集
+VAD_LIGHT_SLEEP = True
+VAD_SLEEP_MS = 50
+VOICE_FILE = "/sd/voice_%03d.wav"
+voice_gate = None
+voice_writer = None
+voice_recording = False  # 用户开关，默认不录音
+voice_clips = None       # 最后一个录音文件的编号，打开开关时从SD卡上查找
+
+# DTMF检测：8个Goertzel滤波器，按帧检查双音、扭曲度和持续时间
+def on_dtmf_digit(key):
+    print("DTMF:", key)
+
+dtmf = DTMFDetector(rate=16000, on_digit=on_dtmf_digit)
 
 def calculate_audio_level(audio_data):
     """计算音频数据的RMS级别"""
     if not audio_data or len(audio_data) < 2:
         return 0
     
-    # 计算RMS（Root Mean Square）音频级别
-    sum_squares = 0
-    count = 0
-    
-    for i in range(0, len(audio_data) - 1, 2):
-        if i + 1 < len(audio_data):
-            # 16位音频数据，小端序
-            sample = audio_data[i] | (audio_data[i + 1] << 8)
-            # 转换为有符号数
-            if sample >= 0x8000:
-                sample -= 0x10000
-            sum_squares += sample * sample
-            count += 1
-    
-    if count == 0:
-        return 0
+    # 单次viper遍历计算RMS、峰值和直流偏移，归一化到0-100范围
+    return audio_meter.update(audio_data)
+
+def on_audio_block(block):
+    """每个完成的I2S数据块：测量电平，保存最新的数据块留给FFT"""
+    global last_audio_level, audio_data_cache, spectrum_fresh
+    
+    last_audio_level = audio_meter.update(block)
+    audio_data_cache = last_audio_level
+    if len(block) >= len(spectrum_block):
+        spectrum_block[:] = block[:len(spectrum_block)]
+        spectrum_fresh = True
+    dtmf.feed(block)
+    if voice_gate is not None:
+        voice_gate.feed(block)
+
+def last_voice_clip():
+    """SD卡上已有录音文件的最大编号，没有则为0"""
+    last = 0
+    for name in os.listdir('/sd'):
+        if name.startswith("voice_") and name.endswith(".wav"):
+            try:
+                last = max(last, int(name[6:-4]))
+            except ValueError:
+                pass
+    return last
+
+def set_voice_recording(enabled):
+    """录音开关；打开时确认有SD卡并找到下一个空闲的文件编号"""
+    global voice_recording, voice_clips
     
-    rms = math.sqrt(sum_squares / count)
-    # 归一化到0-100范围
-    level = int((rms / 32768.0) * 100)
-    return max(0, min(100, level))
+    if enabled:
+        try:
+            voice_clips = last_voice_clip()
+        except OSError:
+            return False  # 没有SD卡
+    else:
+        on_voice_stop()
+    voice_recording = enabled
+    return True
+
+def on_voice_start():
+    """检测到语音：录音开关打开时新建录音文件"""
+    global voice_writer, voice_clips
+    
+    if not voice_recording:
+        return
+    voice_clips += 1
+    voice_writer = WavWriter(VOICE_FILE % voice_clips, rate=16000)
 
-def read_microphone_data():
-    """从I2S读取PDM麦克风音频数据"""
-    global mic_i2s, audio_buffer, pdm_buffer
+def on_voice_block(block):
+    if voice_writer is not None:
+        voice_writer.write(block)
+
+def on_voice_stop():
+    """拖尾时间结束：关闭录音文件"""
+    global voice_writer
     
-    if mic_i2s is None or pdm_buffer is None:
-        return None
+    if voice_writer is not None:
+        voice_writer.close()
+        voice_writer = None
+
+def sleep_until_next_block():
+    """浅睡眠代替空转；睡眠期间I2S暂停，醒来后重新启动采集"""
+    audio_capture.stop()
+    machine.lightsleep(VAD_SLEEP_MS)
+    audio_capture.start()
+    voice_gate.slept(VAD_SLEEP_MS)
+
+def start_audio_capture():
+    """以非阻塞方式启动I2S采集"""
+    global audio_capture, voice_gate
+    
+    if mic_i2s is None:
+        return
+    voice_gate = VoiceGate(audio_block_bytes, rate=16000,
+                           on_start=on_voice_start, on_block=on_voice_block, on_stop=on_voice_stop)
+    # 录音需要每个数据块，UI循环间隔50ms，缓冲8块（128ms）
+    audio_capture = AudioCapture(mic_i2s, audio_block_bytes, buffers=8)
+    audio_capture.subscribe(on_audio_block)
+    audio_capture.start()
+
+def stop_audio_capture():
+    """停止采集并释放I2S，下次进入页面时重新初始化"""
+    global audio_capture, mic_i2s
+    
+    if audio_capture is not None:
+        audio_capture.stop()
+        audio_capture = None
+    set_voice_recording(False)
+    if mic_i2s is not None:
+        mic_i2s.deinit()
+        mic_i2s = None
+
+def measure_audio_level():
+    """处理已采集完成的数据块（不阻塞），返回最新电平"""
+    if audio_capture is not None:
+        try:
+            audio_capture.service()
+        except Exception as e:
+            print("读取I2S数据失败:", str(e))
     
-    try:
-        # 读取PDM数据
-        bytes_read = mic_i2s.readinto(pdm_buffer)
-        if bytes_read > 0:
-            # 将PDM数据转换为PCM进行分析
-            pcm_data = pdm_to_pcm(pdm_buffer[:bytes_read])
-            return pcm_data
-        return None
-    except Exception as e:
-        print(f"读取麦克风数据错误: {e}")
-        return None
+    return audio_data_cache
 
-def get_audio_level(bar_index):
+def get_audio_level(bar_index, level=None):
     """获取音频级别
     如果有真实的麦克风数据，则使用真实数据
     否则使用模拟的波形数据
+    level: 本帧已测量的电平，传入时不再重复读取
     """
-    global audio_levels, max_bars, mic_i2s, last_audio_level, audio_data_cache, last_update_time, audio_update_interval
-    
-    # 检查是否需要更新音频数据
-    current_time = time.ticks_ms() / 1000.0
-    
-    # 如果I2S可用且距离上次更新超过指定间隔
-    if mic_i2s is not None and (current_time - last_update_time >= audio_update_interval):
-        try:
-            # 分配一个小的缓冲区
-            buffer_size = 512  # 512字节缓冲
-            audio_buffer = bytearray(buffer_size)
-            
-            # 读取音频数据
-            bytes_read = mic_i2s.readinto(audio_buffer)
-            
-            if bytes_read > 0:
-                # 将读取的数据转换为音频级别
-                # 这里使用简化的方法，实际应用中可能需要更复杂的处理
-                # 计算音频数据的RMS（均方根）作为级别指示
-                sum_squares = 0
-                sample_count = 0
-                
-                # 转换为16位整数数组并计算RMS
-                for i in range(0, bytes_read, 2):
-                    if i+1 < bytes_read:
-                        # 小端序，组合两个字节为16位整数
-                        sample = audio_buffer[i] | (audio_buffer[i+1] << 8)
-                        # 转换为有符号数
-                        if sample > 32767:
-                            sample -= 65536
-                        
-                        sum_squares += sample * sample
-                        sample_count += 1
-                
-                if sample_count > 0:
-                    # 计算RMS并归一化为0-100范围
-                    rms = math.sqrt(sum_squares / sample_count)
-                    # 归一化RMS值到0-100范围
-                    level = min(100, int(rms * 100 / 32768))
-                    
-                    # 更新缓存和时间戳
-                    last_audio_level = level
-                    audio_data_cache = level
-                    last_update_time = current_time
-                    
-                    # 为不同的条状图添加一些频率分离效果
-                    # 这里简化为基于条状图索引的滤波效果
-                    filter_factor = 0.5 + 0.5 * math.sin(bar_index * 0.5 + time.time() * 2)
-                    filtered_level = int(level * filter_factor)
-                    
-                    return max(5, min(95, filtered_level))  # 保持最小值避免完全静音
-        except Exception as e:
-            print("读取I2S数据失败:", str(e))
+    if level is None:
+        level = measure_audio_level()
     
-    # 如果没有真实数据更新，使用之前的数据或模拟数据
-    if audio_data_cache is not None:
+    if level is not None:
         # 为不同的条状图添加一些频率分离效果
         filter_factor = 0.5 + 0.5 * math.sin(bar_index * 0.5 + time.time() * 2)
-        filtered_level = int(audio_data_cache * filter_factor)
+        filtered_level = int(level * filter_factor)
         return max(5, min(95, filtered_level))  # 保持最小值避免完全静音
     
     # 如果无法读取真实音频，使用模拟数据作为后备
@@ -840,6 +450,7 @@ def create_audio_bars(parent):
     
     # 清空之前的条状图
     audio_bars.clear()
+    audio_peaks.clear()
     
     # 计算总宽度和起始位置（相对于父容器）
     total_width = max_bars * bar_width + (max_bars - 1) * bar_spacing
@@ -858,37 +469,44 @@ def create_audio_bars(parent):
         bar.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
         
         audio_bars.append(bar)
+        
+        # 峰值保持标记（细白线）
+        peak = lv.obj(parent)
+        peak.set_size(bar_width, 2)
+        peak.set_pos(start_x + i * (bar_width + bar_spacing), visualization_area_height - 2)
+        peak.set_style_bg_color(lv.color_hex(0xffffff), 0)
+        peak.set_style_bg_opa(lv.OPA.COVER, 0)
+        peak.set_style_border_width(0, 0)
+        peak.set_style_radius(0, 0)
+        audio_peaks.append(peak)
     
     return audio_bars
 
 def update_audio_bars(bar_index):
     """更新音频可视化条形图
-    bar_index: 当前需要更新的条形图索引
+    有麦克风数据时显示FFT频谱（对数频段，带峰值保持和衰减），
+    否则显示模拟数据
+    bar_index: 模拟模式下的起始条索引
     """
-    # 获取整体音频级别
-    global_level = get_audio_level(bar_index)
+    global spectrum_fresh
+    
+    # 每帧只读取和分析一次音频数据
+    measure_audio_level()
+    if spectrum_fresh:
+        spectrum.process(spectrum_block)
+        spectrum_fresh = False
+    has_spectrum = spectrum.blocks > 0
     
-    # 更新每个条的高度（固定位置，上下起伏）
     for i, bar in enumerate(audio_bars):
-        # 获取每个条自己的音频级别
-        # 通过添加相位偏移来模拟频谱分析
-        # 当前条使用传入的bar_index，其他条使用各自的索引
-        current_level = get_audio_level(i)
-        
-        # 为每个条添加一些随机变化，模拟真实音频频谱
-        # 不同条使用不同的偏移和比例
-        bar_offset = (i - max_bars // 2) * 2  # 中心条偏移较小，两边偏移较大
-        bar_factor = 0.8 + 0.4 * (i / max_bars)  # 不同条的比例因子
-        
-        # 为每个条添加不同的频率响应模拟
-        import random
-        time_factor = time.time() % 1.0  # 1秒循环
-        phase_offset = i * 0.2 + time_factor * 2  # 每条有不同的相位偏移
-        frequency_response = 0.5 + 0.5 * math.sin(phase_offset)
+        if has_spectrum:
+            level = spectrum.levels[i]
+            peak_level = spectrum.peaks[i]
+        else:
+            level = get_simulated_audio_level(bar_index + i)
+            peak_level = level
         
         # 计算当前条的高度
-        adjusted_level = min(100, max(0, global_level * bar_factor * frequency_response + bar_offset))
-        height = int((adjusted_level / 100.0) * visualization_area_height)
+        height = int((level / 100.0) * visualization_area_height)
         
         if height < 3:
             height = 3  # 最小高度，避免看不见
@@ -897,6 +515,10 @@ def update_audio_bars(bar_index):
         bar.set_size(bar_width, height)
         bar.set_pos(bar.get_x(), visualization_area_height - height)
         
+        # 峰值标记
+        peak_y = visualization_area_height - int((peak_level / 100.0) * visualization_area_height)
+        audio_peaks[i].set_pos(bar.get_x(), min(peak_y, visualization_area_height - 2))
+        
         # 根据高度设置颜色
         if height > visualization_area_height * 0.7:
             bar.set_style_bg_color(lv.color_hex(0xff0000), 0)  # 红色 - 高音量
@@ -990,6 +612,16 @@ def microphone():
     item_positions.append((12, 50))  # Adjusted position: left 3px total, up 4px total
     item_sizes.append((30, 30))  # Smaller size for back button
     
+    # Item 1: 录音开关（录到SD卡的voice_NNN.wav）
+    record_label = lv.label(scr)
+    record_label.set_text("REC: OFF")
+    record_label.set_style_text_font(lv.font_montserrat_16, 0)
+    record_label.set_style_text_color(lv.color_hex(0xffffff), 0)  # White text
+    record_label.set_pos(340, 55)
+    selection_items.append(record_label)
+    item_positions.append((332, 50))
+    item_sizes.append((120, 30))
+    
     # 创建音频可视化区域
     audio_container = lv.obj(scr)
     audio_container.set_size(300, visualization_area_height + 40)
@@ -1015,9 +647,20 @@ def microphone():
     status_label.set_style_text_color(lv.color_hex(0x00ff00), 0)  # Green text
     status_label.set_pos(130, 90)
     
+    # DTMF按键显示
+    dtmf_label = lv.label(scr)
+    dtmf_label.set_text("DTMF: -")
+    dtmf_label.set_style_text_font(lv.font_montserrat_14, 0)
+    dtmf_label.set_style_text_color(lv.color_hex(0xffff00), 0)  # 黄色
+    dtmf_label.set_pos(130, 70)
+    dtmf.digits = ""
+    
     # 创建音频条状图
     create_audio_bars(audio_container)
     
+    # 开始后台采集
+    start_audio_capture()
+    
     # Position selection box over first item (back button) by default
     current_selection = 0
     x, y = item_positions[current_selection]
@@ -1029,29 +672,42 @@ def microphone():
     while True:
         key = encoder.update()
         
-        if key == "down":
-            # Move selection down
-            old_selection = current_selection
-            current_selection = (current_selection + 1) % 1
-            
-        elif key == "up":
-            # Move selection up
-            old_selection = current_selection
-            current_selection = (current_selection - 1) % 1
-            
+        if key in ("down", "up"):
+            # Move selection
+            current_selection = (current_selection + (1 if key == "down" else -1)) % len(selection_items)
+            x, y = item_positions[current_selection]
+            width, height = item_sizes[current_selection]
+            selection_box.set_size(width, height)
+            selection_box.set_pos(x, y)
 
         elif key == "enter":
             # Check if back button is selected
             if current_selection == 0:
                 break  # Exit the loop to return to main page
-            # For other selections, you can add specific handling here
             if current_selection == 1:
-                pass
+                if set_voice_recording(not voice_recording):
+                    record_label.set_text("REC: ON" if voice_recording else "REC: OFF")
+                else:
+                    record_label.set_text("REC: NO SD")
         
         # 更新音频可视化
         update_audio_bars(0)  # 传递一个参数，条形图的索引（从0开始）
+        
+        if dtmf.digits:
+            dtmf_label.set_text("DTMF: " + dtmf.digits[-16:])
+        
+        if voice_gate is not None:
+            # 语音状态、有语音的数据块占比和睡眠中可能漏掉开头的语音
+            status_label.set_text("%s  VOICE %d%%  MISSED %d" % (
+                "SPEECH" if voice_gate.state else "LISTENING...",
+                voice_gate.duty_cycle(), voice_gate.missed_onsets))
+            if VAD_LIGHT_SLEEP and voice_gate.may_sleep():
+                sleep_until_next_block()
+                continue
         time.sleep_ms(50)  # 50ms更新一次，约20FPS
             
+    # 停止采集，释放I2S
+    stop_audio_capture()
                 
     # Return to original page by recreating all elements
     recreate_main_page()
@@ -1,8 +1,25 @@
 import lvgl as lv
 import time
+import os
+from machine import Pin, I2S
+from wav import WavWriter, WavReader, WavPlayer
+from audio_capture import AudioCapture
 
 recreate_main_page = None
 encoder = None
+i2c_bus = None  # The factory's I2C(0), shared with the keypad, vibration motor and codec
+
+RECORD_FILE = "/sd/record.wav"
+RECORD_BUFFERS = 8          # Capture blocks queued while the card is busy
+PLAY_BLOCK_BYTES = 4096     # Read-ahead block size
+PLAY_BUFFERS = 4            # Read-ahead depth
+STATUS_INTERVAL = 500       # Status label refresh interval (ms)
+
+# Speaker output (ES8311 DAC)
+I2S_ID = 0
+SCK_PIN = 11
+WS_PIN = 18
+SD_PIN = 45
 
 def set_references(recreate_func, encoder_obj=None):
     global recreate_main_page, encoder
@@ -10,6 +27,88 @@ def set_references(recreate_func, encoder_obj=None):
     if encoder_obj is not None:
         encoder = encoder_obj
 
+def set_i2c_bus(bus):
+    global i2c_bus
+    i2c_bus = bus
+
+def sd_mounted():
+    try:
+        os.statvfs('/sd')
+        return True
+    except OSError:
+        return False
+
+class Recorder:
+    """Microphone -> non-blocking capture -> WAV on the SD card"""
+
+    def __init__(self, path):
+        import lib.microphone as microphone_module
+        self._mic = microphone_module
+        if not microphone_module.init_audio_codec() or microphone_module.mic_i2s is None:
+            raise OSError("microphone not available")
+        self.writer = WavWriter(path, rate=16000)
+        self.capture = AudioCapture(microphone_module.mic_i2s, buffers=RECORD_BUFFERS)
+        self.capture.subscribe(self.writer.write)
+        self.capture.start()
+
+    def service(self):
+        self.capture.service()
+
+    def status(self):
+        return "REC %d.%ds  %d KB/s  overruns %d" % (
+            self.writer.duration_ms() // 1000, self.writer.duration_ms() // 100 % 10,
+            self.writer.throughput() // 1024, self.capture.overruns)
+
+    def stop(self):
+        self.capture.stop()
+        self.capture.service()
+        self.writer.close()
+        self._mic.stop_audio_capture()
+
+class Player:
+    """WAV on the SD card -> read-ahead ring -> non-blocking I2S -> ES8311"""
+
+    def __init__(self, path):
+        from es8311 import ES8311
+        if i2c_bus is None:
+            raise OSError("codec I2C bus not set")
+        self.reader = WavReader(path)
+        self.codec = ES8311(i2c=i2c_bus, mck=10, rate=self.reader.rate)
+        self.codec.power_on()
+        self.codec.set_volume(70)
+        self.i2s = I2S(
+            I2S_ID,
+            sck=Pin(SCK_PIN),
+            ws=Pin(WS_PIN),
+            sd=Pin(SD_PIN),
+            mode=I2S.TX,
+            bits=self.reader.bits,
+            format=I2S.STEREO if self.reader.channels == 2 else I2S.MONO,
+            rate=self.reader.rate,
+            ibuf=PLAY_BLOCK_BYTES * 2,
+        )
+        self.player = WavPlayer(self.i2s, self.reader, PLAY_BLOCK_BYTES, PLAY_BUFFERS)
+        self.player.start()
+
+    @property
+    def finished(self):
+        return self.player.finished
+
+    def service(self):
+        # Top up every free slot of the read-ahead ring
+        while self.player.service():
+            pass
+
+    def status(self):
+        played = self.player.bytes_read * 100 // max(self.reader.data_bytes, 1)
+        return "PLAY %d%%  %d KB/s  underruns %d" % (
+            played, self.player.throughput() // 1024, self.player.underruns)
+
+    def stop(self):
+        self.player.stop()
+        self.i2s.deinit()
+        self.codec.power_off()
+
 def music():
     # Clear all current screen elements
     scr = lv.screen_active()
@@ -19,31 +118,100 @@ def music():
         if child is None:
             break
         child.delete()
-    
-    # Create the color object for screen test
-    color_obj = lv.obj(scr)
-    color_obj.set_size(480, 320)  # Match screen size after rotation
-    color_obj.align(lv.ALIGN.CENTER, 0, 0)
-    
-    # Create inversion style similar to images
-    inv_style = lv.style_t()
-    inv_style.init()
-    inv_style.set_bg_opa(lv.OPA.COVER)
-    inv_style.set_blend_mode(lv.BLEND_MODE.DIFFERENCE)
-    color_obj.add_style(inv_style, 0)
-    
-    color_obj.set_style_bg_color(lv.color_hex(0xffffff), 0)
-    print("music")
-    time.sleep(2)
-    # Clear the screen again to prepare for returning to original page
-    scr = lv.screen_active()
+
+    # Set background to black
+    scr.set_style_bg_color(lv.color_hex(0x000000), 0)
+
+    # Create a separate selection box object that will overlay on top of items
+    selection_box = lv.obj(scr)
+    selection_box.set_style_border_width(4, 0)  # Thick white border
+    selection_box.set_style_border_color(lv.color_hex(0xffffff), 0)
+    selection_box.set_style_border_opa(lv.OPA.COVER, 0)
+    selection_box.set_style_bg_opa(lv.OPA.TRANSP, 0)  # Transparent background
+    selection_box.set_style_radius(3, 0)  # Slightly rounded corners
+    selection_box.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)  # Disable scrollbar
+
+    item_positions = [(12, 50), (15, 90), (15, 130)]
+    item_sizes = [(30, 30), (440, 30), (440, 30)]
+
+    # Item 0: Back button (lv.SYMBOL.LEFT)
+    symbol_left_label = lv.label(scr)
+    symbol_left_label.set_text(lv.SYMBOL.LEFT)
+    symbol_left_label.set_style_text_font(lv.font_montserrat_20, 0)
+    symbol_left_label.set_style_text_color(lv.color_hex(0xffffff), 0)  # White text
+    symbol_left_label.set_pos(20, 55)
+
+    # Item 1: Record
+    record_label = lv.label(scr)
+    record_label.set_text(lv.SYMBOL.AUDIO + "  Record")
+    record_label.set_style_text_font(lv.font_montserrat_20, 0)
+    record_label.set_style_text_color(lv.color_hex(0xffffff), 0)  # White text
+    record_label.set_pos(20, 95)
+
+    # Item 2: Play
+    play_label = lv.label(scr)
+    play_label.set_text(lv.SYMBOL.PLAY + "  Play " + RECORD_FILE)
+    play_label.set_style_text_font(lv.font_montserrat_20, 0)
+    play_label.set_style_text_color(lv.color_hex(0xffffff), 0)  # White text
+    play_label.set_pos(20, 135)
+
+    # Status line: throughput and under/overruns
+    status_label = lv.label(scr)
+    status_label.set_style_text_font(lv.font_montserrat_16, 0)
+    status_label.set_style_text_color(lv.color_hex(0x00ff00), 0)  # Green text
+    status_label.set_pos(20, 185)
+    status_label.set_text("Ready" if sd_mounted() else "No SD card")
+
+    current_selection = 0
+    x, y = item_positions[current_selection]
+    width, height = item_sizes[current_selection]
+    selection_box.set_size(width, height)
+    selection_box.set_pos(x, y)
+
+    session = None      # Active Recorder or Player
+    last_status = 0
+
     while True:
-        child = scr.get_child(0)
-        if child is None:
-            break
-        child.delete()
-    
-    # Return to original page by recreating all elements
-    recreate_main_page()
+        current_time = time.ticks_ms()
+        key = encoder.update()
+
+        if key in ("down", "up") and session is None:
+            current_selection = (current_selection + (1 if key == "down" else -1)) % 3
+            x, y = item_positions[current_selection]
+            width, height = item_sizes[current_selection]
+            selection_box.set_size(width, height)
+            selection_box.set_pos(x, y)
+
+        elif key == "enter":
+            if session is not None:
+                # Second press stops recording or playback
+                session.stop()
+                status_label.set_text("Stopped: " + session.status())
+                session = None
+            elif current_selection == 0:
+                break  # Exit the loop to return to main page
+            elif not sd_mounted():
+                status_label.set_text("No SD card")
+            else:
+                try:
+                    session = Recorder(RECORD_FILE) if current_selection == 1 else Player(RECORD_FILE)
+                except (OSError, ValueError) as e:
+                    status_label.set_text("Error: %s" % e)
 
+        if session is not None:
+            session.service()
+            if isinstance(session, Player) and session.finished:
+                session.stop()
+                status_label.set_text("Done: " + session.status())
+                session = None
+            elif time.ticks_diff(current_time, last_status) > STATUS_INTERVAL:
+                last_status = current_time
+                status_label.set_text(session.status())
 
+        time.sleep_ms(10)
+
+    if session is not None:
+        session.stop()
+
+    # Return to original page by recreating all elements
+    recreate_main_page()
@@ -1,5 +1,7 @@
 import lvgl as lv
 import time
+from sx1262 import SX1262
+from airtime import DutyCycleLedger, time_on_air_us
 
 recreate_main_page = None
 encoder = None
@@ -19,12 +21,117 @@ dropdown_options_list = [
 dropdown_item_height = 25
 dropdown_max_visible = 3
 
+spi_bus = None
+lora = None  # SX1262 driver, created on first use by get_radio()
+configuring = False  # Set while this page sends the radio a command sequence; the chat link timer waits
+ledger = DutyCycleLedger()  # Air time sent per band over the last hour
+REFERENCE_PAYLOAD = 32  # Bytes, a short chat message, for the air time estimate
+
 def set_references(recreate_func, encoder_obj=None):
     global recreate_main_page, encoder
     recreate_main_page = recreate_func
     if encoder_obj is not None:
         encoder = encoder_obj
 
+def set_spi_bus(bus):
+    global spi_bus
+    spi_bus = bus
+
+def option_value(index, selections=None):
+    """Number in the selected option of a dropdown ("868MHZ" -> 868.0), None if it has none"""
+    if selections is None:
+        selections = dropdown_selections
+    text = dropdown_options_list[index][selections[index]]
+    digits = text.rstrip("MHZKzdBms")
+    return float(digits) if digits else None
+
+def radio_enabled(selections=None):
+    """True when the first dropdown is set to ENABLE"""
+    if selections is None:
+        selections = dropdown_selections
+    return dropdown_options_list[0][selections[0]] == "ENABLE"
+
+def radio_mode(selections=None):
+    """The option selected in the mode dropdown ("RX Mode", ...)"""
+    if selections is None:
+        selections = dropdown_selections
+    return dropdown_options_list[1][selections[1]]
+
+def radio_config(selections=None):
+    """SX1262.begin() arguments from the dropdown selections"""
+    return {
+        "freq_mhz": option_value(2, selections),
+        "bw_khz": option_value(3, selections) or 125,
+        "power": int(option_value(4, selections)),
+        "cr": int(option_value(6, selections)),
+        "sf": int(option_value(7, selections)),
+    }
+
+def airtime_text(selections=None):
+    """Air time, packet rate and throughput of a reference packet for the selections"""
+    config = radio_config(selections)
+    toa_us = time_on_air_us(REFERENCE_PAYLOAD, config["sf"], config["bw_khz"], config["cr"])
+    interval_ms = option_value(5, selections)
+    per_hour = int(3_600_000_000 // max(interval_ms * 1000, toa_us))
+    limit = ledger.limit_us(config["freq_mhz"])
+    if limit:
+        per_hour = min(per_hour, limit // toa_us)
+    text = "%dB: %d ms, %d pkt/h, %d bps" % (REFERENCE_PAYLOAD, (toa_us + 500) // 1000, per_hour,
+                                             REFERENCE_PAYLOAD * 8 * per_hour // 3600)
+    if limit:
+        text += ", %d%% used" % ledger.used_percent(config["freq_mhz"])
+    return text
+
+def get_radio():
+    """The LoRa radio, configured from this page; None if it is disabled here or cannot start"""
+    global lora
+    if not radio_enabled():
+        return None
+    if lora is None and spi_bus is not None:
+        try:
+            device = SX1262.create(spi_bus)
+            device.ledger = ledger
+            device.begin(**radio_config())
+        except OSError as e:
+            print("SX1262 init error:", e)
+            return None
+        lora = device
+        apply_mode()
+    return lora
+
+def apply_mode():
+    """Put a running radio in the state the enable and mode dropdowns select
+
+    Disabled: sleep. RX Mode: continuous RX. Any other mode: standby,
+    packets are only sent; the driver has no continuous-wave test mode,
+    so TxContinuousWave is treated like TX Mode.
+    """
+    if lora is None:
+        return
+    if not radio_enabled():
+        lora.sleep()
+    elif radio_mode() == "RX Mode":
+        if not lora.receiving:
+            lora.start_receive()
+    else:
+        lora.standby()
+
+def apply_settings():
+    """Push the dropdown selections to a running radio"""
+    global configuring
+    if lora is None:
+        return
+    config = radio_config()
+    configuring = True
+    try:
+        lora.standby()
+        lora.set_frequency(config["freq_mhz"])
+        lora.set_output_power(config["power"])
+        lora.set_modulation(config["bw_khz"], config["sf"], config["cr"])
+        apply_mode()
+    finally:
+        configuring = False
+
 def update_item_positions(selection_items, scroll_offset, dropdown_displays=None, dropdown_lists=None, dropdown_arrows=None, dropdown_x_positions=None, dropdown_widths=None):
     """Update the visual position of all items based on scroll offset"""
     base_y_start = 55
@@ -307,6 +414,13 @@ def radio(should_recreate=True):
     item_positions.append((15, 410))  # Adjusted position: left 3px total, up 4px total
     item_sizes.append((440, 30))  # Long size
     
+    # Air time of a reference packet and the duty-cycle budget, updated live
+    airtime_label = lv.label(scr)
+    airtime_label.set_text(airtime_text())
+    airtime_label.set_style_text_font(lv.font_montserrat_16, 0)
+    airtime_label.set_style_text_color(lv.color_hex(0xffffff), 0)  # White text
+    airtime_label.set_pos(60, 58)
+
     # Position selection box over first item (back button) by default
     current_selection = 0
     x, y = item_positions[current_selection]
@@ -394,6 +508,11 @@ def radio(should_recreate=True):
                 # Update display text
                 dropdown_displays[current_dropdown_index].set_text(options[current_dropdown_selection])
                 
+                # Preview the air time with the highlighted option
+                preview = list(dropdown_selections)
+                preview[current_dropdown_index] = current_dropdown_selection
+                airtime_label.set_text(airtime_text(preview))
+                
             elif key == "up":
                 # Move selection up in dropdown
                 old_selection = current_dropdown_selection
@@ -433,6 +552,11 @@ def radio(should_recreate=True):
                 # Update display text
                 dropdown_displays[current_dropdown_index].set_text(options[current_dropdown_selection])
                 
+                # Preview the air time with the highlighted option
+                preview = list(dropdown_selections)
+                preview[current_dropdown_index] = current_dropdown_selection
+                airtime_label.set_text(airtime_text(preview))
+                
             elif key == "enter":
                 # Confirm selection and exit dropdown mode
                 selected_option = dropdown_options_list[current_dropdown_index][current_dropdown_selection]
@@ -440,6 +564,8 @@ def radio(should_recreate=True):
                 
                 # Save selection state
                 dropdown_selections[current_dropdown_index] = current_dropdown_selection
+                apply_settings()
+                airtime_label.set_text(airtime_text())
                 
                 # Hide dropdown list
                 dropdown_lists[current_dropdown_index].set_height(0)
@@ -481,6 +607,7 @@ def radio(should_recreate=True):
                 
                 # Update all item positions for scrolling
                 update_item_positions(selection_items, scroll_offset, dropdown_displays=dropdown_displays, dropdown_lists=dropdown_lists, dropdown_arrows=dropdown_arrows, dropdown_x_positions=[235] * 9, dropdown_widths=[200] * 9)
+                airtime_label.set_pos(60, 58 - scroll_offset)
                 
             elif key == "up":
                 # Move selection up
@@ -501,6 +628,7 @@ def radio(should_recreate=True):
                 
                 # Update all item positions for scrolling
                 update_item_positions(selection_items, scroll_offset, dropdown_displays=dropdown_displays, dropdown_lists=dropdown_lists, dropdown_arrows=dropdown_arrows, dropdown_x_positions=[235] * 9, dropdown_widths=[200] * 9)
+                airtime_label.set_pos(60, 58 - scroll_offset)
                 
             elif key == "enter":
                 # Check if back button is selected
@@ -78,6 +78,13 @@ def get_system_info():
                 datetime[0], datetime[1], datetime[2],
                 datetime[4], datetime[5], datetime[6]
             )
+            # 标记RTC已由GPS PPS校准
+            try:
+                import lib.gps as gps_module
+                if gps_module.gps_time.pairs:
+                    formatted_time += " GPS"
+            except Exception:
+                pass
             system_data['rtc_time'] = formatted_time
         except Exception as e:
             # 如果machine.RTC不可用，回退到系统时间
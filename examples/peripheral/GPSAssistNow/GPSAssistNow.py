@@ -0,0 +1,121 @@
+'''
+ * @file      GPSAssistNow.py
+ * @license   MIT
+ * @copyright Copyright (c) 2026  ShenZhen XinYuan Electronic Technology Co., Ltd
+ * @date      2026-10-18
+'''
+from machine import SPI, Pin, I2C, SDCard
+import lcd_bus
+import st7796
+import lvgl as lv
+import vibration
+import _thread
+import task_handler
+import os
+import time
+from gps_service import GPSService
+from ubx import UBXReader
+from assistnow import AssistNowLoader, TTFFMeter, rtc_today
+
+# AssistNow Offline/Autonomous file downloaded from Thingstream (see docs/assistNow)
+MGA_FILE = "/sd/mgaoffline.ubx"
+
+NFC_CS = 39       # NFC Chip Select
+LORA_CS = 36      # LoRa Chip Select
+NFC_RST = 21      # NFC Reset
+LORA_RST = 47     # LoRa Reset
+SD_CS = 21
+
+i2c = I2C(0, scl=Pin(2), sda=Pin(3), freq=400000)
+vb = vibration.vibrationMotor(i2c)
+def vibrate_motor():
+    vb.vibrate(1, 200)
+
+lv.init()
+spi_bus = SPI.Bus(host = 1, mosi=34, miso=33, sck=35)
+try:
+    display_bus = lcd_bus.SPIBus(
+        spi_bus=spi_bus,
+        dc=37,
+        cs=38,
+        freq=80000000
+    )
+
+    display = st7796.ST7796(
+        data_bus=display_bus,
+        display_width=320,
+        display_height=480,
+        reset_state=st7796.STATE_LOW,
+        color_space=lv.COLOR_FORMAT.RGB565,
+        color_byte_order=st7796.BYTE_ORDER_RGB,
+        rgb565_byte_swap=True
+    )
+
+    display.set_power(True)
+    display.init()
+    display.set_rotation(lv.DISPLAY_ROTATION._90)
+except:
+    pass
+
+_thread.start_new_thread(vibrate_motor, ())
+backlight_pin = Pin(42, Pin.OUT)
+backlight_pin.value(1)
+
+scrn = lv.screen_active()
+scrn.set_style_bg_color(lv.color_hex(0x000000), 0)
+
+label = lv.label(scrn)
+label.set_text('GPS AssistNow example')
+label.set_style_text_font(lv.font_montserrat_16, 0)
+label.center()
+
+task_handler.TaskHandler(33)
+
+def install_sd():
+    try:
+        for pin_num in (NFC_RST, NFC_CS, LORA_CS, SD_CS, LORA_RST):
+            Pin(pin_num, Pin.OUT).value(1)
+        sd = SDCard(spi_bus=spi_bus, cs=SD_CS)
+        os.mount(sd, "/sd")
+        return True
+    except Exception as e:
+        print("Failed to detect or mount SD Card:", e)
+        return False
+
+# The service owns the UART; injection borrows it before the first poll
+service = GPSService.create()
+fix = service.fix
+ubx_reader = UBXReader(service.uart, fix=fix)
+
+aided = False
+if install_sd():
+    loader = AssistNowLoader(ubx_reader)
+    try:
+        aided = loader.inject(MGA_FILE, today=rtc_today())
+        print("AssistNow: sent %d (%d resends), acked %d (%d orbit), rejected %d, timeouts %d, skipped %d in %d ms" %
+              (loader.sent, loader.resends, loader.acked, loader.ano_acked, loader.rejected,
+               loader.timeouts, loader.skipped, loader.elapsed_ms))
+    except OSError as e:
+        print("AssistNow: cannot read", MGA_FILE, e)
+
+# Injection consumed the UART, start NMEA parsing from a clean buffer
+service.reader.reset()
+meter = TTFFMeter(fix, aided)
+
+while True:
+    service.poll()
+    ttff = meter.update()
+
+    if ttff is None:
+        age = time.ticks_diff(time.ticks_ms(), meter.start) // 1000
+        text = "Waiting for fix... %d s\nAided: %s\nSats in view: %d" % (age, aided, sum(fix.sats_in_view))
+    else:
+        gain = meter.improvement_ms()
+        text = "TTFF: %.1f s (%s)\nLat: %.5f\nLon: %.5f" % (ttff / 1000, "aided" if aided else "unaided",
+                                                          fix.latitude(), fix.longitude())
+        if gain is not None:
+            text += "\nAssistNow saved %.1f s" % (gain / 1000)
+    label.set_text(text)
+    label.center()
+
+    time.sleep_ms(200)
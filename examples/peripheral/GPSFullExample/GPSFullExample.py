@@ -1,5 +1,5 @@
 import time
-from machine import SPI, Pin, I2C, UART
+from machine import SPI, Pin, I2C
 import sys
 import lcd_bus
 import st7796
@@ -9,29 +9,17 @@ import vibration
 import _thread
 import task_handler
 import re
+from gps_service import GPSService
 
-GPS_TX = 4      # GPS TX → ESP32 RX
-GPS_RX = 12     # GPS RX → ESP32 TX
 GPS_PPS = 13
 
 pps = Pin(GPS_PPS, Pin.IN)
 
-uart = UART(1, baudrate=9600, tx=Pin(GPS_RX), rx=Pin(GPS_TX))
+service = GPSService.create()
+nmea_parser = service.parser
+fix = service.fix
 
 rx_chars = 0
-last_fix_time = time.ticks_ms()
-
-gps_data = {
-    "lat": None,
-    "lng": None,
-    "sats": 0,
-    "hdop": 0,
-    "alt": 0,
-    "speed": 0,
-    "date": (0, 0, 0),
-    "time": (0, 0, 0),
-    "valid": False,
-}
 
 i2c = I2C(0, scl=Pin(2), sda=Pin(3), freq=400000)
 vb = vibration.vibrationMotor(i2c)
@@ -78,51 +66,6 @@ label.center()
 
 task_handler.TaskHandler(33)
 
-def parse_latlng(v, d):
-    if v == "":
-        return None
-    deg = int(v[:2])
-    mins = float(v[2:])
-    sign = -1 if d in ("S", "W") else 1
-    return sign * (deg + mins / 60)
-
-def parse_nmea(line):
-    global gps_data, last_fix_time
-
-    parts = line.split(",")
-    if line.startswith("$GPGGA"):
-        if len(parts[1]) >= 6:
-            hh = int(parts[1][0:2])
-            mm = int(parts[1][2:4])
-            ss = int(parts[1][4:6])
-            gps_data["time"] = (hh, mm, ss)
-
-        gps_data["lat"] = parse_latlng(parts[2], parts[3])
-        gps_data["lng"] = parse_latlng(parts[4], parts[5])
-        gps_data["sats"] = int(parts[7] or 0)
-        gps_data["hdop"] = float(parts[8] or 0)
-        gps_data["alt"] = float(parts[9] or 0)
-
-        gps_data["valid"] = gps_data["sats"] >= 3
-        if gps_data["valid"]:
-            last_fix_time = time.ticks_ms()
-
-    elif line.startswith("$GPRMC"):
-        if parts[2] == "A":
-            gps_data["valid"] = True
-            last_fix_time = time.ticks_ms()
-
-        if len(parts[9]) == 6:
-            dd = int(parts[9][0:2])
-            mm = int(parts[9][2:4])
-            yy = int(parts[9][4:6]) + 2000
-            gps_data["date"] = (yy, mm, dd)
-
-        gps_data["lat"] = parse_latlng(parts[3], parts[4])
-        gps_data["lng"] = parse_latlng(parts[5], parts[6])
-
-        gps_data["speed"] = float(parts[7] or 0) * 1.852
-
 print("FullExample.py (MicroPython)")
 print("An extensive example of many interesting GPS features")
 print()
@@ -130,47 +73,29 @@ print("Sats HDOP  Latitude   Longitude   Fix  Date       Time     Date Alt    Co
 print("           (deg)      (deg)       Age                      Age  (m)    --- from GPS ----  ---- to London  ----  RX    RX        Fail")
 print("----------------------------------------------------------------------------------------------------------------------------------------")
 
-buffer = b""
-
 while True:
-    if uart.any():
-        b = uart.read(1)
-        
-        if not b:
-            continue
-        rx_chars += 1
-
-        if b == b'\n':
-            try:
-                line = buffer.decode("latin-1").strip()
-                
-            except:
-                buffer = b""
-                continue
-
-            if line.startswith("$"):
-                parse_nmea(line)
-
-            buffer = b""
-        else:
-            buffer += b
-
-    age = time.ticks_diff(time.ticks_ms(), last_fix_time)
-
-    year, month, day = gps_data["date"]
-    hh, mm, ss = gps_data["time"]
-
-    lat = gps_data["lat"] or 0
-    lng = gps_data["lng"] or 0
-    sats = gps_data["sats"]
-    hdop = gps_data["hdop"]
-    alt = gps_data["alt"]
-    speed = gps_data["speed"]
-
-    label.set_text(f"Fix: {age}\nSats: {sats}\nHDOP: {hdop}\nLat: {lat}\nLon: {lng}\nDate: {year}/{month}/{day}\nTime: {hh}/{mm}/{ss}\nAlt: {alt}\nSpeed: {speed}\nRX: {rx_chars}")
+    # Drain everything received since the last pass
+    service.poll()
+    rx_chars = service.rx_chars
+    sentences = nmea_parser.sentences
+    failed = nmea_parser.checksum_failed
+
+    age = time.ticks_diff(time.ticks_ms(), fix.fix_ticks)
+
+    year, month, day = fix.year, fix.month, fix.day
+    hh, mm, ss = fix.hour, fix.minute, fix.second
+
+    lat = fix.latitude() or 0
+    lng = fix.longitude() or 0
+    sats = fix.sats_used
+    hdop = fix.hdop / 100
+    alt = fix.alt / 100
+    speed = fix.speed * 0.036
+
+    label.set_text(f"Fix: {age}\nSats: {sats}\nHDOP: {hdop}\nLat: {lat}\nLon: {lng}\nDate: {year}/{month}/{day}\nTime: {hh}/{mm}/{ss}\nAlt: {alt}\nSpeed: {speed}\nRX: {rx_chars}\nSentences: {sentences}\nChecksum Fail: {failed}")
     label.center()
     
-    print("Fix:%u  Sats:%u  HDOP:%.1f  Lat:%.5f  Lon:%.5f   Date:%d/%d/%d   Time:%d/%d/%d  Alt:%.2f m   Speed:%.2f  RX:%u" %
-        (age, sats, hdop, lat, lng, year, month, day, hh, mm, ss, alt, speed, rx_chars))
+    print("Fix:%u  Sats:%u  HDOP:%.1f  Lat:%.5f  Lon:%.5f   Date:%d/%d/%d   Time:%d/%d/%d  Alt:%.2f m   Speed:%.2f  RX:%u  Sentences:%u  Fail:%u" %
+        (age, sats, hdop, lat, lng, year, month, day, hh, mm, ss, alt, speed, rx_chars, sentences, failed))
 
     time.sleep(1)
\ No newline at end of file
@@ -0,0 +1,107 @@
+'''
+ * @file      GPSService.py
+ * @license   MIT
+ * @copyright Copyright (c) 2026  ShenZhen XinYuan Electronic Technology Co., Ltd
+ * @date      2026-10-18
+'''
+from machine import SPI, Pin, I2C, RTC
+import lcd_bus
+import st7796
+import lvgl as lv
+import vibration
+import _thread
+import task_handler
+import struct
+import asyncio
+from gps_service import GPSService
+from gps_time import GPSTime
+
+GPS_PPS = 13
+
+UI_INTERVAL = 500        # Label refresh (ms)
+LOG_INTERVAL = 1000      # Console log line (ms)
+BEACON_INTERVAL = 30000  # Position beacon (ms)
+
+i2c = I2C(0, scl=Pin(2), sda=Pin(3), freq=400000)
+vb = vibration.vibrationMotor(i2c)
+def vibrate_motor():
+    vb.vibrate(1, 200)
+
+lv.init()
+try:
+    spi_bus = SPI.Bus(host = 1, mosi=34, miso=33, sck=35)
+    display_bus = lcd_bus.SPIBus(
+        spi_bus=spi_bus,
+        dc=37,
+        cs=38,
+        freq=80000000
+    )
+
+    display = st7796.ST7796(
+        data_bus=display_bus,
+        display_width=320,
+        display_height=480,
+        reset_state=st7796.STATE_LOW,
+        color_space=lv.COLOR_FORMAT.RGB565,
+        color_byte_order=st7796.BYTE_ORDER_RGB,
+        rgb565_byte_swap=True
+    )
+
+    display.set_power(True)
+    display.init()
+    display.set_rotation(lv.DISPLAY_ROTATION._90)
+except:
+    pass
+
+_thread.start_new_thread(vibrate_motor, ())
+backlight_pin = Pin(42, Pin.OUT)
+backlight_pin.value(1)
+
+scrn = lv.screen_active()
+scrn.set_style_bg_color(lv.color_hex(0x000000), 0)
+
+label = lv.label(scrn)
+label.set_text('GPS service example')
+label.set_style_text_font(lv.font_montserrat_16, 0)
+label.center()
+
+task_handler.TaskHandler(33)
+
+# One UART, parsed once, shared by every consumer below
+service = GPSService.create()
+gps_time = GPSTime(Pin(GPS_PPS, Pin.IN))
+rtc = RTC()
+beacon = bytearray(14)
+
+def on_ui(fix):
+    label.set_text("Sats: %d\nLat: %.5f\nLon: %.5f\nSpeed: %.1f km/h\nPPS: %s" %
+                   (fix.sats_used, fix.latitude() or 0, fix.longitude() or 0, fix.speed * 0.036,
+                    "locked" if gps_time.locked else "waiting"))
+    label.center()
+
+def on_log(fix):
+    if fix.valid:
+        print("%02d:%02d:%02d,%.6f,%.6f,%.1f" %
+              (fix.hour, fix.minute, fix.second, fix.latitude(), fix.longitude(), fix.alt / 100))
+
+def on_beacon(fix):
+    # Compact position report, ready to hand to the LoRa radio
+    if fix.valid and fix.lat is not None:
+        struct.pack_into("<iiih", beacon, 0, fix.lat, fix.lng, fix.alt, min(fix.speed, 0x7FFF))
+        print("Beacon:", beacon.hex())
+
+service.subscribe(gps_time.on_fix_time)
+service.subscribe(on_ui, UI_INTERVAL)
+service.subscribe(on_log, LOG_INTERVAL)
+service.subscribe(on_beacon, BEACON_INTERVAL)
+
+async def time_sync():
+    while True:
+        gps_time.discipline(rtc)
+        await asyncio.sleep(1)
+
+async def main():
+    service.start()
+    await time_sync()
+
+asyncio.run(main())
@@ -0,0 +1,143 @@
+'''
+ * @file      GPSTrackLogger.py
+ * @license   MIT
+ * @copyright Copyright (c) 2026  ShenZhen XinYuan Electronic Technology Co., Ltd
+ * @date      2026-10-18
+'''
+from machine import SPI, Pin, I2C, SDCard
+import lcd_bus
+import st7796
+import lvgl as lv
+import vibration
+import rotary
+import _thread
+import task_handler
+import os
+import time
+from gps_service import GPSService
+from track_log import TrackLogger, export_gpx, epoch_seconds
+from track_simplify import TrackSimplifier
+
+# Binary track on the SD card; press the encoder button to export it as GPX
+TRACK_FILE = "/sd/track.bin"
+GPX_FILE = "/sd/track.gpx"
+FLUSH_INTERVAL = 60000  # Write completed sectors at least this often (ms)
+SIMPLIFY_TOLERANCE_M = 5.0  # Drop points that stay within this distance of the track line
+
+NFC_CS = 39       # NFC Chip Select
+LORA_CS = 36      # LoRa Chip Select
+NFC_RST = 21      # NFC Reset
+LORA_RST = 47     # LoRa Reset
+SD_CS = 21
+
+i2c = I2C(0, scl=Pin(2), sda=Pin(3), freq=400000)
+vb = vibration.vibrationMotor(i2c)
+def vibrate_motor():
+    vb.vibrate(1, 200)
+
+lv.init()
+spi_bus = SPI.Bus(host = 1, mosi=34, miso=33, sck=35)
+try:
+    display_bus = lcd_bus.SPIBus(
+        spi_bus=spi_bus,
+        dc=37,
+        cs=38,
+        freq=80000000
+    )
+
+    display = st7796.ST7796(
+        data_bus=display_bus,
+        display_width=320,
+        display_height=480,
+        reset_state=st7796.STATE_LOW,
+        color_space=lv.COLOR_FORMAT.RGB565,
+        color_byte_order=st7796.BYTE_ORDER_RGB,
+        rgb565_byte_swap=True
+    )
+
+    display.set_power(True)
+    display.init()
+    display.set_rotation(lv.DISPLAY_ROTATION._90)
+except:
+    pass
+
+_thread.start_new_thread(vibrate_motor, ())
+backlight_pin = Pin(42, Pin.OUT)
+backlight_pin.value(1)
+
+scrn = lv.screen_active()
+scrn.set_style_bg_color(lv.color_hex(0x000000), 0)
+
+label = lv.label(scrn)
+label.set_text('GPS track logger example')
+label.set_style_text_font(lv.font_montserrat_16, 0)
+label.center()
+
+task_handler.TaskHandler(33)
+encoder = rotary.RotaryEncoder(40, 41, 7)
+
+def install_sd():
+    try:
+        for pin_num in (NFC_RST, NFC_CS, LORA_CS, SD_CS, LORA_RST):
+            Pin(pin_num, Pin.OUT).value(1)
+        sd = SDCard(spi_bus=spi_bus, cs=SD_CS)
+        os.mount(sd, "/sd")
+        return True
+    except Exception as e:
+        print("Failed to detect or mount SD Card:", e)
+        return False
+
+if not install_sd():
+    label.set_text("No SD card")
+    raise SystemExit
+
+service = GPSService.create()
+fix = service.fix
+
+logger = TrackLogger(TRACK_FILE)
+simplifier = TrackSimplifier(SIMPLIFY_TOLERANCE_M)
+last_flush = time.ticks_ms()
+last_label = 0
+last_t = 0
+
+def on_fix(fix):
+    """Log each new second of a valid fix, keeping only the points the simplifier needs"""
+    global last_t
+    if fix.valid and fix.lat is not None and fix.year >= 2000:
+        t = epoch_seconds(fix.year, fix.month, fix.day, fix.hour, fix.minute, fix.second)
+        if t != last_t:
+            last_t = t
+            point = (t, fix.lat, fix.lng, fix.alt, fix.speed)
+            kept = simplifier.push(fix.lat / 1000000, fix.lng / 1000000, point)
+            if kept is not None:
+                logger.append(*kept)
+
+service.subscribe(on_fix)
+
+while True:
+    service.poll()
+
+    now = time.ticks_ms()
+    if time.ticks_diff(now, last_flush) > FLUSH_INTERVAL:
+        logger.flush()
+        last_flush = now
+
+    if encoder.update() == "enter":
+        kept = simplifier.flush()
+        if kept is not None:
+            logger.append(*kept)
+        logger.close()
+        label.set_text("Exporting GPX...")
+        n = export_gpx(TRACK_FILE, GPX_FILE)
+        print("%d points exported to %s" % (n, GPX_FILE))
+        logger = TrackLogger(TRACK_FILE)
+        simplifier = TrackSimplifier(SIMPLIFY_TOLERANCE_M)
+
+    if time.ticks_diff(now, last_label) > 1000:
+        last_label = now
+        label.set_text("Fix: %s\nPoints: %d of %d (%.1f:1)\nWritten: %d bytes\nPress to export GPX" %
+                       ("yes" if fix.valid else "no", logger.points, simplifier.points_in,
+                        simplifier.compression_ratio(), logger.bytes_written))
+        label.center()
+
+    time.sleep_ms(20)
@@ -6,9 +6,9 @@
 '''
 import os
 import time
-import math
 from machine import Pin, I2S
 from es8311 import ES8311
+from synth import Synth, play_rtttl
     # ======= ES8311 CONFIGURATION =======
 codec = ES8311(scl=2, sda=3, mck=10, rate=32000)
 codec.power_on()
@@ -38,29 +38,28 @@ audio_out = I2S(
     ibuf=BUFFER_LENGTH_IN_BYTES,
 )
 
+synth = Synth(rate=SAMPLE_RATE, voices=4)
+
 def generate_tone(frequency, duration_ms):
     """Generate a tone of specified frequency and duration"""
-    num_samples = int(SAMPLE_RATE * duration_ms / 1000)
-    samples = bytearray(num_samples * 2)  # 2 bytes per 16-bit sample
-    
-    for i in range(num_samples):
-        # Generate sine wave
-        value = int(32767 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
-        # Convert to little-endian bytes
-        samples[i * 2] = value & 0xff
-        samples[i * 2 + 1] = (value >> 8) & 0xff
-    
-    return samples
+    # Wavetable oscillator with a short attack/release, no clicks at the edges
+    return synth.tone(frequency, duration_ms)
 
 # Generate "beep" tones
 tone1 = generate_tone(1000, 200)  # 1000Hz, 200ms
 silence = bytearray(3200)  # 100ms silence (32000 samples/sec * 0.1 sec * 2 bytes/sample)
 
+RINGTONE = "Nokia:d=4,o=5,b=225:8e6,8d6,f#,g#,8c#6,8b,d,e,8b,8a,c#,e,2a"
+
 # Play "beep beep beep" sequence
 try:
     for _ in range(3):
         audio_out.write(tone1)
         audio_out.write(silence)
+
+    # Stream a ringtone, rendered block by block while it plays
+    time.sleep_ms(500)
+    play_rtttl(synth, audio_out, RINGTONE)
     
     # Wait for playback to complete
     time.sleep(2)
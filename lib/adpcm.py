@@ -0,0 +1,349 @@
+import math
+import micropython
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# IMA-ADPCM
+# --------------------------------------------------
+# 4 bits per sample, two samples per byte (first sample in the low
+# nibble). The tables and the predictor state live in one array('i'):
+# 89 step sizes, 8 index adjustments, then predictor and step index.
+_ADJ = const(89)
+_PRED = const(97)
+_INDEX = const(98)
+
+STEP_SIZES = (
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41,
+    45, 50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190,
+    209, 230, 253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724,
+    796, 876, 963, 1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272,
+    2499, 2749, 3024, 3327, 3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132,
+    7845, 8630, 9493, 10442, 11487, 12635, 13899, 15289, 16818, 18500,
+    20350, 22385, 24623, 27086, 29794, 32767,
+)
+INDEX_ADJUST = (-1, -1, -1, -1, 2, 4, 6, 8)
+
+FIR_TAPS = const(31)
+FIR_SHIFT = const(14)           # Downsampler coefficients are Q14
+
+
+@micropython.viper
+def _encode(src, n: int, dst, tbl):
+    s = ptr16(src)
+    d = ptr8(dst)
+    t = ptr32(tbl)
+    pred = t[_PRED]
+    index = t[_INDEX]
+    i = 0
+    while i < n:
+        x = s[i]
+        if x & 0x8000:
+            x -= 0x10000
+        step = t[index]
+        diff = x - pred
+        code = 0
+        if diff < 0:
+            code = 8
+            diff = 0 - diff
+        delta = step >> 3
+        if diff >= step:
+            code |= 4
+            diff -= step
+            delta += step
+        step >>= 1
+        if diff >= step:
+            code |= 2
+            diff -= step
+            delta += step
+        step >>= 1
+        if diff >= step:
+            code |= 1
+            delta += step
+        if code & 8:
+            pred -= delta
+            if pred < -32768:
+                pred = -32768
+        else:
+            pred += delta
+            if pred > 32767:
+                pred = 32767
+        index += t[_ADJ + (code & 7)]
+        if index < 0:
+            index = 0
+        elif index > 88:
+            index = 88
+        if i & 1:
+            d[i >> 1] |= code << 4
+        else:
+            d[i >> 1] = code
+        i += 1
+    t[_PRED] = pred
+    t[_INDEX] = index
+
+
+@micropython.viper
+def _decode(src, n: int, dst, tbl):
+    s = ptr8(src)
+    d = ptr16(dst)
+    t = ptr32(tbl)
+    pred = t[_PRED]
+    index = t[_INDEX]
+    i = 0
+    while i < n:
+        code = s[i >> 1]
+        if i & 1:
+            code = code >> 4
+        code &= 15
+        step = t[index]
+        delta = step >> 3
+        if code & 4:
+            delta += step
+        if code & 2:
+            delta += step >> 1
+        if code & 1:
+            delta += step >> 2
+        if code & 8:
+            pred -= delta
+            if pred < -32768:
+                pred = -32768
+        else:
+            pred += delta
+            if pred > 32767:
+                pred = 32767
+        index += t[_ADJ + (code & 7)]
+        if index < 0:
+            index = 0
+        elif index > 88:
+            index = 88
+        d[i] = pred & 0xFFFF
+        i += 1
+    t[_PRED] = pred
+    t[_INDEX] = index
+
+
+@micropython.viper
+def _decimate(work, n: int, coef, dst):
+    # Every second output of the FIR; work holds taps-1 history samples first
+    x = ptr16(work)
+    c = ptr32(coef)
+    o = ptr16(dst)
+    taps = c[0]
+    i = 0
+    j = 0
+    while i + 1 < n:
+        acc = 0
+        k = 0
+        while k < taps:
+            v = x[i + k]
+            if v & 0x8000:
+                v -= 0x10000
+            acc += c[k + 1] * v
+            k += 1
+        acc = acc >> FIR_SHIFT
+        if acc > 32767:
+            acc = 32767
+        elif acc < -32768:
+            acc = -32768
+        o[j] = acc & 0xFFFF
+        j += 1
+        i += 2
+
+
+@micropython.viper
+def _append(src, n: int, work, offset: int):
+    s = ptr16(src)
+    w = ptr16(work)
+    i = 0
+    while i < n:
+        w[offset + i] = s[i]
+        i += 1
+
+
+def _table():
+    return array("i", list(STEP_SIZES) + list(INDEX_ADJUST) + [0, 0])
+
+
+class ADPCM:
+    """IMA-ADPCM encoder/decoder state
+
+    encode() turns n int16 samples into n / 2 bytes, decode() the
+    reverse; both continue from the predictor left by the previous call.
+    The buffers are the caller's, nothing is allocated per block.
+    """
+
+    def __init__(self):
+        self._tbl = _table()
+
+    @property
+    def state(self):
+        return self._tbl[_PRED], self._tbl[_INDEX]
+
+    def reset(self, predictor=0, index=0):
+        self._tbl[_PRED] = predictor
+        self._tbl[_INDEX] = index
+
+    def encode(self, pcm, n, out):
+        """n samples from array('h') pcm into out, returns the byte count"""
+        _encode(pcm, n, out, self._tbl)
+        return (n + 1) // 2
+
+    def decode(self, data, n, pcm):
+        """n samples from ADPCM bytes into array('h') pcm"""
+        _decode(data, n, pcm, self._tbl)
+        return n
+
+
+def lowpass_fir(taps=FIR_TAPS, cutoff=0.23):
+    """Hamming-windowed sinc, cutoff in cycles per input sample"""
+    m = (taps - 1) / 2
+    h = []
+    for n in range(taps):
+        x = n - m
+        v = 2 * cutoff if x == 0 else math.sin(2 * math.pi * cutoff * x) / (math.pi * x)
+        h.append(v * (0.54 - 0.46 * math.cos(2 * math.pi * n / (taps - 1))))
+    gain = sum(h)
+    return [v / gain for v in h]
+
+
+class Downsampler:
+    """Halve the sample rate (16 kHz -> 8 kHz) with an anti-alias FIR
+
+    process() takes up to block_samples int16 samples (an even count,
+    array('h') or little-endian bytes straight from I2S) and returns the
+    filtered half-rate samples as an array('h') view that stays valid
+    until the next call.
+    """
+
+    def __init__(self, block_samples=512, taps=FIR_TAPS):
+        self._coef = array("i", [taps] + [round(v * (1 << FIR_SHIFT)) for v in lowpass_fir(taps)])
+        self._history = taps - 1
+        self._block = block_samples
+        self._work = array("h", [0] * (self._history + block_samples))
+        self._work_mv = memoryview(self._work)
+        self.out = array("h", [0] * (block_samples // 2))
+        self._out_mv = memoryview(self.out)
+
+    def reset(self):
+        for i in range(self._history):
+            self._work[i] = 0
+
+    def process(self, pcm, n=None):
+        if n is None:
+            n = len(pcm) if isinstance(pcm, array) else len(pcm) // 2
+        if n > self._block or n & 1:
+            raise ValueError("need an even count up to block_samples")
+        h = self._history
+        _append(pcm, n, self._work, h)
+        _decimate(self._work, n, self._coef, self.out)
+        self._work_mv[0:h] = self._work_mv[n:n + h]
+        return self._out_mv[:n // 2]
+
+
+# --------------------------------------------------
+# Voice clips over the radio
+# --------------------------------------------------
+# Every packet can be decoded on its own: it carries the predictor and
+# step index at its first sample, so a lost packet is a short gap of
+# silence instead of garbage for the rest of the clip.
+#   0: clip id   1: packet index   2: packet count
+#   3-4: predictor (int16 LE)   5: step index   6..: ADPCM nibbles
+PACKET_HEADER = const(6)
+MAX_PAYLOAD = 200               # Bytes per packet, well inside a LoRa frame
+CLIP_RATE = 8000
+
+
+class ClipEncoder:
+    """16 kHz PCM -> 8 kHz IMA-ADPCM packets
+
+    add() may be called with blocks of any even size up to block_samples;
+    the encoder keeps a partial packet between calls. finish() returns
+    the list of packets (bytes) with the packet count filled in.
+    """
+
+    def __init__(self, clip_id, payload=MAX_PAYLOAD, block_samples=512):
+        self.clip_id = clip_id & 0xFF
+        self._data_bytes = payload - PACKET_HEADER
+        self._samples = self._data_bytes * 2
+        self._codec = ADPCM()
+        self._down = Downsampler(block_samples)
+        self._pending = array("h", [0] * self._samples)
+        self._fill = 0
+        self.packets = []
+
+    def add(self, pcm, n=None):
+        half = self._down.process(pcm, n)
+        pos = 0
+        count = len(half)
+        while pos < count:
+            take = min(count - pos, self._samples - self._fill)
+            memoryview(self._pending)[self._fill:self._fill + take] = half[pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == self._samples:
+                self._packet()
+
+    def _packet(self):
+        n = self._fill
+        pkt = bytearray(PACKET_HEADER + (n + 1) // 2)
+        pred, index = self._codec.state
+        pkt[0] = self.clip_id
+        pkt[1] = len(self.packets)
+        pkt[3] = pred & 0xFF
+        pkt[4] = (pred >> 8) & 0xFF
+        pkt[5] = index
+        self._codec.encode(self._pending, n, memoryview(pkt)[PACKET_HEADER:])
+        self.packets.append(pkt)
+        self._fill = 0
+
+    def finish(self):
+        if self._fill:
+            self._packet()
+        if len(self.packets) > 255:
+            raise ValueError("clip too long")
+        for pkt in self.packets:
+            pkt[2] = len(self.packets)
+        return self.packets
+
+
+class ClipDecoder:
+    """Collect packets of one clip and decode them into 8 kHz PCM"""
+
+    def __init__(self, clip_id, count, payload=MAX_PAYLOAD):
+        self.clip_id = clip_id
+        self.count = count
+        self._samples = (payload - PACKET_HEADER) * 2
+        self.pcm = array("h", [0] * (count * self._samples))
+        self._received = bytearray(count)
+        self._last = 0          # Samples in the last packet
+        self._codec = ADPCM()
+
+    @property
+    def complete(self):
+        return all(self._received)
+
+    def missing(self):
+        return [i for i in range(self.count) if not self._received[i]]
+
+    def add(self, pkt):
+        """Decode one packet in place, returns False if it belongs elsewhere"""
+        index = pkt[1]
+        if pkt[0] != self.clip_id or index >= self.count:
+            return False
+        pred = pkt[3] | (pkt[4] << 8)
+        if pred & 0x8000:
+            pred -= 0x10000
+        self._codec.reset(pred, pkt[5])
+        n = min((len(pkt) - PACKET_HEADER) * 2, self._samples)
+        start = index * self._samples
+        self._codec.decode(memoryview(pkt)[PACKET_HEADER:], n, memoryview(self.pcm)[start:start + n])
+        self._received[index] = 1
+        if index == self.count - 1:
+            self._last = n
+        return True
+
+    def samples(self):
+        """Sample count of the clip, lost packets included as silence"""
+        if not self._received[self.count - 1]:
+            return self.count * self._samples
+        return (self.count - 1) * self._samples + self._last
@@ -0,0 +1,157 @@
+import time
+from array import array
+
+# --------------------------------------------------
+# LoRa time on air (Semtech SX126x datasheet, 6.1.4)
+# --------------------------------------------------
+# Symbols = preamble + 4.25 (6.25 for SF5/6) + 8
+#           + ceil(max(8 PL + CRC - 4 SF + 8 (SF7+) + header, 0) / (4 SF')) * CR
+# with CRC 16 bits when enabled, header 20 bits in explicit mode,
+# SF' = SF - 2 under low data rate optimisation and CR the coding rate
+# denominator (5-8). Counted in quarter symbols to stay in integers.
+
+
+def needs_ldro(sf, bw_khz):
+    """Low data rate optimisation is required for symbols of 16 ms and longer"""
+    return (1 << sf) / bw_khz >= 16
+
+
+def symbol_time_us(sf, bw_khz):
+    return (1 << sf) * 1000 / bw_khz
+
+
+def time_on_air_us(payload, sf=9, bw_khz=125, cr=7, preamble=16, crc=True, implicit=False, ldro=None):
+    """Air time of one LoRa packet of `payload` bytes in microseconds"""
+    if ldro is None:
+        ldro = needs_ldro(sf, bw_khz)
+    bits = 8 * payload - 4 * sf
+    if crc:
+        bits += 16
+    if not implicit:
+        bits += 20
+    if sf >= 7:
+        bits += 8
+    per_block = 4 * (sf - 2) if ldro and sf >= 7 else 4 * sf
+    blocks = (max(bits, 0) + per_block - 1) // per_block
+    quarters = 4 * preamble + (25 if sf < 7 else 17) + 32 + 4 * blocks * cr
+    return int(quarters * (1 << sf) * 250 / bw_khz + 0.5)
+
+
+# --------------------------------------------------
+# Duty-cycle limits
+# --------------------------------------------------
+# (low MHz, high MHz, percent) per sub-band, ETSI EN 300 220 for the
+# EU 868 and 433 MHz bands. Frequencies outside these have no limit here.
+DUTY_BANDS = (
+    (433.05, 434.79, 10),
+    (863.0, 865.0, 0.1),
+    (865.0, 868.0, 1),
+    (868.0, 868.6, 1),
+    (868.7, 869.2, 0.1),
+    (869.4, 869.65, 10),
+    (869.7, 870.0, 1),
+)
+
+
+class DutyCycleLedger:
+    """Rolling air time budget per duty-cycle band
+
+    Air time is summed in `buckets` slots covering `window_s` (an hour
+    in one-minute slots by default), plus one slot for the current
+    minute so an entry only leaves the sum after a full window. The
+    memory is fixed and nothing is stored per packet.
+
+    reserve() books a transmission if it fits the budget of its band;
+    wait_ms() tells how long until it would.
+    """
+
+    def __init__(self, bands=DUTY_BANDS, window_s=3600, buckets=60):
+        self.bands = bands
+        self.window_ms = window_s * 1000
+        self.bucket_ms = self.window_ms // buckets
+        self._count = buckets + 1
+        self._limit = [int(self.window_ms * 10 * percent) for _, _, percent in bands]
+        self._used = [array("i", [0] * self._count) for _ in bands]
+        self._total = [0] * len(bands)
+        self._pos = 0
+        self._epoch = time.ticks_ms()     # Start of the current slot
+
+        # Statistics
+        self.reserved = 0
+        self.rejected = 0
+
+    def band(self, freq_mhz):
+        """Index of the band containing freq_mhz, -1 when it has no limit"""
+        for i, (low, high, _) in enumerate(self.bands):
+            if low <= freq_mhz <= high:
+                return i
+        return -1
+
+    def _advance(self):
+        elapsed = time.ticks_diff(time.ticks_ms(), self._epoch)
+        steps = elapsed // self.bucket_ms
+        if steps <= 0:
+            return elapsed
+        self._epoch = time.ticks_add(self._epoch, steps * self.bucket_ms)
+        for _ in range(min(steps, self._count)):
+            self._pos = (self._pos + 1) % self._count
+            for b, used in enumerate(self._used):
+                self._total[b] -= used[self._pos]
+                used[self._pos] = 0
+        return elapsed - steps * self.bucket_ms
+
+    def limit_us(self, freq_mhz):
+        """Air time allowed per window, None without a limit"""
+        b = self.band(freq_mhz)
+        return self._limit[b] if b >= 0 else None
+
+    def used_us(self, freq_mhz):
+        b = self.band(freq_mhz)
+        if b < 0:
+            return 0
+        self._advance()
+        return self._total[b]
+
+    def used_percent(self, freq_mhz):
+        """Share of the band's budget already spent"""
+        limit = self.limit_us(freq_mhz)
+        return self.used_us(freq_mhz) * 100 // limit if limit else 0
+
+    def wait_ms(self, freq_mhz, airtime_us):
+        """Milliseconds until airtime_us fits: 0 now, -1 never"""
+        b = self.band(freq_mhz)
+        if b < 0:
+            return 0
+        limit = self._limit[b]
+        if airtime_us > limit:
+            return -1
+        into_slot = self._advance()
+        excess = self._total[b] + airtime_us - limit
+        if excess <= 0:
+            return 0
+        # Slots leave oldest first, the next one at the end of this slot
+        used = self._used[b]
+        wait = self.bucket_ms - into_slot
+        for k in range(1, self._count + 1):
+            excess -= used[(self._pos + k) % self._count]
+            if excess <= 0:
+                break
+            wait += self.bucket_ms
+        return wait
+
+    def record(self, freq_mhz, airtime_us):
+        b = self.band(freq_mhz)
+        if b < 0:
+            return
+        self._advance()
+        self._used[b][self._pos] += airtime_us
+        self._total[b] += airtime_us
+
+    def reserve(self, freq_mhz, airtime_us):
+        """Book airtime_us if the band allows it now; returns False if not"""
+        if self.wait_ms(freq_mhz, airtime_us):
+            self.rejected += 1
+            return False
+        self.record(freq_mhz, airtime_us)
+        self.reserved += 1
+        return True
@@ -0,0 +1,224 @@
+import json
+import struct
+import time
+from micropython import const
+from ubx import (valset, ubx_frame, CLS_MGA, CLS_CFG, ID_CFG_VALSET,
+                 CFG_NAVSPG_ACKAIDING, UBX_SYNC1, UBX_SYNC2)
+
+# --------------------------------------------------
+# MGA message IDs
+# --------------------------------------------------
+ID_MGA_ANO = const(0x20)
+ID_MGA_INI = const(0x40)
+
+ANO_MAX_AGE_DAYS = const(35)   # AssistNow Offline files cover up to 5 weeks
+MSG_BUFFER_SIZE = const(512)   # Largest MGA message is well below this
+
+STATE_FILE = "/sd/assistnow.json"
+
+
+def _day_number(year, month, day):
+    return time.mktime((year, month, day, 0, 0, 0, 0, 0)) // 86400
+
+
+def rtc_today():
+    """Day number of the RTC date, or None if the RTC was never set"""
+    t = time.localtime()
+    if t[0] < 2024:
+        return None
+    return _day_number(t[0], t[1], t[2])
+
+
+def mga_ini_time_utc(t, acc_s=2):
+    """Build MGA-INI-TIME_UTC from a localtime()-style tuple
+
+    Offline (ANO) data can only be used once the receiver knows the time.
+    """
+    payload = struct.pack("<BBBbHBBBBBBIHHI",
+                          0x10, 0, 0, -128,  # type, version, ref, leapSecs unknown
+                          t[0], t[1], t[2], t[3], t[4], t[5], 0,
+                          0, acc_s, 0, 0)
+    return ubx_frame(CLS_MGA, ID_MGA_INI, payload)
+
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state, path=STATE_FILE):
+    try:
+        with open(path, "w") as f:
+            json.dump(state, f)
+    except OSError as e:
+        print("AssistNow: failed to save state:", e)
+
+
+class AssistNowLoader:
+    """Stream an AssistNow MGA file into the receiver, one message at a time
+
+    Every message is written only after the previous one was confirmed
+    with MGA-ACK-DATA0, so the receiver's input buffer never overflows.
+    MGA-ANO records for other days than today (by the RTC) are skipped,
+    and a file whose data has expired is not sent at all. An injection
+    counts as done only when the receiver accepted MGA-ANO orbit data;
+    an acknowledged MGA-INI time alone does not aid the next start.
+    """
+
+    def __init__(self, reader, ack_timeout_ms=300, retries=2):
+        self.reader = reader
+        self.ack_timeout_ms = ack_timeout_ms
+        self.retries = retries
+        self._buf = bytearray(MSG_BUFFER_SIZE)
+        self._mv = memoryview(self._buf)
+
+        # Statistics of the last inject()
+        self.sent = 0           # Messages, not counting retries
+        self.resends = 0
+        self.acked = 0
+        self.ano_acked = 0      # Accepted MGA-ANO records
+        self.rejected = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.elapsed_ms = 0
+
+    def enable_ack(self):
+        """Ask the receiver to acknowledge every aiding message"""
+        self.reader.send(valset(((CFG_NAVSPG_ACKAIDING, 1),)))
+        return self.reader.wait_ack(CLS_CFG, ID_CFG_VALSET)
+
+    def inject(self, path, today=None, state_path=STATE_FILE):
+        """Send the MGA file at path, return True if any MGA-ANO record was accepted
+
+        today is a day number (see rtc_today()); when None, no per-day
+        filtering is done and no MGA-INI time is sent.
+        """
+        self.sent = self.resends = self.acked = self.ano_acked = 0
+        self.rejected = self.timeouts = self.skipped = 0
+        start = time.ticks_ms()
+
+        with open(path, "rb") as f:
+            if today is not None:
+                # Judge the file by its own data, it is replaced under the same name
+                first = self._first_ano_day(f)
+                if first is not None and today - first > ANO_MAX_AGE_DAYS:
+                    print("AssistNow: %s is stale, download a new file" % path)
+                    return False
+                f.seek(0)
+
+            self.enable_ack()
+            if today is not None:
+                self._send(mga_ini_time_utc(time.localtime()), ID_MGA_INI)
+
+            while True:
+                n = self._read_message(f)
+                if n <= 0:
+                    break
+                buf = self._buf
+                msg_id = buf[3]
+                ano = buf[2] == CLS_MGA and msg_id == ID_MGA_ANO and n >= 15
+                if ano and today is not None:
+                    if _day_number(2000 + buf[10], buf[11], buf[12]) != today:
+                        self.skipped += 1
+                        continue
+                if self._send(self._mv[:n], msg_id) and ano:
+                    self.ano_acked += 1
+
+        self.elapsed_ms = time.ticks_diff(time.ticks_ms(), start)
+        if self.ano_acked:
+            state = load_state(state_path)
+            state["file"] = path
+            state["injected"] = time.time()
+            save_state(state, state_path)
+        return self.ano_acked > 0
+
+    def _first_ano_day(self, f):
+        """Day number of the first MGA-ANO record of the file, None if it has none"""
+        while True:
+            n = self._read_message(f)
+            if n <= 0:
+                return None
+            buf = self._buf
+            if buf[2] == CLS_MGA and buf[3] == ID_MGA_ANO and n >= 15:
+                return _day_number(2000 + buf[10], buf[11], buf[12])
+
+    def _read_message(self, f):
+        """Read the next UBX frame of the file into the message buffer"""
+        mv = self._mv
+        while True:
+            if f.readinto(mv[0:1]) != 1:
+                return 0
+            if self._buf[0] != UBX_SYNC1:
+                continue
+            if f.readinto(mv[1:6]) != 5:
+                return 0
+            if self._buf[1] != UBX_SYNC2:
+                continue
+            length = self._buf[4] | (self._buf[5] << 8)
+            total = length + 8
+            if total > len(self._buf):
+                # Not an MGA message, skip its payload
+                f.seek(length + 2, 1)
+                continue
+            if f.readinto(mv[6:total]) != total - 6:
+                return 0
+            return total
+
+    def _send(self, frame, msg_id):
+        """Send one message and wait for its MGA-ACK, return True if it was accepted"""
+        reader = self.reader
+        self.sent += 1
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.resends += 1
+            reader.mga_ack = None
+            reader.send(frame)
+            start = time.ticks_ms()
+            while time.ticks_diff(time.ticks_ms(), start) < self.ack_timeout_ms:
+                reader.poll()
+                ack = reader.mga_ack
+                if ack is not None and ack[2] == msg_id:
+                    if ack[0]:
+                        self.acked += 1
+                    else:
+                        self.rejected += 1
+                    return ack[0]
+                time.sleep_ms(2)
+        self.timeouts += 1
+        return False
+
+
+class TTFFMeter:
+    """Measure time-to-first-fix and compare aided against unaided starts
+
+    The recorded runs are read once here and written back once, at the
+    first fix, so the per-loop calls never touch the card.
+    """
+
+    def __init__(self, fix, aided, state_path=STATE_FILE):
+        self.fix = fix
+        self.aided = aided
+        self.state_path = state_path
+        self.start = time.ticks_ms()
+        self.ttff_ms = None
+        self._state = load_state(state_path)
+
+    def update(self):
+        """Call once per loop; returns the TTFF in ms once the first fix is in"""
+        if self.ttff_ms is None and self.fix.valid:
+            self.ttff_ms = time.ticks_diff(time.ticks_ms(), self.start)
+            self._state["ttff_aided" if self.aided else "ttff_unaided"] = self.ttff_ms
+            save_state(self._state, self.state_path)
+        return self.ttff_ms
+
+    def improvement_ms(self):
+        """Unaided minus aided TTFF from the recorded runs, or None"""
+        state = self._state
+        aided = state.get("ttff_aided")
+        unaided = state.get("ttff_unaided")
+        if aided is None or unaided is None:
+            return None
+        return unaided - aided
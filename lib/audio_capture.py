@@ -0,0 +1,92 @@
+BLOCK_BYTES = 512   # 256 samples, 16 ms at 16 kHz mono 16-bit
+
+
+class AudioCapture:
+    """Non-blocking I2S capture into a ring of preallocated blocks
+
+    start() puts the I2S object in non-blocking mode with I2S.irq();
+    every completed readinto() re-arms the next buffer from the callback.
+    The callback only ever advances `head` and the consumer only ever
+    advances `tail`, so the handoff needs no lock. When the next buffer
+    is still unconsumed the finished block is dropped and refilled in
+    place, counted in `overruns`.
+
+    With the default two buffers this is a ping-pong: one block is being
+    filled while the other is handed out. Readers that need every block
+    (recording) should ask for more buffers.
+    """
+
+    def __init__(self, i2s, block_bytes=BLOCK_BYTES, buffers=2):
+        self.i2s = i2s
+        self.block_bytes = block_bytes
+        self._count = buffers
+        self._bufs = [bytearray(block_bytes) for _ in range(buffers)]
+        self._views = [memoryview(b) for b in self._bufs]
+        self._head = 0      # Blocks completed and published (written by the IRQ)
+        self._tail = 0      # Blocks consumed (written by the reader)
+        self._consumers = []
+        self._handler = self._on_block  # Bind once, the IRQ path must not allocate
+        self.running = False
+
+        # Statistics
+        self.overruns = 0
+
+    @property
+    def blocks(self):
+        return self._head
+
+    def subscribe(self, callback):
+        """callback(block) is called from service() with a memoryview of every delivered block"""
+        self._consumers.append(callback)
+
+    def start(self):
+        if self.running:
+            return
+        self._head = 0
+        self._tail = 0
+        self.running = True
+        self.i2s.irq(self._handler)
+        self.i2s.readinto(self._views[0])
+
+    def stop(self):
+        self.running = False
+        self.i2s.irq(None)
+
+    def _on_block(self, i2s):
+        if not self.running:
+            return
+        head = self._head
+        if head + 1 - self._tail >= self._count:
+            # Next buffer not released yet, drop this block and refill it
+            self.overruns += 1
+        else:
+            head += 1
+            self._head = head
+        i2s.readinto(self._views[head % self._count])
+
+    # --------------------------------------------------
+    # Reader side
+    # --------------------------------------------------
+    def available(self):
+        return self._head - self._tail
+
+    def get(self):
+        """Oldest unconsumed block as a memoryview, or None; call release() when done"""
+        if self._head == self._tail:
+            return None
+        return self._views[self._tail % self._count]
+
+    def release(self):
+        if self._tail != self._head:
+            self._tail += 1
+
+    def service(self):
+        """Hand every waiting block to the consumers, never blocks; returns the block count"""
+        n = 0
+        while self._tail != self._head:
+            block = self._views[self._tail % self._count]
+            for callback in self._consumers:
+                callback(block)
+            self._tail += 1
+            n += 1
+        return n
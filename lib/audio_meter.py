@@ -0,0 +1,78 @@
+import math
+import micropython
+from array import array
+
+FULL_SCALE = 32768
+
+
+@micropython.viper
+def _accumulate(buf, n: int, out):
+    # One pass over n signed 16-bit samples. The sum of squares is split
+    # into low and high 16-bit halves so it cannot overflow a small int.
+    p = ptr16(buf)
+    o = ptr32(out)
+    total = 0
+    lo = 0
+    hi = 0
+    peak = 0
+    i = 0
+    while i < n:
+        s = p[i]
+        if s & 0x8000:
+            s -= 0x10000
+        total += s
+        sq = s * s
+        lo += sq & 0xFFFF
+        hi += sq >> 16
+        if s < 0:
+            s = 0 - s
+        if s > peak:
+            peak = s
+        i += 1
+    o[0] = total
+    o[1] = lo
+    o[2] = hi
+    o[3] = peak
+
+
+class AudioMeter:
+    """RMS, peak and DC offset of 16-bit PCM blocks
+
+    update() measures one block in a single viper pass and keeps the
+    result, so every reader in the same frame gets it for free. `rms` is
+    the AC level with the DC offset removed; levels are 0-100 of full scale.
+    """
+
+    def __init__(self):
+        self._out = array("i", (0, 0, 0, 0))
+        self.rms = 0.0
+        self.peak = 0
+        self.dc = 0.0
+        self.level = 0
+        self.peak_level = 0
+        self.blocks = 0
+        self.samples = 0
+
+    def update(self, buf, nbytes=None):
+        """Measure an array('h') or a buffer of little-endian int16 bytes, return the 0-100 level"""
+        if nbytes is not None:
+            n = nbytes // 2
+        elif isinstance(buf, array):
+            n = len(buf)
+        else:
+            n = len(buf) // 2
+        if n <= 0:
+            return self.level
+        out = self._out
+        _accumulate(buf, n, out)
+        mean = out[0] / n
+        mean_sq = (out[2] * 65536 + out[1]) / n
+        var = mean_sq - mean * mean
+        self.dc = mean
+        self.rms = math.sqrt(var) if var > 0 else 0.0
+        self.peak = out[3]
+        self.level = min(100, int(self.rms * 100 / FULL_SCALE))
+        self.peak_level = min(100, self.peak * 100 // FULL_SCALE)
+        self.blocks += 1
+        self.samples += n
+        return self.level
@@ -0,0 +1,124 @@
+import os
+import struct
+import time
+
+# --------------------------------------------------
+# Chat log format
+# --------------------------------------------------
+# <path> holds the messages back to back, each a header followed by the
+# UTF-8 text:
+#   flags (u8), peer address (u8), time (u32, s), text length (u16)
+# <path>.idx holds the offset (u32) of every message, so message n is
+# found with one 4-byte read at n * 4. Only the flags byte of a record is
+# ever rewritten (delivery status); everything else is append-only.
+RECORD = "<BBIH"
+RECORD_SIZE = 8
+OFFSET_SIZE = 4
+
+# Flags
+OUTGOING = 0x01
+DELIVERED = 0x02
+FAILED = 0x04
+
+
+def _open(path):
+    try:
+        os.stat(path)
+    except OSError:
+        open(path, "wb").close()
+    return open(path, "r+b")
+
+
+class ChatLog:
+    """Append-only message log with an offset index
+
+    Nothing but the message count is kept in memory, so a log of any
+    length opens at once and costs the same RAM. The log is written
+    before the index; on open, complete messages found past the last
+    indexed one (an interrupted append) are indexed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._log = _open(path)
+        self._idx = _open(path + ".idx")
+        self._head = bytearray(RECORD_SIZE)
+        self._offset = bytearray(OFFSET_SIZE)
+        self.changes = 0        # Bumped on every append and status change
+
+        self._count = self._idx.seek(0, 2) // OFFSET_SIZE
+        self._end = 0
+        if self._count:
+            off = self._read_offset(self._count - 1)
+            self._end = off + RECORD_SIZE + self._read_head(off)[3]
+        self._recover()
+
+    def _recover(self):
+        size = self._log.seek(0, 2)
+        while self._end + RECORD_SIZE <= size:
+            length = self._read_head(self._end)[3]
+            if self._end + RECORD_SIZE + length > size:
+                break
+            self._write_offset(self._count, self._end)
+            self._count += 1
+            self._end += RECORD_SIZE + length
+        self._idx.flush()
+
+    def _read_offset(self, n):
+        self._idx.seek(n * OFFSET_SIZE)
+        self._idx.readinto(self._offset)
+        return struct.unpack_from("<I", self._offset)[0]
+
+    def _write_offset(self, n, off):
+        struct.pack_into("<I", self._offset, 0, off)
+        self._idx.seek(n * OFFSET_SIZE)
+        self._idx.write(self._offset)
+
+    def _read_head(self, off):
+        self._log.seek(off)
+        self._log.readinto(self._head)
+        return struct.unpack_from(RECORD, self._head)
+
+    def __len__(self):
+        return self._count
+
+    def append(self, text, peer=0, flags=0, t=None):
+        """Store one message, returns its number"""
+        data = text.encode() if isinstance(text, str) else text
+        struct.pack_into(RECORD, self._head, 0, flags, peer & 0xFF,
+                         int(time.time()) if t is None else t, len(data))
+        self._log.seek(self._end)
+        self._log.write(self._head)
+        self._log.write(data)
+        self._log.flush()
+        self._write_offset(self._count, self._end)
+        self._idx.flush()
+        self._end += RECORD_SIZE + len(data)
+        self._count += 1
+        self.changes += 1
+        return self._count - 1
+
+    def get(self, n):
+        """Message n as (flags, peer, time, text)"""
+        if not 0 <= n < self._count:
+            raise IndexError("no message %d" % n)
+        off = self._read_offset(n)
+        flags, peer, t, length = self._read_head(off)
+        data = self._log.read(length)
+        try:
+            text = data.decode()
+        except UnicodeError:
+            text = "<%d bytes>" % length
+        return flags, peer, t, text
+
+    def set_flags(self, n, flags):
+        """Replace the flags of message n (delivery status)"""
+        self._head[0] = flags
+        self._log.seek(self._read_offset(n))
+        self._log.write(memoryview(self._head)[:1])
+        self._log.flush()
+        self.changes += 1
+
+    def close(self):
+        self._log.close()
+        self._idx.close()
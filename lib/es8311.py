@@ -1,5 +1,3 @@
-import math
-
 import time
 from machine import PWM, Pin, I2C, I2S
 
@@ -7,6 +5,7 @@ from machine import PWM, Pin, I2C, I2S
 # ES8311 I2C address
 # --------------------------------------------------
 ES8311_ADDR = 0x18
+REG_COUNT = 0x50                # Registers 0x00-0x4F
 
 # --------------------------------------------------
 # ES8311 register initialization table
@@ -29,6 +28,28 @@ initial_register_values = [
     (0x19, 0x00), (0x1A, 0x00), (0x1B, 0x0C), (0x1C, 0x4C),
     (0x32, 0x00), (0x37, 0x08), (0x44, 0x00),
 ]
+# Microphone (ADC only) mode, clocked from the I2S bit clock at 16 kHz.
+# Serial port registers 0x09/0x0A are handled by open_mic_mode().
+mic_register_values = [
+    (0x01, 0x03), (0x02, 0x40), (0x03, 0x0B), (0x04, 0x03), (0x05, 0xFF),
+    (0x06, 0x00), (0x07, 0x01),
+    (0x0B, 0x40), (0x0C, 0x00), (0x0D, 0x01), (0x0E, 0x02),
+    (0x10, 0x00), (0x11, 0x00), (0x12, 0x00), (0x14, 0x1A), (0x15, 0x40),
+    (0x16, 0x24), (0x17, 0xBF),
+    (0x31, 0x00), (0x32, 0x00), (0x37, 0x10),
+]
+
+# Settling time after writing these registers (ms): the reset/state
+# machine control and the analog power-up (VMID charge). Everything else
+# takes effect immediately.
+SETTLE_MS = {0x00: 10, 0x0D: 10}
+MAX_GAP = 2                     # Unchanged registers bridged inside a burst
+
+# Power control values: (on, off)
+_ADC_POWER = (0x02, 0x6A)       # 0x0E ADC modulator and PGA
+_DAC_POWER = (0x00, 0x02)       # 0x12 DAC
+_HP_DRIVE = (0x10, 0x40)        # 0x13 output driver
+
 # --------------------------------------------------
 # Speaker amplifier enable
 # --------------------------------------------------
@@ -39,35 +60,62 @@ amp_enable.value(1)
 # ES8311 Driver Class
 # --------------------------------------------------
 class ES8311:
+    """ES8311 codec with a register shadow
+
+    Every register written is remembered, writes that would not change
+    the value are skipped, and runs of neighbouring registers go out as
+    one auto-incrementing writeto_mem() burst. Only the reset and the
+    analog power-up are followed by a delay.
+
+    Pass `i2c` to share an existing bus, and `mck=None` when the codec
+    takes its clock from the I2S bit clock (microphone mode).
+    """
+
     def __init__(self,
                  scl=4,
                  sda=5,
-                 mck=6, rate = 8000):
-        
+                 mck=6, rate = 8000, i2c=None):
+
         self.scl = scl
         self.sda = sda
         self.mck = mck
         self.rate = rate
+        self.i2c = i2c
+        self._own_i2c = i2c is None
+        self.is_open = False
+        self.bits = 16
+        self._shadow = bytearray(REG_COUNT)
+        self._known = bytearray(REG_COUNT)    # 1 when the shadow matches the chip
+
+        # Statistics
+        self.transactions = 0
+        self.skipped = 0
+
         # ---------- MCLK (must persist) ----------
-        self.mclk = PWM(
-            Pin(mck),
-            freq=44100 * 256,
-            duty_u16=32768)
+        if mck is not None:
+            self.mclk = PWM(
+                Pin(mck),
+                freq=44100 * 256,
+                duty_u16=32768)
+
     def power_on(self):
     # Re-create peripherals
-        self.i2c = I2C(1, scl=Pin(self.scl), sda=Pin(self.sda), freq=400_000)
-        self.mclk = PWM(Pin(self.mck), freq=self.rate * 256, duty_u16=32768)
+        if self._own_i2c:
+            self.i2c = I2C(1, scl=Pin(self.scl), sda=Pin(self.sda), freq=400_000)
+        if self.mck is not None:
+            self.mclk = PWM(Pin(self.mck), freq=self.rate * 256, duty_u16=32768)
+        self.invalidate()
 
     # Codec init
-        for reg, val in register_values:
-            self.write(reg, val)
-            time.sleep_ms(10)
+        self.write_regs(register_values)
+        amp_enable.value(1)
+        self.is_open = True
 
     def power_off(self):
+        amp_enable.value(0)
     # Power down codec first (I2C must still be alive)
-        for reg, val in initial_register_values:
-            self.write(reg, val)
-            time.sleep_ms(10)
+        self.write_regs(initial_register_values)
+        self.is_open = False
 
     # Stop clocks AFTER codec is powered down
         if hasattr(self, "mclk"):
@@ -76,23 +124,144 @@ class ES8311:
 
 
     # I2C can now be safely disabled
-        if hasattr(self, "i2c"):
+        if self._own_i2c and hasattr(self, "i2c"):
             del self.i2c
             self.i2c = None
 
+    def open_mic_mode(self, bits=16, channels=1, sample_rate=16000):
+        """ADC only, analog mic with +30 dB PGA; returns True on success"""
+        if self.is_open:
+            return True
+        try:
+            self.invalidate()
+            self.write_regs([(0x44, 0x08), (0x00, 0x80)])
+            # Word length in bits 4:2, standard I2S format in bits 1:0
+            word = 0x0C if bits == 16 else 0x0F if bits == 24 else 0x00
+            dac_iface = (self.read_reg(0x09) | word) & 0xFC
+            adc_iface = ((self.read_reg(0x0A) | word) & 0xFC) | 0x40
+            self.write_regs([(0x09, dac_iface), (0x0A, adc_iface)])
+            self.write_regs(mic_register_values)
+            self.write(0x0B, 0x4F)      # Start the system with the ADC enabled
+        except OSError as e:
+            print("ES8311 mic mode error:", e)
+            return False
+        self.bits = bits
+        self.rate = sample_rate
+        self.is_open = True
+        return True
+
+    # --------------------------------------------------
+    # Register shadow
+    # --------------------------------------------------
+    def invalidate(self):
+        """Forget the shadow, the next write of every register goes out"""
+        for i in range(REG_COUNT):
+            self._known[i] = 0
+
+    def read_reg(self, reg):
+        """Register value from the shadow, or from the chip if not yet known"""
+        if not self._known[reg]:
+            self._shadow[reg] = self.i2c.readfrom_mem(ES8311_ADDR, reg, 1)[0]
+            self._known[reg] = 1
+        return self._shadow[reg]
+
+    def write_regs(self, pairs):
+        """Write (reg, value) pairs in order, skipping unchanged ones and bursting neighbours"""
+        run = bytearray()
+        start = -1
+        gap = 0         # Unchanged registers at the end of the run
+        for reg, value in pairs:
+            changed = not self._known[reg] or self._shadow[reg] != value
+            if not changed and start < 0:
+                self.skipped += 1
+                continue
+            if start >= 0 and reg != start + len(run):
+                self._burst(start, run, gap)
+                run = bytearray()
+                start = -1
+                gap = 0
+                if not changed:
+                    self.skipped += 1
+                    continue
+            if start < 0:
+                start = reg
+            run.append(value)
+            gap = 0 if changed else gap + 1
+            if gap > MAX_GAP:
+                self._burst(start, run, gap)
+                run = bytearray()
+                start = -1
+                gap = 0
+            elif changed and reg in SETTLE_MS:
+                self._burst(start, run, gap)
+                time.sleep_ms(SETTLE_MS[reg])
+                run = bytearray()
+                start = -1
+                gap = 0
+        if start >= 0:
+            self._burst(start, run, gap)
+
+    def _burst(self, start, run, gap):
+        # Trailing unchanged registers are dropped, the rest is one transaction
+        n = len(run) - gap
+        self.skipped += gap
+        if n <= 0:
+            return
+        data = run if n == len(run) else run[:n]
+        self.i2c.writeto_mem(ES8311_ADDR, start, data)
+        self.transactions += 1
+        for i in range(n):
+            reg = start + i
+            self._shadow[reg] = data[i]
+            self._known[reg] = 1
+        if start == 0 and data[0] & 0x1F:
+            # Reset bits set: the chip is back to its defaults
+            self.invalidate()
+            self._shadow[0] = data[0]
+            self._known[0] = 1
 
     # --------------------------------------------------
     # Low-level register write
     # --------------------------------------------------
     def write(self, reg, value):
-        if isinstance(value, int):
-            value = value.to_bytes(1, "little")
-        self.i2c.writeto_mem(ES8311_ADDR, reg, value)
-    
+        if not isinstance(value, int):
+            value = value[0]
+        self.write_regs(((reg, value),))
+
+    def write_reg(self, reg, value):
+        """write() that reports I2C errors as False"""
+        try:
+            self.write(reg, value)
+            return True
+        except OSError:
+            return False
+
+    # --------------------------------------------------
+    # Modes and rates
+    # --------------------------------------------------
+    def set_mode(self, dac=True, adc=True):
+        """Power the DAC path and/or the ADC (microphone) path"""
+        self.write_regs([
+            (0x0E, _ADC_POWER[0] if adc else _ADC_POWER[1]),
+            (0x12, _DAC_POWER[0] if dac else _DAC_POWER[1]),
+            (0x13, _HP_DRIVE[0] if dac else _HP_DRIVE[1]),
+        ])
+
+    def set_rate(self, rate):
+        """Change the sample rate; MCLK stays at 256 x rate, so no register changes"""
+        self.rate = rate
+        if hasattr(self, "mclk"):
+            self.mclk.freq(rate * 256)
+
+    def set_mic_gain(self, db):
+        """Microphone PGA gain, 0-30 dB in 3 dB steps"""
+        step = max(0, min(10, db // 3))
+        self.write(0x14, (self.read_reg(0x14) & 0xF0) | step)
+
     # --------------------------------------------------
     # Volume control (0–100%)
     # --------------------------------------------------
     def set_volume(self, volume):
         volume = max(0, min(100, volume))
         vol = int(255 * volume / 100)
-        self.write(0x32, vol)
\ No newline at end of file
+        self.write(0x32, vol)
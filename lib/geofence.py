@@ -0,0 +1,211 @@
+import math
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# Events passed to the callback
+# --------------------------------------------------
+EVENT_ENTER = const(1)
+EVENT_EXIT = const(2)
+EVENT_DWELL = const(3)
+
+GRID_CELL = const(10000)    # Default cell size: 0.01 deg (~1.1 km)
+_MIN_CELL = const(5500)     # Keeps the column index below 65536
+_M_PER_UDEG = 0.111195      # Metres per micro-degree of latitude
+
+
+class Geofences:
+    """Polygon geofences indexed by a uniform lat/lng grid
+
+    Fence file format, one fence per line ('#' starts a comment):
+        name;lat,lng;lat,lng;lat,lng[;...]
+    Coordinates are degrees. Vertices are stored as micro-degrees in
+    flat arrays and every fence is registered in each grid cell its
+    bounding box touches, so a fix only tests the fences of its own cell
+    (plus the ones it is currently inside, to detect exits).
+
+    Hysteresis: a fix must be at least margin_m inside a fence to enter
+    and margin_m outside to leave; inside the band the state is kept.
+    """
+
+    def __init__(self, callback=None, margin_m=10.0, dwell_s=60, cell=GRID_CELL):
+        self.callback = callback
+        self.margin_m = margin_m
+        self.dwell_s = dwell_s
+        self.cell = max(cell, _MIN_CELL)
+
+        self.names = []
+        self._vx = array("i")       # Longitudes, all fences back to back
+        self._vy = array("i")       # Latitudes
+        self._start = array("I")     # First vertex of each fence
+        self._count = array("H")     # Vertex count of each fence
+        self._bbox = array("i")     # min_lat, min_lng, max_lat, max_lng per fence
+        self._grid = {}
+
+        self._inside = []           # Indices of fences the fix is inside
+        self._since = {}            # Fence index -> time of entering
+        self._dwelt = set()
+
+        # Statistics
+        self.fixes = 0
+        self.candidates_tested = 0
+
+    # --------------------------------------------------
+    # Loading
+    # --------------------------------------------------
+    def load(self, path):
+        """Read fences from a file, return the number loaded"""
+        n = 0
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line[0] == "#":
+                    continue
+                parts = line.split(";")
+                points = []
+                for p in parts[1:]:
+                    lat, lng = p.split(",")
+                    points.append((round(float(lat) * 1000000), round(float(lng) * 1000000)))
+                if len(points) >= 3:
+                    self.add(parts[0], points)
+                    n += 1
+        return n
+
+    def add(self, name, points):
+        """Add a polygon given as [(lat, lng), ...] in micro-degrees"""
+        index = len(self.names)
+        self.names.append(name)
+        self._start.append(len(self._vx))
+        self._count.append(len(points))
+        min_lat = min_lng = 0x7FFFFFFF
+        max_lat = max_lng = -0x7FFFFFFF
+        for lat, lng in points:
+            self._vy.append(lat)
+            self._vx.append(lng)
+            min_lat = min(min_lat, lat)
+            max_lat = max(max_lat, lat)
+            min_lng = min(min_lng, lng)
+            max_lng = max(max_lng, lng)
+        self._bbox.extend((min_lat, min_lng, max_lat, max_lng))
+
+        # Register in every cell the bounding box touches
+        r0, c0 = self._cell(min_lat, min_lng)
+        r1, c1 = self._cell(max_lat, max_lng)
+        grid = self._grid
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                key = (r << 16) | c
+                cell = grid.get(key)
+                if cell is None:
+                    grid[key] = [index]
+                else:
+                    cell.append(index)
+        return index
+
+    def _cell(self, lat, lng):
+        return (lat + 90000000) // self.cell, (lng + 180000000) // self.cell
+
+    # --------------------------------------------------
+    # Evaluation
+    # --------------------------------------------------
+    def update(self, lat, lng, now_s):
+        """Evaluate one fix (micro-degrees, time in seconds), return the event count"""
+        self.fixes += 1
+        r, c = self._cell(lat, lng)
+        candidates = self._grid.get((r << 16) | c, ())
+        events = 0
+        inside = self._inside
+
+        # Fences we are in: check for exit and dwell, removing in place
+        k = 0
+        while k < len(inside):
+            i = inside[k]
+            d = self._signed_distance(i, lat, lng, self._contains(i, lat, lng))
+            if d < -self.margin_m:
+                inside.pop(k)
+                self._since.pop(i, None)
+                self._dwelt.discard(i)
+                events += self._fire(EVENT_EXIT, i)
+                continue
+            if i not in self._dwelt and now_s - self._since[i] >= self.dwell_s:
+                self._dwelt.add(i)
+                events += self._fire(EVENT_DWELL, i)
+            k += 1
+
+        # Fences of this cell: check for enter
+        for i in candidates:
+            if i in inside or not self._in_bbox(i, lat, lng):
+                continue
+            self.candidates_tested += 1
+            if self._contains(i, lat, lng) and self._signed_distance(i, lat, lng, True) >= self.margin_m:
+                inside.append(i)
+                self._since[i] = now_s
+                events += self._fire(EVENT_ENTER, i)
+        return events
+
+    def inside(self):
+        """Names of the fences the last fix was inside"""
+        return [self.names[i] for i in self._inside]
+
+    def _fire(self, event, index):
+        if self.callback is not None:
+            self.callback(event, self.names[index])
+        return 1
+
+    def _in_bbox(self, i, lat, lng):
+        b = self._bbox
+        k = i * 4
+        return b[k] <= lat <= b[k + 2] and b[k + 1] <= lng <= b[k + 3]
+
+    def _contains(self, i, lat, lng):
+        """Even-odd ray casting in micro-degrees"""
+        vx = self._vx
+        vy = self._vy
+        start = self._start[i]
+        n = self._count[i]
+        inside = False
+        j = start + n - 1
+        for k in range(start, start + n):
+            yk = vy[k]
+            yj = vy[j]
+            if (yk > lat) != (yj > lat):
+                xk = vx[k]
+                x = xk + (lat - yk) * (vx[j] - xk) / (yj - yk)
+                if lng < x:
+                    inside = not inside
+            j = k
+        return inside
+
+    def _signed_distance(self, i, lat, lng, contains):
+        """Distance to the fence boundary in metres, negative outside
+
+        contains is _contains() for the same point; the ray cast is done
+        once by the caller instead of again here.
+        """
+        vx = self._vx
+        vy = self._vy
+        start = self._start[i]
+        n = self._count[i]
+        kx = _M_PER_UDEG * math.cos(math.radians(lat / 1000000))
+        ky = _M_PER_UDEG
+        best = None
+        j = start + n - 1
+        for k in range(start, start + n):
+            ax = (vx[j] - lng) * kx
+            ay = (vy[j] - lat) * ky
+            ex = (vx[k] - lng) * kx - ax
+            ey = (vy[k] - lat) * ky - ay
+            length2 = ex * ex + ey * ey
+            t = 0.0 if length2 == 0 else -(ax * ex + ay * ey) / length2
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            dx = ax + t * ex
+            dy = ay + t * ey
+            d = dx * dx + dy * dy
+            if best is None or d < best:
+                best = d
+            j = k
+        best = math.sqrt(best)
+        return best if contains else -best
@@ -0,0 +1,217 @@
+import math
+import micropython
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# Goertzel filter bank
+# --------------------------------------------------
+# One resonator per tone, 2cos(w) in Q14. The state carries over between
+# calls, so frames need not line up with capture blocks. s1 * coef is
+# split into high and low bytes to stay inside 32-bit viper integers.
+# st layout: tone count, energy, then s1, s2 for every tone.
+COEF_SHIFT = const(14)
+ENERGY_SHIFT = const(10)        # Frame energy is sum(x * x) >> 10
+_ENERGY = const(1)
+_TONES = const(2)
+
+DTMF_ROWS = (697, 770, 852, 941)
+DTMF_COLS = (1209, 1336, 1477, 1633)
+DTMF_KEYS = "123A456B789C*0#D"
+
+
+@micropython.viper
+def _goertzel(pcm, n: int, coef, st):
+    x = ptr16(pcm)
+    c = ptr32(coef)
+    s = ptr32(st)
+    count = s[0]
+    energy = s[_ENERGY]
+    i = 0
+    while i < n:
+        v = x[i]
+        if v & 0x8000:
+            v -= 0x10000
+        energy += (v * v) >> ENERGY_SHIFT
+        i += 1
+    s[_ENERGY] = energy
+    k = 0
+    while k < count:
+        ck = c[k]
+        s1 = s[_TONES + 2 * k]
+        s2 = s[_TONES + 2 * k + 1]
+        i = 0
+        while i < n:
+            v = x[i]
+            if v & 0x8000:
+                v -= 0x10000
+            p = ck * (s1 >> 8) + ((ck * (s1 & 0xFF)) >> 8)
+            s0 = v + (p >> (COEF_SHIFT - 8)) - s2
+            s2 = s1
+            s1 = s0
+            i += 1
+        s[_TONES + 2 * k] = s1
+        s[_TONES + 2 * k + 1] = s2
+        k += 1
+
+
+class GoertzelBank:
+    """Tone powers for a fixed set of frequencies, frame by frame
+
+    feed() takes int16 blocks of any length. Every `frame` samples the
+    relative power of each tone is stored in `power` (0..1, the share of
+    the frame's energy at that frequency, 1 for a pure tone) and
+    on_frame(bank) is called.
+    """
+
+    def __init__(self, freqs, rate=16000, frame=256, on_frame=None):
+        self.freqs = freqs
+        self.rate = rate
+        self.frame = frame
+        self.on_frame = on_frame
+        count = len(freqs)
+        self._cos2 = [2 * math.cos(2 * math.pi * f / rate) for f in freqs]
+        self._coef = array("i", [round(c * (1 << COEF_SHIFT)) for c in self._cos2])
+        self._st = array("i", [0] * (_TONES + 2 * count))
+        self._st[0] = count
+        self._fill = 0
+        self.power = [0.0] * count
+        self.energy = 0         # Mean square of the last frame
+
+        # Statistics
+        self.frames = 0
+
+    def feed(self, pcm, n=None):
+        if n is None:
+            n = len(pcm) if isinstance(pcm, array) else len(pcm) // 2
+        mv = memoryview(pcm)
+        step = 1 if isinstance(pcm, array) else 2
+        pos = 0
+        while pos < n:
+            take = min(n - pos, self.frame - self._fill)
+            _goertzel(mv[pos * step:(pos + take) * step], take, self._coef, self._st)
+            self._fill += take
+            pos += take
+            if self._fill == self.frame:
+                self._finish()
+
+    def _finish(self):
+        st = self._st
+        n = self.frame
+        energy = st[_ENERGY] << ENERGY_SHIFT
+        self.energy = energy // n
+        scale = 2 / (n * energy) if energy else 0
+        for k in range(st[0]):
+            s1 = st[_TONES + 2 * k]
+            s2 = st[_TONES + 2 * k + 1]
+            self.power[k] = (s1 * s1 + s2 * s2 - self._cos2[k] * s1 * s2) * scale
+            st[_TONES + 2 * k] = 0
+            st[_TONES + 2 * k + 1] = 0
+        st[_ENERGY] = 0
+        self._fill = 0
+        self.frames += 1
+        if self.on_frame:
+            self.on_frame(self)
+
+
+class ToneDetector:
+    """Report configured tones that last at least `min_frames` frames
+
+    tones maps a name to a frequency. on_tone(name) is called once per
+    tone burst, when it has been present for min_frames frames in a row.
+    """
+
+    def __init__(self, tones, rate=16000, frame=256, threshold=0.5, min_level=100,
+                 min_frames=2, on_tone=None):
+        self.names = list(tones)
+        self.threshold = threshold
+        self.min_level = min_level * min_level      # Mean square below this is silence
+        self.min_frames = min_frames
+        self.on_tone = on_tone
+        self.bank = GoertzelBank([tones[k] for k in self.names], rate, frame, self._frame)
+        self._runs = [0] * len(self.names)
+        self.detected = None    # Name of the tone being heard
+
+    def feed(self, pcm, n=None):
+        self.bank.feed(pcm, n)
+
+    def _frame(self, bank):
+        self.detected = None
+        for k, name in enumerate(self.names):
+            if bank.energy >= self.min_level and bank.power[k] >= self.threshold:
+                self._runs[k] += 1
+                if self._runs[k] >= self.min_frames:
+                    self.detected = name
+                    if self._runs[k] == self.min_frames and self.on_tone:
+                        self.on_tone(name)
+            else:
+                self._runs[k] = 0
+
+
+class DTMFDetector:
+    """DTMF digits from a Goertzel bank over the eight DTMF tones
+
+    A frame holds a digit when one row and one column tone together
+    carry at least `min_share` of its energy, each is at least
+    `dominance` times the other tones of its group, and the column is no
+    more than `twist_db` below (normal twist) nor `reverse_twist_db`
+    above (reverse twist) the row.
+    on_digit(key) fires once when the same digit has been seen for
+    `min_frames` frames (32 ms with the default frame, so 40 ms tones
+    are always caught) and a
+    key must be released before it repeats.
+    """
+
+    def __init__(self, rate=16000, frame=256, min_share=0.6, dominance=4.0,
+                 twist_db=8, reverse_twist_db=4, min_level=100, min_frames=2, on_digit=None):
+        self.min_share = min_share
+        self.dominance = dominance
+        self._twist = 10 ** (twist_db / 10)
+        self._reverse_twist = 10 ** (reverse_twist_db / 10)
+        self.min_level = min_level * min_level
+        self.min_frames = min_frames
+        self.on_digit = on_digit
+        self.bank = GoertzelBank(DTMF_ROWS + DTMF_COLS, rate, frame, self._frame)
+        self._candidate = None
+        self._run = 0
+        self._reported = False
+        self.digits = ""
+
+        # Statistics
+        self.rejected = 0       # Frames with tone energy that failed a check
+
+    def feed(self, pcm, n=None):
+        self.bank.feed(pcm, n)
+
+    def _classify(self, power):
+        if self.bank.energy < self.min_level:
+            return None
+        row = max(range(4), key=lambda i: power[i])
+        col = max(range(4), key=lambda i: power[4 + i])
+        pr = power[row]
+        pc = power[4 + col]
+        if pr + pc < self.min_share:
+            return None
+        for i in range(4):
+            if (i != row and power[i] * self.dominance > pr) or \
+               (i != col and power[4 + i] * self.dominance > pc):
+                self.rejected += 1
+                return None
+        if pr > pc * self._twist or pc > pr * self._reverse_twist:
+            self.rejected += 1
+            return None
+        return DTMF_KEYS[row * 4 + col]
+
+    def _frame(self, bank):
+        key = self._classify(bank.power)
+        if key is None or key != self._candidate:
+            self._candidate = key
+            self._run = 1 if key else 0
+            self._reported = False
+            return
+        self._run += 1
+        if self._run >= self.min_frames and not self._reported:
+            self._reported = True
+            self.digits += key
+            if self.on_digit:
+                self.on_digit(key)
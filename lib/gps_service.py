@@ -0,0 +1,147 @@
+import time
+import micropython
+from micropython import const
+from nmea_reader import NMEAReader
+from nmea import NMEAParser
+
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+
+# --------------------------------------------------
+# T-LoRa-Pager wiring
+# --------------------------------------------------
+GPS_UART = const(1)
+GPS_TX = const(4)       # GPS TX -> ESP32 RX
+GPS_RX = const(12)      # GPS RX -> ESP32 TX
+
+CHUNK_SIZE = 256    # Bytes read from the stream per await
+
+
+class GPSService:
+    """Single owner of the GPS UART that publishes fixes to subscribers
+
+    The UART is read and parsed once, either in the background with
+    start() (uasyncio, via asyncio.StreamReader), from a periodic
+    machine.Timer with start_timer(), or from a synchronous main loop
+    with poll(). After each batch of sentences every subscriber
+    whose interval has elapsed is called with the shared GPSFix. Callbacks
+    run in the reader's context and must return quickly; copy the fields
+    you need rather than keeping a reference to the fix.
+    """
+
+    def __init__(self, uart, parser=None):
+        self.uart = uart
+        self.parser = parser if parser is not None else NMEAParser()
+        self.fix = self.parser.fix
+        self.reader = NMEAReader(uart)
+        self._buf = bytearray(CHUNK_SIZE)
+        self._mv = memoryview(self._buf)
+        self._subscribers = []
+        self._task = None
+        self._timer = None
+        self._poll = self.poll
+        self._tick_ref = self._tick     # Bound once, scheduled from the timer callback
+        self._scheduled = False
+        self.paused = False             # Set while other code talks to the receiver directly
+
+        # Statistics
+        self.published = 0
+
+    @classmethod
+    def create(cls, uart_id=GPS_UART, baudrate=9600, rxbuf=2048, **kwargs):
+        """Service on the on-board GPS; rxbuf holds > 20 ms of data even at 115200 baud"""
+        from machine import UART, Pin
+        return cls(UART(uart_id, baudrate=baudrate, tx=Pin(GPS_RX), rx=Pin(GPS_TX), rxbuf=rxbuf), **kwargs)
+
+    @property
+    def rx_chars(self):
+        return self.reader.rx_chars
+
+    def subscribe(self, callback, interval_ms=0):
+        """Call callback(fix) at most every interval_ms, return a handle for unsubscribe()"""
+        handle = [callback, interval_ms, time.ticks_add(time.ticks_ms(), -interval_ms)]
+        self._subscribers.append(handle)
+        return handle
+
+    def unsubscribe(self, handle):
+        if handle in self._subscribers:
+            self._subscribers.remove(handle)
+
+    def publish(self):
+        """Deliver the current fix to every subscriber that is due"""
+        now = time.ticks_ms()
+        for handle in self._subscribers:
+            if time.ticks_diff(now, handle[2]) >= handle[1]:
+                handle[2] = now
+                handle[0](self.fix)
+        self.published += 1
+
+    # --------------------------------------------------
+    # Synchronous use
+    # --------------------------------------------------
+    def poll(self):
+        """Drain the UART from a main loop, return the number of sentences"""
+        lines = self.reader.poll(self.parser.parse)
+        if lines:
+            self.publish()
+        return lines
+
+    # --------------------------------------------------
+    # uasyncio use
+    # --------------------------------------------------
+    def start(self):
+        """Run the reader as a background task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run(self):
+        stream = asyncio.StreamReader(self.uart)
+        mv = self._mv
+        parse = self.parser.parse
+        while True:
+            n = await stream.readinto(self._buf)
+            if n and self.reader.feed(mv[:n], parse):
+                self.publish()
+
+    # --------------------------------------------------
+    # Timer use
+    # --------------------------------------------------
+    def start_timer(self, timer, period_ms=100, poll=None):
+        """Poll from a periodic machine.Timer, for programs without an asyncio loop
+
+        The timer callback only schedules the poll with micropython.schedule,
+        so parsing and the subscribers run in the main context, between two
+        bytecodes of whatever loop is running. `poll` replaces poll(), to
+        read a UBX receiver for example. Nothing is read while `paused`.
+        """
+        self.stop_timer()
+        self._poll = poll if poll is not None else self.poll
+        self._timer = timer
+        timer.init(period=period_ms, mode=timer.PERIODIC, callback=self._on_timer)
+
+    def stop_timer(self):
+        if self._timer is not None:
+            self._timer.deinit()
+            self._timer = None
+
+    def _on_timer(self, timer):
+        if self._scheduled:
+            return
+        self._scheduled = True
+        try:
+            micropython.schedule(self._tick_ref, None)
+        except RuntimeError:
+            self._scheduled = False     # Schedule queue full, try again on the next tick
+
+    def _tick(self, arg):
+        self._scheduled = False
+        if not self.paused:
+            self._poll()
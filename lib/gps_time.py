@@ -0,0 +1,186 @@
+import time
+from array import array
+from machine import Pin
+from micropython import const
+
+HOLDOVER_S = const(200)      # Re-anchor well before ticks_diff wraps (2**29 us)
+MAX_DRIFT_PPM = const(500)   # Reject pulse pairs further off than this
+DRIFT_FILTER = const(8)      # Exponential smoothing factor for the drift
+PCF_RELEASE_US = const(492126)  # PCF85063A ticks 507874 us after STOP is cleared
+EDGE_RING = const(4)         # Recent PPS edges kept for pairing by count
+
+
+class GPSTime:
+    """UTC time service disciplined by the GPS PPS pulse
+
+    The rising PPS edge is timestamped with time.ticks_us() in a hard IRQ
+    and kept, with the last few, by edge number. The first RMC/ZDA
+    sentence (or NAV-PVT) is paired with the last edge to form an anchor;
+    after that every new whole second is paired with the edge whose number
+    is that many pulses after the anchor's, so a sentence that is parsed
+    late never takes the next pulse. Consecutive anchors give the drift
+    of the ticks_us oscillator, which utc_now() uses to interpolate
+    between pulses. A drift measurement more than MAX_DRIFT_PPM off (off
+    zero for the first one) is rejected; when the first one fails, the
+    anchor or the new pair is a second out and pairing starts again from
+    the new pair.
+    """
+
+    def __init__(self, pps=None):
+        self._ring = array("i", [0] * EDGE_RING)    # ticks_us of edge n at (n - 1) % EDGE_RING
+        self._edges = 0         # Edge count, written by the IRQ only
+
+        self._paired_edges = 0
+        self._seen = None       # Last fix time handed to on_fix_time()
+        self.anchor_ticks = 0
+        self.anchor_secs = None
+        self.drift_ppm = 0.0    # ticks_us runs this many ppm fast
+        self.pairs = 0
+        self.rejected = 0
+
+        self._last_sync = None
+        if pps is not None:
+            self._irq_handler = self._on_pps   # Bind once, IRQ must not allocate
+            pps.irq(trigger=Pin.IRQ_RISING, handler=self._irq_handler, hard=True)
+
+    def _on_pps(self, pin):
+        self._ring[self._edges % EDGE_RING] = time.ticks_us()
+        self._edges += 1
+
+    def pps_edge(self, ticks):
+        """Record an edge timestamp (used by simulations)"""
+        self._ring[self._edges % EDGE_RING] = ticks
+        self._edges += 1
+
+    @property
+    def locked(self):
+        return self.anchor_secs is not None
+
+    def on_fix_time(self, fix, now=None):
+        """Pair the last PPS edge with the UTC second in fix, return True if paired
+
+        Call after every parser poll; repeated calls for the same second
+        are ignored.
+        """
+        if fix.year < 2000 or fix.centisecond:
+            return False
+        stamp = ((fix.day * 24 + fix.hour) * 60 + fix.minute) * 60 + fix.second
+        if stamp == self._seen:
+            return False
+        self._seen = stamp
+        secs = time.mktime((fix.year, fix.month, fix.day,
+                            fix.hour, fix.minute, fix.second, 0, 0))
+
+        edges = self._edges
+        if edges == self._paired_edges:
+            return False    # No new pulse since the last pairing
+
+        if self.anchor_secs is not None:
+            dsec = secs - self.anchor_secs
+            n = self._paired_edges + dsec       # Number of the edge that started this second
+            if 0 < dsec <= HOLDOVER_S and n <= edges and edges - n < EDGE_RING - 1:
+                return self._measure(self._ring[(n - 1) % EDGE_RING], secs, n, dsec)
+            # Otherwise the pulses since the anchor are lost, or this second's pulse has
+            # not come yet, which means the anchor took the wrong one: anchor afresh
+
+        edge = self._ring[(edges - 1) % EDGE_RING]
+        if now is None:
+            now = time.ticks_us()
+        if not 0 <= time.ticks_diff(now, edge) < 1000000:
+            return False    # Pulse belongs to an older second
+        self._anchor(edge, secs, edges)
+        return True
+
+    def _measure(self, edge, secs, n, dsec):
+        measured = time.ticks_diff(edge, self.anchor_ticks) / dsec - 1000000
+        expected = self.drift_ppm if self.pairs else 0
+        if abs(measured - expected) > MAX_DRIFT_PPM:
+            self.rejected += 1
+            if not self.pairs:
+                # Either the anchor or this pair is a second out; only the next pair can tell
+                self._anchor(edge, secs, n)
+            return False
+        if self.pairs:
+            self.drift_ppm += (measured - self.drift_ppm) / DRIFT_FILTER
+        else:
+            self.drift_ppm = measured
+        self.pairs += 1
+        self._anchor(edge, secs, n)
+        return True
+
+    def _anchor(self, edge, secs, n):
+        self.anchor_ticks = edge
+        self.anchor_secs = secs
+        self._paired_edges = n
+
+    def utc_now(self, now=None):
+        """Return (seconds, microseconds) of the current UTC time, or None"""
+        if self.anchor_secs is None:
+            return None
+        if now is None:
+            now = time.ticks_us()
+        elapsed = time.ticks_diff(now, self.anchor_ticks)
+        while elapsed > HOLDOVER_S * 1000000:
+            # No pulse for a while, move the anchor forward before ticks wrap
+            step = HOLDOVER_S // 2
+            self.anchor_ticks = time.ticks_add(self.anchor_ticks, int(step * (1000000 + self.drift_ppm)))
+            self.anchor_secs += step
+            elapsed = time.ticks_diff(now, self.anchor_ticks)
+        elapsed -= int(elapsed * self.drift_ppm / 1000000)
+        return self.anchor_secs + elapsed // 1000000, elapsed % 1000000
+
+    # --------------------------------------------------
+    # Clock discipline
+    # --------------------------------------------------
+    def sync_rtc(self, rtc, max_error_us=1000):
+        """Set machine.RTC() if it is more than max_error_us off, return the error"""
+        now = self.utc_now()
+        if now is None:
+            return None
+        secs, us = now
+        dt = rtc.datetime()
+        rtc_secs = time.mktime((dt[0], dt[1], dt[2], dt[4], dt[5], dt[6], 0, 0))
+        error = (rtc_secs - secs) * 1000000 + dt[7] - us
+        if abs(error) > max_error_us:
+            secs, us = self.utc_now()
+            t = time.gmtime(secs)
+            rtc.datetime((t[0], t[1], t[2], t[6], t[3], t[4], t[5], us))
+        return error
+
+    def sync_pcf85063(self, chip, window_us=30000):
+        """Restart the PCF85063A so that its seconds tick on UTC boundaries
+
+        The chip is released PCF_RELEASE_US into the target second. This
+        only happens when that moment is less than window_us away, so the
+        caller's loop is never held up longer. Returns True once set.
+        """
+        now = self.utc_now()
+        if now is None:
+            return False
+        target = now[0] if now[1] <= PCF_RELEASE_US else now[0] + 1
+        wait = (target - now[0]) * 1000000 + PCF_RELEASE_US - now[1]
+        if wait > window_us:
+            return False
+        t = time.gmtime(target)
+        ctrl = chip.stop()
+        chip.set_datetime(t[0], t[1], t[2], (t[6] + 1) % 7, t[3], t[4], t[5])
+        while True:
+            now = self.utc_now()
+            if now[0] > target or (now[0] == target and now[1] >= PCF_RELEASE_US):
+                break
+        chip.start(ctrl)
+        return True
+
+    def discipline(self, rtc=None, chip=None, interval_s=3600):
+        """Keep the ESP32 RTC and the PCF85063A in step, call from the main loop"""
+        if not self.pairs:
+            return False
+        now = self.utc_now()
+        if self._last_sync is not None and now[0] - self._last_sync < interval_s:
+            return False
+        if rtc is not None:
+            self.sync_rtc(rtc)
+        if chip is not None and not self.sync_pcf85063(chip):
+            return False
+        self._last_sync = now[0]
+        return True
@@ -0,0 +1,375 @@
+import time
+import random
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# Frame format
+# --------------------------------------------------
+# Every frame starts with the same 6-byte header:
+#   0: type and flags   1: source   2: destination   3: message seq
+#   DATA: 4: fragment index   5: fragment count   6..: payload
+#   ACK:  4-5: bitmap of the fragments received (LE)
+# Bits 4-6 of byte 0 are link flags; bit 7 belongs to the payload (the
+# receiver hands it to on_message unchanged).
+HEADER = const(6)
+TYPE_DATA = const(0x00)
+TYPE_ACK = const(0x01)
+TYPE_MASK = const(0x0F)
+FLAG_ACK_REQ = const(0x10)     # Last frame of a round, answer with an ACK
+PAYLOAD_FLAGS = const(0x80)
+BROADCAST = const(0xFF)
+MAX_FRAGMENTS = const(16)      # Fits the 16-bit ACK bitmap
+
+
+class DuplicateCache:
+    """Bounded LRU set of message ids ((sender << 8) | seq)
+
+    Kept in one array, oldest first; a hit moves the id to the end and
+    adding to a full cache forgets the oldest.
+    """
+
+    def __init__(self, size=32):
+        self._keys = array("i", [0] * size)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def touch(self, key):
+        """True if key is cached, and mark it most recently used"""
+        keys = self._keys
+        last = self._count - 1
+        for i in range(self._count):
+            if keys[i] == key:
+                for j in range(i, last):
+                    keys[j] = keys[j + 1]
+                keys[last] = key
+                return True
+        return False
+
+    def add(self, key):
+        if self.touch(key):
+            return
+        keys = self._keys
+        if self._count == len(keys):
+            for j in range(self._count - 1):
+                keys[j] = keys[j + 1]
+            self._count -= 1
+        keys[self._count] = key
+        self._count += 1
+
+
+class LoRaLink:
+    """Acknowledged messages over a packet radio
+
+    radio is an SX1262 or anything with its send()/get()/release()/
+    available()/tx_busy interface. Messages up to max_fragments frames
+    are split into `mtu`-byte frames (all nodes must use the same mtu)
+    and sent one at a time; the last frame of each round asks for an
+    ACK carrying a bitmap of the fragments that arrived, and only the
+    missing ones are sent again. Without an answer the last missing
+    fragment is repeated to ask again, after an ACK timeout that doubles
+    with each retry, plus random jitter. The timeout is the ACK's air
+    time at the current radio settings plus ack_timeout_ms.
+    A broadcast is acknowledged by whichever node answers first, which
+    suits a two-device chat.
+
+    Receivers reassemble in `slots` preallocated buffers and drop
+    messages they have already delivered through a DuplicateCache, but
+    still acknowledge them, as the first ACK may have been lost.
+
+    Call poll() often; it drains the radio queue and sends at most one
+    frame. on_message(src, data, flags) gets every new message,
+    on_delivered(seq) and on_failed(seq) report the fate of sent ones.
+    """
+
+    def __init__(self, radio, address, mtu=200, max_fragments=8, retries=6, ack_timeout_ms=300,
+                 jitter_ms=200, slots=2, cache=32, queue=4,
+                 on_message=None, on_delivered=None, on_failed=None):
+        if max_fragments > MAX_FRAGMENTS:
+            raise ValueError("too many fragments")
+        self.radio = radio
+        self.address = address & 0xFF
+        self.mtu = mtu
+        self.chunk = mtu - HEADER
+        self.max_fragments = max_fragments
+        self.max_message = self.chunk * max_fragments
+        self.retries = retries
+        self.ack_timeout_ms = ack_timeout_ms    # Turnaround margin on top of the ACK's air time
+        self.jitter_ms = jitter_ms
+        self.on_message = on_message
+        self.on_delivered = on_delivered
+        self.on_failed = on_failed
+
+        self._frame = bytearray(mtu)
+        self._frame_mv = memoryview(self._frame)
+        self._ack = bytearray(HEADER)
+        self._acks = []         # (dst, seq, bitmap) waiting for the radio
+
+        # Outgoing message
+        self._queue = []
+        self._queue_size = queue
+        self._seq = random.getrandbits(8)
+        self._active = False
+        self._msg = None
+        self._flags = 0
+        self._dst = 0
+        self._msg_seq = 0
+        self._count = 0
+        self._acked = 0         # Fragments confirmed by the receiver
+        self._sent = 0          # Fragments sent at least once
+        self._round = 0         # Fragments still to send in this round
+        self._retry = 0
+        self._deadline = None   # ACK due by, while waiting
+
+        # Reassembly slots
+        self._slot_buf = [bytearray(self.max_message) for _ in range(slots)]
+        self._slot_mv = [memoryview(b) for b in self._slot_buf]
+        self._slot_key = [-1] * slots
+        self._slot_bits = [0] * slots
+        self._slot_last = [0] * slots       # Length of the last fragment
+        self._slot_time = [0] * slots
+        self._cache = DuplicateCache(cache)
+
+        # Statistics
+        self.messages_sent = 0
+        self.messages_delivered = 0
+        self.messages_failed = 0
+        self.messages_received = 0
+        self.bytes_delivered = 0
+        self.frames_sent = 0
+        self.retransmissions = 0
+        self.acks_sent = 0
+        self.duplicates = 0
+        self.bad_frames = 0
+        self.deferred = 0       # Sends refused by the radio (duty cycle)
+
+    def _airtime_ms(self, n):
+        if hasattr(self.radio, "time_on_air_us"):
+            return self.radio.time_on_air_us(n) // 1000 + 1
+        return 0
+
+    # --------------------------------------------------
+    # Sending
+    # --------------------------------------------------
+    def send(self, data, dst=BROADCAST, flags=0):
+        """Queue a message, returns its seq or None when the queue is full"""
+        if len(data) > self.max_message:
+            raise ValueError("message too long")
+        if len(self._queue) >= self._queue_size:
+            return None
+        self._seq = (self._seq + 1) & 0xFF
+        self._queue.append((bytes(data), dst & 0xFF, self._seq, flags & PAYLOAD_FLAGS))
+        return self._seq
+
+    @property
+    def busy(self):
+        return self._active or bool(self._queue)
+
+    def _start(self, data, dst, seq, flags):
+        self._active = True
+        self._msg = memoryview(data)
+        self._dst = dst
+        self._msg_seq = seq
+        self._flags = flags
+        self._count = max(1, (len(data) + self.chunk - 1) // self.chunk)
+        self._acked = 0
+        self._sent = 0
+        self._round = (1 << self._count) - 1
+        self._retry = 0
+        self._deadline = None
+        self.messages_sent += 1
+
+    def _finish(self, delivered):
+        self._active = False
+        seq = self._msg_seq
+        if delivered:
+            self.messages_delivered += 1
+            self.bytes_delivered += len(self._msg)
+        else:
+            self.messages_failed += 1
+        self._msg = None
+        callback = self.on_delivered if delivered else self.on_failed
+        if callback:
+            callback(seq)
+
+    def _transmit(self):
+        now = time.ticks_ms()
+        if self._deadline is not None:
+            if time.ticks_diff(now, self._deadline) < 0:
+                return
+            if self._retry >= self.retries:
+                self._finish(False)
+                return
+            # Only the last missing fragment goes again, its ACK tells what else is lost
+            self._retry += 1
+            missing = ((1 << self._count) - 1) & ~self._acked
+            self._round = 1 << (len(bin(missing)) - 3)
+            self._deadline = None
+
+        index = 0
+        while not self._round & (1 << index):
+            index += 1
+        bit = 1 << index
+        last = self._round == bit
+        start = index * self.chunk
+        n = min(self.chunk, len(self._msg) - start)
+        frame = self._frame
+        frame[0] = TYPE_DATA | self._flags | (FLAG_ACK_REQ if last else 0)
+        frame[1] = self.address
+        frame[2] = self._dst
+        frame[3] = self._msg_seq
+        frame[4] = index
+        frame[5] = self._count
+        self._frame_mv[HEADER:HEADER + n] = self._msg[start:start + n]
+        if not self.radio.send(frame, HEADER + n):
+            self.deferred += 1
+            return
+        self.frames_sent += 1
+        if self._sent & bit:
+            self.retransmissions += 1
+        self._sent |= bit
+        self._round &= ~bit
+        if last:
+            # Air time follows the radio settings, which may have changed since the last frame
+            ack_wait = self._airtime_ms(HEADER) + self.ack_timeout_ms
+            wait = self._airtime_ms(HEADER + n) + (ack_wait << self._retry)
+            if self.jitter_ms:
+                wait += random.getrandbits(16) % self.jitter_ms
+            self._deadline = time.ticks_add(now, wait)
+
+    def _on_ack(self, src, seq, bitmap):
+        if not self._active or seq != self._msg_seq or self._deadline is None:
+            return
+        if self._dst != BROADCAST and src != self._dst:
+            return
+        full = (1 << self._count) - 1
+        self._acked |= bitmap & full
+        if self._acked == full:
+            self._finish(True)
+        elif self._retry < self.retries:
+            # Selective repeat of what is missing, no need to wait for the timeout
+            self._retry += 1
+            self._round = full & ~self._acked
+            self._deadline = None
+
+    def _send_ack(self, dst, seq, bitmap):
+        ack = self._ack
+        ack[0] = TYPE_ACK
+        ack[1] = self.address
+        ack[2] = dst
+        ack[3] = seq
+        ack[4] = bitmap & 0xFF
+        ack[5] = bitmap >> 8
+        if not self.radio.send(ack, HEADER):
+            self.deferred += 1
+            return False
+        self.acks_sent += 1
+        return True
+
+    def _queue_ack(self, dst, seq, bitmap):
+        for i, (d, s, _) in enumerate(self._acks):
+            if d == dst and s == seq:
+                self._acks[i] = (dst, seq, bitmap)
+                return
+        if len(self._acks) < 4:
+            self._acks.append((dst, seq, bitmap))
+
+    # --------------------------------------------------
+    # Receiving
+    # --------------------------------------------------
+    def _slot(self, key):
+        """Reassembly slot for key, evicting the least recently used"""
+        keys = self._slot_key
+        for i in range(len(keys)):
+            if keys[i] == key:
+                return i
+        oldest = 0
+        for i in range(len(keys)):
+            if keys[i] < 0:
+                oldest = i
+                break
+            if time.ticks_diff(self._slot_time[i], self._slot_time[oldest]) < 0:
+                oldest = i
+        keys[oldest] = key
+        self._slot_bits[oldest] = 0
+        return oldest
+
+    def _receive(self, frame):
+        n = len(frame)
+        if n < HEADER:
+            self.bad_frames += 1
+            return
+        kind = frame[0] & TYPE_MASK
+        src = frame[1]
+        dst = frame[2]
+        seq = frame[3]
+        if src == self.address or (dst != self.address and dst != BROADCAST):
+            return
+        if kind == TYPE_ACK:
+            self._on_ack(src, seq, frame[4] | (frame[5] << 8))
+            return
+        index = frame[4]
+        count = frame[5]
+        if kind != TYPE_DATA or count == 0 or count > self.max_fragments or index >= count \
+                or n - HEADER > self.chunk:
+            self.bad_frames += 1
+            return
+        ack_req = frame[0] & FLAG_ACK_REQ
+        full = (1 << count) - 1
+        key = (src << 8) | seq
+        if self._cache.touch(key):
+            self.duplicates += 1
+            if ack_req:
+                self._queue_ack(src, seq, full)
+            return
+
+        slot = self._slot(key)
+        bit = 1 << index
+        if self._slot_bits[slot] & bit:
+            self.duplicates += 1
+        else:
+            start = index * self.chunk
+            self._slot_mv[slot][start:start + n - HEADER] = frame[HEADER:n]
+            self._slot_bits[slot] |= bit
+            if index == count - 1:
+                self._slot_last[slot] = n - HEADER
+        self._slot_time[slot] = time.ticks_ms()
+
+        if self._slot_bits[slot] != full:
+            if ack_req:
+                self._queue_ack(src, seq, self._slot_bits[slot])
+            return
+        length = (count - 1) * self.chunk + self._slot_last[slot]
+        data = bytes(self._slot_mv[slot][:length])
+        self._slot_key[slot] = -1
+        self._cache.add(key)
+        self._queue_ack(src, seq, full)
+        self.messages_received += 1
+        if self.on_message:
+            self.on_message(src, data, frame[0] & PAYLOAD_FLAGS)
+
+    # --------------------------------------------------
+    # Main loop hook
+    # --------------------------------------------------
+    def poll(self):
+        radio = self.radio
+        while radio.available():
+            data, rssi, snr = radio.get()
+            self._receive(data)
+            radio.release()
+        if radio.tx_busy:
+            return
+        if self._acks:
+            if self._send_ack(*self._acks[0]):
+                self._acks.pop(0)
+            return
+        if not self._active and self._queue:
+            self._start(*self._queue.pop(0))
+        if self._active:
+            self._transmit()
+
+    def retransmission_rate(self):
+        """Retransmitted data frames per 100 sent"""
+        return self.retransmissions * 100 // self.frames_sent if self.frames_sent else 0
@@ -0,0 +1,437 @@
+import time
+import micropython
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# Sentence types returned by NMEAParser.parse()
+# --------------------------------------------------
+SENTENCE_NONE = const(0)
+SENTENCE_GGA = const(1)
+SENTENCE_RMC = const(2)
+SENTENCE_GSA = const(3)
+SENTENCE_GSV = const(4)
+SENTENCE_VTG = const(5)
+SENTENCE_ZDA = const(6)
+
+# Talker IDs, index into the per-constellation satellite counters
+TALKER_GP = const(0)   # GPS
+TALKER_GL = const(1)   # GLONASS
+TALKER_GA = const(2)   # Galileo
+TALKER_GB = const(3)   # BeiDou
+TALKER_GQ = const(4)   # QZSS
+TALKER_GN = const(5)   # Combined GNSS
+TALKER_COUNT = const(6)
+
+MAX_FIELDS = const(24)
+MAX_SATS = const(64)
+
+
+# --------------------------------------------------
+# Native helpers, operate on the raw line buffer
+# --------------------------------------------------
+@micropython.viper
+def _checksum_ok(buf, n: int) -> int:
+    """Return 1 if '$...*hh' matches, 0 on mismatch, -1 if no checksum"""
+    p = ptr8(buf)
+    cs = 0
+    i = 1
+    while i < n:
+        c = p[i]
+        if c == 0x2A:  # '*'
+            break
+        cs ^= c
+        i += 1
+    if i + 2 >= n:
+        return -1
+    hi = p[i + 1]
+    lo = p[i + 2]
+    hi = hi - 0x30 if hi <= 0x39 else (hi | 0x20) - 0x57
+    lo = lo - 0x30 if lo <= 0x39 else (lo | 0x20) - 0x57
+    return 1 if ((hi << 4) | lo) == cs else 0
+
+
+@micropython.viper
+def _split(buf, n: int, offsets) -> int:
+    """Store the start of every field in offsets, return the field count
+
+    offsets[k] is the index of the first byte of field k; the field ends one
+    byte before offsets[k + 1]. The final entry points just past the last
+    field (at '*' or the end of the line).
+    """
+    p = ptr8(buf)
+    o = ptr16(offsets)
+    count = 0
+    o[0] = 1
+    i = 1
+    while i < n:
+        c = p[i]
+        if c == 0x2A:
+            break
+        if c == 0x2C:  # ','
+            count += 1
+            if count >= MAX_FIELDS - 1:
+                break
+            o[count] = i + 1
+        i += 1
+    count += 1
+    o[count] = i + 1
+    return count
+
+
+@micropython.viper
+def _scaled(buf, start: int, end: int, decimals: int) -> int:
+    """Parse a decimal field to an int scaled by 10**decimals"""
+    p = ptr8(buf)
+    neg = 0
+    if start < end and p[start] == 0x2D:  # '-'
+        neg = 1
+        start += 1
+    value = 0
+    frac = -1
+    i = start
+    while i < end:
+        c = p[i]
+        if c == 0x2E:  # '.'
+            frac = 0
+        elif frac < decimals:
+            value = value * 10 + (c - 0x30)
+            if frac >= 0:
+                frac += 1
+        i += 1
+    if frac < 0:
+        frac = 0
+    while frac < decimals:
+        value *= 10
+        frac += 1
+    return 0 - value if neg else value
+
+
+@micropython.viper
+def _field(buf, offsets, k: int, decimals: int) -> int:
+    """Parse field k located by _split() as a scaled decimal"""
+    o = ptr16(offsets)
+    return int(_scaled(buf, o[k], o[k + 1] - 1, decimals))
+
+
+class GPSFix:
+    """Latest navigation solution, updated in place by NMEAParser
+
+    Angles and lengths are integers so that updating a fix never allocates:
+    lat/lng in micro-degrees, alt in cm, speed in cm/s, course in 0.01 deg
+    and DOP values in 0.01 units. The satellite arrays hold one entry per
+    satellite and signal: with NMEA 4.10+ a satellite tracked on L1 and L5
+    is listed twice, sat_signal tells the entries apart (0 before 4.10).
+    """
+    __slots__ = (
+        "valid", "quality", "fix_mode",
+        "lat", "lng", "alt", "speed", "course",
+        "hdop", "pdop", "vdop",
+        "sats_used", "sats_in_view",
+        "year", "month", "day", "hour", "minute", "second", "centisecond",
+        "fix_ticks",
+        "sat_count", "sat_talker", "sat_signal", "sat_prn", "sat_elev", "sat_azim", "sat_snr",
+    )
+
+    def __init__(self):
+        self.valid = False
+        self.quality = 0
+        self.fix_mode = 1
+        self.lat = None
+        self.lng = None
+        self.alt = 0
+        self.speed = 0
+        self.course = 0
+        self.hdop = 0
+        self.pdop = 0
+        self.vdop = 0
+        self.sats_used = 0
+        self.sats_in_view = array("B", bytes(TALKER_COUNT))
+        self.year = 0
+        self.month = 0
+        self.day = 0
+        self.hour = 0
+        self.minute = 0
+        self.second = 0
+        self.centisecond = 0
+        self.fix_ticks = time.ticks_ms()
+
+        # Satellites in view, filled from GSV
+        self.sat_count = 0
+        self.sat_talker = array("B", bytes(MAX_SATS))
+        self.sat_signal = array("B", bytes(MAX_SATS))
+        self.sat_prn = array("H", bytes(2 * MAX_SATS))
+        self.sat_elev = array("b", bytes(MAX_SATS))
+        self.sat_azim = array("H", bytes(2 * MAX_SATS))
+        self.sat_snr = array("B", bytes(MAX_SATS))
+
+    def latitude(self):
+        """Latitude in degrees, or None without a position"""
+        return None if self.lat is None else self.lat / 1000000
+
+    def longitude(self):
+        """Longitude in degrees, or None without a position"""
+        return None if self.lng is None else self.lng / 1000000
+
+
+class NMEAParser:
+    """Checksum-validating NMEA 0183 parser for every GNSS talker
+
+    parse() takes a complete line (bytes, bytearray or memoryview, without
+    '\\r\\n') and decodes GGA, RMC, GSA, GSV, VTG and ZDA straight from the
+    buffer into self.fix. Fields are located by offset, nothing is split
+    or copied.
+    """
+
+    def __init__(self, fix=None):
+        self.fix = fix if fix is not None else GPSFix()
+        self._off = array("H", bytes(2 * (MAX_FIELDS + 1)))
+        self._gsv_signal = bytearray(TALKER_COUNT)  # Signal of the last GSV cycle
+
+        # Statistics
+        self.sentences = 0        # Sentences that passed the checksum
+        self.checksum_failed = 0
+        self.unknown = 0          # Valid sentences of an unsupported type
+
+    def parse(self, line):
+        """Decode one line, return the SENTENCE_* type that updated the fix"""
+        n = len(line)
+        if n < 7 or line[0] != 0x24:  # '$'
+            return SENTENCE_NONE
+        ok = _checksum_ok(line, n)
+        if ok == 0:
+            self.checksum_failed += 1
+            return SENTENCE_NONE
+        if ok < 0:
+            # NMEA requires the checksum for every GNSS sentence
+            self.checksum_failed += 1
+            return SENTENCE_NONE
+
+        talker = _talker(line[1], line[2])
+        if talker < 0:
+            self.unknown += 1
+            return SENTENCE_NONE
+
+        nf = _split(line, n, self._off)
+        a, b, c = line[3], line[4], line[5]
+        kind = SENTENCE_NONE
+        if a == 0x47 and b == 0x47 and c == 0x41:    # GGA
+            kind = self._gga(line, nf)
+        elif a == 0x52 and b == 0x4D and c == 0x43:  # RMC
+            kind = self._rmc(line, nf)
+        elif a == 0x47 and b == 0x53 and c == 0x41:  # GSA
+            kind = self._gsa(line, nf)
+        elif a == 0x47 and b == 0x53 and c == 0x56:  # GSV
+            kind = self._gsv(line, nf, talker)
+        elif a == 0x56 and b == 0x54 and c == 0x47:  # VTG
+            kind = self._vtg(line, nf)
+        elif a == 0x5A and b == 0x44 and c == 0x41:  # ZDA
+            kind = self._zda(line, nf)
+
+        if kind:
+            self.sentences += 1
+        else:
+            self.unknown += 1
+        return kind
+
+    # --------------------------------------------------
+    # Field access
+    # --------------------------------------------------
+    def _len(self, k):
+        off = self._off
+        return off[k + 1] - 1 - off[k]
+
+    def _empty(self, k):
+        return self._len(k) <= 0
+
+    def _int(self, line, k):
+        return _field(line, self._off, k, 0)
+
+    def _fixed(self, line, k, decimals):
+        return _field(line, self._off, k, decimals)
+
+    def _char(self, line, k):
+        return line[self._off[k]] if self._len(k) > 0 else 0
+
+    def _hex(self, line, k):
+        c = self._char(line, k)
+        if 0x30 <= c <= 0x39:
+            return c - 0x30
+        c |= 0x20
+        return c - 0x57 if 0x61 <= c <= 0x66 else 0
+
+    def _angle(self, line, k, deg_digits):
+        """ddmm.mmmmmm + hemisphere field -> micro-degrees"""
+        if self._len(k) < deg_digits + 2:
+            return None
+        s = self._off[k]
+        e = s + self._len(k)
+        deg = _scaled(line, s, s + deg_digits, 0)
+        minutes = _scaled(line, s + deg_digits, e, 6)
+        value = deg * 1000000 + minutes // 60
+        hemi = self._char(line, k + 1)
+        if hemi == 0x53 or hemi == 0x57:  # 'S' / 'W'
+            value = -value
+        return value
+
+    def _utc(self, line, k):
+        if self._len(k) < 6:
+            return
+        s = self._off[k]
+        e = s + self._len(k)
+        fix = self.fix
+        fix.hour = _scaled(line, s, s + 2, 0)
+        fix.minute = _scaled(line, s + 2, s + 4, 0)
+        fix.second = _scaled(line, s + 4, s + 6, 0)
+        fix.centisecond = _scaled(line, s + 6, e, 2) if e > s + 7 else 0
+
+    # --------------------------------------------------
+    # Sentence decoders
+    # --------------------------------------------------
+    def _gga(self, line, nf):
+        if nf < 10:
+            return SENTENCE_NONE
+        fix = self.fix
+        self._utc(line, 1)
+        quality = self._int(line, 6)
+        fix.quality = quality
+        fix.sats_used = self._int(line, 7)
+        if not self._empty(8):
+            fix.hdop = self._fixed(line, 8, 2)
+        if quality:
+            fix.lat = self._angle(line, 2, 2)
+            fix.lng = self._angle(line, 4, 3)
+            fix.alt = self._fixed(line, 9, 2)
+            fix.fix_ticks = time.ticks_ms()
+        fix.valid = quality > 0
+        return SENTENCE_GGA
+
+    def _rmc(self, line, nf):
+        if nf < 10:
+            return SENTENCE_NONE
+        fix = self.fix
+        self._utc(line, 1)
+        active = self._char(line, 2) == 0x41  # 'A'
+        if active:
+            fix.lat = self._angle(line, 3, 2)
+            fix.lng = self._angle(line, 5, 3)
+            # knots * 1000 -> cm/s (1 kn = 463/9 cm/s)
+            fix.speed = self._fixed(line, 7, 3) * 463 // 9000
+            if not self._empty(8):
+                fix.course = self._fixed(line, 8, 2)
+            fix.fix_ticks = time.ticks_ms()
+        fix.valid = active
+        if self._len(9) == 6:
+            s = self._off[9]
+            fix.day = _scaled(line, s, s + 2, 0)
+            fix.month = _scaled(line, s + 2, s + 4, 0)
+            fix.year = _scaled(line, s + 4, s + 6, 0) + 2000
+        return SENTENCE_RMC
+
+    def _gsa(self, line, nf):
+        if nf < 18:
+            return SENTENCE_NONE
+        fix = self.fix
+        fix.fix_mode = self._int(line, 2) or 1
+        used = 0
+        for k in range(3, 15):
+            if not self._empty(k):
+                used += 1
+        # GNGSA repeats once per constellation; GGA carries the total
+        if used > fix.sats_used:
+            fix.sats_used = used
+        fix.pdop = self._fixed(line, 15, 2)
+        fix.hdop = self._fixed(line, 16, 2)
+        fix.vdop = self._fixed(line, 17, 2)
+        return SENTENCE_GSA
+
+    def _gsv(self, line, nf, talker):
+        if nf < 4:
+            return SENTENCE_NONE
+        fix = self.fix
+        # NMEA 4.10+ ends the sentence with a signal ID (hex) and sends one
+        # GSV cycle per signal, L1 first
+        signal = 0
+        if (nf - 4) & 3 == 1:
+            nf -= 1
+            signal = self._hex(line, nf)
+        if self._int(line, 2) == 1:
+            in_view = self._int(line, 3)
+            if signal <= self._gsv_signal[talker]:
+                fix.sats_in_view[talker] = in_view
+            elif in_view > fix.sats_in_view[talker]:
+                # A later signal of the same epoch, mostly the same satellites
+                fix.sats_in_view[talker] = in_view
+            self._gsv_signal[talker] = signal
+            self._drop_signal(talker, signal)
+        count = fix.sat_count
+        k = 4
+        while k + 3 < nf and count < MAX_SATS:
+            if not self._empty(k):
+                fix.sat_talker[count] = talker
+                fix.sat_signal[count] = signal
+                fix.sat_prn[count] = self._int(line, k)
+                fix.sat_elev[count] = self._int(line, k + 1)
+                fix.sat_azim[count] = self._int(line, k + 2)
+                fix.sat_snr[count] = self._int(line, k + 3)
+                count += 1
+            k += 4
+        fix.sat_count = count
+        return SENTENCE_GSV
+
+    def _drop_signal(self, talker, signal):
+        """Remove the satellites of one talker and signal before a new GSV cycle"""
+        fix = self.fix
+        keep = 0
+        for i in range(fix.sat_count):
+            if fix.sat_talker[i] != talker or fix.sat_signal[i] != signal:
+                if keep != i:
+                    fix.sat_talker[keep] = fix.sat_talker[i]
+                    fix.sat_signal[keep] = fix.sat_signal[i]
+                    fix.sat_prn[keep] = fix.sat_prn[i]
+                    fix.sat_elev[keep] = fix.sat_elev[i]
+                    fix.sat_azim[keep] = fix.sat_azim[i]
+                    fix.sat_snr[keep] = fix.sat_snr[i]
+                keep += 1
+        fix.sat_count = keep
+
+    def _vtg(self, line, nf):
+        if nf < 8:
+            return SENTENCE_NONE
+        fix = self.fix
+        if not self._empty(1):
+            fix.course = self._fixed(line, 1, 2)
+        if not self._empty(7):
+            # km/h * 1000 -> cm/s
+            fix.speed = self._fixed(line, 7, 3) // 36
+        return SENTENCE_VTG
+
+    def _zda(self, line, nf):
+        if nf < 5:
+            return SENTENCE_NONE
+        fix = self.fix
+        self._utc(line, 1)
+        if not self._empty(4):
+            fix.day = self._int(line, 2)
+            fix.month = self._int(line, 3)
+            fix.year = self._int(line, 4)
+        return SENTENCE_ZDA
+
+
+def _talker(a, b):
+    """Map the two talker ID bytes to a TALKER_* index, -1 if unsupported"""
+    if a != 0x47:  # 'G'
+        return -1
+    if b == 0x50:
+        return TALKER_GP
+    if b == 0x4E:
+        return TALKER_GN
+    if b == 0x4C:
+        return TALKER_GL
+    if b == 0x41:
+        return TALKER_GA
+    if b == 0x42:
+        return TALKER_GB
+    if b == 0x51:
+        return TALKER_GQ
+    return -1
@@ -0,0 +1,167 @@
+import micropython
+from micropython import const
+
+# --------------------------------------------------
+# Buffer sizes
+# --------------------------------------------------
+RING_SIZE = const(1024)   # Raw UART bytes waiting to be split into lines
+LINE_SIZE = const(128)    # NMEA 0183 caps a sentence at 82 chars, leave headroom
+
+_CR = const(0x0D)
+
+
+@micropython.viper
+def _find_lf(buf, start: int, end: int) -> int:
+    # bytearray has no find() on MicroPython, scan the span natively
+    p = ptr8(buf)
+    i = start
+    while i < end:
+        if p[i] == 0x0A:
+            return i
+        i += 1
+    return -1
+
+
+class NMEAReader:
+    """Drain a GPS UART into a preallocated ring buffer and split NMEA lines.
+
+    Every byte the UART has is pulled in with readinto(), so the FIFO never
+    overflows between UI frames. Lines are assembled in a fixed buffer and
+    handed to the callback as a memoryview without '\\r\\n'; the view is only
+    valid until the callback returns.
+    """
+
+    def __init__(self, uart, ring_size=RING_SIZE, line_size=LINE_SIZE):
+        self.uart = uart
+
+        self._ring = bytearray(ring_size)
+        self._ring_mv = memoryview(self._ring)
+        self._size = ring_size
+        self._head = 0    # Next write position
+        self._count = 0   # Bytes stored in the ring
+
+        self._line = bytearray(line_size)
+        self._line_mv = memoryview(self._line)
+        self._line_len = 0
+        self._discard = False
+
+        # Statistics
+        self.rx_chars = 0
+        self.sentences = 0
+        self.too_long = 0     # Lines longer than the line buffer
+
+    def fill(self):
+        """Move everything the UART has buffered into the ring"""
+        uart = self.uart
+        size = self._size
+        total = 0
+        while True:
+            avail = uart.any()
+            if not avail:
+                break
+            free = size - self._count
+            if free == 0:
+                # Ring full, the rest stays in the UART FIFO until poll() drains
+                break
+            # Largest contiguous free span starting at head
+            head = self._head
+            span = size - head
+            if span > free:
+                span = free
+            if span > avail:
+                span = avail
+            n = uart.readinto(self._ring_mv[head:head + span])
+            if not n:
+                break
+            head += n
+            if head == size:
+                head = 0
+            self._head = head
+            self._count += n
+            total += n
+        self.rx_chars += total
+        return total
+
+    def poll(self, callback):
+        """Fill from the UART and call callback(line) for every complete line
+
+        Returns:
+            Number of complete lines delivered
+        """
+        lines = 0
+        ring = self._ring
+        ring_mv = self._ring_mv
+        size = self._size
+        while self.fill() or self._count:
+            tail = self._head - self._count
+            if tail < 0:
+                tail += size
+            # Contiguous readable span starting at tail
+            end = tail + self._count
+            if end > size:
+                end = size
+            nl = _find_lf(ring, tail, end)
+            stop = end if nl < 0 else nl
+            self._append(ring_mv[tail:stop])
+            self._count -= (stop - tail) + (0 if nl < 0 else 1)
+            if nl >= 0:
+                if self._emit(callback):
+                    lines += 1
+        return lines
+
+    def feed(self, data, callback):
+        """Split an already received chunk (e.g. from an asyncio stream) into lines
+
+        Returns:
+            Number of complete lines delivered
+        """
+        n = len(data)
+        mv = memoryview(data)
+        self.rx_chars += n
+        lines = 0
+        start = 0
+        while start < n:
+            nl = _find_lf(data, start, n)
+            stop = n if nl < 0 else nl
+            self._append(mv[start:stop])
+            if nl < 0:
+                break
+            start = nl + 1
+            if self._emit(callback):
+                lines += 1
+        return lines
+
+    def reset(self):
+        """Drop any partially received data"""
+        self._head = 0
+        self._count = 0
+        self._line_len = 0
+        self._discard = False
+
+    def _append(self, chunk):
+        n = len(chunk)
+        if not n or self._discard:
+            return
+        pos = self._line_len
+        if pos + n > len(self._line):
+            # Oversized or garbled line, skip until the next '\n'
+            self._discard = True
+            self.too_long += 1
+            return
+        self._line_mv[pos:pos + n] = chunk
+        self._line_len = pos + n
+
+    def _emit(self, callback):
+        n = self._line_len
+        discard = self._discard
+        self._line_len = 0
+        self._discard = False
+        if discard:
+            return False
+        if n and self._line[n - 1] == _CR:
+            n -= 1
+        if not n:
+            return False
+        self.sentences += 1
+        callback(self._line_mv[:n])
+        return True
@@ -0,0 +1,53 @@
+from micropython import const
+
+PCF85063_ADDR = const(0x51)
+
+REG_CONTROL_1 = const(0x00)
+REG_SECONDS = const(0x04)
+
+CONTROL_1_STOP = const(1 << 5)
+
+
+def _bcd(v):
+    return ((v // 10) << 4) | (v % 10)
+
+
+def _dec(v):
+    return (v >> 4) * 10 + (v & 0x0F)
+
+
+class PCF85063:
+    """Minimal PCF85063A RTC driver: read, write, stop and start the clock"""
+
+    def __init__(self, i2c, address=PCF85063_ADDR):
+        self.i2c = i2c
+        self.addr = address
+        self._buf = bytearray(7)
+
+    def datetime(self):
+        """Return (year, month, day, weekday, hour, minute, second)"""
+        self.i2c.readfrom_mem_into(self.addr, REG_SECONDS, self._buf)
+        b = self._buf
+        return (2000 + _dec(b[6]), _dec(b[5] & 0x1F), _dec(b[3] & 0x3F),
+                b[4] & 0x07, _dec(b[2] & 0x3F), _dec(b[1] & 0x7F), _dec(b[0] & 0x7F))
+
+    def set_datetime(self, year, month, day, weekday, hour, minute, second):
+        b = self._buf
+        b[0] = _bcd(second)   # Also clears the OS (oscillator stopped) flag
+        b[1] = _bcd(minute)
+        b[2] = _bcd(hour)
+        b[3] = _bcd(day)
+        b[4] = weekday & 0x07
+        b[5] = _bcd(month)
+        b[6] = _bcd(year % 100)
+        self.i2c.writeto_mem(self.addr, REG_SECONDS, b)
+
+    def stop(self):
+        """Halt the clock; the divider chain is held in reset"""
+        ctrl = self.i2c.readfrom_mem(self.addr, REG_CONTROL_1, 1)[0]
+        self.i2c.writeto_mem(self.addr, REG_CONTROL_1, bytes([ctrl | CONTROL_1_STOP]))
+        return ctrl
+
+    def start(self, ctrl=0):
+        """Restart the clock, the next second tick comes exactly 1 s later"""
+        self.i2c.writeto_mem(self.addr, REG_CONTROL_1, bytes([ctrl & ~CONTROL_1_STOP]))
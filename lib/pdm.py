@@ -0,0 +1,218 @@
+import math
+import micropython
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# PDM to PCM decimation
+# --------------------------------------------------
+# Stage 1: a sinc^3 filter over 8 PDM bits evaluated one byte at a time.
+#          Its 22 taps span three bytes, so the output for a byte is the
+#          sum of three 256-entry lookups (current, previous, the one before).
+# Stage 2: third-order CIC decimating the byte rate by decimation / 8.
+# Stage 3: FIR at the output rate that flattens the droop of both sinc
+#          stages and removes what is left above the passband.
+# PDM bits are LSB first, 1 = positive pulse.
+R1 = const(8)
+ORDER = const(3)
+FIR_TAPS = const(31)
+FIR_SHIFT = const(14)           # FIR coefficients are Q14
+PASSBAND = 0.375                # Flat up to 6 kHz at 16 kHz output
+_STATE = const(768)             # State follows the three lookup tables
+
+
+@micropython.viper
+def _cic(pdm, nbytes: int, tbl, work) -> int:
+    t = ptr32(tbl)
+    p = ptr8(pdm)
+    w = ptr16(work)
+    b1 = t[_STATE]
+    b2 = t[_STATE + 1]
+    i1 = t[_STATE + 2]
+    i2 = t[_STATE + 3]
+    i3 = t[_STATE + 4]
+    c1 = t[_STATE + 5]
+    c2 = t[_STATE + 6]
+    c3 = t[_STATE + 7]
+    phase = t[_STATE + 8]
+    r2 = t[_STATE + 9]
+    shift = t[_STATE + 10]
+    pos = t[_STATE + 11]
+    start = pos
+    i = 0
+    while i < nbytes:
+        b = p[i]
+        # Integrators wrap at 32 bits, the combs undo it
+        i1 += t[b] + t[256 + b1] + t[512 + b2]
+        i2 += i1
+        i3 += i2
+        b2 = b1
+        b1 = b
+        phase += 1
+        if phase == r2:
+            phase = 0
+            d1 = i3 - c1
+            c1 = i3
+            d2 = d1 - c2
+            c2 = d1
+            y = d2 - c3
+            c3 = d2
+            y = y >> shift
+            if y > 32767:
+                y = 32767
+            elif y < -32768:
+                y = -32768
+            w[pos] = y & 0xFFFF
+            pos += 1
+        i += 1
+    t[_STATE] = b1
+    t[_STATE + 1] = b2
+    t[_STATE + 2] = i1
+    t[_STATE + 3] = i2
+    t[_STATE + 4] = i3
+    t[_STATE + 5] = c1
+    t[_STATE + 6] = c2
+    t[_STATE + 7] = c3
+    t[_STATE + 8] = phase
+    return pos - start
+
+
+@micropython.viper
+def _fir(work, n: int, coef, out):
+    x = ptr16(work)
+    c = ptr32(coef)
+    o = ptr16(out)
+    taps = c[0]
+    i = 0
+    while i < n:
+        acc = 0
+        k = 0
+        while k < taps:
+            s = x[i + k]
+            if s & 0x8000:
+                s -= 0x10000
+            acc += c[k + 1] * s
+            k += 1
+        acc = acc >> FIR_SHIFT
+        if acc > 32767:
+            acc = 32767
+        elif acc < -32768:
+            acc = -32768
+        o[i] = acc & 0xFFFF
+        i += 1
+
+
+def _sinc3_taps():
+    """Impulse response of three cascaded 8-sample boxcars (22 taps, sum 512)"""
+    h = [1] * R1
+    for _ in range(ORDER - 1):
+        g = [0] * (len(h) + R1 - 1)
+        for i, v in enumerate(h):
+            for j in range(R1):
+                g[i + j] += v
+        h = g
+    return h
+
+
+def _droop(f, decimation):
+    """Gain of both sinc stages at f cycles per output sample"""
+    if f == 0:
+        return 1.0
+    a = math.pi * f / decimation
+    h1 = math.sin(a * R1) / (R1 * math.sin(a))
+    r2 = decimation // R1
+    h2 = math.sin(math.pi * f) / (r2 * math.sin(a * R1))
+    return abs(h1 * h2) ** ORDER
+
+
+def compensation_fir(decimation, taps=FIR_TAPS, passband=PASSBAND):
+    """Windowed linear-phase FIR: inverse droop in the passband, tapering to 0 at Nyquist"""
+    m = (taps - 1) / 2
+    steps = 256
+    h = []
+    for n in range(taps):
+        acc = 0.0
+        for k in range(steps):
+            f = (k + 0.5) * 0.5 / steps
+            if f <= passband:
+                d = 1.0 / _droop(f, decimation)
+            else:
+                d = (0.5 - f) / (0.5 - passband) / _droop(passband, decimation)
+            acc += d * math.cos(2 * math.pi * f * (n - m))
+        window = 0.54 - 0.46 * math.cos(2 * math.pi * n / (taps - 1))
+        h.append(2 * acc * 0.5 / steps * window)
+    gain = sum(h)
+    return [v / gain for v in h]
+
+
+class PDMDecimator:
+    """Convert a 1-bit PDM stream to 16-bit PCM
+
+    process() takes any number of whole PDM bytes (decimation / 8 bytes
+    give one sample) and returns a memoryview of little-endian int16
+    samples that stays valid until the next call. All buffers are
+    allocated here, the per-block work runs in viper.
+
+    For microphones whose raw PDM bits reach an I2S input. The
+    T-LoRa-Pager microphone goes through the ES8311 ADC, which already
+    delivers PCM, so the factory microphone page does not need this.
+    """
+
+    def __init__(self, decimation=64, block_bytes=512, taps=FIR_TAPS):
+        r2 = decimation // R1
+        if r2 < 2 or r2 & (r2 - 1) or r2 * R1 != decimation:
+            raise ValueError("decimation must be 8 x a power of two")
+        self.decimation = decimation
+
+        # Stage 1 lookup tables and stage 2 state in one array
+        h = _sinc3_taps()
+        h += [0] * (3 * R1 - len(h))
+        tbl = array("i", [0] * (_STATE + 12))
+        for j in range(3):
+            for b in range(256):
+                acc = 0
+                for bit in range(8):
+                    tap = h[j * R1 + 7 - bit]
+                    acc += tap if (b >> bit) & 1 else -tap
+                tbl[j * 256 + b] = acc
+        gain = sum(h) * r2 ** ORDER
+        shift = 0
+        while (1 << (shift + 15)) < gain:
+            shift += 1
+        tbl[_STATE + 9] = r2
+        tbl[_STATE + 10] = shift
+        tbl[_STATE + 11] = taps - 1     # Samples go after the FIR history
+        self._tbl = tbl
+
+        coef = compensation_fir(decimation, taps)
+        self._coef = array("i", [taps] + [round(v * (1 << FIR_SHIFT)) for v in coef])
+        self._history = taps - 1
+        self._max_out = block_bytes * 8 // decimation + 1
+        self._work = bytearray(2 * (self._history + self._max_out))
+        self._work_mv = memoryview(self._work)
+        self.pcm = bytearray(2 * self._max_out)
+        self._pcm_mv = memoryview(self.pcm)
+
+        # Statistics
+        self.samples = 0
+
+    def reset(self):
+        for i in range(_STATE, _STATE + 9):
+            self._tbl[i] = 0
+        for i in range(len(self._work)):
+            self._work[i] = 0
+
+    def process(self, pdm, nbytes=None):
+        if nbytes is None:
+            nbytes = len(pdm)
+        limit = (self._max_out - 1) * self.decimation // 8
+        if nbytes > limit:
+            raise ValueError("block larger than block_bytes")
+        n = _cic(pdm, nbytes, self._tbl, self._work)
+        if n:
+            _fir(self._work, n, self._coef, self.pcm)
+            # Keep the newest samples as history for the next block
+            h = self._history * 2
+            self._work_mv[0:h] = self._work_mv[n * 2:n * 2 + h]
+            self.samples += n
+        return self._pcm_mv[:n * 2]
@@ -0,0 +1,112 @@
+from micropython import const
+
+# --------------------------------------------------
+# SMAZ-style short text compression
+# --------------------------------------------------
+# Each output byte below 254 stands for one codebook entry. 254 is
+# followed by one raw byte, 255 by a length - 1 byte and up to 256 raw
+# bytes; anything not in the codebook (other capitals, UTF-8) goes
+# through these escapes. The codebook holds every character the keypad
+# can type (the Q_P_NUM_MAP symbols of keypad.py included), common chat
+# words with their spaces and frequent English n-grams. Codes are
+# positions in CODEBOOK, so every device must carry the same one.
+RAW_BYTE = const(254)
+RAW_RUN = const(255)
+
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+_SYMBOLS = "0123456789*/+-=:'\"@$;?!,. "
+
+CODEBOOK = tuple(_LETTERS) + tuple(_SYMBOLS) + tuple(_LETTERS.upper()) + (
+    # Words
+    "the ", "the", "you ", " you", "you", "your", "are you", "see you", "to ",
+    "and ", "is ", "it ", "in ", "of ", "for ", "on ", "at ", "be ", "are ",
+    "was ", "can ", "we ", "me ", " me", "my ", "so ", "do ", "no ", "not ",
+    "what", "where", "when", "how ", "here", "there", "this ", "this", "that ",
+    "that", "with ", "with", "have ", "have", "will ", "will", "just ", "just",
+    "get ", "from ", "about", "again", "now", " now", "ok", "OK", "okay", "yes",
+    "yeah", "lol", "thanks", "hi ", "hey", "hello", "bye", "see ", "going",
+    "good", "great", "time", "today", "tomorrow", "tonight", "home", "back",
+    "soon", "later", "come", "meet", "call", "need", "want", "know", "think",
+    "I'm ", "I ", "let's ", "let", "like", "love", "sorry", "please", "on my way",
+    "signal", "battery", "gps", "lora", "test", "send", "min", "km", "hour",
+    "wait", "ready", "all ", "out", "up ", "down", "left", "right", "camp",
+    "trail", "top", "n't ", "'s ", "ing ", "ed ",
+    # N-grams
+    "th", "he", "in", "er", "an", "re", "on", "at", "en", "nd", "ti", "es",
+    "or", "te", "of", "ed", "is", "it", "al", "ar", "st", "to", "nt", "ng",
+    "se", "ha", "as", "ou", "io", "le", "ve", "co", "me", "de", "hi", "ri",
+    "ro", "ic", "ne", "ea", "ra", "ce", "ll", "ee", "oo", "ing", "ion", "ent",
+    "ght", "e ", "s ", "t ", "d ", "y ", "n ", "r ", ". ", ", ", "! ", "? ",
+)
+
+_ENTRIES = [e.encode() for e in CODEBOOK]
+# Entries by first byte, longest first, for greedy longest-match encoding
+_INDEX = {}
+for _code, _entry in enumerate(_ENTRIES):
+    _INDEX.setdefault(_entry[0], []).append((_entry, _code))
+for _candidates in _INDEX.values():
+    _candidates.sort(key=lambda c: -len(c[0]))
+
+
+def _flush_raw(out, data, start, end):
+    while start < end:
+        n = min(end - start, 256)
+        if n == 1:
+            out.append(RAW_BYTE)
+        else:
+            out.append(RAW_RUN)
+            out.append(n - 1)
+        out.extend(data[start:start + n])
+        start += n
+
+
+def compress(data):
+    """Compress UTF-8 bytes, returns bytearray"""
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    out = bytearray()
+    n = len(data)
+    pos = 0
+    raw = -1            # Start of pending unmatched bytes
+    while pos < n:
+        for entry, code in _INDEX.get(data[pos], ()):
+            if data.startswith(entry, pos):
+                if raw >= 0:
+                    _flush_raw(out, data, raw, pos)
+                    raw = -1
+                out.append(code)
+                pos += len(entry)
+                break
+        else:
+            if raw < 0:
+                raw = pos
+            pos += 1
+    if raw >= 0:
+        _flush_raw(out, data, raw, n)
+    return out
+
+
+def decompress(data):
+    """Reverse of compress(), returns bytearray; ValueError on a truncated escape"""
+    out = bytearray()
+    n = len(data)
+    pos = 0
+    while pos < n:
+        code = data[pos]
+        if code < RAW_BYTE:
+            out.extend(_ENTRIES[code])
+            pos += 1
+            continue
+        if code == RAW_BYTE:
+            count = 1
+            pos += 1
+        else:
+            if pos + 1 >= n:
+                raise ValueError("truncated")
+            count = data[pos + 1] + 1
+            pos += 2
+        if pos + count > n:
+            raise ValueError("truncated")
+        out.extend(data[pos:pos + count])
+        pos += count
+    return out
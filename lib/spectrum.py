@@ -0,0 +1,187 @@
+import math
+import micropython
+from array import array
+
+# --------------------------------------------------
+# Fixed-point FFT
+# --------------------------------------------------
+# Radix-2 decimation in time on Q15 data in array('i'). Every stage
+# halves its outputs, so values never grow and the result is X[k] / N.
+# A full-scale sine therefore shows up as about 8192 after the Hann window.
+FULL_SCALE_BIN = 8192
+DB_RANGE = 60           # Levels span this many dB below full scale
+
+
+@micropython.viper
+def _load(src, re, im, tbl):
+    # tbl: n, Hann window (n, Q15), bit-reversal permutation (n)
+    t = ptr16(tbl)
+    s = ptr16(src)
+    r = ptr32(re)
+    m = ptr32(im)
+    n = t[0]
+    i = 0
+    while i < n:
+        v = s[i]
+        if v & 0x8000:
+            v -= 0x10000
+        j = t[1 + n + i]
+        r[j] = (v * t[1 + i]) >> 15
+        m[j] = 0
+        i += 1
+
+
+@micropython.viper
+def _fft(re, im, tw, n: int):
+    # tw: cos (n/2, Q15) followed by -sin (n/2, Q15), both signed
+    r = ptr32(re)
+    m = ptr32(im)
+    w = ptr16(tw)
+    half = n >> 1
+    size = 2
+    step = half
+    while size <= n:
+        h = size >> 1
+        start = 0
+        while start < n:
+            k = 0
+            j = start
+            while j < start + h:
+                c = w[k]
+                if c & 0x8000:
+                    c -= 0x10000
+                s = w[half + k]
+                if s & 0x8000:
+                    s -= 0x10000
+                a = r[j + h]
+                b = m[j + h]
+                tr = (a * c - b * s) >> 15
+                ti = (a * s + b * c) >> 15
+                ar = r[j]
+                ai = m[j]
+                r[j] = (ar + tr) >> 1
+                m[j] = (ai + ti) >> 1
+                r[j + h] = (ar - tr) >> 1
+                m[j + h] = (ai - ti) >> 1
+                k += step
+                j += 1
+            start += size
+        size <<= 1
+        step >>= 1
+
+
+@micropython.viper
+def _magnitude(re, im, n: int):
+    # |z| ~ max + 3/8 min, written back over re for bins 0..n/2
+    r = ptr32(re)
+    m = ptr32(im)
+    i = 0
+    while i <= (n >> 1):
+        a = r[i]
+        if a < 0:
+            a = 0 - a
+        b = m[i]
+        if b < 0:
+            b = 0 - b
+        if a < b:
+            a, b = b, a
+        r[i] = a + ((b * 3) >> 3)
+        i += 1
+
+
+def _bit_reverse(i, bits):
+    r = 0
+    for _ in range(bits):
+        r = (r << 1) | (i & 1)
+        i >>= 1
+    return r
+
+
+class SpectrumAnalyzer:
+    """Hann-windowed fixed-point FFT grouped into log-spaced bands
+
+    process() takes one block of n int16 samples and updates `levels`
+    (0-100 per band). Bars fall by `decay` per block instead of dropping
+    straight to the new value, and `peaks` hold the highest level for
+    `hold` blocks before they start to fall as well.
+    """
+
+    def __init__(self, n=256, rate=16000, bands=16, f_min=100, decay=6, hold=10):
+        bits = n.bit_length() - 1
+        if n not in (256, 512):
+            raise ValueError("n must be 256 or 512")
+        self.n = n
+        self.rate = rate
+        self.bands = bands
+        self.decay = decay
+        self.hold = hold
+
+        tbl = array("h", [0] * (1 + 2 * n))
+        tbl[0] = n
+        for i in range(n):
+            tbl[1 + i] = int(32767 * 0.5 * (1 - math.cos(2 * math.pi * i / n)))
+            tbl[1 + n + i] = _bit_reverse(i, bits)
+        self._tbl = tbl
+        half = n // 2
+        tw = array("h", [0] * n)
+        for k in range(half):
+            tw[k] = int(round(32767 * math.cos(2 * math.pi * k / n)))
+            tw[half + k] = int(round(-32767 * math.sin(2 * math.pi * k / n)))
+        self._tw = tw
+        self.re = array("i", [0] * n)
+        self._im = array("i", [0] * n)
+
+        # First bin of every band, log spaced from f_min to Nyquist
+        edges = array("H", [0] * (bands + 1))
+        lo = max(1, int(f_min * n / rate))
+        for b in range(bands + 1):
+            edges[b] = int(lo * (half / lo) ** (b / bands))
+        for b in range(1, bands + 1):
+            if edges[b] <= edges[b - 1]:
+                edges[b] = edges[b - 1] + 1
+        self._edges = edges
+
+        self.levels = array("B", [0] * bands)
+        self.peaks = array("B", [0] * bands)
+        self._peak_age = array("B", [0] * bands)
+        self.blocks = 0
+
+    def bin_frequency(self, k):
+        return k * self.rate / self.n
+
+    def transform(self, pcm):
+        """Window and FFT one block; afterwards re[k] is the magnitude of bin k"""
+        _load(pcm, self.re, self._im, self._tbl)
+        _fft(self.re, self._im, self._tw, self.n)
+        _magnitude(self.re, self._im, self.n)
+
+    def process(self, pcm):
+        """Update band levels from a block of n little-endian int16 samples"""
+        self.transform(pcm)
+        mags = self.re
+        edges = self._edges
+        scale = 100 / DB_RANGE
+        for b in range(self.bands):
+            peak = 0
+            for k in range(edges[b], min(edges[b + 1], self.n // 2 + 1)):
+                if mags[k] > peak:
+                    peak = mags[k]
+            if peak:
+                db = 20 * math.log10(peak / FULL_SCALE_BIN)
+                level = int((db + DB_RANGE) * scale)
+                level = 0 if level < 0 else (100 if level > 100 else level)
+            else:
+                level = 0
+            self._update_band(b, level)
+        self.blocks += 1
+
+    def _update_band(self, b, level):
+        current = self.levels[b] - self.decay
+        self.levels[b] = level if level > current else max(current, 0)
+        if level >= self.peaks[b]:
+            self.peaks[b] = level
+            self._peak_age[b] = 0
+        elif self._peak_age[b] < self.hold:
+            self._peak_age[b] += 1
+        else:
+            self.peaks[b] = max(self.peaks[b] - self.decay, self.levels[b])
@@ -0,0 +1,438 @@
+import time
+from micropython import const
+from airtime import needs_ldro, time_on_air_us
+
+# --------------------------------------------------
+# T-LoRa-Pager wiring (shared SPI bus: mosi=34, miso=33, sck=35)
+# --------------------------------------------------
+LORA_CS = const(36)
+LORA_RST = const(47)
+LORA_BUSY = const(48)
+LORA_DIO1 = const(14)
+
+# --------------------------------------------------
+# SX1262 opcodes
+# --------------------------------------------------
+_SET_SLEEP = const(0x84)
+_SET_STANDBY = const(0x80)
+_SET_TX = const(0x83)
+_SET_RX = const(0x82)
+_SET_PACKET_TYPE = const(0x8A)
+_SET_RF_FREQUENCY = const(0x86)
+_SET_PA_CONFIG = const(0x95)
+_SET_TX_PARAMS = const(0x8E)
+_SET_MODULATION_PARAMS = const(0x8B)
+_SET_PACKET_PARAMS = const(0x8C)
+_SET_DIO_IRQ_PARAMS = const(0x08)
+_SET_BUFFER_BASE = const(0x8F)
+_SET_DIO2_RF_SWITCH = const(0x9D)
+_SET_DIO3_TCXO = const(0x97)
+_SET_REGULATOR_MODE = const(0x96)
+_CALIBRATE = const(0x89)
+_CALIBRATE_IMAGE = const(0x98)
+_WRITE_BUFFER = const(0x0E)
+_READ_BUFFER = const(0x1E)
+_WRITE_REGISTER = const(0x0D)
+_READ_REGISTER = const(0x1D)
+_GET_IRQ_STATUS = const(0x12)
+_CLEAR_IRQ_STATUS = const(0x02)
+_GET_RX_BUFFER_STATUS = const(0x13)
+_GET_PACKET_STATUS = const(0x14)
+_CLEAR_DEVICE_ERRORS = const(0x07)
+
+_REG_SYNC_WORD = const(0x0740)
+_REG_OCP = const(0x08E7)
+
+# IRQ flags
+IRQ_TX_DONE = const(0x0001)
+IRQ_RX_DONE = const(0x0002)
+IRQ_HEADER_ERR = const(0x0020)
+IRQ_CRC_ERR = const(0x0040)
+IRQ_TIMEOUT = const(0x0200)
+_IRQ_MASK = const(0x0263)
+
+_RX_CONTINUOUS = const(0xFFFFFF)
+MAX_PAYLOAD = const(255)
+
+# Bandwidth in kHz -> SX1262 code
+BANDWIDTHS = {7.8: 0x00, 10.4: 0x08, 15.6: 0x01, 20.8: 0x09, 31.25: 0x02,
+              41.7: 0x0A, 62.5: 0x03, 125: 0x04, 250: 0x05, 500: 0x06}
+
+# Image calibration ranges (MHz) -> CalibrateImage arguments
+_IMAGE_BANDS = ((902, 0xE1, 0xE9), (863, 0xD7, 0xDB), (779, 0xC1, 0xC5),
+                (470, 0x75, 0x81), (430, 0x6B, 0x6F))
+
+
+class SX1262:
+    """SX1262 LoRa transceiver driven by its DIO1 interrupt
+
+    spi is a device on the shared bus that drives its own chip select
+    (machine.SPI.Device); busy, dio1 and reset are Pins. Every transfer
+    goes through one preallocated buffer pair with write_readinto(), so
+    sending and receiving do not allocate.
+
+    The DIO1 handler reads finished packets straight into a ring of
+    `queue` slots; the reader takes them with get()/release() (or recv()).
+    The handler only advances `head` and the reader only `tail`, as in
+    AudioCapture. When the ring is full new packets are dropped and
+    counted in `rx_dropped`. An interrupt that arrives while a command
+    from the main code is in progress is handled when that command ends.
+    TX and RX share the data buffer, so send() reads out a packet that
+    finished before it overwrites the buffer with the outgoing one.
+
+    With a DutyCycleLedger in `ledger`, send() books every packet's air
+    time and refuses packets the band's budget has no room for.
+    """
+
+    def __init__(self, spi, busy, dio1, reset=None, queue=8, tcxo_voltage=1.8):
+        self.spi = spi
+        self.busy = busy
+        self.dio1 = dio1
+        self.reset_pin = reset
+        self.tcxo_voltage = tcxo_voltage
+
+        self._out = bytearray(MAX_PAYLOAD + 3)
+        self._in = bytearray(MAX_PAYLOAD + 3)
+        self._out_mv = memoryview(self._out)
+        self._in_mv = memoryview(self._in)
+
+        self._count = queue
+        self._slots = [bytearray(MAX_PAYLOAD) for _ in range(queue)]
+        self._views = [memoryview(b) for b in self._slots]
+        self._lens = bytearray(queue)
+        self._rssi = [0] * queue
+        self._snr = [0] * queue
+        self._head = 0      # Packets received (written by the DIO1 handler)
+        self._tail = 0      # Packets consumed (written by the reader)
+
+        self._handler = self._on_dio1
+        self._in_command = 0        # Nesting depth of main-code commands
+        self._irq_pending = False
+        self.receiving = False      # Continuous RX, resumed after every TX
+        self.tx_busy = False
+        self.on_tx_done = None
+        self.ledger = None
+
+        self.frequency = 0
+        self.bandwidth = 125
+        self.spreading_factor = 9
+        self.coding_rate = 7
+        self.preamble = 16
+        self.crc = True
+        self.implicit = False
+
+        # Statistics
+        self.irqs = 0
+        self.tx_packets = 0
+        self.tx_deferred = 0        # Sends refused by the duty-cycle ledger
+        self.rx_packets = 0
+        self.rx_crc_errors = 0
+        self.rx_dropped = 0
+
+    @classmethod
+    def create(cls, spi_bus, cs=LORA_CS, busy=LORA_BUSY, dio1=LORA_DIO1, reset=LORA_RST,
+               baudrate=8_000_000, **kwargs):
+        """Driver for the on-board radio on an existing machine.SPI.Bus"""
+        from machine import SPI, Pin
+        spi = SPI.Device(spi_bus=spi_bus, freq=baudrate, cs=cs, polarity=0, phase=0)
+        return cls(spi, Pin(busy, Pin.IN), Pin(dio1, Pin.IN), Pin(reset, Pin.OUT), **kwargs)
+
+    # --------------------------------------------------
+    # SPI transfers
+    # --------------------------------------------------
+    def _wait_busy(self, timeout_ms=100):
+        start = time.ticks_ms()
+        while self.busy.value():
+            if time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+                raise OSError("SX1262 busy timeout")
+
+    def _enter(self):
+        self._in_command += 1
+
+    def _leave(self):
+        self._in_command -= 1
+        if not self._in_command and self._irq_pending:
+            self._irq_pending = False
+            self._on_dio1(None)
+
+    def _transfer(self, n):
+        self._wait_busy()
+        self.spi.write_readinto(self._out_mv[:n], self._in_mv[:n])
+
+    def _command(self, opcode, *params):
+        out = self._out
+        out[0] = opcode
+        for i, b in enumerate(params):
+            out[1 + i] = b
+        self._transfer(1 + len(params))
+
+    def _get(self, opcode, n):
+        """Get-type command: opcode, status, then n bytes back from _in[2:]"""
+        out = self._out
+        out[0] = opcode
+        for i in range(1, n + 2):
+            out[i] = 0
+        self._transfer(n + 2)
+        return self._in
+
+    def write_register(self, addr, data):
+        out = self._out
+        out[0] = _WRITE_REGISTER
+        out[1] = addr >> 8
+        out[2] = addr & 0xFF
+        n = len(data)
+        self._out_mv[3:3 + n] = data
+        self._transfer(3 + n)
+
+    def read_register(self, addr, n=1):
+        out = self._out
+        out[0] = _READ_REGISTER
+        out[1] = addr >> 8
+        out[2] = addr & 0xFF
+        for i in range(3, 4 + n):
+            out[i] = 0
+        self._transfer(4 + n)
+        return bytes(self._in_mv[4:4 + n])
+
+    # --------------------------------------------------
+    # Setup
+    # --------------------------------------------------
+    def reset(self):
+        if self.reset_pin is not None:
+            self.reset_pin.value(0)
+            time.sleep_ms(1)
+            self.reset_pin.value(1)
+            time.sleep_ms(5)
+        self._wait_busy(500)
+
+    def begin(self, freq_mhz=868.0, bw_khz=125, sf=9, cr=7, power=14, preamble=16,
+              sync_word=0x12, crc=True):
+        """Reset and configure for LoRa, then wait in standby"""
+        self.reset()
+        self._command(_SET_STANDBY, 0x00)               # STDBY_RC
+        if self.tcxo_voltage:
+            # TCXO supply on DIO3: code = (V - 1.6) / 0.1, 5 ms start-up
+            code = max(0, min(7, int(round((self.tcxo_voltage - 1.6) * 10))))
+            self._command(_SET_DIO3_TCXO, code, 0x00, 0x01, 0x40)
+        self._command(_SET_REGULATOR_MODE, 0x01)        # DC-DC
+        self._command(_CALIBRATE, 0x7F)
+        self._wait_busy(500)
+        self._command(_SET_DIO2_RF_SWITCH, 0x01)
+        self._command(_SET_PACKET_TYPE, 0x01)           # LoRa
+        self._command(_SET_BUFFER_BASE, 0x00, 0x00)
+        self.write_register(_REG_SYNC_WORD, bytes(((sync_word & 0xF0) | 0x04, ((sync_word & 0x0F) << 4) | 0x04)))
+        self.set_frequency(freq_mhz)
+        self.set_output_power(power)
+        self.preamble = preamble
+        self.crc = crc
+        self.set_modulation(bw_khz, sf, cr)
+        self._command(_SET_DIO_IRQ_PARAMS,
+                      _IRQ_MASK >> 8, _IRQ_MASK & 0xFF,     # Enabled
+                      _IRQ_MASK >> 8, _IRQ_MASK & 0xFF,     # Routed to DIO1
+                      0, 0, 0, 0)
+        self._command(_CLEAR_DEVICE_ERRORS, 0x00, 0x00)
+        self.dio1.irq(handler=self._handler, trigger=self.dio1.IRQ_RISING)
+
+    def set_frequency(self, freq_mhz):
+        self._enter()
+        try:
+            for low, f1, f2 in _IMAGE_BANDS:
+                if freq_mhz >= low:
+                    self._command(_CALIBRATE_IMAGE, f1, f2)
+                    break
+            self.frequency = freq_mhz
+            # Step is 32 MHz / 2^25 = 15625 / 16384 Hz, integer maths keeps it exact
+            f = int(round(freq_mhz * 1000)) * 1000 * 16384 // 15625
+            self._command(_SET_RF_FREQUENCY, (f >> 24) & 0xFF, (f >> 16) & 0xFF, (f >> 8) & 0xFF, f & 0xFF)
+        finally:
+            self._leave()
+
+    def set_output_power(self, dbm):
+        self._enter()
+        try:
+            dbm = max(-9, min(22, dbm))
+            self.power = dbm
+            self._command(_SET_PA_CONFIG, 0x04, 0x07, 0x00, 0x01)   # SX1262 high-power PA
+            self.write_register(_REG_OCP, b"\x38")                  # 140 mA
+            self._command(_SET_TX_PARAMS, dbm & 0xFF, 0x04)         # 200 us ramp
+        finally:
+            self._leave()
+
+    def set_modulation(self, bw_khz=None, sf=None, cr=None):
+        """cr is the coding rate denominator, 5-8 for 4/5-4/8"""
+        self._enter()
+        try:
+            if bw_khz is not None:
+                if bw_khz not in BANDWIDTHS:
+                    raise ValueError("unsupported bandwidth")
+                self.bandwidth = bw_khz
+            if sf is not None:
+                self.spreading_factor = sf
+            if cr is not None:
+                self.coding_rate = cr
+            ldro = 1 if needs_ldro(self.spreading_factor, self.bandwidth) else 0
+            self._command(_SET_MODULATION_PARAMS, self.spreading_factor, BANDWIDTHS[self.bandwidth],
+                          self.coding_rate - 4, ldro)
+        finally:
+            self._leave()
+
+    def _packet_params(self, length):
+        self._command(_SET_PACKET_PARAMS, self.preamble >> 8, self.preamble & 0xFF,
+                      1 if self.implicit else 0, length, 1 if self.crc else 0, 0)
+
+    # --------------------------------------------------
+    # Transmit
+    # --------------------------------------------------
+    def time_on_air_us(self, n):
+        return time_on_air_us(n, self.spreading_factor, self.bandwidth, self.coding_rate,
+                              self.preamble, self.crc, self.implicit)
+
+    def duty_wait_ms(self, n):
+        """Milliseconds until an n-byte packet fits the duty cycle: 0 now, -1 never"""
+        if self.ledger is None:
+            return 0
+        return self.ledger.wait_ms(self.frequency, self.time_on_air_us(n))
+
+    def send(self, data, n=None):
+        """Start sending one packet and return at once; tx_busy clears on TX done
+
+        Returns False, without sending, when the duty-cycle ledger has no
+        room for the packet.
+        """
+        if n is None:
+            n = len(data)
+        if n > MAX_PAYLOAD:
+            raise ValueError("packet too long")
+        if self.ledger is not None and not self.ledger.reserve(self.frequency, self.time_on_air_us(n)):
+            self.tx_deferred += 1
+            return False
+        self._enter()
+        try:
+            self._command(_SET_STANDBY, 0x00)
+            # A packet received just before standby is still in the buffer
+            self._irq_pending = False
+            self._service_irq(False)
+            self._packet_params(n)
+            out = self._out
+            out[0] = _WRITE_BUFFER
+            out[1] = 0x00
+            self._out_mv[2:2 + n] = memoryview(data)[:n]
+            self._transfer(2 + n)
+            self.tx_busy = True
+            self._command(_SET_TX, 0x00, 0x00, 0x00)                # No timeout
+        finally:
+            self._leave()
+        return True
+
+    def wait_tx(self, timeout_ms=5000):
+        start = time.ticks_ms()
+        while self.tx_busy:
+            if time.ticks_diff(time.ticks_ms(), start) > timeout_ms:
+                return False
+            time.sleep_ms(1)
+        return True
+
+    # --------------------------------------------------
+    # Receive
+    # --------------------------------------------------
+    def start_receive(self):
+        """Continuous RX; packets are queued by the DIO1 handler"""
+        self._enter()
+        try:
+            self.receiving = True
+            self._packet_params(MAX_PAYLOAD)
+            self._command(_SET_RX, _RX_CONTINUOUS >> 16, (_RX_CONTINUOUS >> 8) & 0xFF, _RX_CONTINUOUS & 0xFF)
+        finally:
+            self._leave()
+
+    def standby(self):
+        self._enter()
+        try:
+            self.receiving = False
+            self._command(_SET_STANDBY, 0x00)
+        finally:
+            self._leave()
+
+    def sleep(self):
+        """Warm-start sleep; configuration is kept, begin() is not needed to wake"""
+        self._enter()
+        try:
+            self.receiving = False
+            self._command(_SET_SLEEP, 0x04)
+        finally:
+            self._leave()
+
+    def _on_dio1(self, pin):
+        if pin is not None:
+            self.irqs += 1
+        if self._in_command:
+            self._irq_pending = True
+            return
+        self._service_irq(True)
+
+    def _service_irq(self, resume_rx):
+        """Read and clear the IRQ flags and act on them; resume_rx restarts RX after TX done"""
+        status = self._get(_GET_IRQ_STATUS, 2)
+        flags = (status[2] << 8) | status[3]
+        if not flags:
+            return
+        self._command(_CLEAR_IRQ_STATUS, flags >> 8, flags & 0xFF)
+        if flags & IRQ_RX_DONE:
+            if flags & (IRQ_CRC_ERR | IRQ_HEADER_ERR):
+                self.rx_crc_errors += 1
+            else:
+                self._read_packet()
+        if flags & IRQ_TX_DONE:
+            self.tx_busy = False
+            self.tx_packets += 1
+            if resume_rx and self.receiving:
+                self.start_receive()
+            if self.on_tx_done:
+                self.on_tx_done()
+
+    def _read_packet(self):
+        status = self._get(_GET_RX_BUFFER_STATUS, 2)
+        n = status[2]
+        offset = status[3]
+        if self._head - self._tail >= self._count:
+            self.rx_dropped += 1
+            return
+        slot = self._head % self._count
+        out = self._out
+        out[0] = _READ_BUFFER
+        out[1] = offset
+        out[2] = 0          # NOP; the chip ignores MOSI while it clocks data out
+        self._transfer(n + 3)
+        self._views[slot][:n] = self._in_mv[3:3 + n]
+        self._lens[slot] = n
+        pkt = self._get(_GET_PACKET_STATUS, 3)
+        self._rssi[slot] = -pkt[2] // 2
+        snr = pkt[3]
+        self._snr[slot] = (snr - 256 if snr & 0x80 else snr) // 4
+        self.rx_packets += 1
+        self._head += 1
+
+    def available(self):
+        return self._head - self._tail
+
+    def get(self):
+        """Oldest queued packet as (memoryview, rssi, snr), or None; call release() when done"""
+        if self._head == self._tail:
+            return None
+        slot = self._tail % self._count
+        return self._views[slot][:self._lens[slot]], self._rssi[slot], self._snr[slot]
+
+    def release(self):
+        if self._tail != self._head:
+            self._tail += 1
+
+    def recv(self, buf):
+        """Copy the oldest packet into buf, returns its length or 0"""
+        pkt = self.get()
+        if pkt is None:
+            return 0
+        data = pkt[0]
+        n = min(len(data), len(buf))
+        memoryview(buf)[:n] = data[:n]
+        self.release()
+        return n
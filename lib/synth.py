@@ -0,0 +1,303 @@
+import math
+import micropython
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# Wavetable oscillators
+# --------------------------------------------------
+# One cycle of sine in a 1024-entry table, read by a 24-bit phase
+# accumulator per voice: the top 10 bits index the table, the step is
+# freq * 2^24 / rate (0.002 Hz resolution at 32 kHz). Gains are Q23 and
+# ramp linearly across a block, so envelopes only need updating once
+# per block from Python.
+TABLE_BITS = const(10)
+PHASE_BITS = const(24)
+_PHASE_MASK = const(0xFFFFFF)
+_INDEX_SHIFT = const(14)        # PHASE_BITS - TABLE_BITS
+_SLOT = const(4)                # phase, step, gain (Q23), gain step per sample
+_VOICES = const(2)              # st[0] = samples, st[1] = voices, slots follow
+ENV_ONE = const(32768)          # Envelope full scale
+
+BLOCK_SAMPLES = 256
+
+# Envelope stages
+IDLE = const(0)
+ATTACK = const(1)
+DECAY = const(2)
+SUSTAIN = const(3)
+RELEASE = const(4)
+
+
+@micropython.viper
+def _render(acc, tbl, st, out):
+    a = ptr32(acc)
+    t = ptr32(tbl)
+    s = ptr32(st)
+    o = ptr16(out)
+    n = s[0]
+    count = s[1]
+    i = 0
+    while i < n:
+        a[i] = 0
+        i += 1
+    v = 0
+    while v < count:
+        base = _VOICES + v * _SLOT
+        gain = s[base + 2]
+        step = s[base + 3]
+        if gain != 0 or step != 0:
+            phase = s[base]
+            inc = s[base + 1]
+            i = 0
+            while i < n:
+                a[i] += (t[phase >> _INDEX_SHIFT] * (gain >> 8)) >> 15
+                phase = (phase + inc) & _PHASE_MASK
+                gain += step
+                i += 1
+            s[base] = phase
+        v += 1
+    i = 0
+    while i < n:
+        y = a[i]
+        if y > 32767:
+            y = 32767
+        elif y < -32768:
+            y = -32768
+        o[i] = y & 0xFFFF
+        i += 1
+
+
+_sine = None
+
+
+def sine_table():
+    """The shared sine wavetable (built on first use)"""
+    global _sine
+    if _sine is None:
+        size = 1 << TABLE_BITS
+        _sine = array("i", [int(round(32767 * math.sin(2 * math.pi * i / size))) for i in range(size)])
+    return _sine
+
+
+class Synth:
+    """Polyphonic sine synthesizer with ADSR envelopes
+
+    note_on() starts a voice and returns its index, note_off() releases
+    it. render() mixes all voices into one block of little-endian int16
+    samples in a single viper call; the buffer is reused, so write it out
+    before the next call. When every voice is busy the quietest releasing
+    voice, or else the oldest one, is stolen.
+    """
+
+    def __init__(self, rate=32000, voices=4, block=BLOCK_SAMPLES):
+        self.rate = rate
+        self.voices = voices
+        self.block = block
+        self._tbl = sine_table()
+        self._st = array("i", [0] * (_VOICES + voices * _SLOT))
+        self._st[1] = voices
+        self._acc = array("i", [0] * block)
+        self._out = bytearray(block * 2)
+        self._out_mv = memoryview(self._out)
+
+        self._stage = bytearray(voices)
+        self._level = [0] * voices      # Envelope level, 0..ENV_ONE
+        self._peak = [0] * voices       # Q15 voice volume
+        self._started = [0] * voices
+        self._notes = 0
+        self.set_envelope()
+
+        # Statistics
+        self.samples = 0
+
+    def _per_sample(self, ms, span):
+        # Envelope change per sample in Q16, covering `span` in `ms`
+        return (span << 16) // max(1, ms * self.rate // 1000)
+
+    def set_envelope(self, attack_ms=5, decay_ms=60, sustain=70, release_ms=80):
+        """sustain is a percentage of the note's volume"""
+        self._sustain = ENV_ONE * sustain // 100
+        self._attack = self._per_sample(attack_ms, ENV_ONE)
+        self._decay = self._per_sample(decay_ms, ENV_ONE - self._sustain)
+        self._release = self._per_sample(release_ms, ENV_ONE)
+
+    def note_on(self, freq, volume=80):
+        """Start a note (volume 0-100), returns the voice index"""
+        v = self._free_voice()
+        base = _VOICES + v * _SLOT
+        self._st[base + 1] = int(freq * (1 << PHASE_BITS) / self.rate) & _PHASE_MASK
+        if self._stage[v] == IDLE:
+            self._st[base] = 0
+            self._level[v] = 0
+        self._stage[v] = ATTACK
+        self._peak[v] = 32767 * volume // 100
+        self._notes += 1
+        self._started[v] = self._notes
+        return v
+
+    def note_off(self, v):
+        if self._stage[v] != IDLE:
+            self._stage[v] = RELEASE
+
+    def all_off(self):
+        for v in range(self.voices):
+            self.note_off(v)
+
+    def active(self):
+        return sum(1 for s in self._stage if s != IDLE)
+
+    def _free_voice(self):
+        best = 0
+        for v in range(self.voices):
+            if self._stage[v] == IDLE:
+                return v
+        for v in range(self.voices):
+            if self._stage[v] == RELEASE and (self._stage[best] != RELEASE or self._level[v] < self._level[best]):
+                best = v
+        if self._stage[best] == RELEASE:
+            return best
+        for v in range(self.voices):
+            if self._started[v] < self._started[best]:
+                best = v
+        return best
+
+    def _advance(self, v, n):
+        """Move voice v's envelope n samples on, return the level at the end"""
+        stage = self._stage[v]
+        level = self._level[v]
+        if stage == ATTACK:
+            level += (self._attack * n) >> 16
+            if level >= ENV_ONE:
+                level = ENV_ONE
+                stage = DECAY
+        elif stage == DECAY:
+            level -= (self._decay * n) >> 16
+            if level <= self._sustain:
+                level = self._sustain
+                stage = SUSTAIN
+        elif stage == RELEASE:
+            level -= (self._release * n) >> 16
+            if level <= 0:
+                level = 0
+                stage = IDLE
+        self._stage[v] = stage
+        self._level[v] = level
+        return level
+
+    def _mix(self, out, n):
+        st = self._st
+        st[0] = n
+        for v in range(self.voices):
+            base = _VOICES + v * _SLOT
+            peak = self._peak[v]
+            start = (self._level[v] * peak) >> 7
+            end = (self._advance(v, n) * peak) >> 7 if self._stage[v] != IDLE else 0
+            st[base + 2] = start
+            st[base + 3] = (end - start) // n
+        _render(self._acc, self._tbl, st, out)
+        self.samples += n
+
+    def render(self, n=None):
+        """Mix the next n samples (at most one block), returns a memoryview of the bytes"""
+        if n is None or n > self.block:
+            n = self.block
+        self._mix(self._out, n)
+        return self._out_mv[:n * 2]
+
+    def render_into(self, buf, start=0, end=None):
+        """Mix straight into buf (int16 bytes) from byte offset start to end"""
+        mv = memoryview(buf)
+        if end is None:
+            end = len(buf)
+        step = self.block * 2
+        while start < end:
+            n = min(step, end - start)
+            self._mix(mv[start:start + n], n // 2)
+            start += n
+
+    def tone(self, freq, duration_ms, volume=80):
+        """A single enveloped note as a new bytearray, released to silence at the end"""
+        total = self.rate * duration_ms // 1000
+        release = (ENV_ONE << 16) // self._release if self._release else 0
+        hold = max(0, total - release)
+        buf = bytearray(total * 2)
+        v = self.note_on(freq, volume)
+        self.render_into(buf, 0, hold * 2)
+        self.note_off(v)
+        self.render_into(buf, hold * 2)
+        self._stage[v] = IDLE
+        self._level[v] = 0
+        return buf
+
+
+# --------------------------------------------------
+# RTTTL ringtones
+# --------------------------------------------------
+# "name:d=4,o=5,b=120:8e6,8d#6,p,2a." - duration, note, sharp, dot, octave
+_SEMITONES = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11, "h": 11}
+
+
+def note_frequency(note, octave):
+    """Frequency of a semitone (0 = C) in an octave, A4 = 440 Hz"""
+    return 440.0 * 2 ** ((note - 9) / 12 + octave - 4)
+
+
+def parse_rtttl(song):
+    """Yield (frequency, duration_ms) for every note, frequency 0 for pauses"""
+    _, settings, notes = song.split(":")
+    duration, octave, bpm = 4, 6, 63
+    for item in settings.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "d":
+            duration = int(value)
+        elif key == "o":
+            octave = int(value)
+        elif key == "b":
+            bpm = int(value)
+    whole_ms = 240000 // bpm
+
+    for token in notes.split(","):
+        token = token.strip().lower()
+        if not token:
+            continue
+        i = 0
+        while i < len(token) and token[i].isdigit():
+            i += 1
+        d = int(token[:i]) if i else duration
+        name = token[i]
+        i += 1
+        sharp = i < len(token) and token[i] == "#"
+        if sharp:
+            i += 1
+        dotted = "." in token[i:]
+        digits = token[i:].replace(".", "")
+        o = int(digits) if digits else octave
+        ms = whole_ms // d
+        if dotted:
+            ms += ms // 2
+        if name == "p":
+            yield 0, ms
+        else:
+            yield note_frequency(_SEMITONES[name] + sharp, o), ms
+
+
+def play_rtttl(synth, i2s, song, volume=80, legato=90):
+    """Stream a ringtone block by block to a blocking I2S.TX
+
+    Each note is held for `legato` percent of its length and released
+    for the rest, so repeated notes stay separate.
+    """
+    rate = synth.rate
+    for freq, ms in parse_rtttl(song):
+        total = rate * ms // 1000
+        hold = total * legato // 100 if freq else 0
+        v = synth.note_on(freq, volume) if freq else None
+        done = 0
+        while done < total:
+            if v is not None and done >= hold:
+                synth.note_off(v)
+                v = None
+            n = min(synth.block, (hold if v is not None else total) - done)
+            i2s.write(synth.render(n))
+            done += n
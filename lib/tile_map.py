@@ -0,0 +1,328 @@
+import math
+import time
+from collections import OrderedDict
+from micropython import const
+
+# --------------------------------------------------
+# Tile set layout
+# --------------------------------------------------
+# Pre-rendered slippy-map tiles, one file per tile:
+#   <root>/<zoom>/<x>/<y>.bin
+# Each file is TILE_SIZE x TILE_SIZE raw RGB565 pixels, row by row,
+# little endian, without any header.
+TILE_SIZE = const(256)
+TILE_BYTES = TILE_SIZE * TILE_SIZE * 2
+MIN_ZOOM = const(1)
+MAX_ZOOM = const(18)
+BACKGROUND = const(0xE71C)      # Light grey for tiles that are not on the card
+
+
+def lat_lng_to_pixel(lat, lng, zoom):
+    """Web Mercator world pixel (x, y) of a position in degrees"""
+    size = TILE_SIZE << zoom
+    x = (lng + 180.0) / 360.0 * size
+    s = math.sin(math.radians(max(min(lat, 85.0511), -85.0511)))
+    y = (0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)) * size
+    return int(x), int(y)
+
+
+def pixel_to_lat_lng(x, y, zoom):
+    """Inverse of lat_lng_to_pixel()"""
+    size = TILE_SIZE << zoom
+    lng = x / size * 360.0 - 180.0
+    n = math.pi - 2 * math.pi * y / size
+    lat = math.degrees(math.atan(math.sinh(n)))
+    return lat, lng
+
+
+class TileCache:
+    """LRU cache of raw tiles with a fixed byte budget
+
+    The budget is split into tile-sized buffers allocated on first use
+    (from PSRAM on boards that have it). An evicted tile hands its buffer
+    to the next load, so the heap is never fragmented by tile reads.
+    Tiles missing from the card are remembered so they are not looked
+    up again on every frame.
+
+    Prefetching reads at most `chunk` bytes per step() call, so a tile
+    can be pulled in over several frames without stalling the display.
+    """
+
+    def __init__(self, root="/sd/tiles", budget=1536 * 1024, chunk=16384):
+        self.root = root
+        self.slots = max(budget // TILE_BYTES, 1)
+        self.chunk = chunk
+        self._tiles = OrderedDict()     # (z, x, y) -> buffer, oldest first
+        self._spare = []
+        self._allocated = 0
+        self._missing = set()
+        self._queue = []                # Tiles waiting to be prefetched
+        self._pending = None            # [key, file, buffer, offset]
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.evictions = 0
+
+    def get(self, z, x, y):
+        """Return the tile buffer, loading it now if needed; None if it does not exist"""
+        key = (z, x, y)
+        buf = self._tiles.pop(key, None)
+        if buf is not None:
+            self._tiles[key] = buf  # Most recently used
+            self.hits += 1
+            return buf
+        if key in self._missing:
+            return None
+        self.misses += 1
+        pending = self._pending
+        if pending is not None and pending[0] == key:
+            # Half-prefetched, finish it; a short tile aborts and is missing
+            while self._pending is not None:
+                self._read_chunk()
+            return self._tiles.get(key)
+        return self._load(key)
+
+    def contains(self, z, x, y):
+        key = (z, x, y)
+        return key in self._tiles or key in self._missing
+
+    def prefetch(self, z, x, y):
+        """Queue a tile to be read in the background by step()"""
+        key = (z, x, y)
+        if key in self._tiles or key in self._missing or key in self._queue:
+            return
+        pending = self._pending
+        if pending is not None and pending[0] == key:
+            return
+        self._queue.append(key)
+
+    def cancel_prefetch(self):
+        self._queue.clear()
+
+    def step(self):
+        """Advance background loading by one chunk, return True if anything was read"""
+        if self._pending is None:
+            while self._queue:
+                key = self._queue.pop(0)
+                if key not in self._tiles and key not in self._missing:
+                    self._open(key)
+                    break
+            if self._pending is None:
+                return False
+        if self._read_chunk():
+            self.prefetched += 1
+        return True
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self._abort()
+        self._queue.clear()
+        for buf in self._tiles.values():
+            self._spare.append(buf)
+        self._tiles.clear()
+        self._missing.clear()
+
+    # --------------------------------------------------
+    # Loading
+    # --------------------------------------------------
+    def _path(self, key):
+        return "%s/%d/%d/%d.bin" % (self.root, key[0], key[1], key[2])
+
+    def _buffer(self):
+        if self._spare:
+            return self._spare.pop()
+        if self._allocated < self.slots:
+            self._allocated += 1
+            return bytearray(TILE_BYTES)
+        if not self._tiles:
+            # The only buffer is held by a prefetch, the caller goes first
+            self._abort()
+            return self._spare.pop()
+        # Budget used up, recycle the least recently used tile
+        oldest = next(iter(self._tiles))
+        self.evictions += 1
+        return self._tiles.pop(oldest)
+
+    def _load(self, key):
+        try:
+            f = open(self._path(key), "rb")
+        except OSError:
+            self._remember_missing(key)
+            return None
+        buf = self._buffer()
+        try:
+            n = f.readinto(buf)
+        finally:
+            f.close()
+        if n != TILE_BYTES:
+            self._spare.append(buf)
+            self._remember_missing(key)
+            return None
+        self._tiles[key] = buf
+        return buf
+
+    def _open(self, key):
+        try:
+            f = open(self._path(key), "rb")
+        except OSError:
+            self._remember_missing(key)
+            return
+        self._pending = [key, f, self._buffer(), 0]
+
+    def _read_chunk(self):
+        """Read the next chunk of the pending tile, return True when it is complete"""
+        key, f, buf, offset = self._pending
+        end = min(offset + self.chunk, TILE_BYTES)
+        n = f.readinto(memoryview(buf)[offset:end])
+        if not n:
+            self._abort()
+            self._remember_missing(key)
+            return False
+        offset += n
+        if offset < TILE_BYTES:
+            self._pending[3] = offset
+            return False
+        f.close()
+        self._pending = None
+        self._tiles[key] = buf
+        return True
+
+    def _abort(self):
+        if self._pending is not None:
+            self._pending[1].close()
+            self._spare.append(self._pending[2])
+            self._pending = None
+
+    def _remember_missing(self, key):
+        if len(self._missing) >= 256:
+            self._missing.clear()
+        self._missing.add(key)
+
+
+class MapView:
+    """Render a window of the tile map into an RGB565 frame buffer
+
+    The view is positioned by its centre in world pixels at the current
+    zoom. render() copies whole tile rows with memoryview slices; tiles
+    one step beyond the edge in the direction of movement are queued for
+    prefetching.
+    """
+
+    def __init__(self, cache, width=480, height=222, zoom=15):
+        self.cache = cache
+        self.width = width
+        self.height = height
+        self.zoom = zoom
+        self.buf = bytearray(width * height * 2)
+        self._mv = memoryview(self.buf)
+        self._blank = bytearray(TILE_SIZE * 2)
+        for i in range(0, len(self._blank), 2):
+            self._blank[i] = BACKGROUND & 0xFF
+            self._blank[i + 1] = BACKGROUND >> 8
+        self.cx = 0
+        self.cy = 0
+        self._dx = 0
+        self._dy = 0
+
+        # Statistics
+        self.frames = 0
+        self.frame_us = 0       # Duration of the last render()
+        self.max_frame_us = 0
+
+    def center_on(self, lat, lng):
+        x, y = lat_lng_to_pixel(lat, lng, self.zoom)
+        self.move_to(x, y)
+
+    def move_to(self, x, y):
+        dx = x - self.cx
+        dy = y - self.cy
+        if dx or dy:
+            self._dx = (dx > 0) - (dx < 0)
+            self._dy = (dy > 0) - (dy < 0)
+        self.cx = x
+        self.cy = y
+
+    def pan(self, dx, dy):
+        self.move_to(self.cx + dx, self.cy + dy)
+
+    def set_zoom(self, zoom):
+        """Change zoom keeping the same centre"""
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        if zoom == self.zoom:
+            return
+        shift = zoom - self.zoom
+        if shift > 0:
+            self.cx <<= shift
+            self.cy <<= shift
+        else:
+            self.cx >>= -shift
+            self.cy >>= -shift
+        self.zoom = zoom
+        self._dx = self._dy = 0
+        self.cache.cancel_prefetch()
+
+    def screen_pos(self, lat, lng):
+        """Position of a coordinate on the screen, may lie outside it"""
+        x, y = lat_lng_to_pixel(lat, lng, self.zoom)
+        return x - self.cx + self.width // 2, y - self.cy + self.height // 2
+
+    def render(self):
+        start = time.ticks_us()
+        cache = self.cache
+        z = self.zoom
+        limit = 1 << z
+        w = self.width
+        h = self.height
+        left = self.cx - w // 2
+        top = self.cy - h // 2
+        tx0 = left // TILE_SIZE
+        ty0 = top // TILE_SIZE
+        tx1 = (left + w - 1) // TILE_SIZE
+        ty1 = (top + h - 1) // TILE_SIZE
+        mv = self._mv
+        blank = self._blank
+        row_bytes = w * 2
+
+        for ty in range(ty0, ty1 + 1):
+            # Rows of this tile row that are on screen
+            y0 = max(ty * TILE_SIZE, top)
+            y1 = min(ty * TILE_SIZE + TILE_SIZE, top + h)
+            for tx in range(tx0, tx1 + 1):
+                x0 = max(tx * TILE_SIZE, left)
+                x1 = min(tx * TILE_SIZE + TILE_SIZE, left + w)
+                n = (x1 - x0) * 2
+                tile = cache.get(z, tx % limit, ty) if 0 <= ty < limit else None
+                dst = (y0 - top) * row_bytes + (x0 - left) * 2
+                if tile is None:
+                    src = memoryview(blank)[:n]
+                    for _ in range(y0, y1):
+                        mv[dst:dst + n] = src
+                        dst += row_bytes
+                else:
+                    tile = memoryview(tile)
+                    src = ((y0 - ty * TILE_SIZE) * TILE_SIZE + x0 - tx * TILE_SIZE) * 2
+                    for _ in range(y0, y1):
+                        mv[dst:dst + n] = tile[src:src + n]
+                        dst += row_bytes
+                        src += TILE_SIZE * 2
+
+        # Queue the tiles just beyond the edge we are moving towards
+        if self._dx:
+            tx = tx1 + 1 if self._dx > 0 else tx0 - 1
+            for ty in range(max(ty0, 0), min(ty1, limit - 1) + 1):
+                cache.prefetch(z, tx % limit, ty)
+        if self._dy:
+            ty = ty1 + 1 if self._dy > 0 else ty0 - 1
+            if 0 <= ty < limit:
+                for tx in range(tx0, tx1 + 1):
+                    cache.prefetch(z, tx % limit, ty)
+
+        self.frames += 1
+        self.frame_us = time.ticks_diff(time.ticks_us(), start)
+        if self.frame_us > self.max_frame_us:
+            self.max_frame_us = self.frame_us
@@ -0,0 +1,203 @@
+import struct
+
+# --------------------------------------------------
+# Binary track format
+# --------------------------------------------------
+# The file is a sequence of 512-byte sectors. Every sector starts with an
+# absolute header, so each one decodes on its own:
+#   magic "TRK1", base time (u32, s since 1970), base lat, base lon (i32, 1e-6 deg)
+# followed by 31 records of 16 bytes, each relative to the previous point:
+#   dt (u16 s), dlat, dlon (i32, 1e-6 deg), alt (i32, cm), speed (i16, cm/s)
+# Unused records at the end of the last sector have dt = 0xFFFF.
+SECTOR_SIZE = 512
+HEADER = "<4sIii"
+HEADER_SIZE = 16
+RECORD = "<Hiiih"
+RECORD_SIZE = 16
+RECORDS_PER_SECTOR = (SECTOR_SIZE - HEADER_SIZE) // RECORD_SIZE
+MAGIC = b"TRK1"
+UNUSED = 0xFFFF
+
+
+def epoch_seconds(year, month, day, hour, minute, second):
+    """Seconds since 1970-01-01 UTC, independent of the port's time epoch"""
+    y = year - (month <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def civil_time(secs):
+    """Inverse of epoch_seconds(): (year, month, day, hour, minute, second)"""
+    days, rem = divmod(secs, 86400)
+    days += 719468
+    era = days // 146097
+    doe = days - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + 3 if mp < 10 else mp - 9
+    year = yoe + era * 400 + (month <= 2)
+    return year, month, day, rem // 3600, rem // 60 % 60, rem % 60
+
+
+class TrackLogger:
+    """Append GPS points to a binary track file in whole sectors
+
+    Points are packed into a preallocated buffer of `sectors` sectors and
+    written only when the buffer is full, on flush() (completed sectors
+    only) and on close() (the last sector is padded). The file therefore
+    always grows by multiples of 512 bytes.
+    """
+
+    def __init__(self, path, sectors=8):
+        self.path = path
+        self._buf = bytearray(SECTOR_SIZE * sectors)
+        self._mv = memoryview(self._buf)
+        self._sectors = sectors
+        self._sector = 0     # Sector being filled
+        self._record = 0     # Records in that sector
+        self._prev = None    # (time, lat, lon) of the previous point
+        self._file = open(path, "ab")
+
+        # Statistics
+        self.points = 0
+        self.bytes_written = 0
+
+    def log_fix(self, fix):
+        """Log a GPSFix, skipped while there is no valid position"""
+        if not fix.valid or fix.lat is None or fix.year < 2000:
+            return False
+        t = epoch_seconds(fix.year, fix.month, fix.day, fix.hour, fix.minute, fix.second)
+        return self.append(t, fix.lat, fix.lng, fix.alt, fix.speed)
+
+    def append(self, t, lat, lon, alt_cm, speed_cms):
+        """Append one point; lat/lon in micro-degrees"""
+        prev = self._prev
+        if prev is not None and t <= prev[0]:
+            return False    # Same or older second
+        if self._record == 0 or prev is None or t - prev[0] >= UNUSED:
+            self._start_sector(t, lat, lon)
+            prev = (t, lat, lon)
+        off = self._sector * SECTOR_SIZE + HEADER_SIZE + self._record * RECORD_SIZE
+        struct.pack_into(RECORD, self._buf, off,
+                         t - prev[0], lat - prev[1], lon - prev[2],
+                         alt_cm, min(max(speed_cms, 0), 0x7FFF))
+        self._prev = (t, lat, lon)
+        self._record += 1
+        self.points += 1
+        if self._record == RECORDS_PER_SECTOR:
+            self._record = 0
+            self._sector += 1
+            if self._sector == self._sectors:
+                self.flush()
+        return True
+
+    def _start_sector(self, t, lat, lon):
+        if self._record:
+            # Gap too long for a u16 delta, close the current sector early
+            self._pad_sector()
+            if self._sector == self._sectors:
+                self.flush()
+        struct.pack_into(HEADER, self._buf, self._sector * SECTOR_SIZE, MAGIC, t, lat, lon)
+
+    def _pad_sector(self):
+        base = self._sector * SECTOR_SIZE
+        for r in range(self._record, RECORDS_PER_SECTOR):
+            off = base + HEADER_SIZE + r * RECORD_SIZE
+            struct.pack_into(RECORD, self._buf, off, UNUSED, 0, 0, 0, 0)
+        self._record = 0
+        self._sector += 1
+
+    def flush(self):
+        """Write all completed sectors"""
+        n = self._sector
+        if not n:
+            return
+        self._file.write(self._mv[:n * SECTOR_SIZE])
+        self._file.flush()
+        self.bytes_written += n * SECTOR_SIZE
+        if self._record:
+            # Move the partly filled sector to the front
+            start = n * SECTOR_SIZE
+            self._buf[0:SECTOR_SIZE] = self._buf[start:start + SECTOR_SIZE]
+        self._sector = 0
+
+    def close(self):
+        if self._record:
+            self._pad_sector()
+        self.flush()
+        self._file.close()
+
+
+def read_points(path):
+    """Yield (time, lat, lon, alt_cm, speed_cms) from a track file, sector by sector"""
+    sector = bytearray(SECTOR_SIZE)
+    with open(path, "rb") as f:
+        while f.readinto(sector) == SECTOR_SIZE:
+            magic, t, lat, lon = struct.unpack_from(HEADER, sector, 0)
+            if magic != MAGIC:
+                continue
+            for r in range(RECORDS_PER_SECTOR):
+                dt, dlat, dlon, alt, speed = struct.unpack_from(RECORD, sector, HEADER_SIZE + r * RECORD_SIZE)
+                if dt == UNUSED:
+                    break
+                t += dt
+                lat += dlat
+                lon += dlon
+                yield t, lat, lon, alt, speed
+
+
+def _deg(v):
+    sign = "-" if v < 0 else ""
+    v = abs(v)
+    return "%s%d.%06d" % (sign, v // 1000000, v % 1000000)
+
+
+def _metres(cm):
+    sign = "-" if cm < 0 else ""
+    cm = abs(cm)
+    return "%s%d.%02d" % (sign, cm // 100, cm % 100)
+
+
+def _iso(t):
+    return "%04d-%02d-%02dT%02d:%02d:%02dZ" % civil_time(t)
+
+
+def export_gpx(src, dst, name="Track"):
+    """Convert a binary track to GPX, streaming point by point"""
+    count = 0
+    with open(dst, "w") as out:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                  '<gpx version="1.1" creator="LilyGoLib" xmlns="http://www.topografix.com/GPX/1/1">\n'
+                  '<trk><name>%s</name><trkseg>\n' % name)
+        for t, lat, lon, alt, speed in read_points(src):
+            out.write('<trkpt lat="%s" lon="%s"><ele>%s</ele><time>%s</time></trkpt>\n' %
+                      (_deg(lat), _deg(lon), _metres(alt), _iso(t)))
+            count += 1
+        out.write("</trkseg></trk>\n</gpx>\n")
+    return count
+
+
+def export_csv(src, dst):
+    """Convert a binary track to CSV, streaming point by point"""
+    count = 0
+    with open(dst, "w") as out:
+        out.write("time,lat,lon,alt_m,speed_kmh\n")
+        for t, lat, lon, alt, speed in read_points(src):
+            out.write("%s,%s,%s,%s,%.2f\n" %
+                      (_iso(t), _deg(lat), _deg(lon), _metres(alt), speed * 0.036))
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    # Host usage: python track_log.py track.bin track.gpx|track.csv
+    import sys
+    src, dst = sys.argv[1], sys.argv[2]
+    n = export_csv(src, dst) if dst.endswith(".csv") else export_gpx(src, dst)
+    print("%d points written to %s" % (n, dst))
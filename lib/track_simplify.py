@@ -0,0 +1,135 @@
+import math
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class TrackSimplifier:
+    """Streaming line simplification with a bounded error in metres
+
+    Opening-window variant of Douglas-Peucker: the last emitted point is
+    the anchor and up to `window` following points are held back. As long
+    as every held point lies within `tolerance_m` of the line from the
+    anchor to the newest point, nothing is emitted. When a point would
+    break the tolerance (or the window is full), the previous point is
+    emitted and becomes the new anchor. Points closer than tolerance_m to
+    the anchor are a dead band and never extend the line on their own.
+    """
+
+    def __init__(self, tolerance_m=5.0, window=32):
+        self.tolerance_m = tolerance_m
+        self.window = window
+        # Held points as parallel lists, reused between segments
+        self._x = [0.0] * window
+        self._y = [0.0] * window
+        self._count = 0
+        self._anchor = None     # (lat, lng) of the last emitted point
+        self._cos_lat = 1.0
+        self._last = None       # (lat, lng, item) of the newest point
+        self._segment_error = 0.0
+
+        # Statistics
+        self.points_in = 0
+        self.points_out = 0
+        self.max_error_m = 0.0
+
+    def push(self, lat, lng, item=None):
+        """Feed one point in degrees; returns the item to keep, or None"""
+        self.points_in += 1
+        if self._anchor is None:
+            self._set_anchor(lat, lng)
+            self._last = None
+            self.points_out += 1
+            return item
+
+        x, y = self._project(lat, lng)
+        count = self._count
+        error = self._max_distance(x, y, count)
+        if count and (error > self.tolerance_m or count == self.window):
+            # The newest point cannot be covered, keep the one before it
+            lat0, lng0, kept = self._last
+            self._commit()
+            self._set_anchor(lat0, lng0)
+            x, y = self._project(lat, lng)
+            self._append(x, y, lat, lng, item)
+            self.points_out += 1
+            return kept
+
+        self._segment_error = error
+        if count or x * x + y * y > self.tolerance_m * self.tolerance_m:
+            self._append(x, y, lat, lng, item)
+        return None
+
+    def push_gps_data(self, gps_data):
+        """Feed a gps_data-style dict (as in gps.py); returns a kept copy or None"""
+        lat = gps_data["lat"]
+        lng = gps_data["lng"]
+        if lat is None or lng is None or not gps_data["valid"]:
+            return None
+        return self.push(lat, lng, dict(gps_data))
+
+    def flush(self):
+        """Return the last held item so the track ends on its final point"""
+        if not self._count:
+            return None
+        lat, lng, item = self._last
+        self._commit()
+        self._set_anchor(lat, lng)
+        self.points_out += 1
+        return item
+
+    def compression_ratio(self):
+        """Input points per kept point"""
+        return self.points_in / self.points_out if self.points_out else 0.0
+
+    # --------------------------------------------------
+    # Geometry in a local tangent plane around the anchor
+    # --------------------------------------------------
+    def _set_anchor(self, lat, lng):
+        self._anchor = (lat, lng)
+        self._cos_lat = math.cos(math.radians(lat))
+        self._count = 0
+        self._segment_error = 0.0
+
+    def _project(self, lat, lng):
+        lat0, lng0 = self._anchor
+        k = math.pi / 180 * EARTH_RADIUS_M
+        return (lng - lng0) * k * self._cos_lat, (lat - lat0) * k
+
+    def _append(self, x, y, lat, lng, item):
+        if self._count < self.window:
+            self._x[self._count] = x
+            self._y[self._count] = y
+            self._count += 1
+        self._last = (lat, lng, item)
+
+    def _commit(self):
+        if self._segment_error > self.max_error_m:
+            self.max_error_m = self._segment_error
+
+    def _max_distance(self, ex, ey, count):
+        """Largest distance of the held points from the segment anchor -> (ex, ey)"""
+        xs = self._x
+        ys = self._y
+        length2 = ex * ex + ey * ey
+        worst = 0.0
+        if length2 == 0.0:
+            for i in range(count):
+                d = xs[i] * xs[i] + ys[i] * ys[i]
+                if d > worst:
+                    worst = d
+            return math.sqrt(worst)
+        inv = 1.0 / length2
+        for i in range(count):
+            px = xs[i]
+            py = ys[i]
+            t = (px * ex + py * ey) * inv
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            dx = px - t * ex
+            dy = py - t * ey
+            d = dx * dx + dy * dy
+            if d > worst:
+                worst = d
+        return math.sqrt(worst)
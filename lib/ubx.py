@@ -0,0 +1,332 @@
+import struct
+import time
+import micropython
+from micropython import const
+from nmea import GPSFix, TALKER_GP, TALKER_GL, TALKER_GA, TALKER_GB, TALKER_GQ, MAX_SATS
+
+# --------------------------------------------------
+# UBX message classes / IDs
+# --------------------------------------------------
+UBX_SYNC1 = const(0xB5)
+UBX_SYNC2 = const(0x62)
+
+CLS_NAV = const(0x01)
+CLS_ACK = const(0x05)
+CLS_CFG = const(0x06)
+CLS_MGA = const(0x13)
+
+ID_NAV_PVT = const(0x07)
+ID_NAV_SAT = const(0x35)
+ID_ACK_NAK = const(0x00)
+ID_ACK_ACK = const(0x01)
+ID_CFG_VALSET = const(0x8A)
+ID_MGA_ACK = const(0x60)
+
+# --------------------------------------------------
+# M10 configuration keys (CFG-VALSET)
+# --------------------------------------------------
+CFG_UART1_BAUDRATE = 0x40520001           # U4
+CFG_UART1OUTPROT_UBX = 0x10740001         # L
+CFG_UART1OUTPROT_NMEA = 0x10740002        # L
+CFG_MSGOUT_UBX_NAV_PVT_UART1 = 0x20910007  # U1
+CFG_MSGOUT_UBX_NAV_SAT_UART1 = 0x20910016  # U1
+CFG_RATE_MEAS = 0x30210001                # U2, ms
+CFG_RATE_NAV = 0x30210002                 # U2, cycles
+CFG_NAVSPG_ACKAIDING = 0x10110025         # L
+
+LAYER_RAM = const(0x01)
+LAYER_BBR = const(0x02)
+
+BUFFER_SIZE = const(1024)
+
+# NAV-SAT gnssId -> nmea talker index
+_GNSS_TALKER = (TALKER_GP, TALKER_GP, TALKER_GA, TALKER_GB, TALKER_GP, TALKER_GQ, TALKER_GL)
+
+# iTOW, year, month, day, hour, min, sec, valid, tAcc, nano, fixType, flags,
+# flags2, numSV, lon, lat, height, hMSL, hAcc, vAcc, velN, velE, velD,
+# gSpeed, headMot, sAcc, headAcc, pDOP
+_NAV_PVT = "<IHBBBBBBIiBBBBiiiiIIiiiiiIIH"
+
+
+@micropython.viper
+def _find_sync(buf, start: int, end: int) -> int:
+    p = ptr8(buf)
+    i = start
+    while i + 1 < end:
+        if p[i] == 0xB5 and p[i + 1] == 0x62:
+            return i
+        i += 1
+    return -1
+
+
+@micropython.viper
+def _fletcher(buf, start: int, end: int) -> int:
+    """8-bit Fletcher checksum over buf[start:end], returned as ck_a | ck_b << 8"""
+    p = ptr8(buf)
+    a = 0
+    b = 0
+    i = start
+    while i < end:
+        a = (a + p[i]) & 0xFF
+        b = (b + a) & 0xFF
+        i += 1
+    return a | (b << 8)
+
+
+@micropython.viper
+def _shift(buf, src: int, n: int):
+    """Move buf[src:src + n] to the start of buf"""
+    p = ptr8(buf)
+    i = 0
+    while i < n:
+        p[i] = p[src + i]
+        i += 1
+
+
+def ubx_frame(cls, msg_id, payload=b""):
+    """Build a complete UBX frame with sync bytes and checksum"""
+    n = len(payload)
+    frame = bytearray(8 + n)
+    frame[0] = UBX_SYNC1
+    frame[1] = UBX_SYNC2
+    frame[2] = cls
+    frame[3] = msg_id
+    frame[4] = n & 0xFF
+    frame[5] = n >> 8
+    frame[6:6 + n] = payload
+    ck = _fletcher(frame, 2, 6 + n)
+    frame[6 + n] = ck & 0xFF
+    frame[7 + n] = ck >> 8
+    return frame
+
+
+def valset(items, layers=LAYER_RAM):
+    """Build a CFG-VALSET frame from (key, value) pairs
+
+    The value size is taken from the key's size bits (L/U1/U2/U4).
+    """
+    payload = bytearray(struct.pack("<BBH", 0, layers, 0))
+    for key, value in items:
+        size = (key >> 28) & 0x07
+        if size <= 2:
+            fmt = "<IB"
+        elif size == 3:
+            fmt = "<IH"
+        else:
+            fmt = "<II"
+        payload.extend(struct.pack(fmt, key, value))
+    return ubx_frame(CLS_CFG, ID_CFG_VALSET, payload)
+
+
+class UBXReader:
+    """Stream UBX frames from the GPS UART into a GPSFix
+
+    Frames are assembled in one reusable buffer, the Fletcher checksum is
+    verified before decoding and NAV-PVT / NAV-SAT are unpacked in place
+    with struct.unpack_from. Bytes outside UBX frames (e.g. residual NMEA)
+    are skipped.
+    """
+
+    def __init__(self, uart, fix=None, size=BUFFER_SIZE):
+        self.uart = uart
+        self.fix = fix if fix is not None else GPSFix()
+        self._buf = bytearray(size)
+        self._mv = memoryview(self._buf)
+        self._len = 0
+        self._ack = None   # (cls, id, acked) of the last ACK/NAK
+        self.mga_ack = None  # (accepted, info_code, msg_id) of the last MGA-ACK
+
+        # Statistics
+        self.rx_chars = 0
+        self.frames = 0
+        self.checksum_failed = 0
+        self.pvt_count = 0
+        self.sat_count = 0
+
+    def poll(self):
+        """Read everything pending and decode complete frames
+
+        Returns:
+            Number of valid frames decoded
+        """
+        uart = self.uart
+        size = len(self._buf)
+        frames = 0
+        while True:
+            avail = uart.any()
+            if avail:
+                end = self._len + avail
+                if end > size:
+                    end = size
+                n = uart.readinto(self._mv[self._len:end])
+                if n:
+                    self._len += n
+                    self.rx_chars += n
+            frames += self._process()
+            if not avail or not uart.any():
+                break
+        return frames
+
+    def send(self, frame):
+        self.uart.write(frame)
+
+    def wait_ack(self, cls, msg_id, timeout_ms=1000):
+        """Wait for ACK-ACK/NAK of a sent message, return True if acknowledged"""
+        self._ack = None
+        start = time.ticks_ms()
+        while time.ticks_diff(time.ticks_ms(), start) < timeout_ms:
+            self.poll()
+            ack = self._ack
+            if ack is not None and ack[0] == cls and ack[1] == msg_id:
+                return ack[2]
+            time.sleep_ms(5)
+        return False
+
+    def configure(self, rate_hz=5, sat_every=10, layers=LAYER_RAM):
+        """Switch UART1 output to UBX NAV-PVT (+ NAV-SAT) only at rate_hz
+
+        NAV-SAT is sent every sat_every navigation epochs (0 disables it).
+        5 Hz fits in 9600 baud; call set_baudrate(115200) first for 10 Hz.
+        Returns True if the receiver acknowledged the configuration.
+        """
+        frame = valset((
+            (CFG_UART1OUTPROT_UBX, 1),
+            (CFG_UART1OUTPROT_NMEA, 0),
+            (CFG_MSGOUT_UBX_NAV_PVT_UART1, 1),
+            (CFG_MSGOUT_UBX_NAV_SAT_UART1, sat_every),
+            (CFG_RATE_MEAS, 1000 // rate_hz),
+            (CFG_RATE_NAV, 1),
+        ), layers)
+        self.send(frame)
+        return self.wait_ack(CLS_CFG, ID_CFG_VALSET)
+
+    def restore_nmea(self, layers=LAYER_RAM):
+        """Re-enable NMEA output at 1 Hz"""
+        frame = valset((
+            (CFG_UART1OUTPROT_NMEA, 1),
+            (CFG_MSGOUT_UBX_NAV_PVT_UART1, 0),
+            (CFG_MSGOUT_UBX_NAV_SAT_UART1, 0),
+            (CFG_RATE_MEAS, 1000),
+        ), layers)
+        self.send(frame)
+        return self.wait_ack(CLS_CFG, ID_CFG_VALSET)
+
+    def set_baudrate(self, baudrate):
+        """Change the receiver baud rate and follow it on our side
+
+        The ACK is sent at the new rate, so it is not waited for.
+        """
+        self.send(valset(((CFG_UART1_BAUDRATE, baudrate),)))
+        time.sleep_ms(100)
+        self.uart.init(baudrate=baudrate)
+        self._len = 0
+
+    # --------------------------------------------------
+    # Frame assembly
+    # --------------------------------------------------
+    def _process(self):
+        buf = self._buf
+        frames = 0
+        pos = 0
+        end = self._len
+        while True:
+            start = _find_sync(buf, pos, end)
+            if start < 0:
+                # Keep a trailing 0xB5, it may be the start of a frame
+                pos = end - 1 if end and buf[end - 1] == UBX_SYNC1 else end
+                break
+            if end - start < 6:
+                pos = start
+                break
+            length = buf[start + 4] | (buf[start + 5] << 8)
+            total = length + 8
+            if total > len(buf):
+                # Impossible length, resync after this sync pair
+                pos = start + 2
+                continue
+            if end - start < total:
+                pos = start
+                break
+            ck = _fletcher(buf, start + 2, start + 6 + length)
+            if (ck & 0xFF) != buf[start + 6 + length] or (ck >> 8) != buf[start + 7 + length]:
+                self.checksum_failed += 1
+                pos = start + 2
+                continue
+            self.frames += 1
+            frames += 1
+            self._dispatch(buf[start + 2], buf[start + 3], start + 6, length)
+            pos = start + total
+        if pos:
+            _shift(buf, pos, end - pos)
+            self._len = end - pos
+        return frames
+
+    def _dispatch(self, cls, msg_id, off, length):
+        if cls == CLS_NAV:
+            if msg_id == ID_NAV_PVT and length >= 92:
+                self._nav_pvt(off)
+            elif msg_id == ID_NAV_SAT and length >= 8:
+                self._nav_sat(off, length)
+        elif cls == CLS_ACK and length >= 2:
+            buf = self._buf
+            self._ack = (buf[off], buf[off + 1], msg_id == ID_ACK_ACK)
+        elif cls == CLS_MGA and msg_id == ID_MGA_ACK and length >= 8:
+            buf = self._buf
+            self.mga_ack = (buf[off] == 1, buf[off + 2], buf[off + 3])
+
+    def _nav_pvt(self, off):
+        (itow, year, month, day, hour, minute, second, valid, tacc, nano,
+         fix_type, flags, flags2, num_sv, lon, lat, height, hmsl, hacc, vacc,
+         vel_n, vel_e, vel_d, g_speed, head_mot, s_acc, head_acc,
+         pdop) = struct.unpack_from(_NAV_PVT, self._buf, off)
+        fix = self.fix
+        if valid & 0x03 == 0x03:  # validDate and validTime
+            fix.year = year
+            fix.month = month
+            fix.day = day
+            fix.hour = hour
+            fix.minute = minute
+            fix.second = second
+            fix.centisecond = nano // 10000000 if nano > 0 else 0
+        fix.fix_mode = fix_type if 2 <= fix_type <= 3 else 1
+        fix.sats_used = num_sv
+        fix.pdop = pdop
+        ok = bool(flags & 0x01)  # gnssFixOK
+        fix.valid = ok
+        fix.quality = 1 if ok else 0
+        if ok:
+            fix.lat = lat // 10           # 1e-7 deg -> micro-degrees
+            fix.lng = lon // 10
+            fix.alt = hmsl // 10          # mm -> cm
+            fix.speed = g_speed // 10     # mm/s -> cm/s
+            fix.course = head_mot // 1000  # 1e-5 deg -> 0.01 deg
+            fix.fix_ticks = time.ticks_ms()
+        self.pvt_count += 1
+
+    def _nav_sat(self, off, length):
+        buf = self._buf
+        fix = self.fix
+        num = buf[off + 5]
+        if 8 + 12 * num > length:
+            return
+        in_view = fix.sats_in_view
+        for t in range(len(in_view)):
+            in_view[t] = 0
+        count = 0
+        p = off + 8
+        for _ in range(num):
+            if count >= MAX_SATS:
+                break
+            gnss_id, sv_id, cno, elev, azim = struct.unpack_from("<BBBbh", buf, p)
+            talker = _GNSS_TALKER[gnss_id] if gnss_id < len(_GNSS_TALKER) else TALKER_GP
+            fix.sat_talker[count] = talker
+            fix.sat_signal[count] = 0
+            fix.sat_prn[count] = sv_id
+            fix.sat_elev[count] = elev
+            fix.sat_azim[count] = azim if azim >= 0 else 0
+            fix.sat_snr[count] = cno
+            in_view[talker] += 1
+            count += 1
+            p += 12
+        fix.sat_count = count
+        self.sat_count += 1
@@ -0,0 +1,221 @@
+import micropython
+from array import array
+from micropython import const
+
+# --------------------------------------------------
+# Voice activity detection
+# --------------------------------------------------
+# Per block: mean absolute level after DC removal and the number of
+# zero crossings, in one viper pass. Speech is a block whose level is
+# well above the tracked noise floor; blocks that are only moderately
+# loud must also cross zero at a voice-like rate, which rejects hiss.
+_LEVEL = const(0)
+_CROSSINGS = const(1)
+_DC = const(2)
+_MEAN = const(3)
+
+# Gate states
+IDLE = const(0)
+ACTIVE = const(1)
+
+
+@micropython.viper
+def _frame(buf, n: int, st):
+    s = ptr16(buf)
+    o = ptr32(st)
+    dc = o[_DC]
+    total = 0
+    raw = 0
+    crossings = 0
+    prev = 0
+    i = 0
+    while i < n:
+        v = s[i]
+        if v & 0x8000:
+            v -= 0x10000
+        raw += v
+        v -= dc
+        neg = 0
+        if v < 0:
+            total -= v
+            neg = 1
+        else:
+            total += v
+        if i > 0 and neg != prev:
+            crossings += 1
+        prev = neg
+        i += 1
+    o[_LEVEL] = total // n
+    o[_CROSSINGS] = crossings
+    o[_MEAN] = raw // n
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing speech detector for int16 blocks
+
+    is_speech() classifies one block. The noise floor follows quiet
+    blocks quickly downwards and slowly upwards, and stays frozen while
+    speech is detected. The first `warmup` blocks only train the DC
+    offset and the floor.
+    """
+
+    def __init__(self, on_ratio=4, loud_ratio=8, min_level=60, max_crossing_rate=40, warmup=8):
+        self.on_ratio = on_ratio                # Level above floor that counts as voice
+        self.loud_ratio = loud_ratio            # Above this, zero crossings are ignored
+        self.min_level = min_level              # Absolute threshold for a silent room
+        self.max_crossing_rate = max_crossing_rate  # Percent of samples
+        self._st = array("i", [0] * 4)
+        self.floor = min_level
+        self.warmup = warmup
+        self._blocks = 0
+        self.level = 0
+        self.crossings = 0
+
+    def is_speech(self, pcm, n=None):
+        if n is None:
+            n = len(pcm) if isinstance(pcm, array) else len(pcm) // 2
+        st = self._st
+        _frame(pcm, n, st)
+        if self._blocks == 0:
+            st[_DC] = st[_MEAN]
+            _frame(pcm, n, st)
+        st[_DC] += (st[_MEAN] - st[_DC]) >> 3
+        level = st[_LEVEL]
+        self.level = level
+        self.crossings = st[_CROSSINGS]
+        self._blocks += 1
+        if self._blocks <= self.warmup:
+            self.floor = max(self.min_level // 2, (self.floor + level) >> 1)
+            return False
+        threshold = max(self.min_level, self.floor * self.on_ratio)
+        if level > self.floor * self.loud_ratio and level > self.min_level:
+            speech = True
+        else:
+            speech = level > threshold and self.crossings * 100 < n * self.max_crossing_rate
+        if not speech:
+            if level < self.floor:
+                self.floor += (level - self.floor) >> 1
+            else:
+                self.floor += ((level - self.floor) >> 5) + 1
+        return speech
+
+
+class VoiceGate:
+    """Pass audio on only while someone is talking
+
+    feed() takes every captured block. While idle the last
+    `preroll_blocks` blocks are kept in a ring, so when speech starts
+    (`attack` speech blocks in a row) on_start() is followed by the
+    pre-roll and then the live blocks; on_stop() comes `hang_ms` after
+    the last speech block. may_sleep() tells the caller that nothing has
+    happened for `sleep_after` blocks; if it does sleep it reports the
+    time with slept(), and an onset in the first block after a sleep is
+    counted in `missed_onsets` since its start may have been lost. After
+    a sleep, `listen_blocks` blocks must be heard before the next one.
+    """
+
+    def __init__(self, block_bytes, rate=16000, preroll_blocks=16, hang_ms=600,
+                 attack=2, sleep_after=30, listen_blocks=3, detector=None,
+                 on_start=None, on_block=None, on_stop=None):
+        self.detector = detector or VoiceActivityDetector()
+        self.block_bytes = block_bytes
+        self.block_ms = block_bytes * 500 // rate      # 16-bit mono
+        self.hang_blocks = max(1, hang_ms // max(1, self.block_ms))
+        self.attack = attack
+        self.sleep_after = sleep_after
+        self.listen_blocks = listen_blocks
+        self.on_start = on_start
+        self.on_block = on_block
+        self.on_stop = on_stop
+
+        self._ring = [bytearray(block_bytes) for _ in range(preroll_blocks)]
+        self._ring_mv = [memoryview(b) for b in self._ring]
+        self._ring_count = 0
+        self._ring_pos = 0
+        self._run = 0           # Consecutive speech blocks
+        self._hang = 0
+        self._quiet = 0         # Blocks since the last speech block
+        self._woke = False
+        self._awake = 0         # Blocks heard since the last sleep
+        self._run_after_sleep = False
+        self.state = IDLE
+
+        # Statistics
+        self.blocks = 0
+        self.active_blocks = 0
+        self.onsets = 0
+        self.missed_onsets = 0
+        self.sleep_ms = 0
+
+    def feed(self, block):
+        self.blocks += 1
+        self._awake += 1
+        speech = self.detector.is_speech(block)
+        woke = self._woke
+        self._woke = False
+        if speech:
+            self._quiet = 0
+        else:
+            self._quiet += 1
+
+        if self.state == ACTIVE:
+            self.active_blocks += 1
+            if self.on_block:
+                self.on_block(block)
+            if speech:
+                self._hang = self.hang_blocks
+            else:
+                self._hang -= 1
+                if self._hang <= 0:
+                    self.state = IDLE
+                    self._run = 0
+                    if self.on_stop:
+                        self.on_stop()
+            return speech
+
+        if speech and self._run == 0:
+            self._run_after_sleep = woke
+        self._run = self._run + 1 if speech else 0
+        if self._run >= self.attack:
+            self._start(block, self._run_after_sleep)
+        else:
+            self._remember(block)
+        return speech
+
+    def _remember(self, block):
+        n = min(len(block), self.block_bytes)
+        self._ring_mv[self._ring_pos][:n] = block[:n]
+        self._ring_pos = (self._ring_pos + 1) % len(self._ring)
+        if self._ring_count < len(self._ring):
+            self._ring_count += 1
+
+    def _start(self, block, missed):
+        self.state = ACTIVE
+        self.onsets += 1
+        if missed:
+            self.missed_onsets += 1
+        self._hang = self.hang_blocks
+        if self.on_start:
+            self.on_start()
+        count = self._ring_count
+        start = (self._ring_pos - count) % len(self._ring)
+        for i in range(count):
+            if self.on_block:
+                self.on_block(self._ring_mv[(start + i) % len(self._ring)])
+        self.active_blocks += count + 1
+        self._ring_count = 0
+        if self.on_block:
+            self.on_block(block)
+
+    def may_sleep(self):
+        return (self.state == IDLE and self._quiet >= self.sleep_after
+                and self._awake >= self.listen_blocks)
+
+    def slept(self, ms):
+        self.sleep_ms += ms
+        self._woke = True
+        self._awake = 0
+
+    def duty_cycle(self):
+        """Percentage of blocks passed on (recorded)"""
+        return self.active_blocks * 100 // self.blocks if self.blocks else 0
@@ -0,0 +1,216 @@
+import struct
+import time
+
+SECTOR_SIZE = 512
+HEADER_SIZE = 44
+
+
+def wav_header(rate, bits, channels, data_size=0):
+    """Canonical 44-byte PCM WAV header"""
+    align = channels * bits // 8
+    return struct.pack("<4sI4s4sIHHIIHH4sI",
+                       b"RIFF", 36 + data_size, b"WAVE",
+                       b"fmt ", 16, 1, channels, rate, rate * align, align, bits,
+                       b"data", data_size)
+
+
+class WavWriter:
+    """Stream PCM into a WAV file in whole sectors
+
+    The header shares the first buffer with the audio, so every write
+    to the card is `sectors` x 512 bytes and sector aligned; only the
+    tail written by close() is shorter. close() patches the RIFF and
+    data sizes in place.
+    """
+
+    def __init__(self, path, rate=16000, bits=16, channels=1, sectors=8):
+        self.rate = rate
+        self.bits = bits
+        self.channels = channels
+        self._buf = bytearray(SECTOR_SIZE * sectors)
+        self._mv = memoryview(self._buf)
+        self._buf[0:HEADER_SIZE] = wav_header(rate, bits, channels)
+        self._fill = HEADER_SIZE
+        self._file = open(path, "wb")
+
+        # Statistics
+        self.data_bytes = 0
+        self.writes = 0
+        self.write_us = 0       # Total time spent in file writes
+        self.max_write_us = 0
+
+    def write(self, pcm):
+        """Append PCM bytes; only ever writes full buffers"""
+        n = len(pcm)
+        src = memoryview(pcm)
+        pos = 0
+        size = len(self._buf)
+        while pos < n:
+            count = min(n - pos, size - self._fill)
+            self._mv[self._fill:self._fill + count] = src[pos:pos + count]
+            self._fill += count
+            pos += count
+            if self._fill == size:
+                self._flush(size)
+        self.data_bytes += n
+
+    def _flush(self, n):
+        start = time.ticks_us()
+        self._file.write(self._mv[:n])
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        self.writes += 1
+        self.write_us += elapsed
+        if elapsed > self.max_write_us:
+            self.max_write_us = elapsed
+        self._fill = 0
+
+    def throughput(self):
+        """Sustained card write speed in bytes per second"""
+        return self.data_bytes * 1000000 // self.write_us if self.write_us else 0
+
+    def duration_ms(self):
+        return self.data_bytes * 1000 // (self.rate * self.channels * self.bits // 8)
+
+    def close(self):
+        if self._fill:
+            self._flush(self._fill)
+        f = self._file
+        f.seek(4)
+        f.write(struct.pack("<I", 36 + self.data_bytes))
+        f.seek(40)
+        f.write(struct.pack("<I", self.data_bytes))
+        f.close()
+
+
+class WavReader:
+    """Parse a PCM WAV header and read the samples that follow"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        head = self._file.read(12)
+        if len(head) < 12 or head[0:4] != b"RIFF" or head[8:12] != b"WAVE":
+            self._file.close()
+            raise ValueError("not a WAV file")
+        self.rate = 0
+        while True:
+            chunk = self._file.read(8)
+            if len(chunk) < 8:
+                self._file.close()
+                raise ValueError("no data chunk")
+            tag, size = struct.unpack("<4sI", chunk)
+            if tag == b"fmt ":
+                fmt = self._file.read(size)
+                fmt_tag, self.channels, self.rate, _, _, self.bits = struct.unpack_from("<HHIIHH", fmt)
+                if fmt_tag != 1:
+                    self._file.close()
+                    raise ValueError("only PCM WAV is supported")
+            elif tag == b"data":
+                self.data_bytes = size
+                break
+            else:
+                self._file.seek(size + (size & 1), 1)
+        self.remaining = self.data_bytes
+
+    def readinto(self, buf):
+        n = len(buf)
+        if n > self.remaining:
+            n = self.remaining
+        if n <= 0:
+            return 0
+        got = self._file.readinto(memoryview(buf)[:n]) if n < len(buf) else self._file.readinto(buf)
+        self.remaining -= got
+        return got
+
+    def close(self):
+        self._file.close()
+
+
+class WavPlayer:
+    """Play a WAV file to a non-blocking I2S.TX with read-ahead
+
+    The file is read into a ring of `buffers` blocks by service(), which
+    the main loop calls; the I2S callback only takes filled blocks, so
+    card latency is hidden by the ring. The main loop advances `head`
+    and the callback advances `tail`. If the callback finds the ring
+    empty it sends silence and counts an underrun.
+    """
+
+    def __init__(self, i2s, reader, block_bytes=4096, buffers=4):
+        self.i2s = i2s
+        self.reader = reader
+        self._count = buffers
+        self._bufs = [bytearray(block_bytes) for _ in range(buffers)]
+        self._views = [memoryview(b) for b in self._bufs]
+        self._lens = [0] * buffers
+        self._silence = memoryview(bytearray(block_bytes // 4))
+        self._head = 0      # Blocks read from the file (main loop)
+        self._tail = 0      # Blocks finished by I2S (callback)
+        self._active = False  # A file block is being written
+        self._eof = False
+        self._handler = self._on_written
+        self.playing = False
+
+        # Statistics
+        self.underruns = 0
+        self.bytes_read = 0
+        self.read_us = 0
+        self.max_read_us = 0
+
+    def start(self):
+        """Pre-fill the whole ring, then start the I2S callback chain"""
+        while self.service():
+            pass
+        self.playing = True
+        self._active = False
+        self.i2s.irq(self._handler)
+        self._on_written(self.i2s)
+
+    def stop(self):
+        self.playing = False
+        self.i2s.irq(None)
+        self.reader.close()
+
+    @property
+    def finished(self):
+        return self._eof and self._tail == self._head
+
+    def _on_written(self, i2s):
+        if not self.playing:
+            return
+        if self._active:
+            self._tail += 1     # The block in flight is done, its slot is free
+        tail = self._tail
+        if tail != self._head:
+            slot = tail % self._count
+            n = self._lens[slot]
+            self._active = True
+            i2s.write(self._views[slot] if n == len(self._bufs[slot]) else self._views[slot][:n])
+        elif not self._eof:
+            self._active = False
+            self.underruns += 1
+            i2s.write(self._silence)
+        else:
+            self.playing = False
+
+    def service(self):
+        """Read one block ahead if there is room, return True if a block was read"""
+        if self._eof or self._head - self._tail >= self._count:
+            return False
+        slot = self._head % self._count
+        start = time.ticks_us()
+        n = self.reader.readinto(self._bufs[slot])
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        if not n:
+            self._eof = True
+            return False
+        self.read_us += elapsed
+        if elapsed > self.max_read_us:
+            self.max_read_us = elapsed
+        self.bytes_read += n
+        self._lens[slot] = n
+        self._head += 1
+        return True
+
+    def throughput(self):
+        """Sustained card read speed in bytes per second"""
+        return self.bytes_read * 1000000 // self.read_us if self.read_us else 0
@@ -0,0 +1,67 @@
+"""Per-fix cost of lib/geofence.py with many fences
+
+    python tests/bench_geofence.py
+
+Scatters square and octagonal fences over a 30 x 40 km area and drives
+a track across it, reporting the time per fix and the fences tested per
+fix for each fence count, with the default grid and with the whole area
+in one cell, which leaves only the bounding box check. Also runs on the
+device (copy geofence.py over, then run the script with mpremote).
+"""
+import math
+import random
+import sys
+import time
+
+if sys.implementation.name != "micropython":
+    import os
+    HERE = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+    sys.path.insert(0, HERE)
+
+import micropython  # noqa: E402,F401
+from geofence import GRID_CELL, Geofences  # noqa: E402
+
+COUNTS = (100, 1000, 5000)
+FIXES = 2000
+ONE_CELL = 1 << 30
+
+
+def fences(g, count, seed=1):
+    rnd = random.Random(seed)
+    for i in range(count):
+        lat = rnd.randint(22400000, 22700000)
+        lng = rnd.randint(113800000, 114200000)
+        r = rnd.randint(500, 3000)
+        sides = 4 if i % 2 else 8
+        g.add("f%d" % i, [(lat + int(r * math.sin(2 * math.pi * k / sides)),
+                           lng + int(r * math.cos(2 * math.pi * k / sides))) for k in range(sides)])
+
+
+def track():
+    # Diagonal drive across the area, ~20 m per fix
+    return [(22450000 + 100 * k, 113850000 + 150 * k) for k in range(FIXES)]
+
+
+def run(count, cell):
+    events = [0]
+    g = Geofences(lambda e, n: None, margin_m=10, cell=cell)
+    fences(g, count)
+    fixes = track()
+    start = time.ticks_us()
+    for k, (lat, lng) in enumerate(fixes):
+        events[0] += g.update(lat, lng, k)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    return elapsed / FIXES, g.candidates_tested / FIXES, events[0]
+
+
+def main():
+    print("fences  grid       us/fix  tested/fix  events")
+    for count in COUNTS:
+        for name, cell in (("0.01 deg", GRID_CELL), ("one cell", ONE_CELL)):
+            us, tested, events = run(count, cell)
+            print("%6d  %-9s  %7.1f  %10.2f  %6d" % (count, name, us, tested, events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Sentences per second and allocation of lib/nmea_reader.py and lib/nmea.py
+
+    python tests/bench_nmea_reader.py [capture.nmea]
+
+Replays a recorded NMEA stream (tests/nmea_capture.nmea, 30 s of an
+M10 receiver at 1 Hz with GPS, GLONASS, Galileo and BeiDou) through a
+fake UART in 230-byte chunks, what a 20 ms UI frame brings at 115200
+baud. It times the reader alone, then reader and parser together.
+
+Also runs on the device (copy the two modules, fake_uart.py and the
+capture over, then run the script with mpremote). There the allocation
+is the exact number of heap bytes, counted by gc.mem_alloc() with the
+collector off. On the host it is the tracemalloc peak above the start,
+which includes the fake UART's own receive buffer.
+"""
+import sys
+import time
+
+if sys.implementation.name != "micropython":
+    import os
+    HERE = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+    sys.path.insert(0, HERE)
+    CAPTURE = os.path.join(HERE, "nmea_capture.nmea")
+else:
+    CAPTURE = "nmea_capture.nmea"
+
+import micropython  # noqa: E402,F401
+from fake_uart import FakeUART  # noqa: E402
+from nmea import NMEAParser  # noqa: E402
+from nmea_reader import NMEAReader  # noqa: E402
+
+CHUNK = 230
+ROUNDS = 10
+WIRE_BYTES_PER_S = 11520    # 115200 baud, 8N1
+
+
+if sys.implementation.name == "micropython":
+    import gc
+
+    def start_count():
+        gc.collect()
+        gc.disable()
+        return gc.mem_alloc()
+
+    def stop_count(start):
+        used = gc.mem_alloc() - start
+        gc.enable()
+        return used
+else:
+    import tracemalloc
+
+    def start_count():
+        tracemalloc.start()
+        return tracemalloc.get_traced_memory()[0]
+
+    def stop_count(start):
+        used = tracemalloc.get_traced_memory()[1] - start
+        tracemalloc.stop()
+        return used
+
+
+def run(capture, on_line):
+    uart = FakeUART(fifo=256)
+    reader = NMEAReader(uart)
+    chunks = [capture[pos:pos + CHUNK] for pos in range(0, len(capture), CHUNK)]
+    reader.poll(on_line)                # Warm up
+    mark = start_count()
+    start = time.ticks_us()
+    for _ in range(ROUNDS):
+        for chunk in chunks:
+            uart.feed(chunk)
+            reader.poll(on_line)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    allocated = stop_count(mark)
+    return reader.sentences, elapsed, allocated
+
+
+def main():
+    with open(sys.argv[1] if len(sys.argv) > 1 else CAPTURE, "rb") as f:
+        capture = f.read()
+    parser = NMEAParser()
+    cases = (("reader", lambda line: None), ("reader + parser", parser.parse))
+    print("capture: %d bytes, %d sentences" % (len(capture), capture.count(b"\n")))
+    print("stage             sentences/s  x wire speed  bytes allocated")
+    for name, on_line in cases:
+        sentences, elapsed, allocated = run(capture, on_line)
+        per_s = sentences * 1000000 / elapsed
+        wire = ROUNDS * len(capture) * 1000000 / elapsed / WIRE_BYTES_PER_S
+        print("%-16s  %11.0f  %12.1f  %15d" % (name, per_s, wire, allocated))
+    print("parser: %d sentences, %d checksum failures, %d unknown" % (
+        parser.sentences, parser.checksum_failed, parser.unknown))
+
+
+if __name__ == "__main__":
+    main()
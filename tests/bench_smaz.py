@@ -0,0 +1,58 @@
+"""Compression ratio and speed of lib/smaz.py on a chat corpus
+
+    python tests/bench_smaz.py [corpus.txt]
+
+Also runs on the device (copy smaz.py and the corpus over, then run the
+script with mpremote), where the timings are the ones that matter. The
+corpus holds one message per line.
+"""
+import sys
+import time
+
+if sys.implementation.name != "micropython":
+    import os
+    HERE = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+    sys.path.insert(0, HERE)
+    CORPUS = os.path.join(HERE, "smaz_corpus.txt")
+else:
+    CORPUS = "smaz_corpus.txt"
+
+import micropython  # noqa: E402,F401
+import smaz  # noqa: E402
+
+ROUNDS = 20
+
+
+def load(path):
+    with open(path) as f:
+        return [line.rstrip("\n").encode() for line in f if line.strip()]
+
+
+def per_message_us(func, items):
+    start = time.ticks_us()
+    for _ in range(ROUNDS):
+        for item in items:
+            func(item)
+    return time.ticks_diff(time.ticks_us(), start) / ROUNDS / len(items)
+
+
+def main():
+    messages = load(sys.argv[1] if len(sys.argv) > 1 else CORPUS)
+    packed = [bytes(smaz.compress(m)) for m in messages]
+    for m, p in zip(messages, packed):
+        if bytes(smaz.decompress(p)) != m:
+            raise AssertionError("round trip failed: %r" % m)
+
+    raw = sum(len(m) for m in messages)
+    small = sum(len(p) for p in packed)
+    print("messages        %d" % len(messages))
+    print("bytes           %d -> %d" % (raw, small))
+    print("ratio           %.3f" % (small / raw))
+    print("mean length     %.1f -> %.1f" % (raw / len(messages), small / len(messages)))
+    print("encode          %.1f us/message" % per_message_us(smaz.compress, messages))
+    print("decode          %.1f us/message" % per_message_us(smaz.decompress, packed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""FFTs per second of lib/spectrum.py
+
+    python tests/bench_spectrum.py
+
+Also runs on the device (copy spectrum.py over, then run the script with
+mpremote), where viper compiles the kernels and the figures are the ones
+that matter. transform() is the window, FFT and magnitude of one block;
+process() adds the band levels the microphone page draws.
+"""
+import math
+import sys
+import time
+
+if sys.implementation.name != "micropython":
+    import os
+    HERE = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+    sys.path.insert(0, HERE)
+
+import micropython  # noqa: E402,F401
+from array import array  # noqa: E402
+from spectrum import SpectrumAnalyzer  # noqa: E402
+
+ROUNDS = 50
+RATE = 16000
+
+
+def block(n):
+    samples = array("h", [int(8000 * math.sin(2 * math.pi * 1000 * i / RATE)
+                              + 3000 * math.sin(2 * math.pi * 3100 * i / RATE)) for i in range(n)])
+    return bytes(samples)
+
+
+def per_second(func, pcm):
+    start = time.ticks_us()
+    for _ in range(ROUNDS):
+        func(pcm)
+    elapsed = time.ticks_diff(time.ticks_us(), start)
+    return ROUNDS * 1000000 / elapsed, elapsed / ROUNDS
+
+
+def main():
+    print("n    call        per second   us/call  real-time blocks/s")
+    for n in (256, 512):
+        sa = SpectrumAnalyzer(n=n, rate=RATE)
+        pcm = block(n)
+        for name in ("transform", "process"):
+            rate, us = per_second(getattr(sa, name), pcm)
+            print("%-4d %-10s  %10.1f  %8.0f  %d" % (n, name, rate, us, RATE // n))
+
+
+if __name__ == "__main__":
+    main()
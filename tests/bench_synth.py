@@ -0,0 +1,59 @@
+"""Samples per second of lib/synth.py against per-sample math.sin
+
+    python tests/bench_synth.py
+
+Also runs on the device (copy synth.py over, then run the script with
+mpremote), where viper compiles the mixer and the figures are the ones
+that matter. The baseline is the loop SimpleTone used before the synth:
+one math.sin() and two byte stores per sample. Real time at 32 kHz
+needs 32000 samples/s per output stream. On the host the viper
+pointers are emulated in Python, so there the synth trails the loop.
+"""
+import math
+import sys
+import time
+
+if sys.implementation.name != "micropython":
+    import os
+    HERE = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+    sys.path.insert(0, HERE)
+
+import micropython  # noqa: E402,F401
+from synth import Synth  # noqa: E402
+
+RATE = 32000
+SAMPLES = 32000
+
+
+def sine_loop(frequency, num_samples):
+    samples = bytearray(num_samples * 2)
+    for i in range(num_samples):
+        value = int(32767 * math.sin(2 * math.pi * frequency * i / RATE))
+        samples[i * 2] = value & 0xff
+        samples[i * 2 + 1] = (value >> 8) & 0xff
+    return samples
+
+
+def rate(func):
+    start = time.ticks_us()
+    func()
+    return SAMPLES * 1000000 / time.ticks_diff(time.ticks_us(), start)
+
+
+def main():
+    print("generator            samples/s   x real time")
+    base = rate(lambda: sine_loop(1000, SAMPLES))
+    print("%-19s  %10.0f  %6.1f" % ("math.sin loop", base, base / RATE))
+    for voices in (1, 2, 4):
+        synth = Synth(rate=RATE, voices=voices)
+        for v in range(voices):
+            synth.note_on(440 * (v + 2) / 2)
+        buf = bytearray(SAMPLES * 2)
+        r = rate(lambda: synth.render_into(buf))
+        print("%-19s  %10.0f  %6.1f   %.1fx the loop" % ("synth, %d voice%s" % (voices, "s" if voices > 1 else ""),
+                                                        r, r / RATE, r / base))
+
+
+if __name__ == "__main__":
+    main()
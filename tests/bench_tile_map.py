@@ -0,0 +1,77 @@
+"""Tile cache hit rate and frame time of lib/tile_map.py while panning
+
+    python tests/bench_tile_map.py [tile_root]
+
+Without a tile root a synthetic tile set (tests/tile_set.py) is written
+to a temporary directory. On the device, pass the root of a tile set
+on the card that holds zoom 15 around the start position used here,
+where the frame times are the ones that matter. The map is panned east
+at several speeds, with one prefetch step per frame as the map page
+does, and once more stepping only on idle frames for comparison.
+"""
+import sys
+import time
+
+if sys.implementation.name != "micropython":
+    import os
+    import shutil
+    import tempfile
+    HERE = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+    sys.path.insert(0, HERE)
+
+import micropython  # noqa: E402,F401
+from tile_map import TILE_SIZE, MapView, TileCache  # noqa: E402
+
+Z = 15
+X0 = 16000
+Y0 = 10000
+COLUMNS = 12
+ROWS = 3
+SPEEDS = (4, 8, 16, 32, 64)     # Pixels per frame
+DISTANCE = (COLUMNS - 3) * TILE_SIZE
+
+
+def run(root, px_per_frame, every_frame=True):
+    cache = TileCache(root)
+    view = MapView(cache, zoom=Z)
+    view.move_to(X0 * TILE_SIZE + view.width // 2, Y0 * TILE_SIZE + 200)
+    view.render()
+    while cache.step():
+        pass
+    cache.hits = cache.misses = 0
+    total_us = 0
+    frames = DISTANCE // px_per_frame
+    for _ in range(frames):
+        view.pan(px_per_frame, 0)
+        view.render()
+        total_us += view.frame_us
+        if every_frame:
+            cache.step()
+    return cache, view, total_us // frames
+
+
+def main():
+    if len(sys.argv) > 1:
+        report(sys.argv[1])
+        return
+    from tile_set import make_tile_set
+    root = make_tile_set(tempfile.mkdtemp(), Z, range(X0, X0 + COLUMNS), range(Y0, Y0 + ROWS))
+    try:
+        report(root)
+    finally:
+        shutil.rmtree(root)
+
+
+def report(root):
+    print("px/frame  step       hit rate  misses  mean frame  max frame")
+    for speed in SPEEDS:
+        for every_frame in (True, False):
+            cache, view, mean_us = run(root, speed, every_frame)
+            print("%8d  %-9s  %7.1f%%  %6d  %7d us  %6d us" % (
+                speed, "every" if every_frame else "idle", cache.hit_rate() * 100,
+                cache.misses, mean_us, view.max_frame_us))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Speed and error of lib/track_simplify.py on a synthetic drive
+
+    python tests/bench_track_simplify.py [points]
+
+For every tolerance it reports the points pushed per second, the
+compression ratio and the largest distance of any input point from the
+simplified track, which must stay within the tolerance. Host only: the
+track generator uses the random module's Gaussian noise.
+"""
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+sys.path.insert(0, HERE)
+
+import micropython  # noqa: E402,F401
+from track_simplify import TrackSimplifier  # noqa: E402
+from tracks import deviation, simplify, walk  # noqa: E402
+
+TOLERANCES = (1.0, 2.0, 5.0, 10.0, 20.0)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    points = walk(n)
+    print("tolerance  points/s   ratio  max deviation")
+    for tolerance in TOLERANCES:
+        ts = TrackSimplifier(tolerance_m=tolerance)
+        start = time.ticks_us()
+        kept = simplify(ts, points)
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        worst = deviation(points, kept)
+        print("%7.1f m  %8.0f  %6.1f  %6.2f m%s" % (
+            tolerance, n * 1000000 / elapsed, ts.compression_ratio(), worst,
+            "" if worst <= tolerance * (1 + 1e-9) else "  OVER"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The micropython stand-in lives next to this file, the modules under test in lib/
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+sys.path.insert(0, HERE)
+
+import micropython  # noqa: E402,F401  Installs ptr8/16/32 and the time extensions
@@ -0,0 +1,51 @@
+class FakeI2S:
+    """Non-blocking machine.I2S stand-in driven by the test
+
+    readinto() and write() only queue the buffer, like the driver after
+    irq() is set; complete() finishes the queued transfer and calls the
+    handler, the way the DMA interrupt would. Received audio comes from
+    `source`, a callable returning the bytes for the next block, and
+    written blocks are collected in `written`.
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.handler = None
+        self.written = []
+        self._rx = None
+        self._tx = None
+
+    def irq(self, handler):
+        self.handler = handler
+
+    def readinto(self, buf):
+        assert self._rx is None, "readinto() while a read is in flight"
+        self._rx = buf
+        return 0
+
+    def write(self, buf):
+        assert self._tx is None, "write() while a write is in flight"
+        self._tx = bytes(buf)
+        return 0
+
+    @property
+    def busy(self):
+        return self._rx is not None or self._tx is not None
+
+    def complete(self):
+        """Finish the transfer in flight and call the handler"""
+        if self._rx is not None:
+            buf, self._rx = self._rx, None
+            data = self.source(len(buf))
+            buf[:len(data)] = data
+        elif self._tx is not None:
+            self.written.append(self._tx)
+            self._tx = None
+        else:
+            return False
+        if self.handler is not None:
+            self.handler(self)
+        return True
+
+    def deinit(self):
+        self.handler = None
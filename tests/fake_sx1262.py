@@ -0,0 +1,160 @@
+"""Register-level model of an SX1262 behind a fake SPI device
+
+Understands the commands lib/sx1262.py sends: buffer and register access,
+the IRQ status commands, the RX buffer and packet status, and the mode,
+frequency, modulation and packet parameter commands. Anything else is
+logged and ignored. The air side is driven by the test: receive() lands
+a packet in the data buffer and raises RX done, tx_done() ends a
+transmission. TX and RX packets go to the buffer bases the driver sets,
+so a driver that shares them can overwrite a packet it has not read.
+Raising an IRQ sets DIO1 and calls its handler at once, like a hard
+interrupt, even in the middle of another transfer.
+"""
+import sx1262
+
+STATUS = 0x22           # Chip status byte returned on every transfer
+
+
+class FakePin:
+    IN = 0
+    OUT = 1
+    IRQ_RISING = 1
+
+    def __init__(self, value=0):
+        self._value = value
+        self.handler = None
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def irq(self, handler=None, trigger=None):
+        self.handler = handler
+
+
+class FakeSX1262:
+    def __init__(self):
+        self.dio1 = FakePin()
+        self.busy = FakePin()
+        self.reset = FakePin(1)
+        self.buffer = bytearray(256)
+        self.registers = {}
+        self.irq = 0
+        self.mode = "STDBY"
+        self.frequency = 0
+        self.modulation = None
+        self.packet_params = None
+        self.tx_base = 0        # SetBufferBaseAddress, both 0 after reset
+        self.rx_base = 0
+        self.tx_length = 0
+        self.rx_length = 0
+        self.rssi_raw = 0
+        self.snr_raw = 0
+        self.opcodes = []       # Every command, in order
+        self.in_transfer = False
+        self.overlapped = 0     # Transfers started while another was running
+        self._on_transfer = None
+
+    def on_transfer(self, opcode, func):
+        """Run func once, as the next transfer with this opcode starts"""
+        self._on_transfer = (opcode, func)
+
+    # --------------------------------------------------
+    # SPI side
+    # --------------------------------------------------
+    def write_readinto(self, out, into):
+        if self.in_transfer:
+            self.overlapped += 1
+        self.in_transfer = True
+        out = bytes(out)
+        op = out[0]
+        self.opcodes.append(op)
+        if self._on_transfer is not None and self._on_transfer[0] == op:
+            func = self._on_transfer[1]
+            self._on_transfer = None
+            func()
+        for i in range(len(into)):
+            into[i] = 0
+        if len(into) > 1:
+            into[1] = STATUS
+        if op == 0x0E:          # WriteBuffer
+            self.buffer[out[1]:out[1] + len(out) - 2] = out[2:]
+        elif op == 0x1E:        # ReadBuffer: opcode, offset, NOP, data
+            n = len(out) - 3
+            into[3:3 + n] = self.buffer[out[1]:out[1] + n]
+        elif op == 0x0D:        # WriteRegister
+            addr = (out[1] << 8) | out[2]
+            for i, b in enumerate(out[3:]):
+                self.registers[addr + i] = b
+        elif op == 0x1D:        # ReadRegister: opcode, address, NOP, data
+            addr = (out[1] << 8) | out[2]
+            for i in range(len(out) - 4):
+                into[4 + i] = self.registers.get(addr + i, 0)
+        elif op == 0x12:        # GetIrqStatus
+            into[2] = self.irq >> 8
+            into[3] = self.irq & 0xFF
+        elif op == 0x02:        # ClearIrqStatus
+            self.irq &= ~((out[1] << 8) | out[2])
+            self.dio1.value(1 if self.irq else 0)
+        elif op == 0x13:        # GetRxBufferStatus
+            into[2] = self.rx_length
+            into[3] = self.rx_base
+        elif op == 0x14:        # GetPacketStatus
+            into[2] = self.rssi_raw
+            into[3] = self.snr_raw & 0xFF
+        elif op == 0x83:
+            self.mode = "TX"
+            self.tx_length = self.packet_params[3]
+        elif op == 0x82:
+            self.mode = "RX"
+        elif op == 0x80:
+            self.mode = "STDBY"
+        elif op == 0x84:
+            self.mode = "SLEEP"
+        elif op == 0x8F:
+            self.tx_base = out[1]
+            self.rx_base = out[2]
+        elif op == 0x86:
+            self.frequency = int.from_bytes(out[1:5], "big")
+        elif op == 0x8B:
+            self.modulation = out[1:5]
+        elif op == 0x8C:
+            self.packet_params = out[1:7]
+        self.in_transfer = False
+
+    # --------------------------------------------------
+    # Air side
+    # --------------------------------------------------
+    def raise_irq(self, flags):
+        self.irq |= flags
+        self.dio1.value(1)
+        if self.dio1.handler:
+            self.dio1.handler(self.dio1)
+
+    def receive(self, data, rssi_dbm=-60, snr_db=8, crc_ok=True):
+        assert self.mode == "RX", "packet sent while not receiving"
+        self.buffer[self.rx_base:self.rx_base + len(data)] = data
+        self.rx_length = len(data)
+        self.rssi_raw = -rssi_dbm * 2
+        self.snr_raw = snr_db * 4
+        flags = sx1262.IRQ_RX_DONE
+        if not crc_ok:
+            flags |= sx1262.IRQ_CRC_ERR
+        self.raise_irq(flags)
+
+    def tx_done(self):
+        assert self.mode == "TX", "no transmission running"
+        self.mode = "STDBY"
+        self.raise_irq(sx1262.IRQ_TX_DONE)
+
+    def sent(self):
+        return bytes(self.buffer[self.tx_base:self.tx_base + self.tx_length])
+
+
+def make_radio(queue=4, **kwargs):
+    """A configured SX1262 driver on a fresh fake chip"""
+    chip = FakeSX1262()
+    radio = sx1262.SX1262(chip, chip.busy, chip.dio1, chip.reset, queue=queue)
+    radio.begin(**kwargs)
+    return radio, chip
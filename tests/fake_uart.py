@@ -0,0 +1,33 @@
+class FakeUART:
+    """machine.UART stand-in: bytes put in with feed() come out of readinto()
+
+    fifo limits how much one readinto() returns, like the driver's RX
+    buffer; written bytes are collected in `written`.
+    """
+
+    def __init__(self, fifo=None):
+        self.fifo = fifo
+        self.written = bytearray()
+        self.baudrate = 9600
+        self._rx = bytearray()
+        self.reads = 0
+
+    def feed(self, data):
+        self._rx.extend(data)
+
+    def any(self):
+        return len(self._rx) if self.fifo is None else min(len(self._rx), self.fifo)
+
+    def readinto(self, buf):
+        n = min(len(buf), self.any())
+        buf[:n] = self._rx[:n]
+        del self._rx[:n]
+        self.reads += 1
+        return n
+
+    def write(self, data):
+        self.written.extend(data)
+        return len(data)
+
+    def init(self, baudrate=9600, **kwargs):
+        self.baudrate = baudrate
@@ -0,0 +1,114 @@
+# --------------------------------------------------
+# Host stand-in for the machine module
+# --------------------------------------------------
+# Just enough for lib/ modules to import and construct on CPython;
+# hardware behaviour comes from the fakes passed into the code under test.
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id=None, mode=IN, pull=None, value=0):
+        self.id = id
+        self._value = value
+        self.handler = None
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def irq(self, handler=None, trigger=None, hard=False):
+        self.handler = handler
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+
+class PWM:
+    def __init__(self, pin, freq=0, duty_u16=0):
+        self.pin = pin
+        self._freq = freq
+        self._duty = duty_u16
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+
+    def deinit(self):
+        pass
+
+
+class I2C:
+    def __init__(self, id=0, scl=None, sda=None, freq=400000):
+        pass
+
+
+class I2S:
+    RX = 0
+    TX = 1
+    MONO = 0
+    STEREO = 1
+
+    def __init__(self, id, **kwargs):
+        self.config = kwargs
+
+    def deinit(self):
+        pass
+
+
+class RTC:
+    def __init__(self):
+        self._dt = (2000, 1, 1, 5, 0, 0, 0, 0)
+
+    def datetime(self, dt=None):
+        if dt is None:
+            return self._dt
+        self._dt = tuple(dt)
+
+
+class UART:
+    def __init__(self, id, baudrate=9600, tx=None, rx=None, rxbuf=256, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.tx = tx
+        self.rx = rx
+        self.rxbuf = rxbuf
+
+    def any(self):
+        return 0
+
+    def readinto(self, buf):
+        return 0
+
+    def write(self, data):
+        return len(data)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=0):
+        self.id = id
+        self.period = None
+        self.mode = None
+        self.callback = None
+
+    def init(self, period=None, mode=PERIODIC, callback=None):
+        self.period = period
+        self.mode = mode
+        self.callback = callback
+
+    def deinit(self):
+        self.callback = None
@@ -0,0 +1,91 @@
+# --------------------------------------------------
+# Host stand-in for the micropython module
+# --------------------------------------------------
+# Lets the modules in lib/ run under CPython for tests and benchmarks.
+# Viper and native code runs as plain Python; the ptr8/16/32 casts are
+# emulated with memoryviews (slowly, but with the same wrap-around).
+# The MicroPython extensions of time are added when missing, so a test
+# may still replace them with a fake clock after importing a module, and
+# time.mktime() takes MicroPython's 8-tuple without a time zone.
+import builtins
+import calendar
+import time
+
+
+def const(x):
+    return x
+
+
+def viper(f):
+    return f
+
+
+def native(f):
+    return f
+
+
+def schedule(func, arg):
+    func(arg)
+    return True
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def mem_info(*args):
+    pass
+
+
+class _Pointer:
+    def __init__(self, buf, fmt):
+        view = memoryview(buf).cast("B")
+        self._view = view if fmt == "B" else view.cast(fmt)
+        self._bits = self._view.itemsize * 8
+        self._signed = fmt in "bhi"
+
+    def __getitem__(self, i):
+        return self._view[i]
+
+    def __setitem__(self, i, value):
+        value &= (1 << self._bits) - 1
+        if self._signed and value >= 1 << (self._bits - 1):
+            value -= 1 << self._bits
+        self._view[i] = value
+
+
+def ptr8(buf):
+    return _Pointer(buf, "B")
+
+
+def ptr16(buf):
+    return _Pointer(buf, "H")
+
+
+def ptr32(buf):
+    return _Pointer(buf, "i")
+
+
+builtins.ptr8 = ptr8
+builtins.ptr16 = ptr16
+builtins.ptr32 = ptr32
+builtins.uint = int
+
+_TIME = {
+    "ticks_ms": lambda: time.monotonic_ns() // 1000000,
+    "ticks_us": lambda: time.monotonic_ns() // 1000,
+    "ticks_diff": lambda a, b: a - b,
+    "ticks_add": lambda a, b: a + b,
+    "sleep_ms": lambda ms: time.sleep(ms / 1000),
+    "sleep_us": lambda us: time.sleep(us / 1000000),
+}
+for _name, _func in _TIME.items():
+    if not hasattr(time, _name):
+        setattr(time, _name, _func)
+
+
+def _mktime(t):
+    return calendar.timegm(tuple(t[:6]) + (0, 0, 0))
+
+
+time.mktime = _mktime
@@ -0,0 +1,173 @@
+"""Simulate two LoRaLink nodes over a lossy, slow channel
+
+    python tests/sim_lora_link.py [--loss 0.2] [--latency 100] [--sf 9] ...
+
+Node 1 sends random messages to node 2 one after the other. Frames take
+their real air time (airtime.time_on_air_us), each copy is lost with
+probability `loss` and arrives `latency` ms after the end of its
+transmission; a node that is transmitting hears nothing (half duplex).
+Time is simulated, so a run of minutes of air time takes a second.
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "lib"))
+sys.path.insert(0, HERE)
+
+import micropython  # noqa: E402,F401
+from airtime import time_on_air_us  # noqa: E402
+from lora_link import LoRaLink  # noqa: E402
+
+STEP_MS = 5
+
+
+class Channel:
+    """Shared air with a simulated millisecond clock"""
+
+    def __init__(self, loss=0.0, latency=0, sf=9, bw_khz=125, cr=7, preamble=16):
+        self.loss = loss
+        self.latency = latency
+        self.sf = sf
+        self.bw_khz = bw_khz
+        self.cr = cr
+        self.preamble = preamble
+        self.now = 0
+        self.radios = []
+        self._events = []
+        self._n = 0
+
+    def airtime_us(self, n):
+        return time_on_air_us(n, self.sf, self.bw_khz, self.cr, self.preamble)
+
+    def at(self, t, func):
+        self._n += 1
+        heapq.heappush(self._events, (t, self._n, func))
+
+    def advance(self, ms):
+        self.now += ms
+        while self._events and self._events[0][0] <= self.now:
+            heapq.heappop(self._events)[2]()
+
+
+class FakeRadio:
+    """The part of the SX1262 interface LoRaLink uses"""
+
+    def __init__(self, channel):
+        self.channel = channel
+        channel.radios.append(self)
+        self.tx_busy = False
+        self._rx = []
+
+    def time_on_air_us(self, n):
+        return self.channel.airtime_us(n)
+
+    def send(self, data, n=None):
+        channel = self.channel
+        n = len(data) if n is None else n
+        packet = bytes(data[:n])
+        end = channel.now + self.time_on_air_us(n) // 1000
+        self.tx_busy = True
+        channel.at(end, self._tx_done)
+        for radio in channel.radios:
+            if radio is not self and random.random() >= channel.loss:
+                channel.at(end + channel.latency, lambda r=radio: r._deliver(packet))
+        return True
+
+    def _tx_done(self):
+        self.tx_busy = False
+
+    def _deliver(self, packet):
+        if not self.tx_busy:
+            self._rx.append(packet)
+
+    def available(self):
+        return len(self._rx)
+
+    def get(self):
+        return memoryview(self._rx[0]), -60, 8
+
+    def release(self):
+        self._rx.pop(0)
+
+
+def simulate(loss=0.0, latency=0, messages=40, size=500, sf=9, switch_sf=None, seed=1,
+             limit_s=20000, **link_args):
+    """Run one transfer, returns a dict of results
+
+    switch_sf changes the spreading factor once the links exist, as the
+    settings page does.
+    """
+    random.seed(seed)
+    channel = Channel(loss, latency, sf)
+    clock = {"ticks_ms": lambda: channel.now,
+             "ticks_diff": lambda a, b: a - b,
+             "ticks_add": lambda a, b: a + b}
+    saved = {name: getattr(time, name) for name in clock}
+    for name, func in clock.items():
+        setattr(time, name, func)
+    try:
+        received = []
+        failed = []
+        sender = LoRaLink(FakeRadio(channel), 1, on_failed=failed.append, **link_args)
+        receiver = LoRaLink(FakeRadio(channel), 2,
+                            on_message=lambda src, data, flags: received.append(data), **link_args)
+        if switch_sf is not None:
+            channel.sf = switch_sf
+        data = [bytes(random.getrandbits(8) for _ in range(random.randint(1, size)))
+                for _ in range(messages)]
+        queued = 0
+        while channel.now < limit_s * 1000:
+            if queued < messages and not sender.busy:
+                sender.send(data[queued], dst=2)
+                queued += 1
+            sender.poll()
+            receiver.poll()
+            if queued == messages and not sender.busy:
+                break
+            channel.advance(STEP_MS)
+    finally:
+        for name, func in saved.items():
+            setattr(time, name, func)
+
+    seconds = channel.now / 1000
+    return {
+        "seconds": seconds,
+        "delivered": sender.messages_delivered,
+        "failed": len(failed),
+        "received": received,
+        "sent": data,
+        "goodput": sender.bytes_delivered / seconds if seconds else 0.0,
+        "retransmission_rate": sender.retransmission_rate(),
+        "frames": sender.frames_sent,
+        "acks": receiver.acks_sent,
+        "duplicates": receiver.duplicates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loss", type=float, nargs="+", default=[0.0, 0.1, 0.2, 0.3])
+    parser.add_argument("--latency", type=int, nargs="+", default=[0, 200], help="ms")
+    parser.add_argument("--messages", type=int, default=40)
+    parser.add_argument("--size", type=int, default=500, help="largest message in bytes")
+    parser.add_argument("--sf", type=int, default=9)
+    parser.add_argument("--switch-sf", type=int, help="spreading factor after the links start")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print("loss  latency  delivered  failed  goodput B/s  retrans %  frames  acks  time s")
+    for loss in args.loss:
+        for latency in args.latency:
+            r = simulate(loss, latency, args.messages, args.size, args.sf, args.switch_sf, args.seed)
+            print("%3d%%  %5d ms  %5d/%-3d  %6d  %11.1f  %9d  %6d  %4d  %6.0f" % (
+                loss * 100, latency, r["delivered"], args.messages, r["failed"], r["goodput"],
+                r["retransmission_rate"], r["frames"], r["acks"], r["seconds"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import math
+from array import array
+
+import pytest
+
+from adpcm import (ADPCM, ClipDecoder, ClipEncoder, Downsampler, INDEX_ADJUST,
+                   MAX_PAYLOAD, PACKET_HEADER, STEP_SIZES)
+
+
+def tone(freq, rate, n, amplitude=12000):
+    return array("h", [int(amplitude * math.sin(2 * math.pi * freq * k / rate)) for k in range(n)])
+
+
+def halved(freq, n, amplitude=12000):
+    """tone() at 16 kHz as the Downsampler outputs it, 15 input samples late"""
+    return [amplitude * math.sin(2 * math.pi * freq * (2 * k - 15) / 16000) for k in range(n)]
+
+
+def snr_db(ref, out):
+    signal = sum(v * v for v in ref)
+    noise = sum((a - b) ** 2 for a, b in zip(ref, out))
+    return 10 * math.log10(signal / noise)
+
+
+def reference_decode(data, n):
+    """IMA-ADPCM decoder written straight from the IMA recommendation"""
+    pred = 0
+    index = 0
+    out = []
+    for i in range(n):
+        code = (data[i >> 1] >> (4 if i & 1 else 0)) & 15
+        step = STEP_SIZES[index]
+        delta = step >> 3
+        if code & 4:
+            delta += step
+        if code & 2:
+            delta += step >> 1
+        if code & 1:
+            delta += step >> 2
+        pred = pred - delta if code & 8 else pred + delta
+        pred = max(-32768, min(32767, pred))
+        index = max(0, min(88, index + INDEX_ADJUST[code & 7]))
+        out.append(pred)
+    return out
+
+
+def encode(pcm):
+    data = bytearray((len(pcm) + 1) // 2)
+    assert ADPCM().encode(pcm, len(pcm), data) == len(data)
+    return data
+
+
+@pytest.mark.parametrize("freq, minimum", ((300, 30), (1000, 18)))
+def test_round_trip_snr(freq, minimum):
+    # 4 bits per sample track slow signals better than fast ones
+    pcm = tone(freq, 8000, 4000)
+    data = encode(pcm)
+    out = array("h", [0] * len(pcm))
+    ADPCM().decode(data, len(pcm), out)
+    assert snr_db(pcm[200:], out[200:]) > minimum
+
+
+def test_decoder_matches_reference():
+    pcm = array("h", [int(20000 * math.sin(k / 7) + 8000 * math.sin(k / 2.3)) for k in range(1001)])
+    data = encode(pcm)
+    out = array("h", [0] * len(pcm))
+    ADPCM().decode(data, len(pcm), out)
+    assert list(out) == reference_decode(data, len(pcm))
+
+
+def test_state_carries_across_calls():
+    pcm = tone(440, 8000, 1000)
+    whole = encode(pcm)
+    codec = ADPCM()
+    parts = bytearray(500)
+    codec.encode(pcm[:300], 300, memoryview(parts)[:150])
+    codec.encode(pcm[300:], 700, memoryview(parts)[150:])
+    assert parts == whole
+
+
+def test_downsampler_keeps_voice_and_removes_alias():
+    down = Downsampler(block_samples=512)
+    pcm = tone(1000, 16000, 4096)
+    out = array("h")
+    for i in range(0, len(pcm), 512):
+        out.extend(down.process(pcm[i:i + 512]))
+    assert len(out) == 2048
+    assert snr_db(halved(1000, 2048)[100:], out[100:]) > 30
+
+    down.reset()
+    high = tone(6000, 16000, 4096)          # Would alias to 2 kHz
+    out = array("h")
+    for i in range(0, len(high), 512):
+        out.extend(down.process(bytearray(high[i:i + 512])))
+    assert max(abs(v) for v in out[100:]) < 12000 / 30
+
+    with pytest.raises(ValueError):
+        down.process(pcm[:511])
+
+
+def test_clip_survives_a_lost_packet():
+    pcm = tone(700, 16000, 16000)           # One second
+    enc = ClipEncoder(7)
+    for i in range(0, len(pcm), 512):
+        enc.add(pcm[i:i + 512])
+    packets = enc.finish()
+    per_packet = (MAX_PAYLOAD - PACKET_HEADER) * 2
+    assert len(packets) == (8000 + per_packet - 1) // per_packet
+    assert all(p[0] == 7 and p[2] == len(packets) for p in packets)
+
+    ref = halved(700, 8000)
+    dec = ClipDecoder(7, len(packets))
+    for i, p in enumerate(packets):
+        if i != 3:
+            assert dec.add(p)
+    assert not dec.add(bytes((8,)) + bytes(packets[0][1:]))
+    assert dec.missing() == [3]
+    assert dec.samples() == 8000
+    # Packets after the lost one decode on their own, from their header state
+    start = 4 * per_packet
+    end = start + per_packet
+    assert snr_db(ref[start:end], dec.pcm[start:end]) > 15
+    assert not any(dec.pcm[3 * per_packet:4 * per_packet])
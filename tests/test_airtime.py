@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from airtime import DutyCycleLedger, needs_ldro, symbol_time_us, time_on_air_us
+
+G3 = 869.525    # 10 % sub-band
+G1 = 868.1      # 1 % sub-band
+
+
+def test_semtech_reference_values():
+    # Semtech LoRa calculator, 125 kHz, CR 4/5, 8 symbol preamble, explicit header, CRC on
+    assert time_on_air_us(10, sf=7, bw_khz=125, cr=5, preamble=8) == 41216
+    assert time_on_air_us(51, sf=12, bw_khz=125, cr=5, preamble=8) == 2465792
+
+
+def test_ldro_switch():
+    # Required from 16 ms symbols on
+    assert symbol_time_us(11, 125) == pytest.approx(16384)
+    assert needs_ldro(11, 125) and needs_ldro(12, 125) and needs_ldro(12, 250)
+    assert not needs_ldro(10, 125) and not needs_ldro(11, 250)
+    # Fewer bits per symbol block makes the packet longer
+    auto = time_on_air_us(51, sf=12, cr=5, preamble=8)
+    assert time_on_air_us(51, sf=12, cr=5, preamble=8, ldro=True) == auto
+    assert time_on_air_us(51, sf=12, cr=5, preamble=8, ldro=False) < auto
+    assert time_on_air_us(51, sf=10, cr=5, preamble=8, ldro=True) > time_on_air_us(51, sf=10, cr=5, preamble=8)
+
+
+def test_header_crc_and_short_packets():
+    explicit = time_on_air_us(22, sf=9)
+    assert time_on_air_us(22, sf=9, implicit=True) < explicit
+    assert time_on_air_us(22, sf=9, crc=False) < explicit
+    # An empty payload still sends the preamble and the 8 header symbols
+    assert time_on_air_us(0, sf=7, cr=5, preamble=8, crc=False, implicit=True) == int((12.25 + 8) * 1024 + 0.5)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000]
+    monkeypatch.setattr(time, "ticks_ms", lambda: now[0])
+    return now
+
+
+def ledger():
+    # A one-minute window in 10 s slots: the G3 budget is 6 s of air time
+    return DutyCycleLedger(window_s=60, buckets=6)
+
+
+def test_budget_per_band(clock):
+    led = ledger()
+    assert led.limit_us(G3) == 6000000
+    assert led.limit_us(G1) == 600000
+    assert led.limit_us(915.0) is None
+    assert led.reserve(G3, 4000000)
+    assert led.used_percent(G3) == 66
+    assert led.used_us(G1) == 0
+    assert not led.reserve(G3, 3000000)
+    assert led.reserve(G1, 500000)
+    assert led.reserve(915.0, 10 ** 9)      # No limit outside the duty-cycle bands
+    assert (led.reserved, led.rejected) == (3, 1)
+    assert led.wait_ms(G3, 7000000) == -1
+
+
+def test_window_expiry(clock):
+    led = ledger()
+    led.record(G3, 4000000)
+    # The slot leaves the sum a full window after its own slot ended
+    clock[0] += 69999
+    assert led.used_us(G3) == 4000000
+    clock[0] += 1
+    assert led.used_us(G3) == 0
+
+
+@pytest.mark.parametrize("start", (0, 2500, 9999, 10000, 37000))
+def test_wait_ms_across_slot_roll_over(clock, start):
+    led = ledger()
+    clock[0] += start
+    led.record(G3, 4000000)
+    clock[0] += 12000
+    led.record(G3, 1500000)
+    wait = led.wait_ms(G3, 1000000)
+    assert wait > 0
+    clock[0] += wait - 1
+    assert not led.reserve(G3, 1000000)
+    clock[0] += 1
+    assert led.wait_ms(G3, 1000000) == 0
+    assert led.used_us(G3) == 1500000
+    # The second booking still has to leave before the whole budget is free
+    wait = led.wait_ms(G3, 6000000)
+    clock[0] += wait
+    assert led.used_us(G3) == 0
+
+
+def test_long_idle_clears_every_slot(clock):
+    led = ledger()
+    for _ in range(6):
+        led.record(G3, 500000)
+        clock[0] += 10000
+    clock[0] += 10 ** 7
+    assert led.used_us(G3) == 0
+    assert led.reserve(G3, 6000000)
@@ -0,0 +1,150 @@
+import json
+import struct
+import time
+
+import pytest
+
+import assistnow
+from assistnow import ID_MGA_ANO, ID_MGA_INI, AssistNowLoader, TTFFMeter, _day_number
+from fake_uart import FakeUART
+from ubx import CLS_ACK, CLS_CFG, CLS_MGA, ID_ACK_ACK, ID_MGA_ACK, UBXReader, ubx_frame
+
+TODAY = _day_number(2026, 10, 18)
+
+
+class Receiver(FakeUART):
+    """M10 stand-in: acknowledges CFG-VALSET, answers MGA messages via `answer`
+
+    answer(msg_id, attempt) returns True (accepted), False (rejected) or
+    None (no MGA-ACK at all); attempt counts the sends of the same frame.
+    """
+
+    def __init__(self, answer=lambda msg_id, attempt: True):
+        super().__init__()
+        self.answer = answer
+        self.frames = []
+        self._attempts = {}
+
+    def write(self, data):
+        frame = bytes(data)
+        self.frames.append(frame)
+        cls, msg_id = frame[2], frame[3]
+        if cls == CLS_CFG:
+            self.feed(ubx_frame(CLS_ACK, ID_ACK_ACK, bytes((cls, msg_id))))
+        elif cls == CLS_MGA:
+            attempt = self._attempts.get(frame, 0)
+            self._attempts[frame] = attempt + 1
+            ok = self.answer(msg_id, attempt)
+            if ok is not None:
+                self.feed(ubx_frame(CLS_MGA, ID_MGA_ACK,
+                                    struct.pack("<BBBBI", 1 if ok else 0, 0, 0 if ok else 3, msg_id, 0)))
+        return len(data)
+
+    def mga_sent(self, msg_id=None):
+        return [f for f in self.frames if f[2] == CLS_MGA and (msg_id is None or f[3] == msg_id)]
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """ticks_ms() that only moves when the code sleeps, so ACK timeouts cost no real time"""
+    now = [0]
+    monkeypatch.setattr(time, "ticks_ms", lambda: now[0])
+
+    def sleep_ms(ms):
+        now[0] += ms
+
+    monkeypatch.setattr(time, "sleep_ms", sleep_ms)
+    return now
+
+
+def ano(sv, year, month, day):
+    payload = bytearray(76)
+    payload[2] = sv
+    payload[4:7] = bytes((year - 2000, month, day))
+    return ubx_frame(CLS_MGA, ID_MGA_ANO, payload)
+
+
+def mga_file(tmp_path, days=(17, 18, 19), svs=3):
+    path = tmp_path / "mgaoffline.ubx"
+    path.write_bytes(b"".join(ano(sv, 2026, 10, d) for d in days for sv in range(1, svs + 1)))
+    return str(path)
+
+
+def test_only_todays_records_are_sent(tmp_path):
+    path = mga_file(tmp_path)
+    state = str(tmp_path / "state.json")
+    rx = Receiver()
+    loader = AssistNowLoader(UBXReader(rx))
+    assert loader.inject(path, today=TODAY, state_path=state)
+    # The INI time first, then the three records of the 18th
+    assert [f[3] for f in rx.mga_sent()] == [ID_MGA_INI] + [ID_MGA_ANO] * 3
+    assert all(f[10:13] == bytes((26, 10, 18)) for f in rx.mga_sent(ID_MGA_ANO))
+    assert (loader.sent, loader.acked, loader.ano_acked, loader.skipped) == (4, 4, 3, 6)
+    assert loader.resends == loader.timeouts == loader.rejected == 0
+    saved = json.load(open(state))
+    assert saved["file"] == path and "injected" in saved
+
+
+def test_time_alone_is_not_a_successful_injection(tmp_path):
+    path = mga_file(tmp_path)
+    state = str(tmp_path / "state.json")
+    rx = Receiver(lambda msg_id, attempt: msg_id == ID_MGA_INI)
+    loader = AssistNowLoader(UBXReader(rx))
+    assert not loader.inject(path, today=TODAY, state_path=state)
+    assert (loader.acked, loader.ano_acked, loader.rejected) == (1, 0, 3)
+    assert assistnow.load_state(state) == {}
+
+
+def test_resends_are_counted_apart_from_messages(tmp_path):
+    path = mga_file(tmp_path, days=(18,), svs=4)
+    rx = Receiver(lambda msg_id, attempt: True if attempt else None)   # First send of each is lost
+    loader = AssistNowLoader(UBXReader(rx), retries=2)
+    assert loader.inject(path, state_path=str(tmp_path / "s.json"))
+    assert loader.sent == 4
+    assert loader.resends == 4
+    assert len(rx.mga_sent()) == 8
+    assert loader.ano_acked == 4 and loader.timeouts == 0
+
+
+def test_silent_receiver_times_out_once_per_message(tmp_path, clock):
+    path = mga_file(tmp_path, days=(18,), svs=2)
+    rx = Receiver(lambda msg_id, attempt: None)
+    loader = AssistNowLoader(UBXReader(rx), ack_timeout_ms=300, retries=2)
+    assert not loader.inject(path, state_path=str(tmp_path / "s.json"))
+    assert (loader.sent, loader.resends, loader.timeouts) == (2, 4, 2)
+    assert len(rx.mga_sent()) == 6
+    assert loader.elapsed_ms >= 6 * 300
+
+
+def test_stale_file_is_not_sent(tmp_path):
+    path = tmp_path / "old.ubx"
+    path.write_bytes(ano(1, 2026, 9, 1) + ano(1, 2026, 10, 18))     # Judged by its first record
+    rx = Receiver()
+    loader = AssistNowLoader(UBXReader(rx))
+    assert not loader.inject(str(path), today=TODAY, state_path=str(tmp_path / "s.json"))
+    assert rx.frames == []
+
+
+class Fix:
+    valid = False
+
+
+def test_ttff_meter_reads_the_state_once(tmp_path, clock, monkeypatch):
+    state = str(tmp_path / "state.json")
+    assistnow.save_state({"ttff_unaided": 32000}, state)
+    loads = []
+    real_load = assistnow.load_state
+    monkeypatch.setattr(assistnow, "load_state", lambda path: loads.append(path) or real_load(path))
+
+    fix = Fix()
+    meter = TTFFMeter(fix, aided=True, state_path=state)
+    assert meter.update() is None
+    assert meter.improvement_ms() is None
+    clock[0] += 5000
+    fix.valid = True
+    assert meter.update() == 5000
+    for _ in range(10):
+        assert meter.update() == 5000
+        assert meter.improvement_ms() == 27000
+    assert len(loads) == 1
+    assert json.load(open(state)) == {"ttff_unaided": 32000, "ttff_aided": 5000}
@@ -0,0 +1,85 @@
+from audio_capture import AudioCapture
+from fake_i2s import FakeI2S
+
+
+def numbered():
+    """I2S source whose k-th block is filled with the byte k"""
+    count = [0]
+
+    def source(n):
+        k = count[0]
+        count[0] += 1
+        return bytes([k & 0xFF]) * n
+
+    return source
+
+
+def start(buffers=2, block_bytes=64):
+    i2s = FakeI2S(numbered())
+    cap = AudioCapture(i2s, block_bytes=block_bytes, buffers=buffers)
+    got = []
+    cap.subscribe(lambda block: got.append(block[0]))
+    cap.start()
+    return i2s, cap, got
+
+
+def test_every_block_reaches_a_prompt_reader():
+    i2s, cap, got = start()
+    for _ in range(100):
+        i2s.complete()
+        cap.service()
+    assert got == list(range(100))
+    assert cap.overruns == 0
+    assert cap.blocks == 100
+
+
+def test_full_ring_drops_blocks_and_keeps_the_newest():
+    i2s, cap, got = start(buffers=4)
+    for _ in range(10):
+        i2s.complete()
+    # Three blocks fit, the fourth buffer was refilled in place seven times
+    assert cap.available() == 3
+    assert cap.overruns == 7
+    assert cap.service() == 3
+    i2s.complete()
+    cap.service()
+    assert got == [0, 1, 2, 10]
+
+
+def test_ring_depth_covers_a_busy_reader():
+    # A reader held up for five blocks at a time (an SD card write)
+    for buffers, dropped in ((2, True), (8, False)):
+        i2s, cap, got = start(buffers=buffers)
+        for k in range(120):
+            i2s.complete()
+            if k % 6 == 5:
+                cap.service()
+        cap.service()
+        assert (cap.overruns > 0) == dropped
+        if not dropped:
+            assert got == list(range(120))
+
+
+def test_get_and_release():
+    i2s, cap, got = start(buffers=3)
+    assert cap.get() is None
+    i2s.complete()
+    i2s.complete()
+    block = cap.get()
+    assert bytes(block) == b"\x00" * 64
+    cap.release()
+    assert cap.get()[0] == 1
+    cap.release()
+    cap.release()           # Nothing left, ignored
+    assert cap.available() == 0
+
+
+def test_stop_ends_the_read_chain():
+    i2s, cap, got = start()
+    i2s.complete()
+    cap.stop()
+    assert i2s.handler is None
+    i2s.complete()
+    assert not i2s.busy
+    cap.service()
+    assert got == [0]
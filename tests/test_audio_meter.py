@@ -0,0 +1,71 @@
+import math
+from array import array
+
+import pytest
+
+from audio_meter import AudioMeter
+
+
+def reference(samples):
+    n = len(samples)
+    mean = sum(samples) / n
+    rms = math.sqrt(sum((s - mean) ** 2 for s in samples) / n)
+    return mean, rms, max(abs(s) for s in samples)
+
+
+def tone(n=512, amplitude=20000, dc=1000, period=32):
+    return array("h", [int(dc + amplitude * math.sin(2 * math.pi * i / period)) for i in range(n)])
+
+
+def test_matches_float_reference():
+    samples = tone()
+    m = AudioMeter()
+    level = m.update(samples)
+    mean, rms, peak = reference(samples)
+    assert m.dc == pytest.approx(mean)
+    assert m.rms == pytest.approx(rms, rel=1e-9)
+    assert m.peak == peak
+    assert level == int(rms * 100 / 32768)
+    assert rms == pytest.approx(20000 / math.sqrt(2), rel=1e-3)
+
+
+def test_bytes_and_array_agree():
+    samples = tone(period=17)
+    a = AudioMeter()
+    b = AudioMeter()
+    a.update(samples)
+    raw = bytearray(samples)
+    b.update(raw, len(raw) - 2 * 100)       # Only part of the buffer is valid
+    c = AudioMeter()
+    c.update(samples[:-100])
+    assert b.rms == pytest.approx(c.rms)
+    assert b.dc == pytest.approx(c.dc)
+    d = AudioMeter()
+    d.update(raw)
+    assert d.rms == pytest.approx(a.rms)
+
+
+def test_full_scale_square_does_not_overflow():
+    samples = array("h", [32767, -32768] * 2048)
+    m = AudioMeter()
+    m.update(samples)
+    assert m.peak == 32768
+    assert m.rms == pytest.approx(32767.5, rel=1e-6)
+    assert m.level == 99                    # Half an LSB short of full scale
+    assert m.peak_level == 100
+
+
+def test_dc_is_removed_from_rms():
+    m = AudioMeter()
+    m.update(array("h", [-5000] * 256))
+    assert m.rms == 0.0
+    assert m.dc == -5000
+    assert m.peak == 5000
+
+
+def test_empty_block_keeps_last_level():
+    m = AudioMeter()
+    level = m.update(tone())
+    assert m.update(bytearray(), 0) == level
+    assert m.blocks == 1
+    assert m.samples == 512
@@ -0,0 +1,117 @@
+import os
+import tracemalloc
+
+from chat_log import DELIVERED, FAILED, OFFSET_SIZE, OUTGOING, RECORD_SIZE, ChatLog
+
+
+def fill(log, n, start=0):
+    for i in range(start, start + n):
+        log.append("message %d" % i, peer=i & 0xFF, flags=OUTGOING if i % 3 == 0 else 0, t=1000 + i)
+
+
+def test_messages_are_found_by_number(tmp_path):
+    path = str(tmp_path / "chat.log")
+    log = ChatLog(path)
+    fill(log, 50)
+    assert len(log) == 50
+    assert log.get(0) == (OUTGOING, 0, 1000, "message 0")
+    assert log.get(37) == (0, 37, 1037, "message 37")
+    assert log.get(49)[3] == "message 49"
+    log.append("grüße ✓", peer=0xA2, t=5)
+    assert log.get(50) == (0, 0xA2, 5, "grüße ✓")
+    try:
+        log.get(51)
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("get() past the end")
+    log.close()
+
+    # Reopened, the index gives the same messages
+    log = ChatLog(path)
+    assert len(log) == 51
+    assert log.get(37) == (0, 37, 1037, "message 37")
+    assert os.path.getsize(path + ".idx") == 51 * OFFSET_SIZE
+    log.close()
+
+
+def test_set_flags_changes_only_the_flags(tmp_path):
+    path = str(tmp_path / "chat.log")
+    log = ChatLog(path)
+    fill(log, 10)
+    size = os.path.getsize(path)
+    changes = log.changes
+    log.set_flags(3, OUTGOING | DELIVERED)
+    log.set_flags(6, OUTGOING | FAILED)
+    assert log.changes == changes + 2
+    assert log.get(3) == (OUTGOING | DELIVERED, 3, 1003, "message 3")
+    assert log.get(6) == (OUTGOING | FAILED, 6, 1006, "message 6")
+    assert log.get(4) == (0, 4, 1004, "message 4")
+    assert os.path.getsize(path) == size
+    log.close()
+    assert ChatLog(path).get(3)[0] == OUTGOING | DELIVERED
+
+
+def test_recover_indexes_an_interrupted_append(tmp_path):
+    path = str(tmp_path / "chat.log")
+    log = ChatLog(path)
+    fill(log, 5)
+    log.close()
+    # Two messages reached the log but not the index, then a torn third
+    idx_size = os.path.getsize(path + ".idx")
+    log = ChatLog(path)
+    fill(log, 2, start=5)
+    log.append("torn message", t=2000)
+    log.close()
+    with open(path + ".idx", "r+b") as f:
+        f.truncate(idx_size)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 4)
+
+    log = ChatLog(path)
+    assert len(log) == 7
+    assert log.get(6) == (OUTGOING, 6, 1006, "message 6")
+    # The next append overwrites the torn record
+    assert log.append("after", t=3000) == 7
+    assert log.get(7) == (0, 0, 3000, "after")
+    log.close()
+    log = ChatLog(path)
+    assert len(log) == 8 and log.get(7)[3] == "after"
+    log.close()
+
+
+def test_recover_stops_at_a_torn_header(tmp_path):
+    path = str(tmp_path / "chat.log")
+    log = ChatLog(path)
+    fill(log, 3)
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"\x00" * (RECORD_SIZE - 3))
+    log = ChatLog(path)
+    assert len(log) == 3
+    assert log.append("next", t=1) == 3
+    assert log.get(3)[3] == "next"
+    log.close()
+
+
+def open_cost(path):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    log = ChatLog(path)
+    log.get(len(log) - 1)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    log.close()
+    return used
+
+
+def test_memory_does_not_grow_with_the_history(tmp_path):
+    small = str(tmp_path / "small.log")
+    large = str(tmp_path / "large.log")
+    log = ChatLog(small)
+    fill(log, 10)
+    log.close()
+    log = ChatLog(large)
+    fill(log, 10000)
+    log.close()
+    assert abs(open_cost(large) - open_cost(small)) < 512
@@ -0,0 +1,113 @@
+import time
+
+import pytest
+
+import es8311
+from es8311 import ES8311, ES8311_ADDR, register_values, mic_register_values
+
+
+class FakeCodec:
+    """ES8311 register file on a fake I2C bus, auto-incrementing like the chip"""
+
+    def __init__(self):
+        self.regs = bytearray(es8311.REG_COUNT)
+        self.regs[0x00] = 0x1F
+        self.regs[0x09] = 0x01          # Non-zero so read-modify-write is visible
+        self.writes = []                # (start register, data) per transaction
+        self.reads = 0
+
+    def writeto_mem(self, addr, reg, data):
+        assert addr == ES8311_ADDR
+        self.writes.append((reg, bytes(data)))
+        self.regs[reg:reg + len(data)] = data
+
+    def readfrom_mem(self, addr, reg, n):
+        assert addr == ES8311_ADDR
+        self.reads += 1
+        return bytes(self.regs[reg:reg + n])
+
+
+@pytest.fixture
+def codec(monkeypatch):
+    delays = []
+    monkeypatch.setattr(time, "sleep_ms", delays.append)
+    chip = FakeCodec()
+    c = ES8311(i2c=chip, mck=None)
+    c.delays = delays
+    return c, chip
+
+
+def expected(pairs):
+    regs = {}
+    for reg, value in pairs:
+        regs[reg] = value
+    return regs
+
+
+def test_init_table_lands_in_few_bursts(codec):
+    c, chip = codec
+    c.write_regs(register_values)
+    for reg, value in expected(register_values).items():
+        assert chip.regs[reg] == value, hex(reg)
+    assert c.transactions == len(chip.writes)
+    assert len(chip.writes) < len(register_values) // 4
+    # Only the reset and the analog power-up wait
+    assert c.delays == [10, 10]
+
+
+def test_unchanged_writes_are_skipped(codec):
+    c, chip = codec
+    c.write_regs(register_values)
+    before = len(chip.writes)
+    c.write_regs(register_values)
+    assert len(chip.writes) == before
+    c.set_volume(100)
+    c.set_volume(100)
+    assert chip.writes[before:] == [(0x32, b"\xFF")]
+    assert c.skipped >= len(register_values)
+
+
+def test_small_gaps_are_bridged(codec):
+    c, chip = codec
+    c.write_regs([(0x10, 1), (0x11, 2), (0x12, 3), (0x13, 4)])
+    chip.writes.clear()
+    # 0x11 and 0x12 unchanged: bridged, one transaction
+    c.write_regs([(0x10, 9), (0x11, 2), (0x12, 3), (0x13, 9)])
+    assert chip.writes == [(0x10, bytes((9, 2, 3, 9)))]
+    chip.writes.clear()
+    # Three unchanged in a row is more than MAX_GAP: split
+    c.write_regs([(0x10, 1), (0x11, 2), (0x12, 3), (0x13, 4), (0x14, 5)])
+    c.write_regs([(0x10, 7), (0x11, 2), (0x12, 3), (0x13, 4), (0x14, 8)])
+    assert chip.writes[-2:] == [(0x10, b"\x07"), (0x14, b"\x08")]
+
+
+def test_reset_forgets_shadow(codec):
+    c, chip = codec
+    c.write(0x32, 0xBF)
+    c.write(0x00, 0x1F)                  # Reset: registers back to defaults
+    chip.regs[0x32] = 0x00
+    chip.writes.clear()
+    c.write(0x32, 0xBF)
+    assert chip.writes == [(0x32, b"\xBF")]
+
+
+def test_reads_are_cached(codec):
+    c, chip = codec
+    assert c.read_reg(0x14) == 0
+    assert c.read_reg(0x14) == 0
+    assert chip.reads == 1
+    c.set_mic_gain(24)
+    assert chip.regs[0x14] == 8
+    assert chip.reads == 1
+
+
+def test_mic_mode(codec):
+    c, chip = codec
+    assert c.open_mic_mode(bits=16, sample_rate=16000)
+    for reg, value in expected(mic_register_values).items():
+        if reg != 0x0B:
+            assert chip.regs[reg] == value, hex(reg)
+    assert chip.regs[0x09] == 0x0C      # 16-bit, I2S format, bit 0 cleared
+    assert chip.regs[0x0A] == 0x4C
+    assert chip.regs[0x0B] == 0x4F
+    assert c.open_mic_mode()            # Already open, nothing sent
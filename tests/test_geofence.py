@@ -0,0 +1,100 @@
+import random
+
+from geofence import Geofences, EVENT_DWELL, EVENT_ENTER, EVENT_EXIT
+
+# 0.001 deg square, ~111 m on a side
+HOME = [(22500000, 114000000), (22501000, 114000000), (22501000, 114001000), (22500000, 114001000)]
+
+
+def walk(fences, lat, lngs):
+    for k, lng in enumerate(lngs):
+        fences.update(lat, lng, k)
+
+
+def test_enter_dwell_exit_across_square():
+    events = []
+    g = Geofences(lambda e, n: events.append((e, n)), margin_m=10, dwell_s=5)
+    g.add("home", HOME)
+    # West to east through the middle, ~1 m per fix
+    walk(g, 22500500, range(113999800, 114001200, 10))
+    assert events == [(EVENT_ENTER, "home"), (EVENT_DWELL, "home"), (EVENT_EXIT, "home")]
+    assert g.inside() == []
+
+
+def test_hysteresis_band_keeps_state():
+    events = []
+    g = Geofences(lambda e, n: events.append((e, n)), margin_m=10)
+    g.add("home", HOME)
+    # 5 m inside the west edge is not enough to enter
+    g.update(22500500, 114000050, 0)
+    assert events == []
+    g.update(22500500, 114000500, 1)
+    assert g.inside() == ["home"]
+    # 5 m outside is not enough to leave
+    g.update(22500500, 113999950, 2)
+    assert g.inside() == ["home"]
+    g.update(22500500, 113999800, 3)
+    assert events == [(EVENT_ENTER, "home"), (EVENT_EXIT, "home")]
+
+
+def test_leaving_several_fences_in_one_fix():
+    seen = []
+    g = Geofences(lambda e, n: seen.append((e, n, g.inside())), margin_m=10)
+    # Three nested squares around the same centre, and one far away
+    for name, half in (("a", 500), ("b", 400), ("c", 300)):
+        g.add(name, [(22500500 - half, 114000500 - half), (22500500 + half, 114000500 - half),
+                     (22500500 + half, 114000500 + half), (22500500 - half, 114000500 + half)])
+    g.update(22500500, 114000500, 0)
+    assert g.inside() == ["a", "b", "c"]
+    del seen[:]
+    g.update(22500500, 114100000, 1)
+    # Exits in entry order, each after the fence left the inside list
+    assert seen == [(EVENT_EXIT, "a", ["b", "c"]), (EVENT_EXIT, "b", ["c"]), (EVENT_EXIT, "c", [])]
+
+
+def test_concave_polygon():
+    g = Geofences(margin_m=0)
+    # U shape open to the north
+    g.add("u", [(0, 0), (0, 3000), (3000, 3000), (3000, 2000), (1000, 2000),
+                (1000, 1000), (3000, 1000), (3000, 0)])
+    g.update(500, 1500, 0)
+    assert g.inside() == ["u"]
+    g.update(2000, 1500, 1)                 # In the notch
+    assert g.inside() == []
+
+
+def test_grid_limits_candidates():
+    g = Geofences()
+    random.seed(1)
+    for i in range(1500):
+        lat = random.randint(22400000, 22700000)
+        lng = random.randint(113800000, 114200000)
+        g.add("f%d" % i, [(lat, lng), (lat + 3000, lng), (lat + 3000, lng + 3000), (lat, lng + 3000)])
+    home = g.add("home", HOME)
+    for k in range(100):
+        g.update(22500500, 113999500 + 20 * k, k)
+    assert g.fixes == 100
+    # Only the fences of the fix's own cell are looked at, and only those
+    # whose bounding box holds the fix are tested
+    r, c = g._cell(22500500, 114000500)
+    cell = g._grid[(r << 16) | c]
+    assert home in cell
+    assert len(cell) < 50
+    assert g.candidates_tested < 100 * 3
+
+
+def test_fence_spanning_cells_is_found_from_each():
+    g = Geofences(margin_m=0, cell=10000)
+    g.add("big", [(0, 0), (0, 25000), (25000, 25000), (25000, 0)])
+    for lat, lng in ((5000, 5000), (15000, 15000), (24000, 1000)):
+        g.update(lat, lng, 0)
+        assert g.inside() == ["big"]
+
+
+def test_load_file(tmp_path):
+    path = tmp_path / "fences.txt"
+    path.write_text("# comment\n\nsq;22.5,114.0;22.501,114.0;22.501,114.001\nbad;1,2\n")
+    g = Geofences()
+    assert g.load(str(path)) == 1
+    assert g.names == ["sq"]
+    assert list(g._vy) == [22500000, 22501000, 22501000]
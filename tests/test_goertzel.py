@@ -0,0 +1,125 @@
+import math
+import random
+from array import array
+
+import pytest
+
+from goertzel import DTMF_COLS, DTMF_KEYS, DTMF_ROWS, DTMFDetector, GoertzelBank, ToneDetector
+
+RATE = 16000
+
+
+def ms(t):
+    return RATE * t // 1000
+
+
+def tones(freqs, duration_ms, levels=None, phase=0.0):
+    """Sum of sines; levels are peak amplitudes"""
+    levels = levels or [8000] * len(freqs)
+    n = ms(duration_ms)
+    return [sum(a * math.sin(2 * math.pi * f * i / RATE + phase) for f, a in zip(freqs, levels))
+            for i in range(n)]
+
+
+def key(k, duration_ms=60, row_level=8000, col_db=0.0):
+    i = DTMF_KEYS.index(k)
+    col_level = row_level * 10 ** (col_db / 20)
+    return tones((DTMF_ROWS[i // 4], DTMF_COLS[i % 4]), duration_ms, (row_level, col_level))
+
+
+def gap(duration_ms):
+    return [0.0] * ms(duration_ms)
+
+
+def pcm(samples, noise=0.0, seed=1):
+    rnd = random.Random(seed)
+    return array("h", [max(-32768, min(32767, int(v + rnd.gauss(0, noise)))) for v in samples])
+
+
+def feed(detector, samples, block=160):
+    # Capture blocks that do not line up with the 256-sample frames
+    for pos in range(0, len(samples), block):
+        detector.feed(samples[pos:pos + block])
+
+
+def test_bank_measures_tone_share():
+    bank = GoertzelBank((1000, 1500, 2000))
+    bank.feed(pcm(tones((1000,), 16)))
+    assert bank.power[0] == pytest.approx(1.0, abs=0.02)
+    assert bank.power[1] < 0.01 and bank.power[2] < 0.01
+    bank.feed(pcm(tones((1500, 2000), 16)))
+    assert bank.power[1] == pytest.approx(0.5, abs=0.02)
+    assert bank.power[2] == pytest.approx(0.5, abs=0.02)
+    assert bank.frames == 2
+
+
+def test_bank_state_carries_across_blocks():
+    samples = pcm(tones((770, 1336), 64))
+    whole = GoertzelBank(DTMF_ROWS + DTMF_COLS)
+    whole.feed(samples)
+    pieces = GoertzelBank(DTMF_ROWS + DTMF_COLS)
+    for pos in range(0, len(samples), 77):
+        pieces.feed(samples[pos:pos + 77])
+    assert pieces.frames == whole.frames == 4
+    assert pieces.power == whole.power
+    # Bytes in place of an array give the same result
+    as_bytes = GoertzelBank(DTMF_ROWS + DTMF_COLS)
+    as_bytes.feed(samples.tobytes())
+    assert as_bytes.power == whole.power
+
+
+@pytest.mark.parametrize("noise", (0, 500, 1500))
+def test_digit_sequence_in_noise(noise):
+    seq = "159#0*DA"
+    samples = gap(30)
+    for k in seq:
+        samples += key(k) + gap(50)
+    det = DTMFDetector()
+    feed(det, pcm(samples, noise))
+    assert det.digits == seq
+
+
+@pytest.mark.parametrize("col_db,found", ((-6, True), (-9, False), (3, True), (5, False)))
+def test_twist_limits(col_db, found):
+    det = DTMFDetector(twist_db=8, reverse_twist_db=4)
+    feed(det, pcm(gap(20) + key("5", 80, col_db=col_db) + gap(40)))
+    assert det.digits == ("5" if found else "")
+    assert (det.rejected > 0) != found
+
+
+@pytest.mark.parametrize("offset", (0, 37, 100, 200, 255))
+def test_minimum_duration(offset):
+    det = DTMFDetector()
+    feed(det, pcm([0.0] * offset + key("8", 40) + gap(40), noise=300))
+    assert det.digits == "8"
+    # A blip no longer than one frame never makes two frames in a row
+    det = DTMFDetector()
+    feed(det, pcm([0.0] * offset + key("8", 16) + gap(40), noise=300))
+    assert det.digits == ""
+
+
+def test_held_key_reports_once_and_repeats_after_release():
+    det = DTMFDetector()
+    seen = []
+    det.on_digit = seen.append
+    feed(det, pcm(gap(20) + key("7", 400) + gap(40) + key("7", 60) + gap(40)))
+    assert seen == ["7", "7"]
+    # A different key needs no release in between
+    det = DTMFDetector()
+    feed(det, pcm(key("1", 80) + key("2", 80) + gap(40)))
+    assert det.digits == "12"
+
+
+def test_speech_like_chord_is_rejected():
+    # Three row tones at once fail the dominance check
+    det = DTMFDetector()
+    feed(det, pcm(tones((697, 852, 1336), 100)))
+    assert det.digits == ""
+
+
+def test_tone_detector_reports_each_burst_once():
+    heard = []
+    det = ToneDetector({"alert": 1000, "ok": 2000}, on_tone=heard.append)
+    feed(det, pcm(tones((1000,), 200) + gap(40) + tones((2000,), 200) + gap(40) + tones((1000,), 20)))
+    assert heard == ["alert", "ok"]
+    assert det.detected is None
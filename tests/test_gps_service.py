@@ -0,0 +1,139 @@
+import time
+from functools import reduce
+
+import micropython
+import pytest
+
+import gps_service
+from fake_uart import FakeUART
+from gps_service import GPSService
+from machine import Timer
+
+
+def sentence(body):
+    checksum = reduce(lambda a, c: a ^ c, body.encode(), 0)
+    return b"$%s*%02X\r\n" % (body.encode(), checksum)
+
+
+GGA = sentence("GNGGA,123519.00,4807.03812,N,01131.00012,E,1,08,0.9,545.4,M,46.9,M,,")
+RMC = sentence("GNRMC,123519.00,A,4807.03812,N,01131.00012,E,0.022,,230394,,,A")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100000]
+    monkeypatch.setattr(time, "ticks_ms", lambda: now[0])
+    return now
+
+
+def test_poll_parses_once_and_publishes_to_every_subscriber(clock):
+    uart = FakeUART()
+    service = GPSService(uart)
+    seen = []
+    service.subscribe(lambda fix: seen.append(("a", fix.latitude())))
+    service.subscribe(lambda fix: seen.append(("b", fix.valid)))
+    assert service.poll() == 0
+    assert seen == [] and service.published == 0
+
+    uart.feed(GGA + RMC)
+    assert service.poll() == 2
+    assert seen == [("a", pytest.approx(48.1173, abs=1e-4)), ("b", True)]
+    assert service.published == 1
+    assert service.rx_chars == len(GGA + RMC)
+    assert service.fix is service.parser.fix
+
+
+def test_subscribers_are_rate_limited(clock):
+    service = GPSService(FakeUART())
+    fast, slow = [], []
+    service.subscribe(lambda fix: fast.append(clock[0]))
+    service.subscribe(lambda fix: slow.append(clock[0]), interval_ms=1000)
+    for _ in range(25):
+        service.publish()
+        clock[0] += 100
+    assert len(fast) == 25
+    # Due at once, then at most every 1000 ms
+    assert slow == [100000, 101000, 102000]
+    assert service.published == 25
+
+
+def test_unsubscribe_stops_delivery(clock):
+    service = GPSService(FakeUART())
+    seen = []
+    handle = service.subscribe(seen.append)
+    service.publish()
+    service.unsubscribe(handle)
+    service.unsubscribe(handle)         # A second time is harmless
+    service.publish()
+    assert len(seen) == 1
+
+
+def test_timer_schedules_poll_and_honours_pause(clock):
+    uart = FakeUART()
+    service = GPSService(uart)
+    seen = []
+    service.subscribe(seen.append)
+    timer = Timer(1)
+    service.start_timer(timer, period_ms=100)
+    assert timer.mode == Timer.PERIODIC and timer.period == 100
+
+    uart.feed(GGA)
+    service.paused = True
+    timer.callback(timer)
+    assert seen == [] and service.rx_chars == 0
+    service.paused = False
+    timer.callback(timer)
+    assert len(seen) == 1
+
+    service.stop_timer()
+    assert timer.callback is None
+
+
+def test_timer_runs_a_custom_poll(clock):
+    service = GPSService(FakeUART())
+    calls = []
+    timer = Timer(1)
+    service.start_timer(timer, poll=lambda: calls.append(True))
+    timer.callback(timer)
+    timer.callback(timer)
+    assert calls == [True, True]
+
+
+def test_timer_never_queues_a_second_poll(clock, monkeypatch):
+    service = GPSService(FakeUART())
+    queue = []
+    monkeypatch.setattr(micropython, "schedule", lambda func, arg: queue.append((func, arg)))
+    timer = Timer(1)
+    service.start_timer(timer)
+    timer.callback(timer)
+    timer.callback(timer)
+    assert len(queue) == 1
+    func, arg = queue.pop()
+    func(arg)
+    timer.callback(timer)
+    assert len(queue) == 1
+
+
+def test_timer_retries_when_the_schedule_queue_is_full(clock, monkeypatch):
+    uart = FakeUART()
+    service = GPSService(uart)
+    seen = []
+    service.subscribe(seen.append)
+    timer = Timer(1)
+    service.start_timer(timer)
+
+    def full(func, arg):
+        raise RuntimeError("schedule queue full")
+
+    monkeypatch.setattr(micropython, "schedule", full)
+    uart.feed(GGA)
+    timer.callback(timer)
+    monkeypatch.setattr(micropython, "schedule", lambda func, arg: func(arg))
+    timer.callback(timer)
+    assert len(seen) == 1
+
+
+def test_create_uses_the_board_uart():
+    service = GPSService.create()
+    assert service.uart.id == gps_service.GPS_UART
+    assert service.uart.rxbuf == 2048
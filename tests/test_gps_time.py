@@ -0,0 +1,214 @@
+import time
+
+import pytest
+
+from gps_time import GPSTime, PCF_RELEASE_US
+from pcf85063 import PCF85063
+
+EPOCH = time.mktime((2026, 10, 18, 7, 36, 0, 0, 0))
+
+
+class Fix:
+    def __init__(self, secs, centisecond=0):
+        t = time.gmtime(secs)
+        self.year, self.month, self.day = t[0], t[1], t[2]
+        self.hour, self.minute, self.second = t[3], t[4], t[5]
+        self.centisecond = centisecond
+
+
+class Clock:
+    """ticks_us that moves `step` us on every read"""
+
+    def __init__(self, t=0, step=0):
+        self.t = t
+        self.step = step
+
+    def __call__(self):
+        t = self.t
+        self.t += self.step
+        return t
+
+
+class FakeI2C:
+    def __init__(self):
+        self.mem = bytearray(0x12)
+        self.log = []
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        buf[:] = self.mem[reg:reg + len(buf)]
+
+    def readfrom_mem(self, addr, reg, n):
+        return bytes(self.mem[reg:reg + n])
+
+    def writeto_mem(self, addr, reg, data):
+        self.mem[reg:reg + len(data)] = data
+        self.log.append((reg, bytes(data)))
+
+
+class FakeRTC:
+    def __init__(self, dt):
+        self.dt = dt
+        self.set_to = None
+
+    def datetime(self, dt=None):
+        if dt is None:
+            return self.dt
+        self.set_to = dt
+
+
+def run_pulses(gt, seconds, period_us, start_us=1000, lag_us=80000):
+    """PPS edges every period_us, each followed lag_us later by its sentence"""
+    for k in range(seconds):
+        edge = start_us + k * period_us
+        gt.pps_edge(edge)
+        gt.on_fix_time(Fix(EPOCH + k), now=edge + lag_us)
+    return start_us + (seconds - 1) * period_us
+
+
+def test_first_pair_locks_time():
+    gt = GPSTime()
+    assert gt.utc_now(now=0) is None
+    gt.pps_edge(5000)
+    assert gt.on_fix_time(Fix(EPOCH), now=90000)
+    assert gt.locked
+    assert gt.utc_now(now=5000 + 250000) == (EPOCH, 250000)
+    assert gt.utc_now(now=5000 + 1250000) == (EPOCH + 1, 250000)
+
+
+def test_sentence_without_new_pulse_is_not_paired():
+    gt = GPSTime()
+    gt.pps_edge(5000)
+    assert gt.on_fix_time(Fix(EPOCH), now=90000)
+    assert not gt.on_fix_time(Fix(EPOCH), now=95000)             # Same second again
+    assert not gt.on_fix_time(Fix(EPOCH + 1), now=1090000)       # No pulse for it
+    assert not gt.on_fix_time(Fix(EPOCH + 2, centisecond=50), now=2090000)
+
+
+def test_old_pulse_is_not_paired():
+    gt = GPSTime()
+    gt.pps_edge(5000)
+    assert not gt.on_fix_time(Fix(EPOCH), now=5000 + 1200000)
+    assert not gt.locked
+
+
+def test_drift_is_measured_and_corrected():
+    gt = GPSTime()
+    last = run_pulses(gt, 20, 1000050)      # ticks_us runs 50 ppm fast
+    assert gt.pairs == 19
+    assert gt.drift_ppm == pytest.approx(50, abs=0.5)
+    # Half a second after the last pulse, in the local oscillator's ticks
+    secs, us = gt.utc_now(now=last + 500025)
+    assert secs == EPOCH + 19
+    assert abs(us - 500000) <= 2
+
+
+def test_outlier_pulse_is_rejected():
+    gt = GPSTime()
+    last = run_pulses(gt, 5, 1000000)
+    gt.pps_edge(last + 1002000)              # 2000 ppm off, e.g. a glitch
+    assert not gt.on_fix_time(Fix(EPOCH + 5), now=last + 1080000)
+    assert gt.rejected == 1
+    assert gt.drift_ppm == pytest.approx(0, abs=0.1)
+
+
+def test_late_sentence_is_paired_with_its_own_pulse():
+    gt = GPSTime()
+    gt.pps_edge(1000)
+    assert gt.on_fix_time(Fix(EPOCH), now=81000)
+    # The next sentence is parsed only after the pulse of the second after it
+    gt.pps_edge(1001000)
+    gt.pps_edge(2001000)
+    assert gt.on_fix_time(Fix(EPOCH + 1), now=2050000)
+    assert gt.drift_ppm == pytest.approx(0)
+    assert gt.on_fix_time(Fix(EPOCH + 2), now=2081000)
+    assert gt.pairs == 2
+    assert gt.rejected == 0
+    assert gt.utc_now(now=2501000) == (EPOCH + 2, 500000)
+
+
+def test_first_measurement_is_bounds_checked():
+    gt = GPSTime()
+
+    def pulse(k):
+        return 1000 + k * 1000020      # ticks_us runs 20 ppm fast
+
+    gt.pps_edge(pulse(0))
+    assert gt.on_fix_time(Fix(EPOCH), now=pulse(0) + 80000)
+    # A glitch adds an edge, so the next second is paired with it and comes out 0.7 s short
+    gt.pps_edge(pulse(0) + 300000)
+    gt.pps_edge(pulse(1))
+    assert not gt.on_fix_time(Fix(EPOCH + 1), now=pulse(1) + 80000)
+    assert gt.rejected == 1 and gt.pairs == 0
+    # The glitch became the anchor, so the next pair is off the other way and anchors again
+    gt.pps_edge(pulse(2))
+    assert not gt.on_fix_time(Fix(EPOCH + 2), now=pulse(2) + 80000)
+    assert gt.rejected == 2 and gt.pairs == 0
+    # From a good anchor the pairs are accepted again, with the right drift
+    for k in range(3, 8):
+        gt.pps_edge(pulse(k))
+        assert gt.on_fix_time(Fix(EPOCH + k), now=pulse(k) + 80000)
+    assert gt.pairs == 5
+    assert gt.drift_ppm == pytest.approx(20, abs=0.5)
+
+
+def test_anchor_taken_from_the_next_pulse_is_replaced():
+    gt = GPSTime()
+    gt.pps_edge(1000)
+    gt.pps_edge(1001000)
+    # The first sentence is parsed after the following pulse and anchors on it
+    assert gt.on_fix_time(Fix(EPOCH), now=1050000)
+    # The next second brings no new pulse, the one after it shows the anchor is a second out
+    assert not gt.on_fix_time(Fix(EPOCH + 1), now=1081000)
+    gt.pps_edge(2001000)
+    assert gt.on_fix_time(Fix(EPOCH + 2), now=2081000)
+    assert gt.pairs == 0 and gt.rejected == 0
+    gt.pps_edge(3001000)
+    assert gt.on_fix_time(Fix(EPOCH + 3), now=3081000)
+    assert gt.pairs == 1
+    assert gt.drift_ppm == pytest.approx(0)
+    assert gt.utc_now(now=3101000) == (EPOCH + 3, 100000)
+
+
+def test_holdover_moves_anchor_forward():
+    gt = GPSTime()
+    last = run_pulses(gt, 3, 1000000)
+    later = last + 450 * 1000000 + 123456
+    assert gt.utc_now(now=later) == (EPOCH + 2 + 450, 123456)
+
+
+def test_sync_rtc_sets_clock_when_off(monkeypatch):
+    gt = GPSTime()
+    run_pulses(gt, 3, 1000000)
+    now = 1000 + 2 * 1000000 + 300000
+    monkeypatch.setattr(time, "ticks_us", lambda: now)
+    t = time.gmtime(EPOCH + 2)
+    rtc = FakeRTC((t[0], t[1], t[2], t[6], t[3], t[4], t[5], 100000))
+    assert gt.sync_rtc(rtc) == -200000
+    assert rtc.set_to == (t[0], t[1], t[2], t[6], t[3], t[4], t[5], 300000)
+    rtc = FakeRTC((t[0], t[1], t[2], t[6], t[3], t[4], t[5], 299800))
+    assert gt.sync_rtc(rtc) == -200
+    assert rtc.set_to is None
+
+
+def test_pcf85063_released_on_the_second_boundary(monkeypatch):
+    gt = GPSTime()
+    last = run_pulses(gt, 3, 1000000)
+    chip = PCF85063(FakeI2C())
+    released = []
+    start = chip.start
+
+    def on_start(ctrl=0):
+        released.append(clock.t)
+        start(ctrl)
+
+    chip.start = on_start
+    # Too early: the release point is more than the window away
+    clock = Clock(last + 100000, step=100)
+    monkeypatch.setattr(time, "ticks_us", clock)
+    assert not gt.sync_pcf85063(chip)
+
+    clock.t = last + PCF_RELEASE_US - 20000
+    assert gt.sync_pcf85063(chip)
+    assert chip.datetime()[4:] == (7, 36, 2)
+    assert 0 <= released[0] - (last + PCF_RELEASE_US) <= 200
+    assert not chip.i2c.mem[0] & 0x20               # STOP bit cleared again
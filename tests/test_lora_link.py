@@ -0,0 +1,34 @@
+from lora_link import DuplicateCache
+from sim_lora_link import simulate
+
+
+def test_lossless_channel_needs_no_retransmissions():
+    r = simulate(messages=20)
+    assert r["delivered"] == 20
+    assert r["received"] == r["sent"]
+    assert r["retransmission_rate"] == 0
+
+
+def test_lossy_channel_delivers_everything_once():
+    r = simulate(loss=0.2, messages=30)
+    assert r["delivered"] == 30
+    assert r["failed"] == 0
+    assert r["received"] == r["sent"]       # Duplicates are not passed on
+    assert r["retransmission_rate"] > 0
+
+
+def test_ack_wait_follows_spreading_factor():
+    # The links start at SF9; at SF12 an ACK alone takes over a second
+    r = simulate(messages=10, switch_sf=12)
+    assert r["delivered"] == 10
+    assert r["retransmission_rate"] == 0
+
+
+def test_duplicate_cache_forgets_least_recently_used():
+    cache = DuplicateCache(3)
+    for key in (1, 2, 3):
+        cache.add(key)
+    assert cache.touch(1)
+    cache.add(4)
+    assert len(cache) == 3
+    assert [k for k in (1, 2, 3, 4) if cache.touch(k)] == [1, 3, 4]
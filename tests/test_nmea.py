@@ -0,0 +1,148 @@
+import os
+
+from nmea import (NMEAParser, SENTENCE_GGA, SENTENCE_GSV, SENTENCE_NONE, SENTENCE_RMC,
+                  TALKER_GA, TALKER_GB, TALKER_GL, TALKER_GN, TALKER_GP)
+
+CAPTURE = os.path.join(os.path.dirname(__file__), "nmea_capture.nmea")
+
+
+def sentence(body):
+    cs = 0
+    for c in body.encode():
+        cs ^= c
+    return b"$%s*%02X" % (body.encode(), cs)
+
+
+def sats(fix):
+    return [(fix.sat_talker[i], fix.sat_signal[i], fix.sat_prn[i], fix.sat_snr[i])
+            for i in range(fix.sat_count)]
+
+
+GGA = "GNGGA,123519.00,4807.03812,N,01131.00012,E,1,08,0.9,545.4,M,46.9,M,,"
+RMC = "GNRMC,123519.00,A,4807.03812,N,01131.00012,E,0.022,,230394,,,A"
+
+
+def test_checksum_is_validated():
+    parser = NMEAParser()
+    line = sentence(GGA)
+    assert parser.parse(line) == SENTENCE_GGA
+    assert parser.parse(line[:-2] + b"00") == SENTENCE_NONE
+    assert parser.parse(line[:-3]) == SENTENCE_NONE          # No checksum
+    bad = bytearray(line)
+    bad[20] ^= 0x01                                         # One flipped bit
+    assert parser.parse(bad) == SENTENCE_NONE
+    assert parser.checksum_failed == 3
+    assert parser.sentences == 1
+
+
+def test_lowercase_checksum_digits():
+    line = sentence(RMC)
+    assert NMEAParser().parse(line[:-2] + line[-2:].lower()) == SENTENCE_RMC
+
+
+def test_position_time_and_speed():
+    parser = NMEAParser()
+    parser.parse(sentence(GGA))
+    parser.parse(sentence(RMC))
+    fix = parser.fix
+    assert fix.valid and fix.quality == 1
+    assert fix.lat == 48117302 and fix.lng == 11516668
+    assert fix.alt == 54540 and fix.hdop == 90 and fix.sats_used == 8
+    assert (fix.hour, fix.minute, fix.second) == (12, 35, 19)
+    assert (fix.year, fix.month, fix.day) == (2094, 3, 23)
+    assert fix.speed == 22 * 463 // 9000
+
+
+def test_southern_and_western_hemispheres():
+    parser = NMEAParser()
+    parser.parse(sentence("GPGGA,010203.00,3351.9000,S,15112.5600,W,1,05,1.2,10.0,M,,M,,"))
+    assert parser.fix.lat == -33865000 and parser.fix.lng == -151209333
+
+
+def test_every_gnss_talker():
+    parser = NMEAParser()
+    for talker in ("GP", "GN", "GL", "GA", "GB", "GQ"):
+        assert parser.parse(sentence(talker + RMC[2:])) == SENTENCE_RMC
+    assert parser.parse(sentence("BD" + RMC[2:])) == SENTENCE_NONE
+    assert parser.parse(sentence("GNXYZ,1,2,3")) == SENTENCE_NONE
+    assert parser.sentences == 6
+    assert parser.unknown == 2
+
+
+def test_multi_part_gsv_per_talker():
+    parser = NMEAParser()
+    for body in ("GPGSV,2,1,06,02,46,077,29,05,11,037,43,12,73,048,28,13,79,029,46",
+                 "GPGSV,2,2,06,15,69,109,18,18,16,222,",
+                 "GLGSV,1,1,02,65,12,295,35,66,55,025,24",
+                 "GAGSV,1,1,01,03,78,327,23",
+                 "GBGSV,1,1,01,06,36,092,39"):
+        assert parser.parse(sentence(body)) == SENTENCE_GSV
+    fix = parser.fix
+    assert list(fix.sats_in_view) == [6, 2, 1, 1, 0, 0]
+    assert [s[2] for s in sats(fix)] == [2, 5, 12, 13, 15, 18, 65, 66, 3, 6]
+    assert sats(fix)[5] == (TALKER_GP, 0, 18, 0)       # Not tracked, SNR empty
+    assert sats(fix)[8] == (TALKER_GA, 0, 3, 23)
+
+    # The next GPS cycle replaces only the GPS satellites
+    parser.parse(sentence("GPGSV,1,1,01,07,20,100,33"))
+    assert [s[2] for s in sats(fix)] == [65, 66, 3, 6, 7]
+    assert fix.sats_in_view[TALKER_GP] == 1
+    assert fix.sats_in_view[TALKER_GB] == 1
+
+
+def test_nmea_411_gsv_keeps_each_signal():
+    parser = NMEAParser()
+    epoch = ("GPGSV,2,1,05,02,46,077,29,05,11,037,43,12,73,048,28,13,79,029,46,1",
+             "GPGSV,2,2,05,15,69,109,18,1",
+             "GPGSV,1,1,02,05,11,037,38,13,79,029,41,8",      # L5
+             "GAGSV,1,1,02,03,78,327,23,08,13,288,18,7",      # E1
+             "GBGSV,1,1,01,06,36,092,39,B")                   # B2I
+    for body in epoch:
+        assert parser.parse(sentence(body)) == SENTENCE_GSV
+    fix = parser.fix
+    # The signal ID is not read as a satellite and L5 does not drop L1
+    assert fix.sat_count == 10
+    assert sats(fix)[4] == (TALKER_GP, 1, 15, 18)
+    assert sats(fix)[5:7] == [(TALKER_GP, 8, 5, 38), (TALKER_GP, 8, 13, 41)]
+    assert sats(fix)[7] == (TALKER_GA, 7, 3, 23)
+    assert sats(fix)[9] == (TALKER_GB, 11, 6, 39)
+    assert fix.sats_in_view[TALKER_GP] == 5
+    assert fix.sats_in_view[TALKER_GA] == 2
+
+    # The next epoch replaces each signal with its own cycle
+    parser.parse(sentence("GPGSV,1,1,03,02,46,077,30,05,11,037,44,12,73,048,29,1"))
+    assert fix.sats_in_view[TALKER_GP] == 3
+    assert fix.sat_count == 8
+    parser.parse(sentence("GPGSV,1,1,01,05,11,037,37,8"))
+    assert fix.sats_in_view[TALKER_GP] == 3
+    gps = [s for s in sats(fix) if s[0] == TALKER_GP]
+    assert gps == [(TALKER_GP, 1, 2, 30), (TALKER_GP, 1, 5, 44), (TALKER_GP, 1, 12, 29),
+                   (TALKER_GP, 8, 5, 37)]
+
+
+def test_gsv_with_no_satellites():
+    parser = NMEAParser()
+    parser.parse(sentence("GNGSV,1,1,03,02,46,077,29,05,11,037,43,12,73,048,28,1"))
+    assert parser.parse(sentence("GNGSV,1,1,00,1")) == SENTENCE_GSV
+    assert parser.fix.sat_count == 0
+    assert parser.fix.sats_in_view[TALKER_GN] == 0
+
+
+def test_short_sentences_are_ignored():
+    parser = NMEAParser()
+    assert parser.parse(sentence("GPGGA,123519")) == SENTENCE_NONE
+    assert parser.parse(sentence("GPGSV,1")) == SENTENCE_NONE
+    assert parser.parse(b"$GP") == SENTENCE_NONE
+    assert not parser.fix.valid
+    assert parser.fix.lat is None
+
+
+def test_capture_sats_in_view():
+    parser = NMEAParser()
+    with open(CAPTURE, "rb") as f:
+        for line in f:
+            parser.parse(line.rstrip(b"\r\n"))
+    assert parser.checksum_failed == 0
+    fix = parser.fix
+    assert fix.sats_in_view[TALKER_GP] == 10 and fix.sats_in_view[TALKER_GL] == 7
+    assert fix.sat_count == 33
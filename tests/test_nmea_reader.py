@@ -0,0 +1,78 @@
+import os
+
+from fake_uart import FakeUART
+from nmea import NMEAParser
+from nmea_reader import NMEAReader
+
+CAPTURE = os.path.join(os.path.dirname(__file__), "nmea_capture.nmea")
+
+GGA = b"$GNGGA,123519.00,4807.03812,N,01131.00012,E,1,08,0.9,545.4,M,46.9,M,,*4E"
+RMC = b"$GNRMC,123519.00,A,4807.03812,N,01131.00012,E,0.022,,230394,,,A*7A"
+
+
+def collect(reader):
+    lines = []
+    reader.poll(lambda line: lines.append(bytes(line)))
+    return lines
+
+
+def test_lines_are_split_and_stripped():
+    uart = FakeUART()
+    reader = NMEAReader(uart)
+    uart.feed(GGA + b"\r\n" + RMC + b"\r\n$GNGSA,A,3")
+    assert collect(reader) == [GGA, RMC]
+    # The partial sentence is completed by the next chunk
+    uart.feed(b",,*1C\r\n")
+    assert collect(reader) == [b"$GNGSA,A,3,,*1C"]
+    assert reader.sentences == 3
+
+
+def test_lines_wrapping_around_the_ring():
+    uart = FakeUART(fifo=37)
+    reader = NMEAReader(uart, ring_size=64)
+    lines = []
+    for i in range(50):
+        uart.feed(b"$GPTXT,%02d\r\n" % i)
+        reader.poll(lambda line: lines.append(bytes(line)))
+    assert lines == [b"$GPTXT,%02d" % i for i in range(50)]
+    assert reader.rx_chars == 50 * 11
+
+
+def test_oversized_line_is_skipped():
+    uart = FakeUART()
+    reader = NMEAReader(uart, line_size=32)
+    uart.feed(b"$" + b"X" * 100 + b"\r\n" + RMC[:30] + b"\r\n")
+    assert collect(reader) == [RMC[:30]]
+    assert reader.too_long == 1
+
+
+def test_feed_splits_stream_chunks():
+    reader = NMEAReader(None)
+    lines = []
+    data = (GGA + b"\r\n" + RMC + b"\r\n") * 3
+    for i in range(0, len(data), 17):
+        reader.feed(data[i:i + 17], lambda line: lines.append(bytes(line)))
+    assert lines == [GGA, RMC] * 3
+
+
+def test_capture_in_uart_sized_chunks():
+    # A 20 ms UI frame at 115200 baud brings ~230 bytes
+    with open(CAPTURE, "rb") as f:
+        capture = f.read()
+    uart = FakeUART(fifo=256)
+    reader = NMEAReader(uart)
+    parser = NMEAParser()
+    lines = []
+
+    def on_line(line):
+        lines.append(bytes(line))
+        parser.parse(line)
+
+    for pos in range(0, len(capture), 230):
+        uart.feed(capture[pos:pos + 230])
+        reader.poll(on_line)
+    assert lines == capture.split(b"\r\n")[:-1]
+    assert reader.too_long == 0
+    assert reader.rx_chars == len(capture)
+    assert parser.checksum_failed == 0
+    assert parser.fix.valid and parser.fix.sats_used > 0
@@ -0,0 +1,89 @@
+import cmath
+import math
+from array import array
+
+import pytest
+
+from spectrum import FULL_SCALE_BIN, SpectrumAnalyzer
+
+
+def tone(n, cycles, amplitude=32767, phase=0.0, dc=0):
+    """n samples with `cycles` periods of a sine, as the int16 bytes process() takes"""
+    return array("h", [max(-32768, min(32767, int(dc + amplitude * math.sin(2 * math.pi * cycles * i / n + phase))))
+                       for i in range(n)]).tobytes()
+
+
+def reference(pcm, n):
+    """|X[k]| / N of the Hann-windowed block, by a plain DFT"""
+    x = array("h")
+    x.frombytes(pcm)
+    w = [v * 0.5 * (1 - math.cos(2 * math.pi * i / n)) for i, v in enumerate(x)]
+    return [abs(sum(w[i] * cmath.exp(-2j * math.pi * k * i / n) for i in range(n))) / n
+            for k in range(n // 2 + 1)]
+
+
+@pytest.mark.parametrize("n", (256, 512))
+@pytest.mark.parametrize("k", (2, 8, 37, 100))
+def test_tone_at_a_bin_gives_its_peak(n, k):
+    sa = SpectrumAnalyzer(n=n)
+    sa.transform(tone(n, k, phase=0.3))
+    mags = list(sa.re[:n // 2 + 1])
+    assert mags.index(max(mags)) == k
+    # max + 3/8 min is within 7 % of the true magnitude
+    assert mags[k] == pytest.approx(FULL_SCALE_BIN, rel=0.08)
+    # Hann leakage: half into each neighbour, nothing further out
+    assert mags[k - 1] == pytest.approx(FULL_SCALE_BIN / 2, rel=0.1)
+    assert mags[k + 1] == pytest.approx(FULL_SCALE_BIN / 2, rel=0.1)
+    assert max(mags[:max(k - 2, 0)] + mags[k + 3:]) < FULL_SCALE_BIN / 200
+
+
+def test_magnitude_scales_with_amplitude():
+    sa = SpectrumAnalyzer()
+    sa.transform(tone(256, 20, amplitude=32767))
+    full = sa.re[20]
+    sa.transform(tone(256, 20, amplitude=3277))
+    assert sa.re[20] == pytest.approx(full / 10, rel=0.02)
+
+
+def test_matches_a_reference_dft():
+    n = 256
+    pcm = array("h", [int(9000 * math.sin(2 * math.pi * 12.3 * i / n)
+                          + 6000 * math.sin(2 * math.pi * 71.6 * i / n + 1)) for i in range(n)]).tobytes()
+    sa = SpectrumAnalyzer(n=n)
+    sa.transform(pcm)
+    ref = reference(pcm, n)
+    for k in range(n // 2 + 1):
+        assert abs(sa.re[k] - ref[k]) <= 0.08 * ref[k] + 8, k
+
+
+def test_dc_stays_in_bin_zero():
+    sa = SpectrumAnalyzer()
+    sa.transform(tone(256, 0, amplitude=0, dc=8000))
+    assert sa.re[0] == pytest.approx(4000, rel=0.01)
+    assert sa.re[1] == pytest.approx(2000, rel=0.01)
+    assert max(sa.re[2:129]) <= 4     # Rounding of the fixed-point stages
+
+
+def test_bands_follow_the_tone():
+    sa = SpectrumAnalyzer(n=256, rate=16000, bands=16, decay=10, hold=2)
+    k = 40      # 2500 Hz
+    band = max(b for b in range(16) if sa._edges[b] <= k)
+    sa.process(tone(256, k))
+    top = sa.levels[band]
+    assert top >= 98
+    assert max(sa.levels[b] for b in range(16) if abs(b - band) > 1) == 0
+
+    # Silence: the bar falls by `decay` per block, the peak holds first
+    silence = bytes(512)
+    sa.process(silence)
+    assert sa.levels[band] == top - 10 and sa.peaks[band] == top
+    sa.process(silence)
+    assert sa.levels[band] == top - 20 and sa.peaks[band] == top
+    sa.process(silence)
+    assert sa.levels[band] == top - 30 and sa.peaks[band] == top - 10
+    assert sa.blocks == 4
+
+
+def test_rejects_other_sizes():
+    with pytest.raises(ValueError):
+        SpectrumAnalyzer(n=128)
@@ -0,0 +1,111 @@
+from airtime import DutyCycleLedger
+from fake_sx1262 import make_radio
+import sx1262
+
+
+def test_begin_programs_frequency_and_sync_word():
+    radio, chip = make_radio(freq_mhz=868.0, sf=9, bw_khz=125, cr=7)
+    assert chip.frequency == 868000000 * 2 ** 25 // 32000000
+    assert chip.registers[0x0740] == 0x14 and chip.registers[0x0741] == 0x24
+    assert tuple(chip.modulation) == (9, 0x04, 3, 0)
+    assert radio.read_register(0x0740, 2) == b"\x14\x24"
+
+
+def test_rx_done_queues_packet_with_signal_quality():
+    radio, chip = make_radio()
+    radio.start_receive()
+    chip.receive(b"hello", rssi_dbm=-71, snr_db=-5)
+    assert radio.available() == 1
+    data, rssi, snr = radio.get()
+    assert bytes(data) == b"hello"
+    assert rssi == -71
+    assert snr == -5
+    radio.release()
+    assert radio.available() == 0
+    assert chip.irq == 0
+
+
+def test_crc_error_is_counted_not_queued():
+    radio, chip = make_radio()
+    radio.start_receive()
+    chip.receive(b"noise", crc_ok=False)
+    assert radio.available() == 0
+    assert radio.rx_crc_errors == 1
+
+
+def test_full_queue_drops_newest_packets():
+    radio, chip = make_radio(queue=4)
+    radio.start_receive()
+    for i in range(6):
+        chip.receive(b"msg%d" % i)
+    assert radio.available() == 4
+    assert radio.rx_dropped == 2
+    buf = bytearray(16)
+    got = []
+    while radio.available():
+        n = radio.recv(buf)
+        got.append(bytes(buf[:n]))
+    assert got == [b"msg0", b"msg1", b"msg2", b"msg3"]
+    # Room again once the reader caught up
+    chip.receive(b"msg6")
+    assert bytes(radio.get()[0]) == b"msg6"
+
+
+def test_tx_done_clears_busy_and_resumes_receive():
+    radio, chip = make_radio()
+    radio.start_receive()
+    done = []
+    radio.on_tx_done = lambda: done.append(True)
+    assert radio.send(b"hello world")
+    assert radio.tx_busy
+    assert chip.mode == "TX"
+    assert chip.sent() == b"hello world"
+    chip.tx_done()
+    assert not radio.tx_busy
+    assert radio.tx_packets == 1
+    assert done == [True]
+    assert chip.mode == "RX"
+    assert chip.packet_params[3] == sx1262.MAX_PAYLOAD
+
+
+def test_irq_during_command_is_deferred_until_it_ends():
+    radio, chip = make_radio()
+    radio.start_receive()
+    # A packet finishes while send() is switching the chip to standby
+    chip.on_transfer(0x80, lambda: chip.receive(b"late packet"))
+    chip.opcodes.clear()
+    radio.send(b"abc")
+    assert chip.overlapped == 0
+    # The packet is read out after standby, before the TX payload replaces it
+    assert chip.opcodes == [0x80, 0x12, 0x02, 0x13, 0x1E, 0x14, 0x8C, 0x0E, 0x83]
+    assert not radio._irq_pending
+    assert radio.irqs == 1
+    assert bytes(radio.get()[0]) == b"late packet"
+    assert chip.sent() == b"abc"
+    # TX done is not mistaken for the end of an earlier packet
+    assert radio.tx_busy
+    chip.tx_done()
+    assert not radio.tx_busy
+    assert chip.mode == "RX"
+
+
+def test_buffer_base_follows_the_driver():
+    radio, chip = make_radio()
+    assert chip.opcodes.count(0x8F) == 1
+    radio._command(0x8F, 0x00, 0x80)
+    radio.start_receive()
+    chip.receive(b"moved")
+    assert bytes(chip.buffer[0x80:0x85]) == b"moved"
+    assert bytes(radio.get()[0]) == b"moved"
+
+
+def test_ledger_refuses_packets_over_budget():
+    radio, chip = make_radio(freq_mhz=869.0, sf=10)     # 0.1 % band: 3.6 s per hour
+    radio.ledger = DutyCycleLedger()
+    sent = 0
+    while radio.send(bytes(200)):
+        chip.tx_done()
+        sent += 1
+    assert 0 < sent < 5
+    assert radio.tx_deferred == 1
+    assert radio.duty_wait_ms(200) > 0
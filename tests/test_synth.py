@@ -0,0 +1,141 @@
+from array import array
+
+import pytest
+
+from synth import Synth, note_frequency, parse_rtttl, play_rtttl, sine_table
+
+RATE = 32000
+
+
+def samples(data):
+    out = array("h")
+    out.frombytes(bytes(data))
+    return out
+
+
+def render(synth, n):
+    out = array("h")
+    while n > 0:
+        block = synth.render(min(n, synth.block))
+        out.extend(samples(block))
+        n -= len(block) // 2
+    return out
+
+
+def crossings(x):
+    return sum(1 for a, b in zip(x, x[1:]) if a < 0 <= b)
+
+
+def test_rtttl_notes_and_durations():
+    song = "test:d=4,o=5,b=120:8e6,8d#6,p,2a.,c,16h,8C#.7"
+    assert [(round(f, 2), ms) for f, ms in parse_rtttl(song)] == [
+        (1318.51, 250), (1244.51, 250), (0, 500), (880.0, 1500), (523.25, 500),
+        (987.77, 125), (2217.46, 375)]
+
+
+def test_rtttl_defaults_and_spacing():
+    # No settings: d=4, o=6, b=63; spaces and empty tokens are ignored
+    notes = list(parse_rtttl("x::a, 8p ,,2g#."))
+    assert notes == [(880.0 * 2, 952), (0, 476), (note_frequency(8, 6), 2856)]
+
+
+def test_note_frequency():
+    assert note_frequency(9, 4) == 440.0
+    assert note_frequency(0, 4) == pytest.approx(261.63, abs=0.01)
+    assert note_frequency(9, 5) == 880.0
+
+
+def test_sine_table():
+    t = sine_table()
+    assert len(t) == 1024
+    assert (t[0], t[256], t[512], t[768]) == (0, 32767, 0, -32767)
+    assert all(t[i] == -t[1024 - i] for i in range(1, 512))
+    assert sine_table() is t
+
+
+def test_sustained_note_frequency_and_level():
+    synth = Synth(rate=RATE, voices=1)
+    synth.set_envelope(attack_ms=5, decay_ms=20, sustain=70, release_ms=50)
+    synth.note_on(1000, volume=80)
+    render(synth, RATE // 10)                   # Past attack and decay
+    x = render(synth, RATE)
+    assert crossings(x) == pytest.approx(1000, abs=1)
+    assert max(x) == pytest.approx(32767 * 0.8 * 0.7, rel=0.01)
+    assert min(x) == pytest.approx(-32767 * 0.8 * 0.7, rel=0.01)
+
+
+def test_envelope_attack_and_release():
+    synth = Synth(rate=RATE, voices=1)
+    synth.set_envelope(attack_ms=10, decay_ms=10, sustain=100, release_ms=40)
+    v = synth.note_on(2000, volume=100)
+    attack = render(synth, RATE * 10 // 1000)
+    # Rising linearly from silence
+    assert max(abs(s) for s in attack[:8]) < 1000
+    assert max(abs(s) for s in attack[-32:]) > 30000
+    render(synth, 1024)
+    synth.note_off(v)
+    release = render(synth, RATE * 40 // 1000 + 2 * synth.block)
+    assert synth.active() == 0
+    assert max(abs(s) for s in release[-synth.block:]) == 0
+    assert max(abs(s) for s in release[:32]) > 30000
+
+
+def test_voices_mix_and_clip():
+    a = Synth(rate=RATE, voices=2)
+    b = Synth(rate=RATE, voices=2)
+    both = Synth(rate=RATE, voices=2)
+    a.note_on(440, 40)
+    b.note_on(660, 40)
+    both.note_on(440, 40)
+    both.note_on(660, 40)
+    xa, xb, xab = render(a, 4096), render(b, 4096), render(both, 4096)
+    assert max(abs(s - (p + q)) for s, p, q in zip(xab, xa, xb)) <= 1
+
+    loud = Synth(rate=RATE, voices=4)
+    for _ in range(4):
+        loud.note_on(500, 100)
+    x = render(loud, 4096)
+    assert max(x) == 32767 and min(x) == -32768
+    # Clipped, not wrapped round: still one crossing per cycle
+    assert crossings(x[2048:]) == pytest.approx(500 * 2048 / RATE, abs=1)
+
+
+def test_voice_stealing():
+    synth = Synth(rate=RATE, voices=2)
+    first = synth.note_on(440)
+    second = synth.note_on(550)
+    assert synth.note_on(660) == first           # Oldest
+    synth.note_off(second)
+    assert synth.note_on(770) == second          # A releasing voice goes first
+
+
+def test_tone_ends_in_silence():
+    synth = Synth(rate=RATE, voices=2)
+    buf = synth.tone(1000, 200)
+    x = samples(buf)
+    assert len(x) == RATE * 200 // 1000
+    assert max(x) > 20000
+    assert max(abs(s) for s in x[-8:]) < 200
+    assert synth.active() == 0
+
+
+class BlockingI2S:
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, buf):
+        self.data += buf
+        return len(buf)
+
+
+def test_play_rtttl_streams_every_sample():
+    synth = Synth(rate=RATE, voices=2)
+    i2s = BlockingI2S()
+    song = "t:d=8,o=5,b=180:c,e,p,g,4c6"
+    play_rtttl(synth, i2s, song)
+    assert len(i2s.data) == sum(RATE * ms // 1000 for _, ms in parse_rtttl(song)) * 2
+    x = samples(i2s.data)
+    # The pause is silent once the previous note's 80 ms release is over
+    eighth = RATE * (240000 // 180 // 8) // 1000
+    assert max(abs(s) for s in x[2 * eighth + RATE * 100 // 1000:3 * eighth]) == 0
+    assert max(abs(s) for s in x[3 * eighth:4 * eighth]) > 10000
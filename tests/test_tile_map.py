@@ -0,0 +1,107 @@
+import pytest
+
+from tile_map import (BACKGROUND, TILE_BYTES, TILE_SIZE, MapView, TileCache,
+                      lat_lng_to_pixel, pixel_to_lat_lng)
+from tile_set import make_tile_set, pixel
+
+Z = 15
+X0 = 16000
+Y0 = 10000
+
+
+@pytest.fixture
+def tiles(tmp_path):
+    # Eight columns by three rows, one tile missing from the card
+    return make_tile_set(str(tmp_path), Z, range(X0, X0 + 8), range(Y0, Y0 + 3), skip={(X0 + 1, Y0 + 1)})
+
+
+def screen_pixel(view, sx, sy):
+    i = (sy * view.width + sx) * 2
+    return view.buf[i] | (view.buf[i + 1] << 8)
+
+
+def expected(view, sx, sy):
+    wx = view.cx - view.width // 2 + sx
+    wy = view.cy - view.height // 2 + sy
+    tx, ty = wx // TILE_SIZE, wy // TILE_SIZE
+    if (tx, ty) == (X0 + 1, Y0 + 1):
+        return BACKGROUND
+    return pixel(Z, tx, ty, wx % TILE_SIZE, wy % TILE_SIZE)
+
+
+def test_lat_lng_round_trip():
+    x, y = lat_lng_to_pixel(-33.8688, 151.2093, Z)
+    lat, lng = pixel_to_lat_lng(x, y, Z)
+    assert lat == pytest.approx(-33.8688, abs=1e-4)
+    assert lng == pytest.approx(151.2093, abs=1e-4)
+
+
+def test_render_copies_the_right_pixels(tiles):
+    view = MapView(TileCache(tiles), zoom=Z)
+    view.move_to((X0 + 1) * TILE_SIZE + 100, (Y0 + 1) * TILE_SIZE + 30)
+    view.render()
+    for sx in (0, 1, 139, 140, 141, 395, 396, 479):
+        for sy in (0, 1, 13, 14, 15, 200, 221):
+            assert screen_pixel(view, sx, sy) == expected(view, sx, sy), (sx, sy)
+
+
+def test_cache_stays_within_its_budget(tiles):
+    cache = TileCache(tiles, budget=3 * TILE_BYTES)
+    for x in range(X0, X0 + 8):
+        assert cache.get(Z, x, Y0) is not None
+    assert cache._allocated == 3
+    assert cache.evictions == 5
+    assert cache.get(Z, X0 + 7, Y0) is not None and cache.hits == 1
+    # Missing tiles are looked up once
+    assert cache.get(Z, X0 + 1, Y0 + 1) is None
+    assert cache.get(Z, X0 + 1, Y0 + 1) is None
+    assert cache.misses == 9
+
+
+def test_prefetch_reads_a_chunk_per_step(tiles):
+    cache = TileCache(tiles, chunk=16384)
+    cache.prefetch(Z, X0, Y0)
+    steps = 0
+    while cache.step():
+        steps += 1
+    assert steps == TILE_BYTES // 16384
+    assert cache.prefetched == 1
+    assert cache.get(Z, X0, Y0) is not None
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_half_prefetched_tile_is_finished_on_demand(tiles):
+    cache = TileCache(tiles, chunk=16384)
+    cache.prefetch(Z, X0 + 2, Y0)
+    cache.step()
+    tile = cache.get(Z, X0 + 2, Y0)
+    assert tile is not None and cache._pending is None
+    assert tile[TILE_BYTES - 2] | (tile[TILE_BYTES - 1] << 8) == pixel(Z, X0 + 2, Y0, 255, 255)
+
+
+def pan_east(tiles, px_per_frame, frames):
+    cache = TileCache(tiles)
+    view = MapView(cache, zoom=Z)
+    view.move_to(X0 * TILE_SIZE + 240, Y0 * TILE_SIZE + 200)
+    view.render()
+    while cache.step():     # Let the first prefetch finish, then count
+        pass
+    cache.hits = cache.misses = 0
+    for _ in range(frames):
+        view.pan(px_per_frame, 0)
+        view.render()
+        cache.step()        # One chunk per frame, as the map page does
+    return cache, view
+
+
+def test_panning_is_served_from_prefetched_tiles(tiles):
+    cache, view = pan_east(tiles, 8, 120)
+    assert cache.misses == 0
+    assert cache.prefetched > 0
+    assert screen_pixel(view, 0, 0) == expected(view, 0, 0)
+
+
+def test_fast_panning_outruns_the_prefetch(tiles):
+    cache, view = pan_east(tiles, 64, 15)
+    assert cache.misses > 0
+    assert 0 < cache.hit_rate() < 1
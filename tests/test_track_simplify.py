@@ -0,0 +1,53 @@
+import pytest
+
+from track_simplify import TrackSimplifier
+from tracks import M_PER_DEG, deviation, simplify, walk
+
+
+@pytest.mark.parametrize("tolerance", (2.0, 5.0, 10.0))
+@pytest.mark.parametrize("seed", (1, 2, 3))
+def test_every_point_stays_within_the_tolerance(tolerance, seed):
+    points = walk(2000, seed=seed)
+    ts = TrackSimplifier(tolerance_m=tolerance)
+    kept = simplify(ts, points)
+    assert kept[0] == 0 and kept[-1] == len(points) - 1
+    assert kept == sorted(set(kept))
+    assert deviation(points, kept) <= tolerance * (1 + 1e-9)
+    assert ts.max_error_m <= tolerance
+    assert ts.points_out == len(kept)
+    assert ts.compression_ratio() > 2
+
+
+def test_straight_line_keeps_only_its_ends():
+    points = [(0.0, i * 10 / M_PER_DEG) for i in range(20)]
+    ts = TrackSimplifier(tolerance_m=1.0, window=64)
+    assert simplify(ts, points) == [0, 19]
+    assert ts.max_error_m == pytest.approx(0, abs=1e-6)
+
+
+def test_window_bounds_a_segment():
+    points = [(0.0, i * 10 / M_PER_DEG) for i in range(100)]
+    kept = simplify(TrackSimplifier(tolerance_m=1.0, window=8), points)
+    assert max(b - a for a, b in zip(kept, kept[1:])) <= 9
+
+
+def test_stop_is_a_dead_band():
+    # Jitter around a parked position keeps nothing new
+    points = [(0.0, 0.0)] + [((i % 3 - 1) / M_PER_DEG, (i % 2) / M_PER_DEG) for i in range(50)]
+    ts = TrackSimplifier(tolerance_m=5.0)
+    assert simplify(ts, points) == [0]
+
+
+def test_corner_is_kept():
+    leg = [(0.0, i * 10 / M_PER_DEG) for i in range(10)]
+    turn = [(i * 10 / M_PER_DEG, 90 / M_PER_DEG) for i in range(1, 10)]
+    kept = simplify(TrackSimplifier(tolerance_m=2.0), leg + turn)
+    assert kept == [0, 9, 18]
+
+
+def test_gps_data_dicts():
+    ts = TrackSimplifier()
+    assert ts.push_gps_data({"lat": None, "lng": None, "valid": False}) is None
+    first = {"lat": 1.0, "lng": 2.0, "valid": True, "speed": 0}
+    kept = ts.push_gps_data(first)
+    assert kept == first and kept is not first
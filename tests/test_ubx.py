@@ -0,0 +1,120 @@
+import struct
+
+from fake_uart import FakeUART
+import ubx
+from ubx import UBXReader, ubx_frame, valset
+from nmea import TALKER_GA, TALKER_GL, TALKER_GP
+
+
+def nav_pvt(lat=-338688000, lon=1512093000, fix_ok=True, fix_type=3, num_sv=11):
+    payload = bytearray(92)
+    struct.pack_into(ubx._NAV_PVT, payload, 0,
+                     123456000, 2026, 10, 18, 7, 36, 1, 0x07, 50, 250000000,
+                     fix_type, 0x01 if fix_ok else 0, 0, num_sv,
+                     lon, lat, 60000, 45500, 1500, 2500,
+                     100, -200, 0, 1234, 9000000, 300, 50000, 135)
+    return ubx_frame(ubx.CLS_NAV, ubx.ID_NAV_PVT, payload)
+
+
+def nav_sat(sats):
+    payload = bytearray(8 + 12 * len(sats))
+    struct.pack_into("<IBBxx", payload, 0, 123456000, 1, len(sats))
+    for i, (gnss_id, sv_id, cno, elev, azim) in enumerate(sats):
+        struct.pack_into("<BBBbhhI", payload, 8 + 12 * i, gnss_id, sv_id, cno, elev, azim, 0, 0)
+    return ubx_frame(ubx.CLS_NAV, ubx.ID_NAV_SAT, payload)
+
+
+def test_frame_checksum():
+    # Fletcher-8 over class, id, length and payload
+    frame = ubx_frame(0x06, 0x8A, b"\x00\x01\x00\x00\x01\x00\x52\x40\x00\xC2\x01\x00")
+    a = b = 0
+    for c in frame[2:-2]:
+        a = (a + c) & 0xFF
+        b = (b + a) & 0xFF
+    assert frame[:6] == b"\xB5\x62\x06\x8A\x0C\x00"
+    assert frame[-2:] == bytes((a, b))
+
+
+def test_valset_value_sizes():
+    frame = valset(((ubx.CFG_UART1OUTPROT_NMEA, 0), (ubx.CFG_RATE_MEAS, 200),
+                    (ubx.CFG_UART1_BAUDRATE, 115200)))
+    payload = frame[6:-2]
+    assert payload[:4] == b"\x00\x01\x00\x00"
+    assert payload[4:] == struct.pack("<IB", ubx.CFG_UART1OUTPROT_NMEA, 0) + \
+        struct.pack("<IH", ubx.CFG_RATE_MEAS, 200) + \
+        struct.pack("<II", ubx.CFG_UART1_BAUDRATE, 115200)
+
+
+def test_nav_pvt_decodes_into_fix():
+    uart = FakeUART()
+    reader = UBXReader(uart)
+    uart.feed(nav_pvt())
+    assert reader.poll() == 1
+    fix = reader.fix
+    assert fix.valid
+    assert fix.fix_mode == 3
+    assert fix.sats_used == 11
+    assert fix.lat == -33868800
+    assert fix.lng == 151209300
+    assert fix.alt == 4550
+    assert fix.speed == 123
+    assert fix.course == 9000
+    assert fix.pdop == 135
+    assert (fix.year, fix.month, fix.day) == (2026, 10, 18)
+    assert (fix.hour, fix.minute, fix.second, fix.centisecond) == (7, 36, 1, 25)
+
+
+def test_no_fix_keeps_position():
+    uart = FakeUART()
+    reader = UBXReader(uart)
+    uart.feed(nav_pvt())
+    reader.poll()
+    uart.feed(nav_pvt(lat=0, lon=0, fix_ok=False, fix_type=0))
+    reader.poll()
+    assert not reader.fix.valid
+    assert reader.fix.fix_mode == 1
+    assert reader.fix.lat == -33868800
+
+
+def test_frames_split_and_mixed_with_noise():
+    uart = FakeUART(fifo=7)
+    reader = UBXReader(uart, size=256)
+    good = nav_pvt()
+    bad = bytearray(nav_pvt())
+    bad[20] ^= 0xFF
+    stream = b"$GNGGA,,,,*00\r\n\xB5" + bytes(bad) + good + b"\x00\xB5" + good
+    uart.feed(stream)
+    frames = 0
+    while uart.any():
+        frames += reader.poll()
+    assert frames == 2
+    assert reader.checksum_failed == 1
+    assert reader.pvt_count == 2
+    assert reader.rx_chars == len(stream)
+
+
+def test_nav_sat_fills_satellite_table():
+    uart = FakeUART()
+    reader = UBXReader(uart)
+    uart.feed(nav_sat(((0, 5, 40, 45, 120), (6, 70, 30, -3, -1), (2, 11, 22, 10, 300))))
+    reader.poll()
+    fix = reader.fix
+    assert fix.sat_count == 3
+    assert list(fix.sat_prn[:3]) == [5, 70, 11]
+    assert list(fix.sat_talker[:3]) == [TALKER_GP, TALKER_GL, TALKER_GA]
+    assert list(fix.sat_elev[:3]) == [45, -3, 10]
+    assert list(fix.sat_azim[:3]) == [120, 0, 300]
+    assert list(fix.sat_snr[:3]) == [40, 30, 22]
+    assert fix.sats_in_view[TALKER_GP] == 1 and fix.sats_in_view[TALKER_GL] == 1
+
+
+def test_ack_and_mga_ack():
+    uart = FakeUART()
+    reader = UBXReader(uart)
+    uart.feed(ubx_frame(ubx.CLS_ACK, ubx.ID_ACK_ACK, bytes((ubx.CLS_CFG, ubx.ID_CFG_VALSET))))
+    assert reader.wait_ack(ubx.CLS_CFG, ubx.ID_CFG_VALSET, timeout_ms=50)
+    uart.feed(ubx_frame(ubx.CLS_ACK, ubx.ID_ACK_NAK, bytes((ubx.CLS_CFG, ubx.ID_CFG_VALSET))))
+    assert not reader.wait_ack(ubx.CLS_CFG, ubx.ID_CFG_VALSET, timeout_ms=50)
+    uart.feed(ubx_frame(ubx.CLS_MGA, ubx.ID_MGA_ACK, bytes((1, 0, 0, 0x20, 0, 0, 0, 0))))
+    reader.poll()
+    assert reader.mga_ack == (True, 0, 0x20)
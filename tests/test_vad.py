@@ -0,0 +1,177 @@
+import math
+import random
+from array import array
+
+from vad import ACTIVE, IDLE, VoiceActivityDetector, VoiceGate
+
+RATE = 16000
+BLOCK = 256                 # Samples, 16 ms
+FORMANTS = ((700, 1.0), (1200, 0.6), (2500, 0.2))
+
+
+def silence(blocks, level=20, seed=1):
+    rnd = random.Random(seed)
+    return [array("h", [int(rnd.gauss(0, level)) for _ in range(BLOCK)]) for _ in range(blocks)]
+
+
+def hiss(blocks, level=100, seed=2):
+    return silence(blocks, level, seed)
+
+
+def speech(blocks, amplitude=4000, start=0):
+    """A voiced vowel: harmonics of a wavering 120 Hz pitch shaped by three formants"""
+    gains = []
+    for h in range(1, 30):
+        f = 120 * h
+        gains.append(sum(g / (1 + ((f - fc) / 150) ** 2) for fc, g in FORMANTS))
+    norm = amplitude / sum(gains)
+    out = []
+    phase = 0.0
+    for b in range(blocks):
+        samples = array("h", [0] * BLOCK)
+        for i in range(BLOCK):
+            t = (start + b * BLOCK + i) / RATE
+            phase += 2 * math.pi * (120 + 10 * math.sin(2 * math.pi * 3 * t)) / RATE
+            v = sum(g * math.sin(h * phase) for h, g in enumerate(gains, 1))
+            samples[i] = int(v * norm * (0.6 + 0.4 * math.sin(2 * math.pi * 4 * t)))
+        out.append(samples)
+    return out
+
+
+def as_bytes(blocks):
+    return [bytes(b) for b in blocks]
+
+
+def test_detector_separates_speech_from_silence():
+    vad = VoiceActivityDetector()
+    assert not any(vad.is_speech(b) for b in silence(40))
+    hits = sum(vad.is_speech(b) for b in speech(40))
+    assert hits >= 38
+    assert not any(vad.is_speech(b) for b in silence(20, seed=3)[5:])
+
+
+def test_detector_rejects_hiss():
+    vad = VoiceActivityDetector()
+    for b in silence(20):
+        vad.is_speech(b)
+    assert not any(vad.is_speech(b) for b in hiss(100))
+    assert vad.crossings * 100 > BLOCK * vad.max_crossing_rate
+
+
+def test_detector_removes_dc():
+    vad = VoiceActivityDetector()
+    offset = [array("h", [s + 3000 for s in b]) for b in silence(40)]
+    assert not any(vad.is_speech(b) for b in offset)
+    assert vad.level < 40
+
+
+class Recorder:
+    def __init__(self):
+        self.clips = []
+        self.open = False
+
+    def start(self):
+        assert not self.open
+        self.open = True
+        self.clips.append([])
+
+    def block(self, b):
+        assert self.open
+        self.clips[-1].append(bytes(b))
+
+    def stop(self):
+        assert self.open
+        self.open = False
+
+
+def make_gate(rec, **kwargs):
+    return VoiceGate(BLOCK * 2, rate=RATE, on_start=rec.start, on_block=rec.block,
+                     on_stop=rec.stop, **kwargs)
+
+
+def test_gate_records_utterance_with_preroll_and_hang():
+    rec = Recorder()
+    gate = make_gate(rec, preroll_blocks=16, hang_ms=600)
+    quiet = as_bytes(silence(40))
+    talk = as_bytes(speech(30))
+    after = as_bytes(silence(80, seed=4))
+    for b in quiet + talk + after:
+        gate.feed(b)
+
+    assert len(rec.clips) == 1 and not rec.open
+    assert gate.state == IDLE
+    clip = rec.clips[0]
+    # The pre-roll ends with the first speech block, the second one starts the gate
+    assert clip[:15] == quiet[-15:]
+    assert clip[15:45] == talk
+    assert clip[45:] == after[:len(clip) - 45]
+    assert len(clip) - 45 == hang_blocks(600)
+    assert gate.onsets == 1
+    assert gate.active_blocks == len(clip)
+    assert gate.duty_cycle() == len(clip) * 100 // 150
+
+
+def hang_blocks(ms):
+    # The hang counts down one quiet block at a time
+    return ms // (BLOCK * 1000 // RATE)
+
+
+def test_gate_ignores_short_clicks():
+    rec = Recorder()
+    gate = make_gate(rec, attack=2)
+    for b in as_bytes(silence(30)):
+        gate.feed(b)
+    click = as_bytes(speech(1))
+    for b in click + as_bytes(silence(30, seed=5)):
+        gate.feed(b)
+    assert rec.clips == []
+    assert gate.onsets == 0
+
+
+def test_gate_two_utterances_give_two_clips():
+    rec = Recorder()
+    gate = make_gate(rec)
+    blocks = silence(30) + speech(20) + silence(60, seed=6) + speech(20, start=9999) + silence(60, seed=7)
+    for b in as_bytes(blocks):
+        gate.feed(b)
+    assert len(rec.clips) == 2
+    assert gate.onsets == 2
+
+
+def test_sleep_needs_quiet_then_listening_and_counts_missed_onsets():
+    rec = Recorder()
+    gate = make_gate(rec, sleep_after=30, listen_blocks=3)
+    quiet = as_bytes(silence(60))
+    for b in quiet[:29]:
+        gate.feed(b)
+    assert not gate.may_sleep()
+    gate.feed(quiet[29])
+    assert gate.may_sleep()
+
+    gate.slept(50)
+    assert not gate.may_sleep()         # Must listen before sleeping again
+    for b in quiet[30:33]:
+        gate.feed(b)
+    assert gate.may_sleep()
+    assert gate.sleep_ms == 50
+
+    # Speech that begins in the first block after a sleep may have lost its start
+    gate.slept(50)
+    for b in as_bytes(speech(10)):
+        gate.feed(b)
+    assert gate.state == ACTIVE
+    assert not gate.may_sleep()
+    assert gate.onsets == 1
+    assert gate.missed_onsets == 1
+    assert gate.sleep_ms == 100
+
+
+def test_onset_while_awake_is_not_missed():
+    gate = make_gate(Recorder())
+    for b in as_bytes(silence(40)):
+        gate.feed(b)
+    gate.slept(50)
+    for b in as_bytes(silence(5, seed=8) + speech(10)):
+        gate.feed(b)
+    assert gate.onsets == 1
+    assert gate.missed_onsets == 0
@@ -0,0 +1,154 @@
+import struct
+import time
+
+import pytest
+
+from fake_i2s import FakeI2S
+from wav import HEADER_SIZE, SECTOR_SIZE, WavPlayer, WavReader, WavWriter, wav_header
+
+
+def pcm(n, seed=0):
+    return bytes((seed + 7 * i) % 251 + 1 for i in range(n))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ticks_us() that moves 1 ms per call, so every timed file access takes 1 ms"""
+    now = [0]
+
+    def ticks_us():
+        now[0] += 1000
+        return now[0]
+
+    monkeypatch.setattr(time, "ticks_us", ticks_us)
+    return now
+
+
+class Recording:
+    """File wrapper that remembers the size of every write"""
+
+    def __init__(self, f):
+        self._f = f
+        self.sizes = []
+
+    def write(self, data):
+        self.sizes.append(len(data))
+        return self._f.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def test_header_round_trip(tmp_path):
+    path = str(tmp_path / "a.wav")
+    data = pcm(10001)
+    w = WavWriter(path, rate=22050, bits=16, channels=2)
+    for pos in range(0, len(data), 999):
+        w.write(data[pos:pos + 999])
+    w.close()
+
+    raw = open(path, "rb").read()
+    assert len(raw) == HEADER_SIZE + len(data)
+    assert raw[:HEADER_SIZE] == wav_header(22050, 16, 2, len(data))
+
+    r = WavReader(path)
+    assert (r.rate, r.bits, r.channels, r.data_bytes) == (22050, 16, 2, len(data))
+    buf = bytearray(4096)
+    out = bytearray()
+    while True:
+        n = r.readinto(buf)
+        if not n:
+            break
+        out += buf[:n]
+    r.close()
+    assert out == data
+
+
+def test_writer_only_writes_whole_sectors(tmp_path, clock):
+    w = WavWriter(str(tmp_path / "b.wav"), sectors=8)
+    w._file = Recording(w._file)
+    for _ in range(40):
+        w.write(pcm(512))
+    sizes = w._file.sizes
+    assert sizes and all(n == SECTOR_SIZE * 8 for n in sizes)
+    assert w.writes == len(sizes)
+    # Every write took 1 ms on the fake clock
+    assert w.throughput() == w.data_bytes * 1000 // w.writes
+    assert w.duration_ms() == 40 * 512 * 1000 // 32000
+    w.close()
+
+
+def test_reader_skips_unknown_chunks(tmp_path):
+    path = tmp_path / "c.wav"
+    data = pcm(300)
+    fmt = struct.pack("<HHIIHH", 1, 1, 8000, 16000, 2, 16)
+    body = (b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+            + b"LIST" + struct.pack("<I", 5) + b"abcde\0"       # Odd size, padded
+            + b"data" + struct.pack("<I", len(data)) + data)
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+    r = WavReader(str(path))
+    assert (r.rate, r.channels, r.data_bytes) == (8000, 1, 300)
+    buf = bytearray(512)
+    assert r.readinto(buf) == 300
+    assert buf[:300] == data
+    assert r.readinto(buf) == 0
+    r.close()
+
+
+def test_reader_rejects_non_pcm(tmp_path):
+    path = tmp_path / "d.wav"
+    path.write_bytes(b"not a wav file at all")
+    with pytest.raises(ValueError):
+        WavReader(str(path))
+    head = bytearray(wav_header(8000, 16, 1, 0))
+    head[20:22] = struct.pack("<H", 3)      # IEEE float
+    path.write_bytes(bytes(head))
+    with pytest.raises(ValueError):
+        WavReader(str(path))
+
+
+def make_file(tmp_path, n):
+    path = str(tmp_path / "p.wav")
+    data = pcm(n, seed=3)
+    w = WavWriter(path)
+    w.write(data)
+    w.close()
+    return path, data
+
+
+def played(i2s):
+    """Written blocks without the silence sent on underruns"""
+    return b"".join(b for b in i2s.written if any(b))
+
+
+def test_player_plays_every_byte(tmp_path, clock):
+    path, data = make_file(tmp_path, 10 * 1024 + 100)
+    i2s = FakeI2S()
+    player = WavPlayer(i2s, WavReader(path), block_bytes=1024, buffers=4)
+    player.start()
+    while not player.finished:
+        assert i2s.complete()
+        player.service()
+    assert player.underruns == 0
+    assert played(i2s) == data
+    assert not i2s.busy
+    assert player.throughput() == player.bytes_read * 1000 // 11
+    player.stop()
+
+
+def test_player_underrun_sends_silence_and_resumes(tmp_path):
+    path, data = make_file(tmp_path, 8 * 1024)
+    i2s = FakeI2S()
+    player = WavPlayer(i2s, WavReader(path), block_bytes=1024, buffers=4)
+    player.start()
+    # The card stalls: the ring drains, then silence keeps the I2S clock running
+    for _ in range(5):
+        i2s.complete()
+    assert player.underruns == 2
+    assert [len(b) for b in i2s.written] == [1024] * 4 + [256]
+    assert not any(i2s.written[-1])
+    while not player.finished:
+        player.service()
+        i2s.complete()
+    assert played(i2s) == data
+    player.stop()
@@ -0,0 +1,38 @@
+"""Synthetic slippy-map tile set for the tile_map tests and benchmark
+
+Every pixel of tile (z, x, y) holds its own position in the tile,
+(py << 8) | px, XORed with a per-tile value, so any pixel copied to the
+wrong place, or from the wrong tile, shows up in a comparison.
+"""
+import os
+import sys
+from array import array
+
+
+def tile_key(z, x, y):
+    return (x * 40503 + y * 2971 + z * 211) & 0xFFFF
+
+
+def pixel(z, x, y, px, py):
+    return ((py << 8) | px) ^ tile_key(z, x, y)
+
+
+def tile_bytes(z, x, y):
+    key = tile_key(z, x, y)
+    pixels = array("H", [v ^ key for v in range(65536)])
+    if sys.byteorder != "little":
+        pixels.byteswap()
+    return pixels.tobytes()
+
+
+def make_tile_set(root, z, xs, ys, skip=()):
+    """Write the tiles of columns xs and rows ys at zoom z, except those in skip"""
+    for x in xs:
+        folder = os.path.join(root, str(z), str(x))
+        os.makedirs(folder, exist_ok=True)
+        for y in ys:
+            if (x, y) in skip:
+                continue
+            with open(os.path.join(folder, "%d.bin" % y), "wb") as f:
+                f.write(tile_bytes(z, x, y))
+    return root
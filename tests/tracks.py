@@ -0,0 +1,69 @@
+"""Synthetic GPS tracks and the deviation check for lib/track_simplify.py
+
+walk() is a drive of straight legs, curves and stops with GPS noise.
+deviation() measures how far every input point lies from the simplified
+track, in the same local-plane metres the simplifier uses.
+"""
+import math
+import random
+
+from track_simplify import EARTH_RADIUS_M
+
+M_PER_DEG = math.pi / 180 * EARTH_RADIUS_M
+
+
+def walk(n, seed=1, lat=-33.8688, lng=151.2093, noise_m=1.5):
+    rnd = random.Random(seed)
+    heading = rnd.uniform(0, 2 * math.pi)
+    speed = 8.0     # m per fix
+    turn = 0.0
+    points = []
+    x = y = 0.0
+    for i in range(n):
+        if i % 40 == 0:
+            turn = rnd.choice((0.0, 0.0, rnd.uniform(-0.08, 0.08)))
+            speed = rnd.choice((0.0, 3.0, 8.0, 15.0))
+        heading += turn
+        x += speed * math.cos(heading)
+        y += speed * math.sin(heading)
+        px = x + rnd.gauss(0, noise_m)
+        py = y + rnd.gauss(0, noise_m)
+        points.append((lat + py / M_PER_DEG, lng + px / M_PER_DEG / math.cos(math.radians(lat))))
+    return points
+
+
+def simplify(simplifier, points):
+    """Indexes of the points the simplifier keeps"""
+    kept = []
+    for i, (lat, lng) in enumerate(points):
+        item = simplifier.push(lat, lng, i)
+        if item is not None:
+            kept.append(item)
+    item = simplifier.flush()
+    if item is not None:
+        kept.append(item)
+    return kept
+
+
+def _distance(p, a, b):
+    cos_lat = math.cos(math.radians(a[0]))
+
+    def xy(q):
+        return (q[1] - a[1]) * M_PER_DEG * cos_lat, (q[0] - a[0]) * M_PER_DEG
+
+    px, py = xy(p)
+    ex, ey = xy(b)
+    length2 = ex * ex + ey * ey
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, (px * ex + py * ey) / length2))
+    return math.hypot(px - t * ex, py - t * ey)
+
+
+def deviation(points, kept):
+    """Largest distance of any input point from the kept segment spanning it"""
+    worst = 0.0
+    for a, b in zip(kept, kept[1:]):
+        for i in range(a + 1, b):
+            d = _distance(points[i], points[a], points[b])
+            if d > worst:
+                worst = d
+    return worst